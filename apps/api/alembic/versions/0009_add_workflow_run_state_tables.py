@@ -0,0 +1,75 @@
+"""add workflow run state tables
+
+Revision ID: 0009_add_workflow_run_state_tables
+Revises: 0008_add_exports_glossary_tables
+Create Date: 2026-01-12
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0009_add_workflow_run_state_tables"
+down_revision = "0008_add_exports_glossary_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_run_state_blobs",
+        sa.Column("id", sa.dialects.postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "workflow_run_id",
+            sa.dialects.postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("workflow_runs.id"),
+            nullable=False,
+        ),
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("content", sa.JSON(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index(
+        "ix_workflow_run_state_blobs_run_digest",
+        "workflow_run_state_blobs",
+        ["workflow_run_id", "digest"],
+        unique=True,
+    )
+
+    op.create_table(
+        "workflow_run_state_items",
+        sa.Column("id", sa.dialects.postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column(
+            "workflow_run_id",
+            sa.dialects.postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("workflow_runs.id"),
+            nullable=False,
+        ),
+        sa.Column("collection", sa.String(length=64), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("value", sa.JSON(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index(
+        "ix_workflow_run_state_items_run_collection",
+        "workflow_run_state_items",
+        ["workflow_run_id", "collection", "position"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_workflow_run_state_items_run_collection", table_name="workflow_run_state_items")
+    op.drop_table("workflow_run_state_items")
+    op.drop_index("ix_workflow_run_state_blobs_run_digest", table_name="workflow_run_state_blobs")
+    op.drop_table("workflow_run_state_blobs")
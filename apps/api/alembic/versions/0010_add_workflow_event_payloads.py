@@ -0,0 +1,36 @@
+"""add workflow event payloads
+
+Revision ID: 0010_add_workflow_event_payloads
+Revises: 0009_add_workflow_run_state_tables
+Create Date: 2026-01-12
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0010_add_workflow_event_payloads"
+down_revision = "0009_add_workflow_run_state_tables"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "workflow_event_payloads",
+        sa.Column("id", sa.dialects.postgresql.UUID(as_uuid=True), primary_key=True, nullable=False),
+        sa.Column("workflow_run_id", sa.dialects.postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        ),
+    )
+    op.create_index("ix_workflow_event_payloads_created_at", "workflow_event_payloads", ["created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_workflow_event_payloads_created_at", table_name="workflow_event_payloads")
+    op.drop_table("workflow_event_payloads")
@@ -0,0 +1,28 @@
+"""add artifact impact relevance
+
+Revision ID: 0011_add_artifact_impact_relevance
+Revises: 0010_add_workflow_event_payloads
+Create Date: 2026-01-19
+
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+revision = "0011_add_artifact_impact_relevance"
+down_revision = "0010_add_workflow_event_payloads"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("artifact_impacts", sa.Column("relevance", sa.Float(), nullable=True))
+    op.add_column("artifact_impacts", sa.Column("evidence", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("artifact_impacts", "evidence")
+    op.drop_column("artifact_impacts", "relevance")
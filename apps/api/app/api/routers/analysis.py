@@ -115,7 +115,7 @@ async def rebuild_knowledge_graph(
 ) -> KnowledgeGraphRebuildResponse:
     snapshot = await _get_snapshot(session, snapshot_id)
 
-    llm = await resolve_llm_client(session=session, app=request.app)
+    llm = await resolve_llm_client(session=session, app=request.app, phase="kg_extraction")
     if llm is None:
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
@@ -281,7 +281,7 @@ async def run_story_linter(
                 )
 
     if use_llm:
-        llm = await resolve_llm_client(session=session, app=request.app)
+        llm = await resolve_llm_client(session=session, app=request.app, phase="story_lint")
         if llm is not None:
             artifact_summaries: list[dict[str, Any]] = []
             for artifact, version in sources:
@@ -376,7 +376,7 @@ async def repair_lint_issues(
 ) -> LintRepairResponse:
     snapshot = await _get_snapshot(session, snapshot_id)
 
-    llm = await resolve_llm_client(session=session, app=request.app)
+    llm = await resolve_llm_client(session=session, app=request.app, phase="lint_repair")
     if llm is None:
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
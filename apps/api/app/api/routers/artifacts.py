@@ -156,7 +156,7 @@ async def rewrite_artifact_version(
     if not artifact:
         raise HTTPException(status_code=404, detail="artifact_not_found")
 
-    llm = await resolve_llm_client(session=session, app=request.app)
+    llm = await resolve_llm_client(session=session, app=request.app, phase="targeted_rewrite")
     if llm is None:
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
@@ -396,7 +396,7 @@ async def add_brief_message(
     )
     await session.commit()
 
-    llm = await resolve_llm_client(session=session, app=request.app)
+    llm = await resolve_llm_client(session=session, app=request.app, phase="brief_builder")
     if llm is None:
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
@@ -473,7 +473,7 @@ async def add_brief_message_stream(
     )
     await session.commit()
 
-    llm = await resolve_llm_client(session=session, app=request.app)
+    llm = await resolve_llm_client(session=session, app=request.app, phase="brief_builder")
     if llm is None:
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
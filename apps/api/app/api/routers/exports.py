@@ -1,12 +1,17 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import BriefSnapshot, SnapshotGlossaryEntry
+from app.db.models import ArtifactKind, BriefSnapshot, SnapshotGlossaryEntry
 from app.db.session import get_db_session
 from app.schemas.exports import (
     ExportResponse,
@@ -14,12 +19,21 @@ from app.schemas.exports import (
     GlossaryEntryRead,
     GlossaryEntryUpdate,
 )
+from app.services.export_cache import (
+    ExportCache,
+    ExportCacheWriter,
+    default_export_cache_dir,
+    etag_matches,
+    export_cache_key,
+)
 from app.services.export_compiler import (
-    compile_novel_markdown,
-    compile_novel_text,
-    compile_script_fountain,
-    compile_script_text,
+    iter_novel_markdown,
+    iter_novel_text,
+    iter_script_fountain,
+    iter_script_text,
+    latest_versions,
 )
+from app.services.glossary import glossary_revision, invalidate_glossary
 
 router = APIRouter(prefix="/api/brief-snapshots", tags=["exports"])
 
@@ -62,6 +76,7 @@ async def create_glossary_entry(
     )
     session.add(entry)
     await session.commit()
+    invalidate_glossary(snapshot_id)
     await session.refresh(entry)
     return GlossaryEntryRead.model_validate(entry)
 
@@ -86,63 +101,230 @@ async def update_glossary_entry(
         entry.replacement = payload.replacement
     if payload.meta is not None:
         entry.meta = payload.meta
+    # Set here rather than by the database: the glossary revision compares updated_at, and some
+    # backends' now() only has second resolution.
+    entry.updated_at = datetime.now(UTC)
 
     await session.commit()
+    invalidate_glossary(snapshot_id)
     await session.refresh(entry)
     return GlossaryEntryRead.model_validate(entry)
 
 
+@dataclass(frozen=True, slots=True)
+class _ExportFormat:
+    chunks: Callable[..., AsyncIterator[str]]
+    content_type: str
+    kind: ArtifactKind
+
+
+_EXPORTS: dict[str, _ExportFormat] = {
+    "novel.md": _ExportFormat(iter_novel_markdown, "text/markdown; charset=utf-8", ArtifactKind.novel_chapter),
+    "novel.txt": _ExportFormat(iter_novel_text, "text/plain; charset=utf-8", ArtifactKind.novel_chapter),
+    "script.fountain": _ExportFormat(iter_script_fountain, "text/plain; charset=utf-8", ArtifactKind.script_scene),
+    "script.txt": _ExportFormat(iter_script_text, "text/plain; charset=utf-8", ArtifactKind.script_scene),
+}
+_DISABLED_EXPORT_CACHE = ExportCache(directory=default_export_cache_dir(), max_bytes=0)
+
+
+def _export_cache(request: Request) -> ExportCache:
+    return getattr(request.app.state, "export_cache", None) or _DISABLED_EXPORT_CACHE
+
+
+async def _export_key(
+    session: AsyncSession,
+    *,
+    snapshot_id: uuid.UUID,
+    filename: str,
+    apply_glossary: bool,
+) -> tuple[str, list[uuid.UUID]]:
+    # Two small queries instead of compiling the book: an unchanged export is served from the
+    # cache (or answered with 304) whatever its length.
+    versions = await latest_versions(
+        session=session, brief_snapshot_id=snapshot_id, kind=_EXPORTS[filename].kind
+    )
+    revision = (
+        await glossary_revision(session=session, brief_snapshot_id=snapshot_id) if apply_glossary else (0, "")
+    )
+    key = export_cache_key(
+        filename=filename, apply_glossary=apply_glossary, versions=versions, glossary_revision=revision
+    )
+    return key, [version_id for version_id, _title in versions]
+
+
+async def _export_json(
+    *,
+    request: Request,
+    response: Response,
+    session: AsyncSession,
+    snapshot_id: uuid.UUID,
+    filename: str,
+    apply_glossary: bool,
+) -> ExportResponse | Response:
+    await _get_snapshot(session, snapshot_id)
+    key, version_ids = await _export_key(
+        session, snapshot_id=snapshot_id, filename=filename, apply_glossary=apply_glossary
+    )
+    headers = {"ETag": f'"{key}"', "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    export = _EXPORTS[filename]
+    cache = _export_cache(request)
+    text = cache.read_text(key)
+    if text is None:
+        chunks = export.chunks(
+            session=session, brief_snapshot_id=snapshot_id, apply_glossary=apply_glossary, version_ids=version_ids
+        )
+        text = "".join([chunk async for chunk in chunks])
+        cache.store_text(key, text)
+    response.headers.update(headers)
+    return ExportResponse(filename=filename, content_type=export.content_type, text=text)
+
+
 @router.get("/{snapshot_id}/export/novel.md", response_model=ExportResponse)
 async def export_novel_markdown(
     snapshot_id: uuid.UUID,
+    request: Request,
+    response: Response,
     apply_glossary: bool = True,
     session: AsyncSession = Depends(get_db_session),
-) -> ExportResponse:
-    await _get_snapshot(session, snapshot_id)
-    text = await compile_novel_markdown(
-        session=session, brief_snapshot_id=snapshot_id, apply_glossary=apply_glossary
+) -> ExportResponse | Response:
+    return await _export_json(
+        request=request,
+        response=response,
+        session=session,
+        snapshot_id=snapshot_id,
+        filename="novel.md",
+        apply_glossary=apply_glossary,
     )
-    return ExportResponse(filename="novel.md", content_type="text/markdown; charset=utf-8", text=text)
 
 
 @router.get("/{snapshot_id}/export/novel.txt", response_model=ExportResponse)
 async def export_novel_text(
     snapshot_id: uuid.UUID,
+    request: Request,
+    response: Response,
     apply_glossary: bool = True,
     session: AsyncSession = Depends(get_db_session),
-) -> ExportResponse:
-    await _get_snapshot(session, snapshot_id)
-    text = await compile_novel_text(
-        session=session, brief_snapshot_id=snapshot_id, apply_glossary=apply_glossary
+) -> ExportResponse | Response:
+    return await _export_json(
+        request=request,
+        response=response,
+        session=session,
+        snapshot_id=snapshot_id,
+        filename="novel.txt",
+        apply_glossary=apply_glossary,
     )
-    return ExportResponse(filename="novel.txt", content_type="text/plain; charset=utf-8", text=text)
 
 
 @router.get("/{snapshot_id}/export/script.fountain", response_model=ExportResponse)
 async def export_script_fountain(
     snapshot_id: uuid.UUID,
+    request: Request,
+    response: Response,
     apply_glossary: bool = True,
     session: AsyncSession = Depends(get_db_session),
-) -> ExportResponse:
-    await _get_snapshot(session, snapshot_id)
-    text = await compile_script_fountain(
-        session=session, brief_snapshot_id=snapshot_id, apply_glossary=apply_glossary
-    )
-    return ExportResponse(
+) -> ExportResponse | Response:
+    return await _export_json(
+        request=request,
+        response=response,
+        session=session,
+        snapshot_id=snapshot_id,
         filename="script.fountain",
-        content_type="text/plain; charset=utf-8",
-        text=text,
+        apply_glossary=apply_glossary,
     )
 
 
 @router.get("/{snapshot_id}/export/script.txt", response_model=ExportResponse)
 async def export_script_text(
     snapshot_id: uuid.UUID,
+    request: Request,
+    response: Response,
     apply_glossary: bool = True,
     session: AsyncSession = Depends(get_db_session),
-) -> ExportResponse:
+) -> ExportResponse | Response:
+    return await _export_json(
+        request=request,
+        response=response,
+        session=session,
+        snapshot_id=snapshot_id,
+        filename="script.txt",
+        apply_glossary=apply_glossary,
+    )
+
+
+async def _stream_download(
+    sessionmaker: Any,
+    *,
+    chunks: Callable[..., AsyncIterator[str]],
+    snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+    version_ids: list[uuid.UUID],
+    writer: ExportCacheWriter | None,
+) -> AsyncIterator[bytes]:
+    # Runs after the request's own session is gone, so the cursor gets a session of its own. The
+    # export is cached only once it was sent completely.
+    try:
+        async with sessionmaker() as session:
+            async for chunk in chunks(
+                session=session, brief_snapshot_id=snapshot_id, apply_glossary=apply_glossary, version_ids=version_ids
+            ):
+                data = chunk.encode("utf-8")
+                if writer is not None:
+                    writer.write(data)
+                yield data
+        if writer is not None:
+            writer.commit()
+            writer = None
+    finally:
+        if writer is not None:
+            writer.discard()
+
+
+# File downloads: the same documents as the export endpoints above, streamed chapter by chapter
+# (or from the export cache) instead of compiled in memory and wrapped in JSON.
+@router.get("/{snapshot_id}/download/{filename}")
+async def download_export(
+    snapshot_id: uuid.UUID,
+    filename: str,
+    request: Request,
+    apply_glossary: bool = True,
+    session: AsyncSession = Depends(get_db_session),
+) -> Response:
+    export = _EXPORTS.get(filename)
+    if export is None:
+        raise HTTPException(status_code=404, detail="export_format_not_found")
     await _get_snapshot(session, snapshot_id)
-    text = await compile_script_text(
-        session=session, brief_snapshot_id=snapshot_id, apply_glossary=apply_glossary
+    sessionmaker = getattr(request.app.state, "sessionmaker", None)
+    if sessionmaker is None:
+        raise HTTPException(status_code=500, detail="db_not_initialized")
+
+    key, version_ids = await _export_key(
+        session, snapshot_id=snapshot_id, filename=filename, apply_glossary=apply_glossary
+    )
+    etag = f'"{key}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+    }
+    cache = _export_cache(request)
+    cached = cache.open_stream(key)
+    if cached is not None:
+        return StreamingResponse(cached, media_type=export.content_type, headers=headers)
+    return StreamingResponse(
+        _stream_download(
+            sessionmaker,
+            chunks=export.chunks,
+            snapshot_id=snapshot_id,
+            apply_glossary=apply_glossary,
+            version_ids=version_ids,
+            writer=cache.writer(key),
+        ),
+        media_type=export.content_type,
+        headers=headers,
     )
-    return ExportResponse(filename="script.txt", content_type="text/plain; charset=utf-8", text=text)
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Request
+
+from app.llm.endpoints import endpoint_health
+from app.schemas.metrics import LlmMetricsRead
+from app.services.llm_metrics import llm_metrics
+
+router = APIRouter(prefix="/api/metrics", tags=["metrics"])
+
+
+@router.get("/llm", response_model=LlmMetricsRead)
+async def get_llm_metrics(request: Request) -> LlmMetricsRead:
+    breakers = getattr(request.app.state, "provider_breakers", None)
+    return LlmMetricsRead.model_validate(
+        {
+            **llm_metrics.snapshot(),
+            "endpoints": endpoint_health.snapshot(),
+            "breakers": breakers.snapshot() if breakers is not None else [],
+        }
+    )
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy import delete, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import StreamingResponse
 
 from app.db.models import (
     Artifact,
@@ -18,6 +22,7 @@ from app.db.models import (
 )
 from app.db.session import get_db_session
 from app.schemas.propagation import (
+    MAX_REPAIR_CONCURRENCY,
     ArtifactImpactRead,
     ImpactReportItem,
     PropagationApplyRequest,
@@ -29,9 +34,12 @@ from app.schemas.propagation import (
     PropagationRepairResponse,
     RepairedArtifactVersion,
 )
+from app.services.impact_analysis import analyze_impacts
 from app.services.llm_provider import resolve_embeddings_client, resolve_llm_client
-from app.services.memory_store import index_artifact_version
+from app.services.memory_store import index_artifact_versions
 from app.services.propagation_extraction import extract_fact_changes, repair_impacted_content
+from app.services.settings_store import resolve_runtime_execution_preferences
+from app.services.workflow_events import format_sse_event
 
 router = APIRouter(prefix="/api/brief-snapshots", tags=["propagation"])
 
@@ -114,18 +122,31 @@ def _artifact_meta_for_llm(*, artifact: Artifact, version: ArtifactVersion) -> d
     }
 
 
+@dataclass(slots=True)
+class _Impact:
+    artifact: Artifact
+    version: ArtifactVersion
+    reason: str
+    relevance: float | None = None
+    evidence: list[dict[str, Any]] = field(default_factory=list)
+
+
 async def _compute_impacts(
     *,
     session: AsyncSession,
-    brief_snapshot_id: uuid.UUID,
+    request: Request,
+    snapshot: BriefSnapshot,
     edited_artifact: Artifact,
-) -> list[tuple[Artifact, ArtifactVersion, str]]:
+    base_version: ArtifactVersion,
+    edited_version: ArtifactVersion,
+    fact_changes: str | None,
+) -> list[_Impact]:
     sources = await _select_latest_artifact_versions_for_snapshot(
         session=session,
-        brief_snapshot_id=brief_snapshot_id,
+        brief_snapshot_id=snapshot.id,
     )
 
-    impacts: list[tuple[Artifact, ArtifactVersion, str]] = []
+    downstream: list[tuple[Artifact, ArtifactVersion]] = []
     edited_ordinal = edited_artifact.ordinal
     for artifact, version in sources:
         if artifact.id == edited_artifact.id:
@@ -140,13 +161,56 @@ async def _compute_impacts(
         )
         if not is_downstream:
             continue
+        downstream.append((artifact, version))
 
-        reason = (
-            f"上游 {edited_artifact.kind.value}（ordinal={edited_artifact.ordinal}）发生编辑改动，"
-            "下游内容可能需要同步修订。"
+    upstream = f"上游 {edited_artifact.kind.value}（ordinal={edited_artifact.ordinal}）发生编辑改动，"
+    relevance = (
+        await analyze_impacts(
+            session=session,
+            embeddings=await resolve_embeddings_client(session=session, app=request.app),
+            brief_snapshot_id=snapshot.id,
+            base_text=base_version.content_text,
+            edited_text=edited_version.content_text,
+            fact_changes=fact_changes,
+            candidates=[(version.id, version.content_text) for _artifact, version in downstream],
         )
-        impacts.append((artifact, version, reason))
+        if downstream
+        else None
+    )
+    if relevance is None:
+        # Nothing in the change to match downstream text against: keep every later artifact.
+        return [
+            _Impact(
+                artifact=artifact, version=version, reason=f"{upstream}下游内容可能需要同步修订。"
+            )
+            for artifact, version in downstream
+        ]
 
+    runtime_prefs = await resolve_runtime_execution_preferences(
+        session=session, brief_id=snapshot.brief_id
+    )
+    min_relevance = float(runtime_prefs.get("propagation_impact_min_relevance") or 0.0)
+
+    impacts: list[_Impact] = []
+    for artifact, version in downstream:
+        scored = relevance[version.id]
+        if scored.score < min_relevance:
+            continue
+        matches = "、".join(str(item["match"]) for item in scored.evidence if item.get("match"))
+        reason = (
+            f"{upstream}下游引用了改动涉及的内容（相关度 {scored.score:.2f}"
+            + (f"：{matches}" if matches else "")
+            + "），可能需要同步修订。"
+        )
+        impacts.append(
+            _Impact(
+                artifact=artifact,
+                version=version,
+                reason=reason,
+                relevance=scored.score,
+                evidence=scored.evidence,
+            )
+        )
     return impacts
 
 
@@ -185,14 +249,13 @@ async def preview_propagation(
 
     edited_artifact = await _get_artifact(session, edited_version.artifact_id)
 
-    impacts = await _compute_impacts(
-        session=session,
-        brief_snapshot_id=snapshot.id,
-        edited_artifact=edited_artifact,
+    llm = (
+        await resolve_llm_client(session=session, app=request.app, phase="propagation_extraction")
+        if use_llm
+        else None
     )
-
-    llm = await resolve_llm_client(session=session, app=request.app) if use_llm else None
     patches: dict[str, Any] = {}
+    extracted: str | None = None
     if use_llm and llm is not None:
         base_artifact = await _get_artifact(session, base_version.artifact_id)
         result = await extract_fact_changes(
@@ -203,7 +266,8 @@ async def preview_propagation(
             base_text=base_version.content_text,
             edited_text=edited_version.content_text,
         )
-        fact_changes = (result.fact_changes or "").strip() or _basic_fact_changes(
+        extracted = (result.fact_changes or "").strip() or None
+        fact_changes = extracted or _basic_fact_changes(
             base_text=base_version.content_text, edited_text=edited_version.content_text
         )
         patches = dict(result.patches or {})
@@ -212,18 +276,30 @@ async def preview_propagation(
             base_text=base_version.content_text, edited_text=edited_version.content_text
         )
 
+    impacts = await _compute_impacts(
+        session=session,
+        request=request,
+        snapshot=snapshot,
+        edited_artifact=edited_artifact,
+        base_version=base_version,
+        edited_version=edited_version,
+        fact_changes=extracted,
+    )
+
     return PropagationPreviewResponse(
         fact_changes=fact_changes,
         impacts=[
             ImpactReportItem(
-                artifact_id=artifact.id,
-                artifact_version_id=version.id,
-                kind=artifact.kind,
-                ordinal=artifact.ordinal,
-                title=artifact.title,
-                reason=reason,
+                artifact_id=impact.artifact.id,
+                artifact_version_id=impact.version.id,
+                kind=impact.artifact.kind,
+                ordinal=impact.artifact.ordinal,
+                title=impact.artifact.title,
+                reason=impact.reason,
+                relevance=impact.relevance,
+                evidence=impact.evidence,
             )
-            for artifact, version, reason in impacts
+            for impact in impacts
         ],
         patches=patches,
     )
@@ -246,14 +322,14 @@ async def apply_propagation(
         raise HTTPException(status_code=400, detail="artifact_versions_not_in_snapshot")
 
     edited_artifact = await _get_artifact(session, edited_version.artifact_id)
-    impacts = await _compute_impacts(
-        session=session,
-        brief_snapshot_id=snapshot.id,
-        edited_artifact=edited_artifact,
-    )
 
-    llm = await resolve_llm_client(session=session, app=request.app) if use_llm else None
+    llm = (
+        await resolve_llm_client(session=session, app=request.app, phase="propagation_extraction")
+        if use_llm
+        else None
+    )
     patches: dict[str, Any] = {}
+    extracted: str | None = None
     if use_llm and llm is not None:
         base_artifact = await _get_artifact(session, base_version.artifact_id)
         diff = await extract_fact_changes(
@@ -264,7 +340,8 @@ async def apply_propagation(
             base_text=base_version.content_text,
             edited_text=edited_version.content_text,
         )
-        fact_changes = (diff.fact_changes or "").strip() or _basic_fact_changes(
+        extracted = (diff.fact_changes or "").strip() or None
+        fact_changes = extracted or _basic_fact_changes(
             base_text=base_version.content_text, edited_text=edited_version.content_text
         )
         patches = dict(diff.patches or {})
@@ -273,6 +350,16 @@ async def apply_propagation(
             base_text=base_version.content_text, edited_text=edited_version.content_text
         )
 
+    impacts = await _compute_impacts(
+        session=session,
+        request=request,
+        snapshot=snapshot,
+        edited_artifact=edited_artifact,
+        base_version=base_version,
+        edited_version=edited_version,
+        fact_changes=extracted,
+    )
+
     event = PropagationEvent(
         brief_snapshot_id=snapshot.id,
         base_artifact_version_id=base_version.id,
@@ -283,7 +370,7 @@ async def apply_propagation(
     session.add(event)
     await session.flush()
 
-    artifact_ids = [artifact.id for artifact, _version, _reason in impacts]
+    artifact_ids = [impact.artifact.id for impact in impacts]
     if artifact_ids:
         await session.execute(
             delete(ArtifactImpact).where(
@@ -294,13 +381,15 @@ async def apply_propagation(
         )
 
     created_impacts: list[ArtifactImpact] = []
-    for artifact, version, reason in impacts:
+    for item in impacts:
         impact = ArtifactImpact(
             propagation_event_id=event.id,
             brief_snapshot_id=snapshot.id,
-            artifact_id=artifact.id,
-            artifact_version_id=version.id,
-            reason=reason,
+            artifact_id=item.artifact.id,
+            artifact_version_id=item.version.id,
+            reason=item.reason,
+            relevance=item.relevance,
+            evidence=item.evidence if item.relevance is not None else None,
             repaired_artifact_version_id=None,
             repaired_at=None,
         )
@@ -318,16 +407,31 @@ async def apply_propagation(
     )
 
 
-@router.post(
-    "/{snapshot_id}/propagation/events/{event_id}/repair", response_model=PropagationRepairResponse
-)
-async def repair_impacts(
+# Repaired versions written per commit while the remaining repairs are still running.
+_REPAIR_COMMIT_BATCH = 8
+
+
+@dataclass(slots=True)
+class _RepairJob:
+    snapshot: BriefSnapshot
+    event: PropagationEvent
+    upstream_edited: ArtifactVersion
+    impacts: list[ArtifactImpact]
+    artifacts: dict[uuid.UUID, Artifact]
+    versions: dict[uuid.UUID, ArtifactVersion]
+    llm: Any
+    embeddings: Any
+    concurrency: int
+
+
+async def _prepare_repair(
+    *,
+    session: AsyncSession,
+    request: Request,
     snapshot_id: uuid.UUID,
     event_id: uuid.UUID,
     payload: PropagationRepairRequest,
-    request: Request,
-    session: AsyncSession = Depends(get_db_session),
-) -> PropagationRepairResponse:
+) -> _RepairJob:
     snapshot = await _get_snapshot(session, snapshot_id)
 
     event = await session.get(PropagationEvent, event_id)
@@ -336,7 +440,7 @@ async def repair_impacts(
     if event.brief_snapshot_id != snapshot.id:
         raise HTTPException(status_code=400, detail="propagation_event_not_in_snapshot")
 
-    llm = await resolve_llm_client(session=session, app=request.app)
+    llm = await resolve_llm_client(session=session, app=request.app, phase="propagation_repair")
     if llm is None:
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
@@ -350,71 +454,220 @@ async def repair_impacts(
     if payload.artifact_ids:
         stmt = stmt.where(ArtifactImpact.artifact_id.in_(payload.artifact_ids))
     stmt = stmt.order_by(ArtifactImpact.created_at.asc())
+    impacts = list((await session.execute(stmt)).scalars().all())
+
+    artifact_ids = {impact.artifact_id for impact in impacts}
+    version_ids = {impact.artifact_version_id for impact in impacts}
+    artifact_rows = await session.execute(select(Artifact).where(Artifact.id.in_(artifact_ids)))
+    artifacts = {item.id: item for item in artifact_rows.scalars()}
+    version_rows = await session.execute(
+        select(ArtifactVersion).where(ArtifactVersion.id.in_(version_ids))
+    )
+    versions = {item.id: item for item in version_rows.scalars()}
+    if artifact_ids - artifacts.keys():
+        raise HTTPException(status_code=404, detail="artifact_not_found")
+    if version_ids - versions.keys():
+        raise HTTPException(status_code=404, detail="artifact_version_not_found")
 
-    impacts = (await session.execute(stmt)).scalars().all()
-
-    repaired: list[RepairedArtifactVersion] = []
-    updated_impacts: list[ArtifactImpact] = []
-
-    for impact in impacts:
-        artifact = await _get_artifact(session, impact.artifact_id)
-        impacted_version = await _get_artifact_version(session, impact.artifact_version_id)
-
-        repaired_text = await repair_impacted_content(
-            llm=llm,
-            brief_json=dict(snapshot.content or {}),
-            fact_changes=event.fact_changes,
-            upstream_edited_text=upstream_edited.content_text,
-            impacted_meta=_artifact_meta_for_llm(artifact=artifact, version=impacted_version),
-            impacted_text=impacted_version.content_text,
-        )
-
-        new_version = ArtifactVersion(
-            artifact_id=artifact.id,
-            source=ArtifactVersionSource.agent,
-            content_text=repaired_text,
-            meta={
-                "repaired_from_version_id": str(impacted_version.id),
-                "propagation_event_id": str(event.id),
-                "upstream_edited_version_id": str(upstream_edited.id),
-            },
-            workflow_run_id=None,
-            brief_snapshot_id=snapshot.id,
+    concurrency = payload.concurrency
+    if concurrency is None:
+        runtime_prefs = await resolve_runtime_execution_preferences(
+            session=session, brief_id=snapshot.brief_id
         )
-        session.add(new_version)
-        await session.commit()
-        await session.refresh(new_version)
+        concurrency = int(runtime_prefs.get("propagation_repair_concurrency") or 1)
+
+    return _RepairJob(
+        snapshot=snapshot,
+        event=event,
+        upstream_edited=upstream_edited,
+        impacts=impacts,
+        artifacts=artifacts,
+        versions=versions,
+        llm=llm,
+        embeddings=await resolve_embeddings_client(session=session, app=request.app),
+        # The setting is not bounded when saved, so it is clamped here like the request field.
+        concurrency=min(max(1, concurrency), MAX_REPAIR_CONCURRENCY),
+    )
 
-        impact.repaired_artifact_version_id = new_version.id
-        impact.repaired_at = datetime.datetime.now(datetime.UTC)
-        await session.commit()
-        await session.refresh(impact)
 
-        repaired.append(
-            RepairedArtifactVersion(artifact_id=artifact.id, artifact_version_id=new_version.id)
-        )
-        updated_impacts.append(impact)
+async def _run_repairs(
+    *, session: AsyncSession, job: _RepairJob
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    # Repairs run concurrently (at most job.concurrency LLM calls at a time); only this coroutine
+    # touches the session. Finished repairs are written in batches as they come in, and indexed
+    # for retrieval together at the end. Yields ("progress", ...) per repair, then ("final", ...).
+    semaphore = asyncio.Semaphore(job.concurrency)
+    brief_json = dict(job.snapshot.content or {})
+
+    async def repair(impact: ArtifactImpact) -> tuple[ArtifactImpact, str]:
+        impacted_version = job.versions[impact.artifact_version_id]
+        async with semaphore:
+            text = await repair_impacted_content(
+                llm=job.llm,
+                brief_json=brief_json,
+                fact_changes=job.event.fact_changes,
+                upstream_edited_text=job.upstream_edited.content_text,
+                impacted_meta=_artifact_meta_for_llm(
+                    artifact=job.artifacts[impact.artifact_id], version=impacted_version
+                ),
+                impacted_text=impacted_version.content_text,
+            )
+        return impact, text
 
-        embeddings = await resolve_embeddings_client(session=session, app=request.app)
-        if embeddings is not None:
-            try:
-                await index_artifact_version(
-                    session=session,
-                    embeddings=embeddings,
-                    brief_snapshot_id=snapshot.id,
-                    artifact_version_id=new_version.id,
-                    content_text=repaired_text,
-                    meta={
+    repaired: list[RepairedArtifactVersion] = []
+    updated_impacts: list[ArtifactImpact] = []
+    to_index: list[tuple[uuid.UUID, str, dict[str, Any]]] = []
+    pending: list[tuple[ArtifactImpact, str]] = []
+
+    async def write_pending() -> None:
+        if not pending:
+            return
+        for impact, text in pending:
+            artifact = job.artifacts[impact.artifact_id]
+            new_version = ArtifactVersion(
+                id=uuid.uuid4(),
+                artifact_id=artifact.id,
+                source=ArtifactVersionSource.agent,
+                content_text=text,
+                meta={
+                    "repaired_from_version_id": str(impact.artifact_version_id),
+                    "propagation_event_id": str(job.event.id),
+                    "upstream_edited_version_id": str(job.upstream_edited.id),
+                },
+                workflow_run_id=None,
+                brief_snapshot_id=job.snapshot.id,
+            )
+            session.add(new_version)
+            impact.repaired_artifact_version_id = new_version.id
+            impact.repaired_at = datetime.datetime.now(datetime.UTC)
+            repaired.append(
+                RepairedArtifactVersion(artifact_id=artifact.id, artifact_version_id=new_version.id)
+            )
+            updated_impacts.append(impact)
+            to_index.append(
+                (
+                    new_version.id,
+                    text,
+                    {
                         "kind": str(artifact.kind.value),
                         "ordinal": artifact.ordinal,
                         "source": str(ArtifactVersionSource.agent.value),
-                        "propagation_event_id": str(event.id),
+                        "propagation_event_id": str(job.event.id),
                     },
                 )
+            )
+        pending.clear()
+        await session.commit()
+
+    tasks = [asyncio.create_task(repair(impact)) for impact in job.impacts]
+    try:
+        for done, finished in enumerate(asyncio.as_completed(tasks), start=1):
+            try:
+                impact, text = await finished
             except Exception:
-                await session.rollback()
+                # Keep what was repaired so far; the failed and unfinished impacts stay open.
+                await write_pending()
+                raise
+            pending.append((impact, text))
+            if len(pending) >= _REPAIR_COMMIT_BATCH:
+                await write_pending()
+            yield "progress", {
+                "done": done,
+                "total": len(tasks),
+                "artifact_id": str(impact.artifact_id),
+            }
+        await write_pending()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # The repairs are committed either way; a failed index is reported rather than failing them.
+    index_error: str | None = None
+    if job.embeddings is not None and to_index:
+        try:
+            await index_artifact_versions(
+                session=session,
+                embeddings=job.embeddings,
+                brief_snapshot_id=job.snapshot.id,
+                versions=to_index,
+            )
+        except Exception as exc:
+            await session.rollback()
+            index_error = str(exc) or type(exc).__name__
 
-    return PropagationRepairResponse(
+    response = PropagationRepairResponse(
         repaired=repaired,
         impacts=[ArtifactImpactRead.model_validate(item) for item in updated_impacts],
+        index_error=index_error,
+    )
+    yield "final", response.model_dump(mode="json")
+
+
+@router.post(
+    "/{snapshot_id}/propagation/events/{event_id}/repair", response_model=PropagationRepairResponse
+)
+async def repair_impacts(
+    snapshot_id: uuid.UUID,
+    event_id: uuid.UUID,
+    payload: PropagationRepairRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+) -> PropagationRepairResponse:
+    job = await _prepare_repair(
+        session=session,
+        request=request,
+        snapshot_id=snapshot_id,
+        event_id=event_id,
+        payload=payload,
+    )
+    result: dict[str, Any] = {}
+    async for name, data in _run_repairs(session=session, job=job):
+        if name == "final":
+            result = data
+    return PropagationRepairResponse.model_validate(result)
+
+
+@router.post("/{snapshot_id}/propagation/events/{event_id}/repair/stream")
+async def repair_impacts_stream(
+    snapshot_id: uuid.UUID,
+    event_id: uuid.UUID,
+    payload: PropagationRepairRequest,
+    request: Request,
+) -> StreamingResponse:
+    # Same as /repair, reported as SSE: status, one progress event per repaired artifact, then
+    # final (the /repair response body) or error. The repairs outlive the request's dependencies,
+    # so they get a session of their own, closed when the stream ends.
+    sessionmaker = getattr(request.app.state, "sessionmaker", None)
+    if sessionmaker is None:
+        raise HTTPException(status_code=500, detail="db_not_initialized")
+    session: AsyncSession = sessionmaker()
+    try:
+        job = await _prepare_repair(
+            session=session,
+            request=request,
+            snapshot_id=snapshot_id,
+            event_id=event_id,
+            payload=payload,
+        )
+    except BaseException:
+        await session.close()
+        raise
+
+    async def event_stream():
+        try:
+            yield format_sse_event(
+                name="status", payload={"state": "started", "total": len(job.impacts)}
+            )
+            async for name, data in _run_repairs(session=session, job=job):
+                yield format_sse_event(name=name, payload=data)
+        except Exception as exc:
+            yield format_sse_event(name="error", payload={"detail": str(exc)})
+        finally:
+            await session.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"},
     )
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db_session
 from app.schemas.settings import (
+    LlmPhaseRoutingPatch,
+    LlmPhaseRoutingRead,
     LlmProviderSettingsPatch,
     LlmProviderSettingsRead,
     NovelToScriptPromptDefaultsPatch,
@@ -14,11 +16,14 @@ from app.schemas.settings import (
     PromptPresetsPatch,
     PromptPresetsRead,
 )
+from app.services.run_context import invalidate_run_contexts
 from app.services.settings_store import (
+    get_llm_phase_routing,
     get_llm_provider_settings,
     get_novel_to_script_prompt_defaults,
     get_output_spec_defaults,
     get_prompt_presets,
+    patch_llm_phase_routing,
     patch_llm_provider_settings,
     patch_novel_to_script_prompt_defaults,
     patch_output_spec_defaults,
@@ -39,6 +44,7 @@ async def get_output_spec_defaults_route(
 @router.patch("/output-spec", response_model=OutputSpecDefaultsRead)
 async def patch_output_spec_defaults_route(
     payload: OutputSpecDefaultsPatch,
+    request: Request,
     session: AsyncSession = Depends(get_db_session),
 ) -> OutputSpecDefaultsRead:
     patch: dict[str, object | None] = {}
@@ -54,8 +60,33 @@ async def patch_output_spec_defaults_route(
         patch["auto_step_retries"] = payload.auto_step_retries
     if "auto_step_backoff_s" in payload.model_fields_set:
         patch["auto_step_backoff_s"] = payload.auto_step_backoff_s
+    if "step_deadline_s" in payload.model_fields_set:
+        patch["step_deadline_s"] = payload.step_deadline_s
+    if "step_idle_timeout_s" in payload.model_fields_set:
+        patch["step_idle_timeout_s"] = payload.step_idle_timeout_s
+    if "phase_deadlines" in payload.model_fields_set:
+        patch["phase_deadlines"] = payload.phase_deadlines
+    if "speculative_draft_window" in payload.model_fields_set:
+        patch["speculative_draft_window"] = payload.speculative_draft_window
+    if "speculative_draft_concurrency" in payload.model_fields_set:
+        patch["speculative_draft_concurrency"] = payload.speculative_draft_concurrency
+    if "critic_policy" in payload.model_fields_set:
+        patch["critic_policy"] = (
+            payload.critic_policy.model_dump(mode="json") if payload.critic_policy is not None else None
+        )
+    if "draft_self_review" in payload.model_fields_set:
+        patch["draft_self_review"] = payload.draft_self_review
+    if "fix_mode" in payload.model_fields_set:
+        patch["fix_mode"] = payload.fix_mode
+    if "paragraph_fix_concurrency" in payload.model_fields_set:
+        patch["paragraph_fix_concurrency"] = payload.paragraph_fix_concurrency
+    if "propagation_repair_concurrency" in payload.model_fields_set:
+        patch["propagation_repair_concurrency"] = payload.propagation_repair_concurrency
+    if "propagation_impact_min_relevance" in payload.model_fields_set:
+        patch["propagation_impact_min_relevance"] = payload.propagation_impact_min_relevance
 
     resolved = await patch_output_spec_defaults(session=session, patch=patch)
+    invalidate_run_contexts(request.app)
     return OutputSpecDefaultsRead.model_validate(resolved)
 
 
@@ -106,15 +137,70 @@ async def patch_llm_provider_settings_route(
         patch["timeout_s"] = payload.timeout_s
     if "max_retries" in payload.model_fields_set:
         patch["max_retries"] = payload.max_retries
+    if "structured_output" in payload.model_fields_set:
+        patch["structured_output"] = payload.structured_output
+    if "failover_endpoints" in payload.model_fields_set:
+        patch["failover_endpoints"] = (
+            None
+            if payload.failover_endpoints is None
+            else [endpoint.model_dump(exclude_none=True) for endpoint in payload.failover_endpoints]
+        )
+    if "hedge_percentile" in payload.model_fields_set:
+        patch["hedge_percentile"] = payload.hedge_percentile
+    if "hedge_initial_delay_s" in payload.model_fields_set:
+        patch["hedge_initial_delay_s"] = payload.hedge_initial_delay_s
     if "api_key" in payload.model_fields_set:
         patch["api_key"] = payload.api_key
 
-    await patch_llm_provider_settings(session=session, patch=patch)
     env_settings = getattr(request.app.state, "settings", None)
+    try:
+        await patch_llm_provider_settings(session=session, patch=patch, env_settings=env_settings)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    invalidate_run_contexts(request.app)
     resolved = await get_llm_provider_settings(session=session, env_settings=env_settings)
     return LlmProviderSettingsRead.model_validate(resolved)
 
 
+@router.get("/llm-routing", response_model=LlmPhaseRoutingRead)
+async def get_llm_phase_routing_route(
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+) -> LlmPhaseRoutingRead:
+    env_settings = getattr(request.app.state, "settings", None)
+    resolved = await get_llm_phase_routing(session=session, env_settings=env_settings)
+    return LlmPhaseRoutingRead.model_validate(resolved)
+
+
+@router.patch("/llm-routing", response_model=LlmPhaseRoutingRead)
+async def patch_llm_phase_routing_route(
+    request: Request,
+    payload: LlmPhaseRoutingPatch,
+    session: AsyncSession = Depends(get_db_session),
+) -> LlmPhaseRoutingRead:
+    patch: dict[str, object | None] = {}
+    if "fast_model" in payload.model_fields_set:
+        patch["fast_model"] = payload.fast_model
+    if payload.routes is not None:
+        patch["routes"] = {
+            phase: (
+                None
+                if route is None
+                else {key: getattr(route, key) for key in route.model_fields_set}
+            )
+            for phase, route in payload.routes.items()
+        }
+
+    env_settings = getattr(request.app.state, "settings", None)
+    try:
+        await patch_llm_phase_routing(session=session, patch=patch, env_settings=env_settings)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    invalidate_run_contexts(request.app)
+    resolved = await get_llm_phase_routing(session=session, env_settings=env_settings)
+    return LlmPhaseRoutingRead.model_validate(resolved)
+
+
 @router.get("/prompt-presets", response_model=PromptPresetsRead)
 async def get_prompt_presets_route(
     session: AsyncSession = Depends(get_db_session),
@@ -126,8 +212,10 @@ async def get_prompt_presets_route(
 @router.patch("/prompt-presets", response_model=PromptPresetsRead)
 async def patch_prompt_presets_route(
     payload: PromptPresetsPatch,
+    request: Request,
     session: AsyncSession = Depends(get_db_session),
 ) -> PromptPresetsRead:
     patch = payload.model_dump(exclude_unset=True)
     resolved = await patch_prompt_presets(session=session, patch=patch)
+    invalidate_run_contexts(request.app)
     return PromptPresetsRead.model_validate(resolved)
@@ -4,17 +4,19 @@ import asyncio
 import copy
 import json
 import re
+import time
 import uuid
 from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import StreamingResponse
 
 from app.db.models import BriefSnapshot, RunStatus, WorkflowKind, WorkflowRun, WorkflowStepRun
 from app.db.session import get_db_session
+from app.db.unit_of_work import UnitOfWork
 from app.schemas.workflow_execution import WorkflowControlResponse, WorkflowNextResponse
 from app.schemas.workflow_interventions import (
     WorkflowInterventionRequest,
@@ -31,10 +33,43 @@ from app.schemas.workflows import (
 )
 from app.services import cascade_delete
 from app.services.error_utils import format_exception_chain
+from app.services.event_multiplex import MultiplexFilter, coalesce_events
 from app.services.json_utils import deep_merge
+from app.services.llm_metrics import llm_metrics
 from app.services.llm_provider import resolve_llm_and_embeddings, resolve_llm_client
-from app.services.settings_store import resolve_runtime_execution_preferences
-from app.services.workflow_events import WorkflowEventHub, format_sse_event
+from app.services.provider_breaker import (
+    BREAKER_CLOSED,
+    ProviderCircuitBreaker,
+    guard_llm,
+    provider_breaker_key,
+)
+from app.services.run_context import (
+    RunContext,
+    RunContextGenerations,
+    invalidate_run_contexts,
+    load_run_context,
+    run_context_is_stale,
+)
+from app.services.run_state_store import expand_run_state, store_run_state
+from app.services.settings_store import (
+    resolve_phase_deadlines,
+    resolve_runtime_execution_preferences,
+)
+from app.services.speculative_drafts import SpeculativeDrafts
+from app.services.step_cancellation import (
+    CANCEL_REASON_PAUSED,
+    CANCEL_REASON_STOPPED,
+    StepCanceled,
+    StepTimedOut,
+    cancel_running_step,
+    track_step_cancellation,
+)
+from app.services.step_prefetch import StepPrefetch
+from app.services.workflow_events import (
+    WorkflowEventHub,
+    format_multiplexed_sse_event,
+    format_sse_event,
+)
 from app.services.workflow_executor import execute_next_step
 from app.services.workflow_intervention import build_workflow_intervention
 from app.services.workflow_step_runner import determine_step_name, execute_one_step
@@ -91,17 +126,16 @@ def _coerce_float(value: object, *, default: float, min_value: float = 0.0) -> f
     return max(min_value, parsed)
 
 
-async def _resolve_autorun_retry_policy(
+async def _resolve_step_deadlines(
     *,
     session: AsyncSession,
     snapshot: BriefSnapshot | None,
-) -> tuple[int, float]:
+    step_name: str,
+) -> tuple[float, float]:
     if snapshot is None:
-        return 3, 1.0
+        return 0.0, 0.0
     runtime = await resolve_runtime_execution_preferences(session=session, brief_id=snapshot.brief_id)
-    retries = _coerce_int(runtime.get("auto_step_retries"), default=3, min_value=0)
-    backoff_s = _coerce_float(runtime.get("auto_step_backoff_s"), default=1.0, min_value=0.0)
-    return retries, backoff_s
+    return resolve_phase_deadlines(runtime_prefs=runtime, phase=step_name)
 
 
 def _is_retryable_step_failure(*, run_error: dict[str, Any] | None, step_error: str | None) -> bool:
@@ -113,7 +147,7 @@ def _is_retryable_step_failure(*, run_error: dict[str, Any] | None, step_error:
         return False
 
     error_type = str(run_error.get("error_type") or "")
-    if error_type in {"APIConnectionError", "APITimeoutError"}:
+    if error_type in {"APIConnectionError", "APITimeoutError", "StepTimedOut"}:
         return True
     if error_type == "APIError":
         # The OpenAI Python SDK uses APIError for some transient failures, including stream interruptions.
@@ -144,6 +178,36 @@ def _is_retryable_step_failure(*, run_error: dict[str, Any] | None, step_error:
     return False
 
 
+def _step_failed_error(
+    exc: BaseException,
+    *,
+    step_name: str,
+    step_index: int,
+    error_chain: str | None,
+) -> dict[str, Any]:
+    return {
+        "detail": "step_failed",
+        "step_name": step_name,
+        "step_index": step_index,
+        "error_type": exc.__class__.__name__,
+        "error": str(exc),
+        "error_chain": error_chain,
+    }
+
+
+async def _run_read(*, session: AsyncSession, run: WorkflowRun) -> WorkflowRunRead:
+    # Responses carry the full state; SSE events and listings keep the compact stored form.
+    read = WorkflowRunRead.model_validate(run)
+    return read.model_copy(update={"state": await expand_run_state(session=session, run=run)})
+
+
+async def _discard_step_writes(uow: UnitOfWork, *, run: WorkflowRun, step: WorkflowStepRun) -> None:
+    # Drop whatever the failed phase flushed so a failure never leaves half a step behind.
+    await uow.rollback()
+    await uow.session.refresh(run)
+    await uow.session.refresh(step)
+
+
 def _autorun_retry_state(state: dict[str, Any]) -> dict[str, Any]:
     blob = state.get("_autorun_retry")
     if isinstance(blob, dict):
@@ -161,6 +225,39 @@ def _compute_backoff_delay_s(*, base_backoff_s: float, attempt: int, cap_s: floa
     return min(cap_s, base_backoff_s * (2 ** (attempt - 1)))
 
 
+async def _wait_for_stop(stop_event: asyncio.Event, *, timeout_s: float | None) -> None:
+    if timeout_s is None or timeout_s <= 0:
+        await asyncio.sleep(0)
+        return
+    try:
+        await asyncio.wait_for(stop_event.wait(), timeout=timeout_s)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def _publish_breaker_state(
+    hub: WorkflowEventHub | None,
+    *,
+    run_id: uuid.UUID,
+    breaker: ProviderCircuitBreaker,
+    last_state: str,
+) -> str:
+    snapshot = breaker.snapshot()
+    if hub is not None and snapshot["state"] != last_state:
+        await hub.publish(
+            run_id=run_id,
+            name="log",
+            payload={
+                "message": (
+                    f"provider_breaker state={snapshot['state']} key={snapshot['key']} "
+                    f"retry_in_s={snapshot['retry_in_s']}"
+                ),
+                "breaker": snapshot,
+            },
+        )
+    return str(snapshot["state"])
+
+
 @router.post("", response_model=WorkflowRunRead)
 async def create_workflow_run(
     payload: WorkflowRunCreate,
@@ -213,12 +310,12 @@ async def create_workflow_run(
         kind=payload.kind,
         status=payload.status,
         brief_snapshot_id=snapshot.id,
-        state=state,
+        state={},
     )
     session.add(run)
+    await store_run_state(session=session, run=run, state=state)
     await session.commit()
-    await session.refresh(run)
-    return WorkflowRunRead.model_validate(run)
+    return await _run_read(session=session, run=run)
 
 
 @router.get("", response_model=list[WorkflowRunRead])
@@ -235,6 +332,127 @@ async def list_workflow_runs(
     return [WorkflowRunRead.model_validate(item) for item in items]
 
 
+# Most events a multiplexed stream writes (after coalescing) per batch.
+_MULTIPLEXED_BATCH = 500
+# How often a stream following a brief snapshot looks for runs created since it connected, whether
+# or not its runs are busy. Runs can be created by any process, so this is a poll.
+_NEW_RUNS_CHECK_INTERVAL_S = 15.0
+
+
+def _event_hub(app: FastAPI) -> WorkflowEventHub:
+    hub = getattr(app.state, "workflow_event_hub", None)
+    if hub is None:
+        hub = WorkflowEventHub()
+        app.state.workflow_event_hub = hub
+    return hub
+
+
+async def _multiplexed_runs(
+    sessionmaker: Any,
+    *,
+    run_ids: list[uuid.UUID],
+    brief_snapshot_id: uuid.UUID | None,
+) -> list[WorkflowRun]:
+    async with sessionmaker() as session:
+        conditions = []
+        if run_ids:
+            conditions.append(WorkflowRun.id.in_(run_ids))
+        if brief_snapshot_id is not None:
+            conditions.append(WorkflowRun.brief_snapshot_id == brief_snapshot_id)
+        result = await session.execute(select(WorkflowRun).where(or_(*conditions)))
+        return list(result.scalars().all())
+
+
+@router.get("/events")
+async def workflow_runs_events(
+    request: Request,
+    run_id: list[uuid.UUID] = Query(default=[]),
+    brief_snapshot_id: uuid.UUID | None = None,
+    events: str | None = None,
+    stream_run_id: list[uuid.UUID] = Query(default=[]),
+    once: bool = False,
+) -> StreamingResponse:
+    # One stream for many runs: the given runs and/or every run of a brief snapshot (including
+    # runs created while connected). Every event carries its run_id. `events` limits the event
+    # names forwarded; `stream_run_id` limits streamed LLM output to those runs. Events that piled
+    # up while the client was slow are coalesced before they are written.
+    if not run_id and brief_snapshot_id is None:
+        raise HTTPException(status_code=400, detail="run_id_or_brief_snapshot_id_required")
+    sessionmaker = getattr(request.app.state, "sessionmaker", None)
+    if sessionmaker is None:
+        raise HTTPException(status_code=500, detail="db_not_initialized")
+
+    runs = await _multiplexed_runs(sessionmaker, run_ids=run_id, brief_snapshot_id=brief_snapshot_id)
+    hub = _event_hub(request.app)
+    queue = await hub.subscribe_many(run_ids=[run.id for run in runs])
+    names = frozenset(name.strip() for name in (events or "").split(",") if name.strip())
+    event_filter = MultiplexFilter(
+        events=names or None,
+        stream_run_ids=frozenset(stream_run_id) if stream_run_id else None,
+    )
+    initial = [
+        format_multiplexed_sse_event(
+            run_id=run.id,
+            name="run",
+            payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
+        )
+        for run in runs
+    ]
+
+    async def announce_new_runs() -> list[str]:
+        if brief_snapshot_id is None:
+            return []
+        known = {run.id for run in runs}
+        found = await _multiplexed_runs(sessionmaker, run_ids=[], brief_snapshot_id=brief_snapshot_id)
+        added = [run for run in found if run.id not in known]
+        if not added:
+            return []
+        runs.extend(added)
+        hub.add_runs(queue=queue, run_ids=[run.id for run in added])
+        return [
+            format_multiplexed_sse_event(
+                run_id=run.id,
+                name="run",
+                payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
+            )
+            for run in added
+        ]
+
+    async def event_stream():
+        try:
+            for frame in initial:
+                yield frame
+            if once:
+                return
+            next_check = time.monotonic() + _NEW_RUNS_CHECK_INTERVAL_S
+            while True:
+                try:
+                    first = await asyncio.wait_for(queue.get(), timeout=15.0)
+                except TimeoutError:
+                    first = None
+                if time.monotonic() >= next_check:
+                    next_check = time.monotonic() + _NEW_RUNS_CHECK_INTERVAL_S
+                    for frame in await announce_new_runs():
+                        yield frame
+                if first is None:
+                    yield ": ping\n\n"
+                    continue
+                batch = [first]
+                while len(batch) < _MULTIPLEXED_BATCH and not queue.empty():
+                    batch.append(queue.get_nowait())
+                allowed = [event for event in batch if event_filter.allows(event)]
+                if allowed:
+                    yield b"".join(event.multiplexed_data for event in coalesce_events(allowed))
+        finally:
+            await hub.unsubscribe_many(queue=queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache"},
+    )
+
+
 @router.delete("/{run_id}")
 async def delete_workflow_run(
     run_id: uuid.UUID,
@@ -270,7 +488,7 @@ async def apply_workflow_intervention(
         if target_step.workflow_run_id != run.id:
             raise HTTPException(status_code=400, detail="workflow_step_not_in_run")
 
-    llm = await resolve_llm_client(session=session, app=request.app)
+    llm = await resolve_llm_client(session=session, app=request.app, phase="workflow_intervention")
     if llm is None:
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
@@ -278,7 +496,7 @@ async def apply_workflow_intervention(
     if not instruction:
         raise HTTPException(status_code=400, detail="instruction_required")
 
-    run_state: dict[str, Any] = dict(run.state or {})
+    run_state: dict[str, Any] = await expand_run_state(session=session, run=run)
     target_step_json: dict[str, Any] | None = None
     if target_step is not None:
         target_step_json = {
@@ -300,7 +518,7 @@ async def apply_workflow_intervention(
     )
 
     patch = dict(result.state_patch or {})
-    run.state = deep_merge(run_state, patch)
+    await store_run_state(session=session, run=run, state=deep_merge(run_state, patch))
 
     # Record as a step run for audit/history.
     next_index = await session.scalar(
@@ -328,6 +546,7 @@ async def apply_workflow_intervention(
     await session.commit()
     await session.refresh(step)
     await session.refresh(run)
+    invalidate_run_contexts(request.app, run_id=run.id)
 
     hub = getattr(request.app.state, "workflow_event_hub", None)
     if hub is not None:
@@ -343,7 +562,7 @@ async def apply_workflow_intervention(
         )
 
     return WorkflowInterventionResponse(
-        run=WorkflowRunRead.model_validate(run),
+        run=await _run_read(session=session, run=run),
         step=WorkflowStepRunRead.model_validate(step),
         assistant_message=result.assistant_message,
         state_patch=patch,
@@ -358,7 +577,7 @@ async def get_workflow_run(
     run = await session.get(WorkflowRun, run_id)
     if not run:
         raise HTTPException(status_code=404, detail="workflow_run_not_found")
-    return WorkflowRunRead.model_validate(run)
+    return await _run_read(session=session, run=run)
 
 
 @router.post("/{run_id}/fork", response_model=WorkflowRunRead)
@@ -378,7 +597,9 @@ async def fork_workflow_run(
         if step.workflow_run_id != run.id:
             raise HTTPException(status_code=400, detail="workflow_step_not_in_run")
 
-    state: dict[str, Any] = dict(payload.state if payload.state is not None else (run.state or {}))
+    state: dict[str, Any] = (
+        dict(payload.state) if payload.state is not None else await expand_run_state(session=session, run=run)
+    )
     state["forked_from"] = {"run_id": str(run.id), "step_id": str(payload.step_id) if payload.step_id else None}
     state = _reset_failed_cursor_phase(state)
 
@@ -386,13 +607,13 @@ async def fork_workflow_run(
         kind=run.kind,
         status=RunStatus.queued,
         brief_snapshot_id=run.brief_snapshot_id,
-        state=state,
+        state={},
         error=None,
     )
     session.add(forked)
+    await store_run_state(session=session, run=forked, state=state)
     await session.commit()
-    await session.refresh(forked)
-    return WorkflowRunRead.model_validate(forked)
+    return await _run_read(session=session, run=forked)
 
 
 @router.get("/{run_id}/events")
@@ -411,12 +632,11 @@ async def workflow_run_events(
         if not run:
             raise HTTPException(status_code=404, detail="workflow_run_not_found")
 
-    hub = getattr(request.app.state, "workflow_event_hub", None)
-    if hub is None:
-        hub = WorkflowEventHub()
-        request.app.state.workflow_event_hub = hub
+    hub = _event_hub(request.app)
 
-    queue = await hub.subscribe(run_id=run.id)
+    # EventSource sends the id of the last event it saw when it reconnects; resume from there.
+    last_event_id = hub.resume_point(request.headers.get("last-event-id"))
+    queue = await hub.subscribe(run_id=run.id, last_event_id=last_event_id)
     initial = {"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")}
 
     async def event_stream():
@@ -430,7 +650,7 @@ async def workflow_run_events(
                 except TimeoutError:
                     yield ": ping\n\n"
                     continue
-                yield format_sse_event(name=event.name, payload=event.payload)
+                yield event.data
         finally:
             await hub.unsubscribe(run_id=run.id, queue=queue)
 
@@ -445,6 +665,7 @@ async def workflow_run_events(
 async def patch_workflow_run(
     run_id: uuid.UUID,
     payload: WorkflowRunPatch,
+    request: Request,
     session: AsyncSession = Depends(get_db_session),
 ) -> WorkflowRunRead:
     run = await session.get(WorkflowRun, run_id)
@@ -454,13 +675,13 @@ async def patch_workflow_run(
     if payload.status is not None:
         run.status = payload.status
     if payload.state is not None:
-        run.state = payload.state
+        await store_run_state(session=session, run=run, state=payload.state)
     if payload.error is not None:
         run.error = payload.error
 
     await session.commit()
-    await session.refresh(run)
-    return WorkflowRunRead.model_validate(run)
+    invalidate_run_contexts(request.app, run_id=run.id)
+    return await _run_read(session=session, run=run)
 
 
 @router.post("/{run_id}/steps", response_model=WorkflowStepRunRead)
@@ -554,6 +775,7 @@ async def pause_workflow_run(
     run.status = RunStatus.paused
     await session.commit()
     await session.refresh(run)
+    cancel_running_step(app=request.app, run_id=run.id, reason=CANCEL_REASON_PAUSED)
     hub = getattr(request.app.state, "workflow_event_hub", None)
     if hub is not None:
         await hub.publish(
@@ -620,7 +842,30 @@ async def execute_workflow_next(
         raise HTTPException(status_code=400, detail="openai_not_configured")
 
     hub = getattr(request.app.state, "workflow_event_hub", None)
-    step = await execute_one_step(session=session, llm=llm, embeddings=embeddings, run=run, hub=hub)
+    step_name = str(determine_step_name(run))
+    snapshot = await session.get(BriefSnapshot, run.brief_snapshot_id)
+    deadline_s, idle_timeout_s = await _resolve_step_deadlines(
+        session=session, snapshot=snapshot, step_name=step_name
+    )
+    with track_step_cancellation(
+        app=request.app,
+        run_id=run.id,
+        phase=step_name,
+        deadline_s=deadline_s,
+        idle_timeout_s=idle_timeout_s,
+    ) as cancel:
+        async with UnitOfWork(request.app.state.engine) as uow:
+            step_run = await uow.session.get(WorkflowRun, run.id)
+            if step_run is None:
+                raise HTTPException(status_code=404, detail="workflow_run_not_found")
+            step = await execute_one_step(
+                session=uow.session,
+                llm=llm,
+                embeddings=embeddings,
+                run=step_run,
+                hub=hub,
+                cancel=cancel,
+            )
     await session.refresh(run)
 
     if run.status == RunStatus.failed and isinstance(run.error, dict):
@@ -637,22 +882,47 @@ async def execute_workflow_next(
                 )
 
     return WorkflowNextResponse(
-        run=WorkflowRunRead.model_validate(run),
+        run=await _run_read(session=session, run=run),
         step=WorkflowStepRunRead.model_validate(step),
     )
 
 
 async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.Event) -> None:
-    sessionmaker = getattr(app.state, "sessionmaker", None)
+    engine = getattr(app.state, "engine", None)
     hub = getattr(app.state, "workflow_event_hub", None)
 
-    if sessionmaker is None:
+    if engine is None:
         return
 
+    breakers = getattr(app.state, "provider_breakers", None)
+    breaker: ProviderCircuitBreaker | None = None
+    breaker_state = BREAKER_CLOSED
+    context: RunContext | None = None
+    drafts: SpeculativeDrafts | None = None
+    prefetch: StepPrefetch | None = None
+    sessionmaker = getattr(app.state, "sessionmaker", None)
+    if sessionmaker is not None:
+        drafts = SpeculativeDrafts(sessionmaker=sessionmaker)
+        prefetch = StepPrefetch(sessionmaker=sessionmaker)
+
     try:
         while not stop_event.is_set():
             retry_delay_s: float | None = None
-            async with sessionmaker() as session:
+            if breaker is not None:
+                breaker_state = await _publish_breaker_state(
+                    hub, run_id=run_id, breaker=breaker, last_state=breaker_state
+                )
+                # While the provider is tripped, wait for the breaker instead of starting steps
+                # that would only fail (and burn retry attempts).
+                breaker_wait_s = breaker.retry_in_s()
+                if breaker_wait_s > 0:
+                    await _wait_for_stop(stop_event, timeout_s=breaker_wait_s)
+                    continue
+
+            # Each step runs in one transaction: the step row is claimed up front, then the phase's
+            # writes and the final step/run update are committed together. Events go out after commit.
+            async with UnitOfWork(engine) as uow:
+                session = uow.session
                 run = await session.get(WorkflowRun, run_id)
                 if not run:
                     return
@@ -661,25 +931,41 @@ async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.
                 if run.status in {RunStatus.succeeded, RunStatus.failed, RunStatus.canceled}:
                     return
 
-                snapshot = await session.get(BriefSnapshot, run.brief_snapshot_id)
-                max_step_retries, backoff_s = await _resolve_autorun_retry_policy(
-                    session=session, snapshot=snapshot
-                )
-
-                llm, embeddings, meta = await resolve_llm_and_embeddings(session=session, app=app)
+                # Snapshot, preferences, presets and clients only change through interventions and
+                # settings patches, which invalidate the context explicitly.
+                if (
+                    context is None
+                    or context.snapshot.id != run.brief_snapshot_id
+                    or run_context_is_stale(app, context)
+                ):
+                    if drafts is not None and context is not None:
+                        # Whatever invalidated the context may have changed the drafts' inputs.
+                        drafts.discard()
+                    if prefetch is not None and context is not None:
+                        prefetch.discard()
+                    context = await load_run_context(
+                        session=session,
+                        app=app,
+                        run_id=run.id,
+                        brief_snapshot_id=run.brief_snapshot_id,
+                        previous=context,
+                    )
+                    if drafts is not None:
+                        drafts.configure(
+                            window=int(context.runtime_prefs.get("speculative_draft_window") or 0),
+                            concurrency=int(context.runtime_prefs.get("speculative_draft_concurrency") or 1),
+                        )
+                max_step_retries, backoff_s = context.max_step_retries, context.backoff_s
+                llm, embeddings, meta = context.llm, context.embeddings, context.provider_meta
                 if llm is None or embeddings is None:
                     return
+                if breakers is not None:
+                    breaker = breakers.get(provider_breaker_key(meta))
+                    llm = guard_llm(llm, breaker, registry=breakers)
 
-                if run.status == RunStatus.queued:
+                run_started = run.status == RunStatus.queued
+                if run_started:
                     run.status = RunStatus.running
-                    await session.commit()
-                    await session.refresh(run)
-                    if hub is not None:
-                        await hub.publish(
-                            run_id=run.id,
-                            name="run",
-                            payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
-                        )
 
                 step_name = str(determine_step_name(run))
                 next_index = await session.scalar(
@@ -698,25 +984,46 @@ async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.
                     started_at=now,
                 )
                 session.add(step)
-                await session.commit()
-                await session.refresh(step)
+                await uow.commit()
                 if hub is not None:
+                    if run_started:
+                        await hub.publish(
+                            run_id=run.id,
+                            name="run",
+                            payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
+                        )
                     await hub.publish(
                         run_id=run.id,
                         name="step",
                         payload={"step": WorkflowStepRunRead.model_validate(step).model_dump(mode="json")},
                     )
 
+                deadline_s, idle_timeout_s = resolve_phase_deadlines(
+                    runtime_prefs=context.runtime_prefs, phase=step_name
+                )
                 run_error: dict[str, Any] | None = None
                 try:
-                    outputs = await execute_next_step(
-                        session=session,
-                        llm=llm,
-                        embeddings=embeddings,
-                        run=run,
-                        hub=hub,
-                        step_id=step.id,
-                    )
+                    with track_step_cancellation(
+                        app=app,
+                        run_id=run.id,
+                        phase=step_name,
+                        deadline_s=deadline_s,
+                        idle_timeout_s=idle_timeout_s,
+                    ) as cancel:
+                        if stop_event.is_set():
+                            cancel.cancel(CANCEL_REASON_STOPPED)
+                        outputs = await execute_next_step(
+                            session=session,
+                            llm=llm,
+                            embeddings=embeddings,
+                            run=run,
+                            hub=hub,
+                            step_id=step.id,
+                            cancel=cancel,
+                            context=context,
+                            drafts=drafts,
+                            prefetch=prefetch,
+                        )
                     step.outputs = outputs
                     step.finished_at = datetime.now().astimezone()
 
@@ -727,19 +1034,45 @@ async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.
                             step.error = json.dumps(run_error, ensure_ascii=False)
                     else:
                         step.status = RunStatus.succeeded
+                except StepTimedOut as exc:
+                    # Hung steps canceled by the watchdog go through the normal retry policy.
+                    await _discard_step_writes(uow, run=run, step=step)
+                    step.finished_at = datetime.now().astimezone()
+                    step.status = RunStatus.failed
+                    step.outputs = {}
+                    step.error = format_exception_chain(exc)
+                    run_error = _step_failed_error(
+                        exc, step_name=step_name, step_index=step_index, error_chain=step.error
+                    )
+                except StepCanceled as exc:
+                    # The step is abandoned rather than failed: the cursor has not moved, so the
+                    # next autorun/next call simply starts the same phase again.
+                    await _discard_step_writes(uow, run=run, step=step)
+                    step.finished_at = datetime.now().astimezone()
+                    step.status = RunStatus.canceled
+                    step.error = str(exc)
+                    await uow.commit()
+                    if hub is not None:
+                        await hub.publish(
+                            run_id=run.id,
+                            name="step",
+                            payload={"step": WorkflowStepRunRead.model_validate(step).model_dump(mode="json")},
+                        )
+                        await hub.publish(
+                            run_id=run.id,
+                            name="log",
+                            payload={"message": f"autorun_step_canceled step={step_name} reason={exc.reason}"},
+                        )
+                    return
                 except Exception as exc:
+                    await _discard_step_writes(uow, run=run, step=step)
                     step.finished_at = datetime.now().astimezone()
                     step.status = RunStatus.failed
                     step.outputs = {}
                     step.error = format_exception_chain(exc)
-                    run_error = {
-                        "detail": "step_failed",
-                        "step_name": step_name,
-                        "step_index": step_index,
-                        "error_type": exc.__class__.__name__,
-                        "error": str(exc),
-                        "error_chain": step.error,
-                    }
+                    run_error = _step_failed_error(
+                        exc, step_name=step_name, step_index=step_index, error_chain=step.error
+                    )
 
                 if step.status == RunStatus.failed and run_error is not None:
                     state: dict[str, Any] = copy.deepcopy(run.state or {})
@@ -757,13 +1090,14 @@ async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.
 
                     if retryable and attempt <= max_step_retries:
                         retry_delay_s = _compute_backoff_delay_s(base_backoff_s=backoff_s, attempt=attempt)
+                        if breaker is not None and breaker.state != BREAKER_CLOSED:
+                            retry_delay_s = breaker.retry_in_s()
+                        llm_metrics.incr(phase=step_name, name="autorun_retries")
                         run.status = RunStatus.queued
                         run.error = None
                         run.state = state
 
-                        await session.commit()
-                        await session.refresh(run)
-                        await session.refresh(step)
+                        await uow.commit()
 
                         if hub is not None:
                             await hub.publish(
@@ -785,28 +1119,51 @@ async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.
                                     "message": f"autorun_retry_scheduled step={step_name} attempt={attempt}/{max_step_retries} delay_s={retry_delay_s}"
                                 },
                             )
-                        continue
-
-                    run.status = RunStatus.failed
-                    effective = meta.get("effective")
-                    if isinstance(effective, dict):
-                        run_error = deep_merge(dict(run_error), {"provider": effective})
-                    if retryable and attempt > max_step_retries:
-                        run_error = deep_merge(
-                            dict(run_error),
-                            {
-                                "autorun_retry_exhausted": True,
-                                "autorun_retry_attempts": attempt,
-                                "autorun_retry_limit": max_step_retries,
-                            },
-                        )
+                        # Leave the unit of work first, so its connection goes back to the pool
+                        # for the backoff; the wait is at the bottom of the loop.
+                    else:
+                        run.status = RunStatus.failed
+                        effective = meta.get("effective")
+                        if isinstance(effective, dict):
+                            run_error = deep_merge(dict(run_error), {"provider": effective})
+                        if retryable and attempt > max_step_retries:
+                            run_error = deep_merge(
+                                dict(run_error),
+                                {
+                                    "autorun_retry_exhausted": True,
+                                    "autorun_retry_attempts": attempt,
+                                    "autorun_retry_limit": max_step_retries,
+                                },
+                            )
 
-                    run.error = run_error
-                    run.state = state
-                    await session.commit()
-                    await session.refresh(run)
-                    await session.refresh(step)
+                        run.error = run_error
+                        run.state = state
+                        await uow.commit()
 
+                        if hub is not None:
+                            await hub.publish(
+                                run_id=run.id,
+                                name="step",
+                                payload={"step": WorkflowStepRunRead.model_validate(step).model_dump(mode="json")},
+                            )
+                            await hub.publish(
+                                run_id=run.id,
+                                name="run",
+                                payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
+                            )
+                            reason = "not_retryable" if not retryable else "retry_limit_exhausted"
+                            await hub.publish(
+                                run_id=run.id,
+                                name="log",
+                                payload={
+                                    "message": f"autorun_stopped_on_failure step={step_name} attempt={attempt}/{max_step_retries} reason={reason}"
+                                },
+                            )
+                        return
+                elif step.status == RunStatus.failed:
+                    run.status = RunStatus.failed
+                    run.error = {"detail": "step_failed", "step_name": step_name, "step_index": step_index}
+                    await uow.commit()
                     if hub is not None:
                         await hub.publish(
                             run_id=run.id,
@@ -818,22 +1175,13 @@ async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.
                             name="run",
                             payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
                         )
-                        reason = "not_retryable" if not retryable else "retry_limit_exhausted"
-                        await hub.publish(
-                            run_id=run.id,
-                            name="log",
-                            payload={
-                                "message": f"autorun_stopped_on_failure step={step_name} attempt={attempt}/{max_step_retries} reason={reason}"
-                            },
-                        )
                     return
-
-                if step.status == RunStatus.failed and run_error is None:
-                    run.status = RunStatus.failed
-                    run.error = {"detail": "step_failed", "step_name": step_name, "step_index": step_index}
-                    await session.commit()
-                    await session.refresh(run)
-                    await session.refresh(step)
+                else:
+                    state: dict[str, Any] = copy.deepcopy(run.state or {})
+                    if "_autorun_retry" in state:
+                        state.pop("_autorun_retry", None)
+                        run.state = state
+                    await uow.commit()
                     if hub is not None:
                         await hub.publish(
                             run_id=run.id,
@@ -845,48 +1193,27 @@ async def _autorun_loop(app: FastAPI, *, run_id: uuid.UUID, stop_event: asyncio.
                             name="run",
                             payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
                         )
-                    return
-
-                state: dict[str, Any] = copy.deepcopy(run.state or {})
-                if "_autorun_retry" in state:
-                    state.pop("_autorun_retry", None)
-                    run.state = state
-                await session.commit()
-                await session.refresh(run)
-                await session.refresh(step)
-                if hub is not None:
-                    await hub.publish(
-                        run_id=run.id,
-                        name="step",
-                        payload={"step": WorkflowStepRunRead.model_validate(step).model_dump(mode="json")},
-                    )
-                    await hub.publish(
-                        run_id=run.id,
-                        name="run",
-                        payload={"run": WorkflowRunRead.model_validate(run).model_dump(mode="json")},
-                    )
 
-            if retry_delay_s is None:
-                await asyncio.sleep(0)
-            elif retry_delay_s <= 0:
-                await asyncio.sleep(0)
-            else:
-                try:
-                    await asyncio.wait_for(stop_event.wait(), timeout=retry_delay_s)
-                except asyncio.TimeoutError:
-                    pass
+            await _wait_for_stop(stop_event, timeout_s=retry_delay_s)
     except asyncio.CancelledError:
         return
     except Exception as exc:
         if hub is not None:
             await hub.publish(run_id=run_id, name="log", payload={"message": str(exc)})
     finally:
+        if drafts is not None:
+            await drafts.close()
+        if prefetch is not None:
+            await prefetch.close()
         tasks = getattr(app.state, "workflow_autorun_tasks", None)
         flags = getattr(app.state, "workflow_autorun_stop_flags", None)
         if isinstance(tasks, dict):
             tasks.pop(run_id, None)
         if isinstance(flags, dict):
             flags.pop(run_id, None)
+        generations = getattr(app.state, "run_context_generations", None)
+        if isinstance(generations, RunContextGenerations):
+            generations.forget(run_id)
         if hub is not None:
             await hub.publish(run_id=run_id, name="log", payload={"message": "autorun_stopped"})
 
@@ -956,6 +1283,7 @@ async def autorun_stop(
         stop_event = flags.get(run.id)
         if isinstance(stop_event, asyncio.Event):
             stop_event.set()
+    cancel_running_step(app=request.app, run_id=run.id, reason=CANCEL_REASON_STOPPED)
 
     if isinstance(tasks, dict):
         task = tasks.get(run.id)
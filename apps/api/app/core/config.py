@@ -29,11 +29,21 @@ class Settings(BaseSettings):
     )
     openai_api_key: str | None = Field(default=None, validation_alias="OPENAI_API_KEY")
     openai_model: str = Field(default="gpt-4o-mini", validation_alias="OPENAI_MODEL")
+    openai_fast_model: str | None = Field(default=None, validation_alias="OPENAI_FAST_MODEL")
     openai_embeddings_model: str = Field(
         default="text-embedding-3-small", validation_alias="OPENAI_EMBEDDINGS_MODEL"
     )
     openai_timeout_s: float = Field(default=60, validation_alias="OPENAI_TIMEOUT_S")
     openai_max_retries: int = Field(default=2, validation_alias="OPENAI_MAX_RETRIES")
+    openai_structured_output: bool = Field(default=False, validation_alias="OPENAI_STRUCTURED_OUTPUT")
+    step_watchdog_interval_s: float = Field(default=1.0, validation_alias="STEP_WATCHDOG_INTERVAL_S")
+    # memory (single process), postgres (LISTEN/NOTIFY) or unix (local socket broker).
+    event_bus: str = Field(default="memory", validation_alias="EVENT_BUS")
+    event_bus_socket_path: str | None = Field(default=None, validation_alias="EVENT_BUS_SOCKET_PATH")
+    event_bus_inline_max_bytes: int = Field(default=7000, validation_alias="EVENT_BUS_INLINE_MAX_BYTES")
+    # Compiled exports kept on disk, least recently used evicted first; 0 disables the cache.
+    export_cache_dir: str | None = Field(default=None, validation_alias="EXPORT_CACHE_DIR")
+    export_cache_max_bytes: int = Field(default=256 * 1024 * 1024, validation_alias="EXPORT_CACHE_MAX_BYTES")
     license_public_key: str | None = Field(default=None, validation_alias="LICENSE_PUBLIC_KEY")
     license_required: bool = Field(default=False, validation_alias="LICENSE_REQUIRED")
     license_machine_salt: str = Field(default="writer_agent2", validation_alias="LICENSE_MACHINE_SALT")
@@ -4,5 +4,7 @@ from sqlalchemy.orm import DeclarativeBase
 
 
 class Base(DeclarativeBase):
-    pass
+    # Fetch server-generated columns (created_at/updated_at) with RETURNING at flush time, so
+    # callers don't need a follow-up refresh() round trip after writes.
+    __mapper_args__ = {"eager_defaults": True}
 
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from types import TracebackType
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+_UNIT_OF_WORK_KEY = "unit_of_work"
+
+
+# One database transaction spanning a whole workflow step. The session joins an outer
+# connection-level transaction in "rollback_only" mode, so session.commit() calls inside step code
+# only flush; nothing becomes visible until UnitOfWork.commit() commits the outer transaction.
+class UnitOfWork:
+    def __init__(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._conn: AsyncConnection | None = None
+        self.session: AsyncSession | None = None
+
+    async def __aenter__(self) -> UnitOfWork:
+        self._conn = await self._engine.connect()
+        await self._conn.begin()
+        self.session = AsyncSession(
+            bind=self._conn,
+            expire_on_commit=False,
+            join_transaction_mode="rollback_only",
+        )
+        self.session.info[_UNIT_OF_WORK_KEY] = self
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        conn = self._conn
+        session = self.session
+        self._conn = None
+        self.session = None
+        if session is not None:
+            await session.close()
+        if conn is not None:
+            if conn.in_transaction():
+                await conn.rollback()
+            await conn.close()
+
+    async def commit(self) -> None:
+        assert self.session is not None and self._conn is not None
+        await self.session.commit()
+        await self._conn.commit()
+        await self._conn.begin()
+
+    async def rollback(self) -> None:
+        assert self.session is not None and self._conn is not None
+        await self.session.rollback()
+        if self._conn.in_transaction():
+            await self._conn.rollback()
+        await self._conn.begin()
+
+
+def unit_of_work_for(session: AsyncSession) -> UnitOfWork | None:
+    uow = session.info.get(_UNIT_OF_WORK_KEY)
+    return uow if isinstance(uow, UnitOfWork) else None
+
+
+async def commit_unit(session: AsyncSession) -> None:
+    uow = unit_of_work_for(session)
+    if uow is not None:
+        await uow.commit()
+    else:
+        await session.commit()
+
+
+async def rollback_unit(session: AsyncSession) -> None:
+    uow = unit_of_work_for(session)
+    if uow is not None:
+        await uow.rollback()
+    else:
+        await session.rollback()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import time
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(frozen=True)
+class ChatEndpoint:
+    base_url: str | None
+    model: str
+    api_key: str | None = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.base_url or 'default'}#{self.model}"
+
+
+def same_base_url(left: str | None, right: str | None) -> bool:
+    # Whether two base URLs name the same provider, so one API key is good for both.
+    return (left or "").rstrip("/") == (right or "").rstrip("/")
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class EndpointHealth:
+    def __init__(
+        self,
+        *,
+        alpha: float = 0.3,
+        unhealthy_below: float = 0.5,
+        recovery_s: float = 30.0,
+        max_samples: int = 200,
+    ) -> None:
+        self._alpha = alpha
+        self._unhealthy_below = unhealthy_below
+        self._recovery_s = recovery_s
+        self._max_samples = max_samples
+        self._scores: dict[str, float] = {}
+        self._updated_at: dict[str, float] = {}
+        self._latencies: dict[tuple[str, str], deque[float]] = {}
+        self._counters: dict[str, Counter[str]] = {}
+
+    def score(self, key: str) -> float:
+        score = self._scores.get(key, 1.0)
+        updated_at = self._updated_at.get(key)
+        # An endpoint that has been left alone for a while gets another chance.
+        if updated_at is not None and time.monotonic() - updated_at >= self._recovery_s:
+            score = max(score, self._unhealthy_below)
+        return score
+
+    def is_healthy(self, key: str) -> bool:
+        return self.score(key) >= self._unhealthy_below
+
+    def _update(self, key: str, ok: bool) -> None:
+        previous = self.score(key)
+        self._scores[key] = (1 - self._alpha) * previous + self._alpha * (1.0 if ok else 0.0)
+        self._updated_at[key] = time.monotonic()
+
+    def record_success(self, key: str, *, kind: str, latency_s: float) -> None:
+        self._update(key, True)
+        samples = self._latencies.setdefault((key, kind), deque(maxlen=self._max_samples))
+        samples.append(max(0.0, float(latency_s)))
+
+    def record_failure(self, key: str) -> None:
+        self._update(key, False)
+        self.incr(key, "failures")
+
+    def incr(self, key: str, name: str) -> None:
+        self._counters.setdefault(key, Counter())[name] += 1
+
+    def latency_percentile(self, key: str, *, kind: str, q: float, min_samples: int = 10) -> float | None:
+        samples = self._latencies.get((key, kind))
+        if not samples or len(samples) < min_samples:
+            return None
+        return _percentile(list(samples), q)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        keys = set(self._scores) | set(self._counters) | {key for key, _kind in self._latencies}
+        out: dict[str, dict[str, Any]] = {}
+        for key in sorted(keys):
+            item: dict[str, Any] = {"score": round(self.score(key), 4), "healthy": self.is_healthy(key)}
+            for (sample_key, kind), samples in self._latencies.items():
+                if sample_key != key or not samples:
+                    continue
+                values = list(samples)
+                item[f"{kind}_samples"] = len(values)
+                item[f"{kind}_p50_s"] = round(_percentile(values, 0.5), 4)
+                item[f"{kind}_p95_s"] = round(_percentile(values, 0.95), 4)
+            item.update(dict(sorted(self._counters.get(key, Counter()).items())))
+            out[key] = item
+        return out
+
+    def reset(self) -> None:
+        self._scores.clear()
+        self._updated_at.clear()
+        self._latencies.clear()
+        self._counters.clear()
+
+
+endpoint_health = EndpointHealth()
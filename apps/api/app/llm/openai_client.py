@@ -1,12 +1,49 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from typing import Any, TypeVar
 
-from openai import AsyncOpenAI
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    BadRequestError,
+    UnprocessableEntityError,
+)
+from pydantic import BaseModel
 
 from app.core.config import Settings
 from app.llm.client import LLMClient
 from app.llm.embeddings_client import EmbeddingsClient
+from app.llm.endpoints import ChatEndpoint, endpoint_health, same_base_url
+
+T = TypeVar("T")
+
+# (base_url, model) pairs that rejected `response_format: json_schema`; shared by all clients.
+_JSON_SCHEMA_UNSUPPORTED: set[tuple[str | None, str]] = set()
+
+
+def _json_schema_response_format(response_model: type[BaseModel]) -> dict[str, Any]:
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": response_model.__name__,
+            "schema": response_model.model_json_schema(),
+            "strict": False,
+        },
+    }
+
+
+def _is_failover_error(exc: BaseException) -> bool:
+    if isinstance(exc, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in {408, 409, 429} or exc.status_code >= 500
+    return False
 
 
 class OpenAIChatClient:
@@ -18,12 +55,67 @@ class OpenAIChatClient:
         timeout_s: float,
         max_retries: int = 2,
         base_url: str | None = None,
+        structured_output: bool = False,
+        failover_endpoints: Sequence[ChatEndpoint] = (),
+        hedge_percentile: float | None = None,
+        hedge_initial_delay_s: float | None = None,
+        hedge_min_delay_s: float = 0.5,
+        http_client: httpx.AsyncClient | None = None,
     ) -> None:
-        kwargs: dict[str, object] = {"api_key": api_key, "timeout": timeout_s, "max_retries": max_retries}
-        if base_url:
-            kwargs["base_url"] = base_url
-        self._client = AsyncOpenAI(**kwargs)
+        self._api_key = api_key
+        self._timeout_s = timeout_s
+        self._max_retries = max_retries
+        self._http_client = http_client
+        self._primary = ChatEndpoint(base_url=base_url, model=model, api_key=api_key)
+        # The primary key only goes to the primary's host; an endpoint elsewhere without a key of
+        # its own is left out.
+        self._endpoints = [
+            self._primary,
+            *(
+                ep
+                for ep in failover_endpoints
+                if ep != self._primary and (ep.api_key or same_base_url(ep.base_url, base_url))
+            ),
+        ]
+        self._client = self._build_openai(self._primary)
+        self._clients: dict[ChatEndpoint, AsyncOpenAI] = {}
         self._model = model
+        self._base_url = base_url
+        self._structured_output = structured_output
+        self._hedge_percentile = hedge_percentile
+        self._hedge_initial_delay_s = hedge_initial_delay_s
+        self._hedge_min_delay_s = hedge_min_delay_s
+
+    def _build_openai(self, endpoint: ChatEndpoint) -> AsyncOpenAI:
+        kwargs: dict[str, object] = {
+            "api_key": endpoint.api_key or self._api_key,
+            "timeout": self._timeout_s,
+            "max_retries": self._max_retries,
+        }
+        if endpoint.base_url:
+            kwargs["base_url"] = endpoint.base_url
+        if self._http_client is not None:
+            kwargs["http_client"] = self._http_client
+        return AsyncOpenAI(**kwargs)
+
+    def _openai_for(self, endpoint: ChatEndpoint) -> AsyncOpenAI:
+        if endpoint == self._primary:
+            return self._client
+        if endpoint not in self._clients:
+            self._clients[endpoint] = self._build_openai(endpoint)
+        return self._clients[endpoint]
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @property
+    def base_url(self) -> str | None:
+        return self._base_url
+
+    @property
+    def supports_json_schema(self) -> bool:
+        return self._structured_output and (self._base_url, self._model) not in _JSON_SCHEMA_UNSUPPORTED
 
     @classmethod
     def from_settings(cls, settings: Settings) -> OpenAIChatClient | None:
@@ -35,36 +127,202 @@ class OpenAIChatClient:
             timeout_s=settings.openai_timeout_s,
             max_retries=settings.openai_max_retries,
             base_url=settings.resolved_openai_base_url(),
+            structured_output=settings.openai_structured_output,
         )
 
-    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
-        resp = await self._client.chat.completions.create(
-            model=self._model,
-            temperature=0.2,
-            messages=[
+    def _ordered_endpoints(self) -> list[ChatEndpoint]:
+        # Config order wins among healthy endpoints; unhealthy ones are only tried last.
+        return sorted(self._endpoints, key=lambda ep: not endpoint_health.is_healthy(ep.key))
+
+    def _hedge_delay_s(self, endpoint: ChatEndpoint, *, kind: str) -> float | None:
+        if self._hedge_percentile is None:
+            return None
+        delay = endpoint_health.latency_percentile(endpoint.key, kind=kind, q=self._hedge_percentile)
+        if delay is None:
+            delay = self._hedge_initial_delay_s
+        if delay is None:
+            return None
+        return max(self._hedge_min_delay_s, delay)
+
+    async def _hedged(
+        self,
+        attempt: Callable[[ChatEndpoint], Awaitable[T]],
+        *,
+        kind: str,
+        discard: Callable[[T], Awaitable[None]] | None = None,
+    ) -> T:
+        remaining = self._ordered_endpoints()
+        pending: dict[asyncio.Task[T], tuple[ChatEndpoint, float]] = {}
+        hedged = False
+        last_exc: BaseException | None = None
+
+        def launch() -> ChatEndpoint:
+            endpoint = remaining.pop(0)
+            pending[asyncio.create_task(attempt(endpoint))] = (endpoint, time.monotonic())
+            return endpoint
+
+        first = launch()
+        try:
+            while pending:
+                timeout = None
+                if not hedged and remaining and len(pending) == 1:
+                    timeout = self._hedge_delay_s(first, kind=kind)
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    hedged = True
+                    endpoint_health.incr(launch().key, "hedges")
+                    continue
+
+                for task in done:
+                    endpoint, started = pending.pop(task)
+                    exc = task.exception()
+                    if exc is None:
+                        endpoint_health.record_success(
+                            endpoint.key, kind=kind, latency_s=time.monotonic() - started
+                        )
+                        if hedged and endpoint != first:
+                            endpoint_health.incr(endpoint.key, "hedge_wins")
+                        return task.result()
+                    if not _is_failover_error(exc):
+                        raise exc
+                    endpoint_health.record_failure(endpoint.key)
+                    last_exc = exc
+
+                if not pending and remaining:
+                    endpoint_health.incr(launch().key, "failovers")
+
+            assert last_exc is not None
+            raise last_exc
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                results = await asyncio.gather(*pending, return_exceptions=True)
+                if discard is not None:
+                    for result in results:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+
+    async def _create(
+        self,
+        endpoint: ChatEndpoint,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        response_model: type[BaseModel] | None,
+        stream: bool = False,
+    ) -> Any:
+        client = self._openai_for(endpoint)
+        kwargs: dict[str, Any] = {
+            "model": endpoint.model,
+            "temperature": 0.2,
+            "messages": [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
+        }
+        if stream:
+            kwargs["stream"] = True
+        schema_key = (endpoint.base_url, endpoint.model)
+        if response_model is None or not self._structured_output or schema_key in _JSON_SCHEMA_UNSUPPORTED:
+            return await client.chat.completions.create(**kwargs)
+
+        try:
+            return await client.chat.completions.create(
+                **kwargs, response_format=_json_schema_response_format(response_model)
+            )
+        except (BadRequestError, UnprocessableEntityError) as schema_exc:
+            # Capability negotiation: if the same request succeeds without `response_format`,
+            # the provider doesn't support JSON schema output and we stop sending it.
+            try:
+                resp = await client.chat.completions.create(**kwargs)
+            except Exception:
+                raise schema_exc from None
+            _JSON_SCHEMA_UNSUPPORTED.add(schema_key)
+            return resp
+
+    async def complete(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        response_model: type[BaseModel] | None = None,
+    ) -> str:
+        resp = await self._hedged(
+            lambda endpoint: self._create(
+                endpoint,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                response_model=response_model,
+            ),
+            kind="complete",
         )
         return resp.choices[0].message.content or ""
 
-    async def stream_complete(self, *, system_prompt: str, user_prompt: str) -> AsyncIterator[str]:
-        stream = await self._client.chat.completions.create(
-            model=self._model,
-            temperature=0.2,
+    async def _open_stream(
+        self,
+        endpoint: ChatEndpoint,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        response_model: type[BaseModel] | None,
+    ) -> tuple[str, Any]:
+        stream = await self._create(
+            endpoint,
+            system_prompt=system_prompt,
+            user_prompt=user_prompt,
+            response_model=response_model,
             stream=True,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
         )
-        async for chunk in stream:
-            if not chunk.choices:
-                continue
-            delta = chunk.choices[0].delta
-            content = getattr(delta, "content", None)
-            if content:
+        try:
+            async for content in _iter_stream_content(stream):
+                return content, stream
+        except BaseException:
+            await stream.close()
+            raise
+        return "", stream
+
+    async def stream_complete(
+        self,
+        *,
+        system_prompt: str,
+        user_prompt: str,
+        response_model: type[BaseModel] | None = None,
+    ) -> AsyncIterator[str]:
+        # The first endpoint to produce a token wins; hedging is based on time-to-first-token.
+        first, stream = await self._hedged(
+            lambda endpoint: self._open_stream(
+                endpoint,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                response_model=response_model,
+            ),
+            kind="first_token",
+            discard=_close_opened_stream,
+        )
+        try:
+            if first:
+                yield first
+            async for content in _iter_stream_content(stream):
                 yield content
+        finally:
+            await stream.close()
+
+
+async def _close_opened_stream(opened: tuple[str, Any]) -> None:
+    await opened[1].close()
+
+
+async def _iter_stream_content(stream: Any) -> AsyncIterator[str]:
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        content = getattr(delta, "content", None)
+        if content:
+            yield content
 
 
 class OpenAIEmbeddingsClient:
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from typing import Any
+
+from app.llm.client import LLMClient
+
+
+class PhaseRoutedLLMClient:
+    def __init__(self, *, default: LLMClient, routes: dict[str, LLMClient] | None = None) -> None:
+        self._default = default
+        self._routes = dict(routes or {})
+
+    @property
+    def model(self) -> str | None:
+        return getattr(self._default, "model", None)
+
+    @property
+    def supports_json_schema(self) -> bool:
+        return bool(getattr(self._default, "supports_json_schema", False))
+
+    def for_phase(self, phase: str | None) -> LLMClient:
+        if not phase:
+            return self._default
+        return self._routes.get(phase, self._default)
+
+    async def complete(self, *, system_prompt: str, user_prompt: str, **kwargs: Any) -> str:
+        return await self._default.complete(system_prompt=system_prompt, user_prompt=user_prompt, **kwargs)
+
+    async def stream_complete(self, *, system_prompt: str, user_prompt: str, **kwargs: Any) -> AsyncIterator[str]:
+        async for delta in self._default.stream_complete(  # type: ignore[attr-defined]
+            system_prompt=system_prompt, user_prompt=user_prompt, **kwargs
+        ):
+            yield delta
+
+
+def llm_for_phase(llm: LLMClient, phase: str | None) -> LLMClient:
+    for_phase = getattr(llm, "for_phase", None)
+    if for_phase is None:
+        return llm
+    return for_phase(phase)
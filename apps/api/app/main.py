@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -12,6 +14,7 @@ from app.api.routers.brief_snapshots import router as brief_snapshots_router
 from app.api.routers.briefs import router as briefs_router
 from app.api.routers.exports import router as exports_router
 from app.api.routers.license import router as license_router
+from app.api.routers.metrics import router as metrics_router
 from app.api.routers.open_threads import router as open_threads_router
 from app.api.routers.propagation import router as propagation_router
 from app.api.routers.settings import router as settings_router
@@ -20,7 +23,12 @@ from app.core.config import Settings, load_settings
 from app.llm.client import LLMClient
 from app.llm.embeddings_client import EmbeddingsClient
 from app.services.db_migrations import upgrade_head
+from app.services.event_bus import EVENT_BUS_MEMORY, create_event_bus
+from app.services.export_cache import ExportCache, default_export_cache_dir
 from app.services.license_store import license_status
+from app.services.provider_breaker import ProviderBreakerRegistry
+from app.services.run_context import RunContextGenerations
+from app.services.step_cancellation import run_step_watchdog, shutdown_autoruns
 from app.services.workflow_events import WorkflowEventHub
 
 
@@ -39,6 +47,13 @@ def create_app(
     app.state.workflow_event_hub = WorkflowEventHub()
     app.state.workflow_autorun_tasks = {}
     app.state.workflow_autorun_stop_flags = {}
+    app.state.workflow_step_cancels = {}
+    app.state.run_context_generations = RunContextGenerations()
+    app.state.provider_breakers = ProviderBreakerRegistry()
+    app.state.export_cache = ExportCache(
+        directory=settings.export_cache_dir or default_export_cache_dir(),
+        max_bytes=settings.export_cache_max_bytes,
+    )
 
     app.add_middleware(
         CORSMiddleware,
@@ -96,6 +111,7 @@ def create_app(
     app.include_router(propagation_router)
     app.include_router(open_threads_router)
     app.include_router(exports_router)
+    app.include_router(metrics_router)
 
     if settings.static_dir:
         app.mount("/", StaticFiles(directory=settings.static_dir, html=True), name="static")
@@ -107,9 +123,29 @@ def create_app(
         engine = create_async_engine(settings.database_url, pool_pre_ping=True)
         app.state.engine = engine
         app.state.sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+        if settings.event_bus != EVENT_BUS_MEMORY:
+            hub = WorkflowEventHub(
+                bus=create_event_bus(
+                    backend=settings.event_bus,
+                    database_url=settings.database_url,
+                    sessionmaker=app.state.sessionmaker,
+                    socket_path=settings.event_bus_socket_path,
+                    inline_max_bytes=settings.event_bus_inline_max_bytes,
+                )
+            )
+            await hub.start()
+            app.state.workflow_event_hub = hub
+        app.state.step_watchdog_task = asyncio.create_task(
+            run_step_watchdog(app, interval_s=settings.step_watchdog_interval_s)
+        )
 
     @app.on_event("shutdown")
     async def _shutdown() -> None:
+        watchdog = getattr(app.state, "step_watchdog_task", None)
+        if watchdog is not None:
+            watchdog.cancel()
+        await shutdown_autoruns(app)
+        await app.state.workflow_event_hub.close()
         engine = getattr(app.state, "engine", None)
         if engine:
             await engine.dispose()
@@ -3,7 +3,7 @@ from __future__ import annotations
 import uuid
 from typing import Any
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
 
 
 class NovelOutlineChapter(BaseModel):
@@ -119,10 +119,30 @@ class CriticResult(BaseModel):
         return {}
 
 
+class SelfReviewedDraft(DraftResult):
+    # The writer's own critic pass over the draft, returned in the same call.
+    self_assessment: CriticResult | None = None
+
+    @field_validator("self_assessment", mode="before")
+    @classmethod
+    def _coerce_self_assessment(cls, value: Any) -> CriticResult | None:
+        # A missing or malformed self-assessment only means the separate critic has to run.
+        if not isinstance(value, (dict, CriticResult)):
+            return None
+        try:
+            return CriticResult.model_validate(value)
+        except ValidationError:
+            return None
+
+
 class RewriteResult(BaseModel):
     replacements: dict[int, str] = Field(default_factory=dict)
 
 
+class ParagraphRewriteResult(BaseModel):
+    text: str
+
+
 class ScriptSceneListItem(BaseModel):
     index: int = Field(ge=1)
     slug: str
@@ -0,0 +1,12 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class LlmMetricsRead(BaseModel):
+    totals: dict[str, int] = Field(default_factory=dict)
+    by_phase: dict[str, dict[str, int]] = Field(default_factory=dict)
+    endpoints: dict[str, dict[str, Any]] = Field(default_factory=dict)
+    breakers: list[dict[str, Any]] = Field(default_factory=list)
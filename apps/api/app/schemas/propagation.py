@@ -21,6 +21,8 @@ class ImpactReportItem(BaseModel):
     ordinal: int | None
     title: str | None
     reason: str
+    relevance: float | None = None
+    evidence: list[dict[str, Any]] = Field(default_factory=list)
 
 
 class PropagationPreviewResponse(BaseModel):
@@ -55,6 +57,8 @@ class ArtifactImpactRead(BaseModel):
     artifact_id: uuid.UUID
     artifact_version_id: uuid.UUID
     reason: str
+    relevance: float | None = None
+    evidence: list[dict[str, Any]] | None = None
     repaired_artifact_version_id: uuid.UUID | None
     repaired_at: datetime | None
     created_at: datetime
@@ -65,8 +69,13 @@ class PropagationApplyResponse(BaseModel):
     impacts: list[ArtifactImpactRead] = Field(default_factory=list)
 
 
+MAX_REPAIR_CONCURRENCY = 16
+
+
 class PropagationRepairRequest(BaseModel):
     artifact_ids: list[uuid.UUID] | None = None
+    # Repairs run at once; defaults to the propagation_repair_concurrency setting.
+    concurrency: int | None = Field(default=None, ge=1, le=MAX_REPAIR_CONCURRENCY)
 
 
 class RepairedArtifactVersion(BaseModel):
@@ -77,4 +86,6 @@ class RepairedArtifactVersion(BaseModel):
 class PropagationRepairResponse(BaseModel):
     repaired: list[RepairedArtifactVersion] = Field(default_factory=list)
     impacts: list[ArtifactImpactRead] = Field(default_factory=list)
+    # Set when the repaired versions could not be indexed for retrieval; they are saved regardless.
+    index_error: str | None = None
 
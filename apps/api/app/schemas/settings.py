@@ -1,10 +1,22 @@
 from __future__ import annotations
 
-from pydantic import BaseModel, ConfigDict
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
 
 from app.schemas.briefs import ScriptFormat
 
 
+class CriticPolicySettings(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    # fast_path and sample skip state/digest extraction along with the critic on skipped units.
+    mode: Literal["always", "fast_path", "sample", "deferred"] = "always"
+    min_soft_score: int = Field(default=85, ge=0)
+    recent_units: int = Field(default=3, ge=1)
+    sample_every: int = Field(default=3, ge=1)
+
+
 class OutputSpecDefaultsRead(BaseModel):
     model_config = ConfigDict(extra="allow")
 
@@ -14,6 +26,17 @@ class OutputSpecDefaultsRead(BaseModel):
     max_fix_attempts: int
     auto_step_retries: int
     auto_step_backoff_s: float
+    step_deadline_s: float
+    step_idle_timeout_s: float
+    phase_deadlines: dict[str, dict[str, float]] = Field(default_factory=dict)
+    speculative_draft_window: int = 0
+    speculative_draft_concurrency: int = 2
+    critic_policy: CriticPolicySettings = Field(default_factory=CriticPolicySettings)
+    draft_self_review: bool = False
+    fix_mode: Literal["whole", "paragraph"] = "whole"
+    paragraph_fix_concurrency: int = 4
+    propagation_repair_concurrency: int = 4
+    propagation_impact_min_relevance: float = 0.3
 
 
 class OutputSpecDefaultsPatch(BaseModel):
@@ -25,6 +48,33 @@ class OutputSpecDefaultsPatch(BaseModel):
     max_fix_attempts: int | None = None
     auto_step_retries: int | None = None
     auto_step_backoff_s: float | None = None
+    step_deadline_s: float | None = None
+    step_idle_timeout_s: float | None = None
+    phase_deadlines: dict[str, dict[str, float]] | None = None
+    speculative_draft_window: int | None = None
+    speculative_draft_concurrency: int | None = None
+    critic_policy: CriticPolicySettings | None = None
+    draft_self_review: bool | None = None
+    fix_mode: Literal["whole", "paragraph"] | None = None
+    paragraph_fix_concurrency: int | None = None
+    propagation_repair_concurrency: int | None = None
+    propagation_impact_min_relevance: float | None = None
+
+
+class LlmFailoverEndpointRead(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    base_url: str | None = None
+    model: str | None = None
+    api_key_configured: bool = False
+
+
+class LlmFailoverEndpointWrite(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    base_url: str | None = None
+    model: str | None = None
+    api_key: str | None = None
 
 
 class LlmProviderSettingsRead(BaseModel):
@@ -35,6 +85,10 @@ class LlmProviderSettingsRead(BaseModel):
     embeddings_model: str
     timeout_s: float
     max_retries: int
+    structured_output: bool = False
+    failover_endpoints: list[LlmFailoverEndpointRead] = Field(default_factory=list)
+    hedge_percentile: float | None = None
+    hedge_initial_delay_s: float | None = None
     api_key_configured: bool
 
 
@@ -46,9 +100,45 @@ class LlmProviderSettingsPatch(BaseModel):
     embeddings_model: str | None = None
     timeout_s: float | None = None
     max_retries: int | None = None
+    structured_output: bool | None = None
+    failover_endpoints: list[LlmFailoverEndpointWrite] | None = None
+    hedge_percentile: float | None = Field(default=None, gt=0, lt=100)
+    hedge_initial_delay_s: float | None = Field(default=None, ge=0)
     api_key: str | None = None
 
 
+class LlmPhaseRouteRead(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    model: str | None = None
+    base_url: str | None = None
+    api_key_configured: bool = False
+
+
+class LlmPhaseRouteWrite(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    model: str | None = None
+    base_url: str | None = None
+    api_key: str | None = None
+
+
+class LlmPhaseRoutingRead(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    fast_model: str | None = None
+    lightweight_phases: list[str] = Field(default_factory=list)
+    routes: dict[str, LlmPhaseRouteRead] = Field(default_factory=dict)
+    effective_models: dict[str, str] = Field(default_factory=dict)
+
+
+class LlmPhaseRoutingPatch(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    fast_model: str | None = None
+    routes: dict[str, LlmPhaseRouteWrite | None] | None = None
+
+
 class NovelToScriptPromptDefaultsRead(BaseModel):
     model_config = ConfigDict(extra="allow")
 
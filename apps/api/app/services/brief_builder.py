@@ -7,6 +7,7 @@ from pydantic import ValidationError
 
 from app.db.models import WorkflowKind
 from app.llm.client import LLMClient
+from app.llm.routing import llm_for_phase
 from app.schemas.brief_messages import BriefBuilderResult
 from app.services.prompting import extract_json_object, load_prompt, render_prompt
 
@@ -29,7 +30,9 @@ async def parse_brief_builder_output(
             load_prompt("json_repair_user.md"),
             {"INVALID_OUTPUT": raw_output or str(exc)},
         )
-        repaired = await llm.complete(system_prompt=repair_system, user_prompt=repair_user)
+        repaired = await llm_for_phase(llm, "json_repair").complete(
+            system_prompt=repair_system, user_prompt=repair_user
+        )
         try:
             payload = extract_json_object(repaired)
             return BriefBuilderResult.model_validate(payload)
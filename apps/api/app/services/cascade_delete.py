@@ -24,8 +24,11 @@ from app.db.models import (
     PropagationEvent,
     SnapshotGlossaryEntry,
     WorkflowRun,
+    WorkflowRunStateBlob,
+    WorkflowRunStateItem,
     WorkflowStepRun,
 )
+from app.services.step_cancellation import CANCEL_REASON_DELETED, cancel_running_step
 
 
 def stop_autorun_best_effort(*, app: FastAPI | None, run_id: uuid.UUID) -> None:
@@ -37,6 +40,7 @@ def stop_autorun_best_effort(*, app: FastAPI | None, run_id: uuid.UUID) -> None:
         stop_event = flags.get(run_id)
         if isinstance(stop_event, asyncio.Event):
             stop_event.set()
+    cancel_running_step(app=app, run_id=run_id, reason=CANCEL_REASON_DELETED)
 
     tasks = getattr(app.state, "workflow_autorun_tasks", None)
     if isinstance(tasks, dict):
@@ -88,6 +92,8 @@ async def delete_workflow_run(
     await session.execute(delete(MemoryChunk).where(MemoryChunk.artifact_version_id.in_(version_ids)))
 
     await session.execute(delete(WorkflowStepRun).where(WorkflowStepRun.workflow_run_id == run_id))
+    await session.execute(delete(WorkflowRunStateItem).where(WorkflowRunStateItem.workflow_run_id == run_id))
+    await session.execute(delete(WorkflowRunStateBlob).where(WorkflowRunStateBlob.workflow_run_id == run_id))
     await session.execute(delete(ArtifactVersion).where(ArtifactVersion.id.in_(version_ids)))
     await session.execute(delete(WorkflowRun).where(WorkflowRun.id == run_id))
 
@@ -130,6 +136,12 @@ async def delete_brief_snapshot(
     await session.execute(delete(MemoryChunk).where(MemoryChunk.brief_snapshot_id == snapshot_id))
 
     await session.execute(delete(WorkflowStepRun).where(WorkflowStepRun.workflow_run_id.in_(run_ids_subq)))
+    await session.execute(
+        delete(WorkflowRunStateItem).where(WorkflowRunStateItem.workflow_run_id.in_(run_ids_subq))
+    )
+    await session.execute(
+        delete(WorkflowRunStateBlob).where(WorkflowRunStateBlob.workflow_run_id.in_(run_ids_subq))
+    )
     await session.execute(
         delete(ArtifactVersion).where(
             or_(
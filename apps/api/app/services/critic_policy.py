@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import ValidationError
+
+from app.schemas.generation import CriticResult
+from app.services.llm_metrics import current_step_metrics, llm_metrics
+
+CRITIC_POLICY_ALWAYS = "always"
+# Skip the LLM critic while the deterministic checks pass and recent soft scores stay high.
+CRITIC_POLICY_FAST_PATH = "fast_path"
+# Run the LLM critic on every Nth unit only.
+CRITIC_POLICY_SAMPLE = "sample"
+# Trade-off of both: the critic is also what extracts a unit's state_patch and fact digest, so a
+# skipped unit leaves current_state as it was and gets the opening of its text as fact digest.
+# Skipped units are counted as critic:<mode>:state_not_updated and flagged in the step metrics.
+# Commit first and critique the unit while the next one is drafted; reopen it only on failure.
+CRITIC_POLICY_DEFERRED = "deferred"
+CRITIC_POLICIES = (CRITIC_POLICY_ALWAYS, CRITIC_POLICY_FAST_PATH, CRITIC_POLICY_SAMPLE, CRITIC_POLICY_DEFERRED)
+
+CRITIC_DECISION_LLM = "llm"
+CRITIC_DECISION_SKIP = "skip"
+CRITIC_DECISION_DEFER = "defer"
+CRITIC_DECISION_DEFERRED_REVIEW = "deferred_review"
+# The draft came with a passing self-assessment from the same call, which stands in for the critic.
+CRITIC_DECISION_SELF_REVIEW = "self_review"
+
+DEFAULT_CRITIC_POLICY: dict[str, Any] = {
+    "mode": CRITIC_POLICY_ALWAYS,
+    "min_soft_score": 85,
+    "recent_units": 3,
+    "sample_every": 3,
+}
+
+_RECENT_SCORES_KEY = "critic_recent_scores"
+_SKIP_STREAK_KEY = "critic_skip_streak"
+_MAX_RECENT_SCORES = 10
+
+
+@dataclass(frozen=True, slots=True)
+class CriticPolicy:
+    mode: str = CRITIC_POLICY_ALWAYS
+    min_soft_score: int = 85
+    recent_units: int = 3
+    # For fast_path this also bounds how many units in a row may skip the LLM critic.
+    sample_every: int = 3
+
+
+def normalize_critic_policy(raw: object) -> dict[str, Any]:
+    source = raw if isinstance(raw, dict) else {"mode": raw} if isinstance(raw, str) else {}
+    out = dict(DEFAULT_CRITIC_POLICY)
+    mode = str(source.get("mode") or "").strip()
+    if mode in CRITIC_POLICIES:
+        out["mode"] = mode
+    for key, minimum in (("min_soft_score", 0), ("recent_units", 1), ("sample_every", 1)):
+        try:
+            out[key] = max(minimum, int(source.get(key, out[key])))
+        except (TypeError, ValueError):
+            continue
+    return out
+
+
+def resolve_critic_policy(*, runtime_prefs: dict[str, Any], state: dict[str, Any]) -> CriticPolicy:
+    # A run may override the server default, e.g. for a trusted prompt preset.
+    merged = normalize_critic_policy(runtime_prefs.get("critic_policy"))
+    override = state.get("critic_policy")
+    if isinstance(override, str):
+        override = {"mode": override}
+    if isinstance(override, dict):
+        merged = normalize_critic_policy({**merged, **override})
+    return CriticPolicy(**merged)
+
+
+def resolve_draft_self_review(*, runtime_prefs: dict[str, Any], state: dict[str, Any]) -> bool:
+    override = state.get("draft_self_review")
+    if isinstance(override, bool):
+        return override
+    return bool(runtime_prefs.get("draft_self_review"))
+
+
+def draft_self_assessment(draft_state: dict[str, Any]) -> CriticResult | None:
+    raw = draft_state.get("self_assessment")
+    if not isinstance(raw, dict):
+        return None
+    try:
+        return CriticResult.model_validate(raw)
+    except ValidationError:
+        return None
+
+
+def critic_decision(
+    policy: CriticPolicy,
+    *,
+    state: dict[str, Any],
+    unit_index: int,
+    deferrable: bool = False,
+    draft: dict[str, Any] | None = None,
+) -> str:
+    # A unit the critic already sent back for fixing is always re-checked by it.
+    if int(state.get("fix_attempt") or 0) > 0:
+        return CRITIC_DECISION_LLM
+    # A speculative draft written against an older current_state is checked against the latest
+    # one before it can be committed, whatever the policy or its own review says.
+    if draft is not None and draft.get("speculative") == "stale":
+        return CRITIC_DECISION_LLM
+    if draft is not None and "self_assessment" in draft:
+        # Self-reviewed drafts only go to the critic when their own review flagged a problem.
+        assessment = draft_self_assessment(draft)
+        if assessment is not None and not critic_rejected(assessment):
+            return CRITIC_DECISION_SELF_REVIEW
+        return CRITIC_DECISION_LLM
+    if policy.mode == CRITIC_POLICY_FAST_PATH:
+        recent = list(state.get(_RECENT_SCORES_KEY) or [])[-policy.recent_units :]
+        streak = int(state.get(_SKIP_STREAK_KEY) or 0)
+        trusted = len(recent) >= policy.recent_units and all(
+            isinstance(scores, dict) and scores and min(scores.values()) >= policy.min_soft_score
+            for scores in recent
+        )
+        if trusted and streak < policy.sample_every:
+            return CRITIC_DECISION_SKIP
+        return CRITIC_DECISION_LLM
+    if policy.mode == CRITIC_POLICY_SAMPLE:
+        return CRITIC_DECISION_LLM if (max(1, unit_index) - 1) % policy.sample_every == 0 else CRITIC_DECISION_SKIP
+    if policy.mode == CRITIC_POLICY_DEFERRED and deferrable:
+        return CRITIC_DECISION_DEFER
+    return CRITIC_DECISION_LLM
+
+
+def critic_rejected(critic: CriticResult) -> bool:
+    return (not critic.hard_pass) or bool(critic.rewrite_paragraph_indices)
+
+
+def skipped_critic_result(*, draft_text: str, soft_scores: dict[str, int] | None = None) -> CriticResult:
+    # Stands in for the LLM critic on the fast path. The digest falls back to the opening of the
+    # text, the same way the novel source digests do.
+    return CriticResult(
+        hard_pass=True,
+        hard_errors=[],
+        soft_scores=dict(soft_scores or {}),
+        rewrite_paragraph_indices=[],
+        rewrite_instructions="",
+        fact_digest=(draft_text or "").strip()[:200],
+        tone_digest="",
+        state_patch={},
+    )
+
+
+def stand_in_critic_result(*, decision: str, draft_state: dict[str, Any], draft_text: str) -> CriticResult:
+    # The result used in place of the LLM critic for any decision other than CRITIC_DECISION_LLM.
+    assessment = draft_self_assessment(draft_state) if decision == CRITIC_DECISION_SELF_REVIEW else None
+    if assessment is None:
+        return skipped_critic_result(draft_text=draft_text)
+    if not assessment.fact_digest:
+        assessment.fact_digest = (draft_text or "").strip()[:200]
+    return assessment
+
+
+def record_critic_outcome(
+    *,
+    state: dict[str, Any],
+    phase: str,
+    policy: CriticPolicy,
+    decision: str,
+    critic: CriticResult | None = None,
+) -> None:
+    # Throughput: how many units each policy sent to the LLM, skipped or deferred. Quality: how
+    # often the LLM critic rejected a unit, and the sum of each reviewed unit's lowest soft score.
+    prefix = f"critic:{policy.mode}"
+    llm_metrics.incr(phase=phase, name=f"{prefix}:{decision}")
+    if decision == CRITIC_DECISION_SKIP:
+        state[_SKIP_STREAK_KEY] = int(state.get(_SKIP_STREAK_KEY) or 0) + 1
+        llm_metrics.incr(phase=phase, name=f"{prefix}:state_not_updated")
+    elif critic is not None:
+        state[_SKIP_STREAK_KEY] = 0
+        if critic_rejected(critic):
+            llm_metrics.incr(phase=phase, name=f"{prefix}:rejected")
+        scores = {key: int(value) for key, value in (critic.soft_scores or {}).items()}
+        if scores:
+            llm_metrics.incr(phase=phase, name=f"{prefix}:scored")
+            llm_metrics.incr(phase=phase, name=f"{prefix}:score_total", amount=min(scores.values()))
+            recent = list(state.get(_RECENT_SCORES_KEY) or [])
+            recent.append(scores)
+            state[_RECENT_SCORES_KEY] = recent[-_MAX_RECENT_SCORES:]
+
+    step_metrics = current_step_metrics()
+    if step_metrics is not None:
+        step_metrics.critic_policy = policy.mode
+        step_metrics.critic_decision = decision
+        step_metrics.critic_state_updated = decision != CRITIC_DECISION_SKIP
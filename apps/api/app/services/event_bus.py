@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.models import WorkflowEventPayload
+
+EVENT_BUS_MEMORY = "memory"
+EVENT_BUS_POSTGRES = "postgres"
+EVENT_BUS_UNIX = "unix"
+EVENT_BUSES = (EVENT_BUS_MEMORY, EVENT_BUS_POSTGRES, EVENT_BUS_UNIX)
+
+EventSink = Callable[[uuid.UUID, str, dict[str, Any]], None]
+
+_POSTGRES_CHANNEL = "workflow_events"
+# Postgres rejects NOTIFY payloads of 8000 bytes or more.
+_DEFAULT_INLINE_MAX_BYTES = 7000
+_PAYLOAD_TTL = timedelta(minutes=10)
+_PRUNE_INTERVAL_S = 60.0
+
+
+class EventBus(abc.ABC):
+    # Carries workflow events between the processes serving the API. Every process's hub gets every
+    # event, including its own, through the sink; the hub keeps the per-run logs and subscribers.
+
+    # Whether other processes may have subscribers this process cannot see.
+    cross_process = True
+
+    def __init__(self) -> None:
+        self._sink: EventSink | None = None
+
+    def attach(self, sink: EventSink) -> None:
+        self._sink = sink
+
+    def _deliver(self, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None:
+        if self._sink is not None:
+            self._sink(run_id, name, payload)
+
+    async def start(self) -> None:
+        return None
+
+    @abc.abstractmethod
+    async def publish(self, *, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None: ...
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryEventBus(EventBus):
+    # Single process: events go straight to this process's hub.
+
+    cross_process = False
+
+    async def publish(self, *, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None:
+        self._deliver(run_id, name, payload)
+
+
+class _WireEventBus(EventBus):
+    # Shared by the cross-process backends: events travel as one JSON message each, and payloads
+    # too large for a message are stored in workflow_event_payloads and sent as a reference.
+
+    def __init__(
+        self,
+        *,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        inline_max_bytes: int = _DEFAULT_INLINE_MAX_BYTES,
+    ) -> None:
+        super().__init__()
+        self._sessionmaker = sessionmaker
+        self._inline_max_bytes = inline_max_bytes
+        self._last_prune = 0.0
+        # Messages are resolved and delivered in arrival order by a single task, so a payload that
+        # has to be fetched by reference does not let later events overtake it.
+        self._inbox: asyncio.Queue[str] = asyncio.Queue()
+        self._inbox_task: asyncio.Task[None] | None = None
+
+    async def _encode(self, *, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> str:
+        message = json.dumps(
+            {"run_id": str(run_id), "name": name, "payload": payload}, ensure_ascii=False, default=str
+        )
+        if len(message.encode("utf-8")) <= self._inline_max_bytes:
+            return message
+        ref = uuid.uuid4()
+        async with self._sessionmaker() as session:
+            session.add(WorkflowEventPayload(id=ref, workflow_run_id=run_id, payload=payload))
+            await self._prune(session)
+            await session.commit()
+        return json.dumps({"run_id": str(run_id), "name": name, "ref": str(ref)})
+
+    async def _prune(self, session: AsyncSession) -> None:
+        now = time.monotonic()
+        if now - self._last_prune < _PRUNE_INTERVAL_S:
+            return
+        self._last_prune = now
+        cutoff = datetime.now(UTC) - _PAYLOAD_TTL
+        await session.execute(delete(WorkflowEventPayload).where(WorkflowEventPayload.created_at < cutoff))
+
+    def _receive(self, message: str) -> None:
+        self._inbox.put_nowait(message)
+
+    def _start_inbox(self) -> None:
+        if self._inbox_task is None:
+            self._inbox_task = asyncio.create_task(self._drain_inbox())
+
+    async def _drain_inbox(self) -> None:
+        while True:
+            message = await self._inbox.get()
+            try:
+                data = json.loads(message)
+                run_id = uuid.UUID(str(data["run_id"]))
+                payload = data.get("payload")
+                if "ref" in data:
+                    async with self._sessionmaker() as session:
+                        row = await session.get(WorkflowEventPayload, uuid.UUID(str(data["ref"])))
+                    payload = row.payload if row is not None else None
+                if isinstance(payload, dict):
+                    self._deliver(run_id, str(data["name"]), payload)
+            except Exception:
+                # A malformed message, or a reference that was pruned already: drop the event.
+                # Subscribers see the gap as missing output, not a broken stream.
+                continue
+
+    async def _stop_inbox(self) -> None:
+        if self._inbox_task is not None:
+            self._inbox_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._inbox_task
+            self._inbox_task = None
+
+
+class PostgresEventBus(_WireEventBus):
+    # LISTEN/NOTIFY on one channel. Notifications reach every listening connection, including the
+    # publisher's own, in commit order.
+
+    def __init__(
+        self,
+        *,
+        database_url: str,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        inline_max_bytes: int = _DEFAULT_INLINE_MAX_BYTES,
+    ) -> None:
+        super().__init__(sessionmaker=sessionmaker, inline_max_bytes=inline_max_bytes)
+        self._dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listener: Any = None
+        self._pool: Any = None
+
+    async def start(self) -> None:
+        import asyncpg
+
+        self._start_inbox()
+        self._listener = await asyncpg.connect(self._dsn)
+        await self._listener.add_listener(_POSTGRES_CHANNEL, self._on_notify)
+        self._pool = await asyncpg.create_pool(self._dsn, min_size=1, max_size=4)
+
+    def _on_notify(self, _connection: Any, _pid: int, _channel: str, message: str) -> None:
+        self._receive(message)
+
+    async def publish(self, *, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None:
+        if self._pool is None:
+            raise RuntimeError("event_bus_not_started")
+        message = await self._encode(run_id=run_id, name=name, payload=payload)
+        await self._pool.execute("SELECT pg_notify($1, $2)", _POSTGRES_CHANNEL, message)
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            with contextlib.suppress(Exception):
+                await self._listener.remove_listener(_POSTGRES_CHANNEL, self._on_notify)
+            await self._listener.close()
+            self._listener = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        await self._stop_inbox()
+
+
+def default_event_bus_socket_path() -> str:
+    return os.path.join(tempfile.gettempdir(), "writer_agent_events.sock")
+
+
+class UnixSocketEventBus(_WireEventBus):
+    # A local broker for processes on one machine (the desktop build). The first process to bind
+    # the socket relays every message to all connected processes; the others connect to it. If the
+    # broker goes away, the remaining processes race to take over.
+
+    def __init__(
+        self,
+        *,
+        path: str,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        inline_max_bytes: int = _DEFAULT_INLINE_MAX_BYTES,
+    ) -> None:
+        super().__init__(sessionmaker=sessionmaker, inline_max_bytes=inline_max_bytes)
+        self._path = path
+        self._server: asyncio.AbstractServer | None = None
+        self._peers: set[asyncio.StreamWriter] = set()
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task[None] | None = None
+        self._connected = asyncio.Event()
+        self._closed = False
+
+    @property
+    def is_broker(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> None:
+        if not hasattr(asyncio, "start_unix_server"):
+            raise RuntimeError("unix_socket_event_bus_unsupported")
+        self._start_inbox()
+        await self._connect()
+
+    async def _connect(self) -> None:
+        self._connected.clear()
+        while not self._closed:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self._path)
+            except (FileNotFoundError, ConnectionRefusedError):
+                # Nobody is serving: the socket file is missing or left behind by a dead broker.
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(self._path)
+                try:
+                    self._server = await asyncio.start_unix_server(self._serve_peer, path=self._path)
+                except OSError:
+                    # Another process became the broker first; connect to it instead.
+                    await asyncio.sleep(0.05)
+                    continue
+                self._connected.set()
+                return
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._read_from_broker(reader))
+            self._connected.set()
+            return
+
+    async def _serve_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._peers.add(writer)
+        try:
+            while line := await reader.readline():
+                self._broadcast(line)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._peers.discard(writer)
+            writer.close()
+
+    def _broadcast(self, line: bytes) -> None:
+        for peer in list(self._peers):
+            if peer.is_closing():
+                self._peers.discard(peer)
+                continue
+            peer.write(line)
+        self._receive(line.decode("utf-8"))
+
+    async def _read_from_broker(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while line := await reader.readline():
+                self._receive(line.decode("utf-8"))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        if not self._closed:
+            self._writer = None
+            await self._connect()
+
+    async def publish(self, *, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None:
+        message = await self._encode(run_id=run_id, name=name, payload=payload)
+        line = message.encode("utf-8") + b"\n"
+        await self._connected.wait()
+        if self._server is not None:
+            self._broadcast(line)
+            return
+        if self._writer is None:
+            raise RuntimeError("event_bus_not_connected")
+        self._writer.write(line)
+        await self._writer.drain()
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader_task
+        if self._writer is not None:
+            self._writer.close()
+        for peer in list(self._peers):
+            peer.close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._path)
+            self._server = None
+        await self._stop_inbox()
+
+
+def create_event_bus(
+    *,
+    backend: str,
+    database_url: str,
+    sessionmaker: async_sessionmaker[AsyncSession],
+    socket_path: str | None = None,
+    inline_max_bytes: int = _DEFAULT_INLINE_MAX_BYTES,
+) -> EventBus:
+    if backend == EVENT_BUS_POSTGRES:
+        return PostgresEventBus(
+            database_url=database_url, sessionmaker=sessionmaker, inline_max_bytes=inline_max_bytes
+        )
+    if backend == EVENT_BUS_UNIX:
+        return UnixSocketEventBus(
+            path=socket_path or default_event_bus_socket_path(),
+            sessionmaker=sessionmaker,
+            inline_max_bytes=inline_max_bytes,
+        )
+    if backend == EVENT_BUS_MEMORY:
+        return InMemoryEventBus()
+    raise RuntimeError(f"unknown_event_bus:{backend}")
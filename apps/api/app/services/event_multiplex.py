@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from app.services.workflow_events import WorkflowEvent, format_multiplexed_sse_event
+
+_LLM_STREAM_EVENTS = frozenset({"llm_start", "llm_delta", "llm_end"})
+
+
+@dataclass(frozen=True, slots=True)
+class MultiplexFilter:
+    # None means everything. Resync events always pass: they replace events the client missed.
+    events: frozenset[str] | None = None
+    # Runs whose streamed LLM output is forwarded, e.g. only the run open in the editor.
+    stream_run_ids: frozenset[uuid.UUID] | None = None
+
+    def allows(self, event: WorkflowEvent) -> bool:
+        if event.name == "resync":
+            return True
+        if self.events is not None and event.name not in self.events:
+            return False
+        if event.name in _LLM_STREAM_EVENTS and self.stream_run_ids is not None:
+            return event.run_id in self.stream_run_ids
+        return True
+
+
+def _merge_state_diffs(first: dict[str, Any], second: dict[str, Any]) -> dict[str, Any]:
+    second_set = dict(second.get("set") or {})
+    second_unset = set(second.get("unset") or [])
+    merged_set = {key: value for key, value in (first.get("set") or {}).items() if key not in second_unset}
+    merged_set.update(second_set)
+    unset = [key for key in dict.fromkeys([*(first.get("unset") or []), *second_unset]) if key not in second_set]
+    return {"set": merged_set, "unset": unset}
+
+
+def _merged_run_payload(previous: dict[str, Any], current: dict[str, Any]) -> dict[str, Any] | None:
+    diff = current.get("state_diff")
+    if not isinstance(diff, dict):
+        # A full run dump supersedes whatever came before it.
+        return current
+    previous_diff = previous.get("state_diff")
+    if isinstance(previous_diff, dict):
+        return {**current, "state_diff": _merge_state_diffs(previous_diff, diff)}
+    previous_state = (previous.get("run") or {}).get("state")
+    if not isinstance(previous_state, dict):
+        return None
+    state = {key: value for key, value in previous_state.items() if key not in set(diff.get("unset") or [])}
+    state.update(diff.get("set") or {})
+    merged = {key: value for key, value in current.items() if key != "state_diff"}
+    merged["run"] = {**(current.get("run") or {}), "state": state}
+    return merged
+
+
+def _merged(previous: WorkflowEvent, event: WorkflowEvent) -> WorkflowEvent | None:
+    if previous.name != event.name or previous.run_id != event.run_id or event.run_id is None:
+        return None
+    payload: dict[str, Any] | None = None
+    if event.name == "llm_delta" and previous.payload.get("step_id") == event.payload.get("step_id"):
+        append = str(previous.payload.get("append") or "") + str(event.payload.get("append") or "")
+        payload = {**event.payload, "append": append}
+    elif event.name == "run":
+        payload = _merged_run_payload(previous.payload, event.payload)
+    if payload is None:
+        return None
+    return WorkflowEvent(
+        name=event.name,
+        payload=payload,
+        id=event.id,
+        run_id=event.run_id,
+        multiplexed_data=format_multiplexed_sse_event(
+            run_id=event.run_id, name=event.name, payload=payload
+        ).encode("utf-8"),
+    )
+
+
+def coalesce_events(events: list[WorkflowEvent]) -> list[WorkflowEvent]:
+    # Events that piled up while the client was busy: consecutive llm_delta appends of a step are
+    # joined, and consecutive run updates collapse into the latest one. Order within each run is
+    # kept; order across runs does not matter to clients.
+    out: list[WorkflowEvent] = []
+    last_index: dict[uuid.UUID | None, int] = {}
+    for event in events:
+        index = last_index.get(event.run_id)
+        merged = _merged(out[index], event) if index is not None else None
+        if merged is not None and index is not None:
+            out[index] = merged
+            continue
+        last_index[event.run_id] = len(out)
+        out.append(event)
+    return out
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterator
+from pathlib import Path
+
+_READ_CHUNK_BYTES = 64 * 1024
+
+
+def default_export_cache_dir() -> str:
+    return os.path.join(tempfile.gettempdir(), "writer_agent_exports")
+
+
+def export_cache_key(
+    *,
+    filename: str,
+    apply_glossary: bool,
+    versions: list[tuple[uuid.UUID, str | None]],
+    glossary_revision: tuple[int, str],
+) -> str:
+    # Everything an export is compiled from: the latest version of each chapter/scene (versions are
+    # immutable, so their ids stand for their text), the headings (artifact titles, renamed in
+    # place) and the glossary revision.
+    material = json.dumps(
+        [
+            filename,
+            bool(apply_glossary),
+            [[str(version_id), title] for version_id, title in versions],
+            list(glossary_revision),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # If-None-Match uses the weak comparison.
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class ExportCacheWriter:
+    # Collects an export while it is being sent; only a complete export is added to the cache.
+
+    def __init__(self, cache: ExportCache, key: str) -> None:
+        self._cache = cache
+        self._key = key
+        fd, path = tempfile.mkstemp(dir=cache.directory, prefix=".partial-")
+        self._file = os.fdopen(fd, "wb")
+        self._path = Path(path)
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self._size += len(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+        if self._size > self._cache.max_bytes:
+            self.discard()
+            return
+        os.replace(self._path, self._cache.directory / self._key)
+        self._cache._added(self._key, self._size)
+
+    def discard(self) -> None:
+        self._file.close()
+        with contextlib.suppress(FileNotFoundError):
+            self._path.unlink()
+
+
+class ExportCache:
+    # Compiled exports on disk, one file per cache key, evicted least-recently-used first once
+    # they add up to more than max_bytes. Use order survives restarts through the files' mtimes.
+    # max_bytes <= 0 disables the cache.
+
+    def __init__(self, *, directory: str, max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._sizes: OrderedDict[str, int] | None = None
+        self._total = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _index(self) -> OrderedDict[str, int]:
+        if self._sizes is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entries = []
+            for path in self.directory.iterdir():
+                if path.is_file() and not path.name.startswith("."):
+                    stat = path.stat()
+                    entries.append((stat.st_mtime, path.name, stat.st_size))
+            self._sizes = OrderedDict((name, size) for _mtime, name, size in sorted(entries))
+            self._total = sum(self._sizes.values())
+        return self._sizes
+
+    def _hit(self, key: str) -> Path | None:
+        if not self.enabled:
+            return None
+        sizes = self._index()
+        path = self.directory / key
+        if key not in sizes or not path.is_file():
+            # Not cached here, or evicted by another process sharing the directory.
+            if key in sizes:
+                self._total -= sizes.pop(key)
+            return None
+        sizes.move_to_end(key)
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return path
+
+    def read_text(self, key: str) -> str | None:
+        path = self._hit(key)
+        if path is None:
+            return None
+        try:
+            return path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def open_stream(self, key: str) -> Iterator[bytes] | None:
+        path = self._hit(key)
+        if path is None:
+            return None
+        try:
+            handle = path.open("rb")
+        except OSError:
+            return None
+
+        def chunks() -> Iterator[bytes]:
+            with handle:
+                while chunk := handle.read(_READ_CHUNK_BYTES):
+                    yield chunk
+
+        return chunks()
+
+    def writer(self, key: str) -> ExportCacheWriter | None:
+        if not self.enabled:
+            return None
+        self._index()
+        return ExportCacheWriter(self, key)
+
+    def store_text(self, key: str, text: str) -> None:
+        writer = self.writer(key)
+        if writer is not None:
+            writer.write(text.encode("utf-8"))
+            writer.commit()
+
+    def _added(self, key: str, size: int) -> None:
+        sizes = self._index()
+        self._total += size - sizes.pop(key, 0)
+        sizes[key] = size
+        while self._total > self.max_bytes and sizes:
+            name, evicted = sizes.popitem(last=False)
+            self._total -= evicted
+            with contextlib.suppress(FileNotFoundError):
+                (self.directory / name).unlink()
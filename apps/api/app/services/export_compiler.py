@@ -1,106 +1,132 @@
 from __future__ import annotations
 
 import uuid
+from collections.abc import AsyncIterator
 
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Artifact, ArtifactKind, ArtifactVersion, SnapshotGlossaryEntry
+from app.db.models import Artifact, ArtifactKind, ArtifactVersion
+from app.services.glossary import load_glossary_matcher
 
+# Rows fetched per round trip while streaming an export.
+_STREAM_BATCH_SIZE = 16
 
-async def _latest_versions_by_kind(
+
+async def latest_versions(
     *,
     session: AsyncSession,
     brief_snapshot_id: uuid.UUID,
     kind: ArtifactKind,
-) -> list[tuple[Artifact, ArtifactVersion]]:
+) -> list[tuple[uuid.UUID, str | None]]:
+    # (version id, artifact title) of the latest version per ordinal; the older versions' text is
+    # never fetched. Titles belong to the artifact and can change without a new version.
     result = await session.execute(
-        select(Artifact, ArtifactVersion)
+        select(Artifact.ordinal, ArtifactVersion.id, Artifact.title)
         .join(ArtifactVersion, ArtifactVersion.artifact_id == Artifact.id)
         .where(Artifact.kind == kind)
+        .where(Artifact.ordinal.is_not(None))
         .where(ArtifactVersion.brief_snapshot_id == brief_snapshot_id)
-        .order_by(Artifact.ordinal.asc().nullslast(), ArtifactVersion.created_at.desc())
+        .order_by(Artifact.ordinal.asc(), ArtifactVersion.created_at.desc())
     )
-    rows = result.all()
-
-    chosen: dict[int, tuple[Artifact, ArtifactVersion]] = {}
-    for artifact, version in rows:
-        if artifact.ordinal is None:
-            continue
-        ordinal = int(artifact.ordinal)
-        if ordinal in chosen:
-            continue
-        chosen[ordinal] = (artifact, version)
-
+    chosen: dict[int, tuple[uuid.UUID, str | None]] = {}
+    for ordinal, version_id, title in result.all():
+        chosen.setdefault(int(ordinal), (version_id, title))
     return [chosen[k] for k in sorted(chosen.keys())]
 
 
-async def _load_glossary(
-    *, session: AsyncSession, brief_snapshot_id: uuid.UUID
-) -> list[tuple[str, str]]:
-    result = await session.execute(
-        select(SnapshotGlossaryEntry)
-        .where(SnapshotGlossaryEntry.brief_snapshot_id == brief_snapshot_id)
-        .order_by(SnapshotGlossaryEntry.term.asc())
+async def _stream_latest_versions(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    kind: ArtifactKind,
+    version_ids: list[uuid.UUID] | None,
+) -> AsyncIterator[tuple[str | None, int, str]]:
+    # (title, ordinal, text) of the latest version per ordinal, in ordinal order, read through a
+    # server-side cursor a few rows at a time. Callers that already resolved the latest versions
+    # (e.g. to key the export cache) pass them in, so the text matches what they resolved.
+    if version_ids is None:
+        latest = await latest_versions(session=session, brief_snapshot_id=brief_snapshot_id, kind=kind)
+        version_ids = [version_id for version_id, _title in latest]
+    if not version_ids:
+        return
+    result = await session.stream(
+        select(Artifact.title, Artifact.ordinal, ArtifactVersion.content_text)
+        .join(ArtifactVersion, ArtifactVersion.artifact_id == Artifact.id)
+        .where(ArtifactVersion.id.in_(version_ids))
+        .order_by(Artifact.ordinal.asc())
+        .execution_options(yield_per=_STREAM_BATCH_SIZE)
     )
-    entries = result.scalars().all()
-    return [(e.term, e.replacement) for e in entries if e.term and e.replacement]
+    async for title, ordinal, text in result:
+        yield title, int(ordinal), text or ""
 
 
-def _apply_glossary(text: str, replacements: list[tuple[str, str]]) -> str:
-    if not replacements:
-        return text
-    updated = text
-    for term, replacement in sorted(replacements, key=lambda item: len(item[0]), reverse=True):
-        if not term:
-            continue
-        updated = updated.replace(term, replacement)
-    return updated
+async def _join_chunks(parts: AsyncIterator[str], *, separator: str) -> AsyncIterator[str]:
+    # Same text as separator.join(parts) + "\n", one part at a time.
+    first = True
+    async for part in parts:
+        yield part if first else separator + part
+        first = False
+    if not first:
+        yield "\n"
 
 
-async def compile_novel_markdown(
+async def _novel_chapter_parts(
     *,
     session: AsyncSession,
     brief_snapshot_id: uuid.UUID,
     apply_glossary: bool,
-) -> str:
-    chapters = await _latest_versions_by_kind(
-        session=session, brief_snapshot_id=brief_snapshot_id, kind=ArtifactKind.novel_chapter
-    )
-    replacements = await _load_glossary(session=session, brief_snapshot_id=brief_snapshot_id)
-    parts: list[str] = []
-    for artifact, version in chapters:
-        title = artifact.title or f"第{artifact.ordinal}章"
-        body = version.content_text or ""
+    heading: str,
+    version_ids: list[uuid.UUID] | None = None,
+) -> AsyncIterator[str]:
+    glossary = await load_glossary_matcher(session=session, brief_snapshot_id=brief_snapshot_id)
+    async for title, ordinal, body in _stream_latest_versions(
+        session=session,
+        brief_snapshot_id=brief_snapshot_id,
+        kind=ArtifactKind.novel_chapter,
+        version_ids=version_ids,
+    ):
         if apply_glossary:
-            body = _apply_glossary(body, replacements)
-        parts.append(f"# {title}\n\n{body}".strip())
-    return "\n\n---\n\n".join(parts).strip() + ("\n" if parts else "")
+            body = glossary.apply(body)
+        yield f"{heading}{title or f'第{ordinal}章'}\n\n{body}".strip()
 
 
-async def compile_novel_text(
+def iter_novel_markdown(
     *,
     session: AsyncSession,
     brief_snapshot_id: uuid.UUID,
     apply_glossary: bool,
-) -> str:
-    chapters = await _latest_versions_by_kind(
-        session=session, brief_snapshot_id=brief_snapshot_id, kind=ArtifactKind.novel_chapter
+    version_ids: list[uuid.UUID] | None = None,
+) -> AsyncIterator[str]:
+    parts = _novel_chapter_parts(
+        session=session,
+        brief_snapshot_id=brief_snapshot_id,
+        apply_glossary=apply_glossary,
+        heading="# ",
+        version_ids=version_ids,
     )
-    replacements = await _load_glossary(session=session, brief_snapshot_id=brief_snapshot_id)
-    parts: list[str] = []
-    for artifact, version in chapters:
-        title = artifact.title or f"第{artifact.ordinal}章"
-        body = version.content_text or ""
-        if apply_glossary:
-            body = _apply_glossary(body, replacements)
-        parts.append(f"{title}\n\n{body}".strip())
-    return "\n\n".join(parts).strip() + ("\n" if parts else "")
+    return _join_chunks(parts, separator="\n\n---\n\n")
 
 
-def _to_fountain_scene_heading(*, artifact: Artifact) -> str:
-    title = artifact.title or ""
-    ordinal = artifact.ordinal
+def iter_novel_text(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+    version_ids: list[uuid.UUID] | None = None,
+) -> AsyncIterator[str]:
+    parts = _novel_chapter_parts(
+        session=session,
+        brief_snapshot_id=brief_snapshot_id,
+        apply_glossary=apply_glossary,
+        heading="",
+        version_ids=version_ids,
+    )
+    return _join_chunks(parts, separator="\n\n")
+
+
+def _to_fountain_scene_heading(*, title: str | None, ordinal: int | None) -> str:
+    title = title or ""
     if ordinal is None and not title:
         return "== Scene =="
     if ordinal is None:
@@ -110,23 +136,113 @@ def _to_fountain_scene_heading(*, artifact: Artifact) -> str:
     return f"== {ordinal}. =="
 
 
+async def _script_fountain_parts(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+    version_ids: list[uuid.UUID] | None = None,
+) -> AsyncIterator[str]:
+    glossary = await load_glossary_matcher(session=session, brief_snapshot_id=brief_snapshot_id)
+    async for title, ordinal, body in _stream_latest_versions(
+        session=session,
+        brief_snapshot_id=brief_snapshot_id,
+        kind=ArtifactKind.script_scene,
+        version_ids=version_ids,
+    ):
+        if apply_glossary:
+            body = glossary.apply(body)
+        yield f"{_to_fountain_scene_heading(title=title, ordinal=ordinal)}\n\n{body}".strip()
+
+
+async def _script_text_parts(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+    version_ids: list[uuid.UUID] | None = None,
+) -> AsyncIterator[str]:
+    glossary = await load_glossary_matcher(session=session, brief_snapshot_id=brief_snapshot_id)
+    async for _title, _ordinal, text in _stream_latest_versions(
+        session=session,
+        brief_snapshot_id=brief_snapshot_id,
+        kind=ArtifactKind.script_scene,
+        version_ids=version_ids,
+    ):
+        body = text.strip()
+        if apply_glossary:
+            body = glossary.apply(body)
+        if body:
+            yield body
+
+
+def iter_script_fountain(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+    version_ids: list[uuid.UUID] | None = None,
+) -> AsyncIterator[str]:
+    parts = _script_fountain_parts(
+        session=session,
+        brief_snapshot_id=brief_snapshot_id,
+        apply_glossary=apply_glossary,
+        version_ids=version_ids,
+    )
+    return _join_chunks(parts, separator="\n\n")
+
+
+def iter_script_text(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+    version_ids: list[uuid.UUID] | None = None,
+) -> AsyncIterator[str]:
+    parts = _script_text_parts(
+        session=session,
+        brief_snapshot_id=brief_snapshot_id,
+        apply_glossary=apply_glossary,
+        version_ids=version_ids,
+    )
+    return _join_chunks(parts, separator="\n\n")
+
+
+async def _compile(chunks: AsyncIterator[str]) -> str:
+    return "".join([chunk async for chunk in chunks])
+
+
+async def compile_novel_markdown(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+) -> str:
+    return await _compile(
+        iter_novel_markdown(session=session, brief_snapshot_id=brief_snapshot_id, apply_glossary=apply_glossary)
+    )
+
+
+async def compile_novel_text(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    apply_glossary: bool,
+) -> str:
+    return await _compile(
+        iter_novel_text(session=session, brief_snapshot_id=brief_snapshot_id, apply_glossary=apply_glossary)
+    )
+
+
 async def compile_script_fountain(
     *,
     session: AsyncSession,
     brief_snapshot_id: uuid.UUID,
     apply_glossary: bool,
 ) -> str:
-    scenes = await _latest_versions_by_kind(
-        session=session, brief_snapshot_id=brief_snapshot_id, kind=ArtifactKind.script_scene
+    return await _compile(
+        iter_script_fountain(session=session, brief_snapshot_id=brief_snapshot_id, apply_glossary=apply_glossary)
     )
-    replacements = await _load_glossary(session=session, brief_snapshot_id=brief_snapshot_id)
-    parts: list[str] = []
-    for artifact, version in scenes:
-        body = version.content_text or ""
-        if apply_glossary:
-            body = _apply_glossary(body, replacements)
-        parts.append(f"{_to_fountain_scene_heading(artifact=artifact)}\n\n{body}".strip())
-    return "\n\n".join(parts).strip() + ("\n" if parts else "")
 
 
 async def compile_script_text(
@@ -135,15 +251,6 @@ async def compile_script_text(
     brief_snapshot_id: uuid.UUID,
     apply_glossary: bool,
 ) -> str:
-    scenes = await _latest_versions_by_kind(
-        session=session, brief_snapshot_id=brief_snapshot_id, kind=ArtifactKind.script_scene
+    return await _compile(
+        iter_script_text(session=session, brief_snapshot_id=brief_snapshot_id, apply_glossary=apply_glossary)
     )
-    replacements = await _load_glossary(session=session, brief_snapshot_id=brief_snapshot_id)
-    parts: list[str] = []
-    for _artifact, version in scenes:
-        body = (version.content_text or "").strip()
-        if apply_glossary:
-            body = _apply_glossary(body, replacements)
-        if body:
-            parts.append(body)
-    return "\n\n".join(parts).strip() + ("\n" if parts else "")
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import uuid
+from collections import OrderedDict, deque
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import SnapshotGlossaryEntry
+
+# Snapshots whose compiled glossaries are kept.
+_MAX_CACHED = 64
+
+
+class GlossaryMatcher:
+    # Aho–Corasick automaton over a glossary's terms. apply() replaces leftmost-longest matches in
+    # one pass over the text: the output of a replacement is never scanned again, so entries cannot
+    # cascade into each other, and the cost does not grow with the number of terms.
+
+    def __init__(self, replacements: list[tuple[str, str]]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._depth: list[int] = [0]
+        # Longest term ending at each node (its own, or one reached through failure links).
+        self._out: list[tuple[int, str] | None] = [None]
+        for term, replacement in replacements:
+            if term:
+                self._add(term, replacement)
+        self._link()
+
+    @property
+    def empty(self) -> bool:
+        return not self._goto[0]
+
+    def _add(self, term: str, replacement: str) -> None:
+        node = 0
+        for char in term:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[node] + 1)
+                self._out.append(None)
+            node = child
+        # The first entry for a term wins.
+        if self._out[node] is None:
+            self._out[node] = (len(term), replacement)
+
+    def _link(self) -> None:
+        queue: deque[int] = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                if self._out[child] is None:
+                    self._out[child] = self._out[self._fail[child]]
+                queue.append(child)
+
+    def apply(self, text: str) -> str:
+        if self.empty or not text:
+            return text
+        goto, fail, depth, out = self._goto, self._fail, self._depth, self._out
+        parts: list[str] = []
+        copied = 0
+        position = 0
+        node = 0
+        # The leftmost(-longest) match seen so far: (start, end, replacement).
+        best: tuple[int, int, str] | None = None
+        length = len(text)
+        while True:
+            if position < length:
+                char = text[position]
+                while node and char not in goto[node]:
+                    node = fail[node]
+                node = goto[node].get(char, 0)
+                match = out[node]
+                if match is not None:
+                    start = position - match[0] + 1
+                    if best is None or start < best[0] or (start == best[0] and position > best[1]):
+                        best = (start, position, match[1])
+                position += 1
+                # Matches still in progress start at position - depth[node] or later; once that is
+                # past the best match's start, nothing can beat it any more.
+                if best is None or position - depth[node] <= best[0]:
+                    continue
+            elif best is None:
+                break
+            start, end, replacement = best
+            parts.append(text[copied:start])
+            parts.append(replacement)
+            copied = position = end + 1
+            node = 0
+            best = None
+        parts.append(text[copied:])
+        return "".join(parts)
+
+
+_EMPTY = GlossaryMatcher([])
+_cache: OrderedDict[uuid.UUID, tuple[tuple[int, str], GlossaryMatcher]] = OrderedDict()
+
+
+async def glossary_revision(*, session: AsyncSession, brief_snapshot_id: uuid.UUID) -> tuple[int, str]:
+    # Changes whenever an entry is added, removed or edited, also by another process.
+    count, updated_at = (
+        await session.execute(
+            select(func.count(SnapshotGlossaryEntry.id), func.max(SnapshotGlossaryEntry.updated_at)).where(
+                SnapshotGlossaryEntry.brief_snapshot_id == brief_snapshot_id
+            )
+        )
+    ).one()
+    return int(count or 0), str(updated_at or "")
+
+
+async def load_glossary(*, session: AsyncSession, brief_snapshot_id: uuid.UUID) -> list[tuple[str, str]]:
+    result = await session.execute(
+        select(SnapshotGlossaryEntry.term, SnapshotGlossaryEntry.replacement)
+        .where(SnapshotGlossaryEntry.brief_snapshot_id == brief_snapshot_id)
+        .order_by(SnapshotGlossaryEntry.term.asc(), SnapshotGlossaryEntry.created_at.asc())
+    )
+    return [(term, replacement) for term, replacement in result.all() if term and replacement]
+
+
+async def load_glossary_matcher(*, session: AsyncSession, brief_snapshot_id: uuid.UUID) -> GlossaryMatcher:
+    revision = await glossary_revision(session=session, brief_snapshot_id=brief_snapshot_id)
+    if revision[0] == 0:
+        return _EMPTY
+    cached = _cache.get(brief_snapshot_id)
+    if cached is not None and cached[0] == revision:
+        _cache.move_to_end(brief_snapshot_id)
+        return cached[1]
+    matcher = GlossaryMatcher(await load_glossary(session=session, brief_snapshot_id=brief_snapshot_id))
+    _cache[brief_snapshot_id] = (revision, matcher)
+    _cache.move_to_end(brief_snapshot_id)
+    while len(_cache) > _MAX_CACHED:
+        _cache.popitem(last=False)
+    return matcher
+
+
+def invalidate_glossary(brief_snapshot_id: uuid.UUID) -> None:
+    # Called after this process's glossary writes, which also covers edits the revision can miss
+    # (updated_at has limited resolution). Other processes notice changes through the revision.
+    _cache.pop(brief_snapshot_id, None)
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import difflib
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import KgEntity, MemoryChunk
+from app.llm.embeddings_client import EmbeddingsClient
+from app.services.memory_store import cosine_distance
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[。！？!?；;])|\n+")
+_CJK_RUN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff]+")
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9'-]{2,}")
+
+# Bigrams common enough in any chapter that sharing one says nothing about the change.
+_STOP_TERMS = frozenset(
+    "一个 一下 一样 一直 不是 不会 不能 什么 他们 以后 但是 你们 其实 出来 可以 只是 因为 如果 已经 "
+    "我们 所以 时候 有些 没有 然后 现在 然而 知道 而且 自己 起来 还是 还有 这么 这个 这样 那么 那个 "
+    "那样 怎么 就是 她们 它们 the and for with that this from".split()
+)
+
+# Contribution of one matching signal; several signals combine as independent evidence. An entity
+# named in the change is enough on its own to clear the default propagation_impact_min_relevance
+# (0.3): a character's name is usually in both versions, so change_terms never carries it.
+_TERM_WEIGHT = 0.5
+_ENTITY_WEIGHT = 0.4
+_MEMORY_WEIGHT = 0.8
+# Chunk similarity below which the memory index is not counted as evidence.
+_MEMORY_FLOOR = 0.75
+
+_MAX_EVIDENCE_PER_SIGNAL = 5
+_EXCERPT_CONTEXT = 24
+
+
+@dataclass(slots=True)
+class ImpactRelevance:
+    score: float
+    evidence: list[dict[str, Any]] = field(default_factory=list)
+
+
+def _sentences(text: str) -> list[str]:
+    return [part.strip() for part in _SENTENCE_SPLIT.split(text or "") if part and part.strip()]
+
+
+def _terms(text: str) -> set[str]:
+    # Character bigrams for CJK runs (no word boundaries to go by) and whole words elsewhere.
+    terms: set[str] = set()
+    for run in _CJK_RUN.findall(text):
+        terms.update(run[i : i + 2] for i in range(len(run) - 1))
+    terms.update(word.lower() for word in _WORD.findall(text))
+    return terms - _STOP_TERMS
+
+
+def changed_passages(*, base_text: str, edited_text: str) -> tuple[list[str], list[str]]:
+    # Sentences removed from the base text and sentences added by the edit.
+    base = _sentences(base_text)
+    edited = _sentences(edited_text)
+    removed: list[str] = []
+    added: list[str] = []
+    matcher = difflib.SequenceMatcher(None, base, edited, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            removed.extend(base[i1:i2])
+            added.extend(edited[j1:j2])
+    return removed, added
+
+
+def change_terms(*, base_text: str, edited_text: str) -> set[str]:
+    # Terms of the changed sentences that the other side no longer (or not yet) contains: for
+    # 旧城 → 新城 that is 旧城 and 新城, not the character both versions still mention.
+    removed, added = changed_passages(base_text=base_text, edited_text=edited_text)
+    base_terms = _terms(base_text)
+    edited_terms = _terms(edited_text)
+    terms: set[str] = set()
+    for sentence in removed:
+        terms |= _terms(sentence) - edited_terms
+    for sentence in added:
+        terms |= _terms(sentence) - base_terms
+    return terms
+
+
+def _excerpt(text: str, needle: str) -> str:
+    index = text.lower().find(needle.lower())
+    if index < 0:
+        return ""
+    start = max(0, index - _EXCERPT_CONTEXT)
+    end = min(len(text), index + len(needle) + _EXCERPT_CONTEXT)
+    return text[start:end].strip()
+
+
+async def _involved_entities(
+    *, session: AsyncSession, brief_snapshot_id: uuid.UUID, change_text: str
+) -> list[str]:
+    result = await session.execute(
+        select(KgEntity.name).where(KgEntity.brief_snapshot_id == brief_snapshot_id).distinct()
+    )
+    return sorted(
+        {name for name in result.scalars().all() if name and len(name) >= 2 and name in change_text}
+    )
+
+
+async def _memory_similarities(
+    *,
+    session: AsyncSession,
+    embeddings: EmbeddingsClient,
+    query: str,
+    version_ids: list[uuid.UUID],
+) -> dict[uuid.UUID, tuple[float, str]]:
+    # Best chunk similarity per candidate version, from the vectors already in the memory index.
+    result = await session.execute(
+        select(MemoryChunk.artifact_version_id, MemoryChunk.content_text, MemoryChunk.embedding).where(
+            MemoryChunk.artifact_version_id.in_(version_ids)
+        )
+    )
+    rows = result.all()
+    if not rows:
+        return {}
+    query_vec = (await embeddings.embed(texts=[query]))[0]
+    best: dict[uuid.UUID, tuple[float, str]] = {}
+    for version_id, content_text, embedding in rows:
+        similarity = 1.0 - cosine_distance(embedding, query_vec)
+        if similarity > best.get(version_id, (-1.0, ""))[0]:
+            best[version_id] = (similarity, content_text)
+    return best
+
+
+async def analyze_impacts(
+    *,
+    session: AsyncSession,
+    embeddings: EmbeddingsClient | None,
+    brief_snapshot_id: uuid.UUID,
+    base_text: str,
+    edited_text: str,
+    fact_changes: str | None,
+    candidates: list[tuple[uuid.UUID, str]],
+) -> dict[uuid.UUID, ImpactRelevance] | None:
+    # Scores each downstream (version_id, text) by how much of the change it refers to: terms the
+    # edit removed or introduced (lexical index), knowledge-graph entities named in the change, and
+    # memory chunks close to the change. Returns None when the change offers nothing to match on
+    # (e.g. only punctuation or layout changed), so callers can fall back to flagging everything.
+    removed, added = changed_passages(base_text=base_text, edited_text=edited_text)
+    terms = change_terms(base_text=base_text, edited_text=edited_text)
+    if fact_changes:
+        # Terms both versions share are context the edit did not touch, e.g. the character's name.
+        terms |= _terms(fact_changes) - (_terms(base_text) & _terms(edited_text))
+    change_text = "\n".join([*removed, *added, (fact_changes or "").strip()]).strip()
+    if not change_text:
+        return None
+
+    entities = await _involved_entities(
+        session=session, brief_snapshot_id=brief_snapshot_id, change_text=change_text
+    )
+    memory: dict[uuid.UUID, tuple[float, str]] = {}
+    if embeddings is not None and candidates:
+        memory = await _memory_similarities(
+            session=session,
+            embeddings=embeddings,
+            query=change_text,
+            version_ids=[version_id for version_id, _text in candidates],
+        )
+    if not terms and not entities and not memory:
+        return None
+
+    relevance: dict[uuid.UUID, ImpactRelevance] = {}
+    for version_id, text in candidates:
+        text = text or ""
+        evidence: list[dict[str, Any]] = []
+        miss = 1.0
+
+        matched_terms = sorted(terms & _terms(text), key=lambda term: (-len(term), term))
+        miss *= (1.0 - _TERM_WEIGHT) ** len(matched_terms)
+        for term in matched_terms[:_MAX_EVIDENCE_PER_SIGNAL]:
+            evidence.append({"signal": "term", "match": term, "excerpt": _excerpt(text, term)})
+
+        matched_entities = [name for name in entities if name in text]
+        miss *= (1.0 - _ENTITY_WEIGHT) ** len(matched_entities)
+        for name in matched_entities[:_MAX_EVIDENCE_PER_SIGNAL]:
+            evidence.append({"signal": "entity", "match": name, "excerpt": _excerpt(text, name)})
+
+        similarity, chunk = memory.get(version_id, (0.0, ""))
+        if similarity > _MEMORY_FLOOR:
+            miss *= 1.0 - _MEMORY_WEIGHT * (similarity - _MEMORY_FLOOR) / (1.0 - _MEMORY_FLOOR)
+            evidence.append(
+                {
+                    "signal": "memory",
+                    "similarity": round(similarity, 3),
+                    "excerpt": chunk[: _EXCERPT_CONTEXT * 4].strip(),
+                }
+            )
+
+        relevance[version_id] = ImpactRelevance(score=round(1.0 - miss, 3), evidence=evidence)
+    return relevance
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+
+class LlmMetrics:
+    def __init__(self) -> None:
+        self._by_phase: dict[str, Counter[str]] = defaultdict(Counter)
+
+    def incr(self, *, phase: str, name: str, amount: int = 1) -> None:
+        self._by_phase[phase or "unknown"][name] += amount
+
+    def snapshot(self) -> dict[str, dict]:
+        totals: Counter[str] = Counter()
+        by_phase: dict[str, dict[str, int]] = {}
+        for phase in sorted(self._by_phase):
+            counters = self._by_phase[phase]
+            totals.update(counters)
+            by_phase[phase] = dict(sorted(counters.items()))
+        return {"totals": dict(sorted(totals.items())), "by_phase": by_phase}
+
+    def reset(self) -> None:
+        self._by_phase.clear()
+
+
+llm_metrics = LlmMetrics()
+
+
+@dataclass(slots=True)
+class StepMetrics:
+    llm_calls: int = 0
+    models: list[str] = field(default_factory=list)
+    critic_policy: str | None = None
+    critic_decision: str | None = None
+    # False when a skipped critic left current_state and the fact digest without an update.
+    critic_state_updated: bool = True
+
+    def record_llm_call(self, *, model: str | None) -> None:
+        self.llm_calls += 1
+        if model and model not in self.models:
+            self.models.append(model)
+
+    def as_dict(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"llm_calls": self.llm_calls, "models": list(self.models)}
+        if self.critic_decision is not None:
+            out["critic_policy"] = self.critic_policy
+            out["critic_decision"] = self.critic_decision
+            out["critic_state_updated"] = self.critic_state_updated
+        return out
+
+
+_current_step_metrics: ContextVar[StepMetrics | None] = ContextVar("current_step_metrics", default=None)
+
+
+@contextmanager
+def collect_step_metrics() -> Iterator[StepMetrics]:
+    metrics = StepMetrics()
+    token = _current_step_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_step_metrics.reset(token)
+
+
+def current_step_metrics() -> StepMetrics | None:
+    return _current_step_metrics.get()
+
+
+def record_llm_call(*, phase: str, model: str | None) -> None:
+    llm_metrics.incr(phase=phase, name="llm_calls")
+    if model:
+        llm_metrics.incr(phase=phase, name=f"llm_calls:{model}")
+    step_metrics = current_step_metrics()
+    if step_metrics is not None:
+        step_metrics.record_llm_call(model=model)
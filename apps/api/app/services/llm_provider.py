@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Any
 
 from fastapi import FastAPI
@@ -9,9 +9,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import Settings
 from app.llm.client import LLMClient
 from app.llm.embeddings_client import EmbeddingsClient
+from app.llm.endpoints import ChatEndpoint, same_base_url
 from app.llm.openai_client import OpenAIChatClient, OpenAIEmbeddingsClient
+from app.llm.routing import PhaseRoutedLLMClient
 from app.services.settings_store import (
+    LIGHTWEIGHT_LLM_PHASES,
+    get_llm_phase_routing_raw,
     get_llm_provider_settings_raw,
+    resolve_llm_phase_route,
     resolve_llm_provider_effective_config,
 )
 
@@ -24,6 +29,10 @@ class EffectiveLlmProviderConfig:
     embeddings_model: str
     timeout_s: float
     max_retries: int
+    structured_output: bool = False
+    failover_endpoints: tuple[ChatEndpoint, ...] = ()
+    hedge_percentile: float | None = None
+    hedge_initial_delay_s: float | None = None
 
 
 def _settings_from_app(app: FastAPI) -> Settings:
@@ -48,13 +57,91 @@ async def resolve_effective_provider_config(
         embeddings_model=str(effective.get("embeddings_model") or settings.openai_embeddings_model),
         timeout_s=float(effective.get("timeout_s") or settings.openai_timeout_s),
         max_retries=int(effective.get("max_retries") or settings.openai_max_retries),
+        structured_output=bool(effective.get("structured_output")),
+        failover_endpoints=tuple(
+            ChatEndpoint(
+                base_url=endpoint.get("base_url"),
+                model=str(endpoint.get("model")),
+                api_key=endpoint.get("api_key"),
+            )
+            for endpoint in effective.get("failover_endpoints") or []
+        ),
+        hedge_percentile=effective.get("hedge_percentile"),
+        hedge_initial_delay_s=effective.get("hedge_initial_delay_s"),
     )
 
 
+def _apply_phase_route(cfg: EffectiveLlmProviderConfig, route: dict[str, Any]) -> EffectiveLlmProviderConfig:
+    if not route:
+        return cfg
+    base_url = route.get("base_url") or cfg.base_url
+    api_key = route.get("api_key")
+    if api_key is None:
+        if not same_base_url(base_url, cfg.base_url):
+            # The primary key is never sent to another host. Settings reject such routes, so this
+            # one predates a change of the primary base_url; the phase stays on the primary.
+            return cfg
+        api_key = cfg.api_key
+    model = str(route.get("model") or cfg.model)
+    # The failover endpoints are configured for the primary model and host.
+    failover_endpoints = cfg.failover_endpoints if (model, base_url) == (cfg.model, cfg.base_url) else ()
+    return replace(
+        cfg, model=model, base_url=base_url, api_key=api_key, failover_endpoints=failover_endpoints
+    )
+
+
+def _chat_client(cfg: EffectiveLlmProviderConfig) -> OpenAIChatClient:
+    return OpenAIChatClient(
+        api_key=str(cfg.api_key),
+        base_url=cfg.base_url,
+        model=cfg.model,
+        timeout_s=cfg.timeout_s,
+        max_retries=cfg.max_retries,
+        structured_output=cfg.structured_output,
+        failover_endpoints=cfg.failover_endpoints,
+        hedge_percentile=cfg.hedge_percentile,
+        hedge_initial_delay_s=cfg.hedge_initial_delay_s,
+    )
+
+
+async def _build_phase_routed_llm(
+    *,
+    session: AsyncSession,
+    app: FastAPI,
+    cfg: EffectiveLlmProviderConfig,
+    phase: str | None = None,
+) -> tuple[PhaseRoutedLLMClient, dict[str, str]]:
+    settings = _settings_from_app(app)
+    routing = await get_llm_phase_routing_raw(session=session)
+
+    clients: dict[EffectiveLlmProviderConfig, OpenAIChatClient] = {}
+
+    def client_for(phase_cfg: EffectiveLlmProviderConfig) -> OpenAIChatClient:
+        if phase_cfg not in clients:
+            clients[phase_cfg] = _chat_client(phase_cfg)
+        return clients[phase_cfg]
+
+    default_cfg = _apply_phase_route(
+        cfg, resolve_llm_phase_route(routing=routing, phase=phase, env_settings=settings)
+    )
+    default = client_for(default_cfg)
+
+    routes: dict[str, OpenAIChatClient] = {}
+    phase_models: dict[str, str] = {}
+    for routed_phase in [*LIGHTWEIGHT_LLM_PHASES, *routing["routes"].keys()]:
+        route = resolve_llm_phase_route(routing=routing, phase=routed_phase, env_settings=settings)
+        phase_cfg = _apply_phase_route(cfg, route)
+        if phase_cfg != default_cfg:
+            routes[routed_phase] = client_for(phase_cfg)
+            phase_models[routed_phase] = phase_cfg.model
+    return PhaseRoutedLLMClient(default=default, routes=routes), phase_models
+
+
 async def resolve_llm_client(
     *,
     session: AsyncSession,
     app: FastAPI,
+    phase: str | None = None,
 ) -> LLMClient | None:
     override = getattr(app.state, "llm_client", None)
     if override is not None:
@@ -63,13 +150,8 @@ async def resolve_llm_client(
     cfg = await resolve_effective_provider_config(session=session, app=app)
     if not cfg.api_key:
         return None
-    return OpenAIChatClient(
-        api_key=cfg.api_key,
-        base_url=cfg.base_url,
-        model=cfg.model,
-        timeout_s=cfg.timeout_s,
-        max_retries=cfg.max_retries,
-    )
+    llm, _phase_models = await _build_phase_routed_llm(session=session, app=app, cfg=cfg, phase=phase)
+    return llm
 
 
 async def resolve_embeddings_client(
@@ -111,15 +193,10 @@ async def resolve_llm_and_embeddings(
 
     llm: LLMClient | None = override_llm
     embeddings: EmbeddingsClient | None = override_embeddings
+    phase_models: dict[str, str] = {}
 
     if llm is None and cfg.api_key:
-        llm = OpenAIChatClient(
-            api_key=cfg.api_key,
-            base_url=cfg.base_url,
-            model=cfg.model,
-            timeout_s=cfg.timeout_s,
-            max_retries=cfg.max_retries,
-        )
+        llm, phase_models = await _build_phase_routed_llm(session=session, app=app, cfg=cfg)
 
     if embeddings is None and cfg.api_key:
         embeddings = OpenAIEmbeddingsClient(
@@ -137,6 +214,10 @@ async def resolve_llm_and_embeddings(
             "embeddings_model": cfg.embeddings_model,
             "timeout_s": cfg.timeout_s,
             "max_retries": cfg.max_retries,
+            "structured_output": cfg.structured_output,
+            "failover_models": [endpoint.model for endpoint in cfg.failover_endpoints],
+            "hedge_percentile": cfg.hedge_percentile,
+            "phase_models": phase_models,
             "api_key_present": bool(cfg.api_key),
             "source": "db/env",
         }
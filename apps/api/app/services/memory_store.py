@@ -4,14 +4,14 @@ import math
 import uuid
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import MemoryChunk
 from app.llm.embeddings_client import EmbeddingsClient
 
 
-def _cosine_distance(a: object, b: list[float]) -> float:
+def cosine_distance(a: object, b: list[float]) -> float:
     dot = 0.0
     norm_a = 0.0
     norm_b = 0.0
@@ -79,6 +79,7 @@ async def index_artifact_version(
     artifact_version_id: uuid.UUID,
     content_text: str,
     meta: dict[str, Any] | None = None,
+    commit: bool = True,
 ) -> int:
     chunks = chunk_text(content_text)
     if not chunks:
@@ -100,10 +101,71 @@ async def index_artifact_version(
             )
         )
 
-    await session.commit()
+    if commit:
+        await session.commit()
+    else:
+        await session.flush()
     return len(chunks)
 
 
+async def index_artifact_versions(
+    *,
+    session: AsyncSession,
+    embeddings: EmbeddingsClient,
+    brief_snapshot_id: uuid.UUID,
+    versions: list[tuple[uuid.UUID, str, dict[str, Any]]],
+    batch_size: int = 64,
+    commit: bool = True,
+) -> int:
+    # index_artifact_version for many (version_id, text, meta) at once: the chunks of all versions
+    # share embeddings calls of up to batch_size texts, and everything is written in one commit.
+    chunked = [
+        (version_id, idx, chunk, meta)
+        for version_id, content_text, meta in versions
+        for idx, chunk in enumerate(chunk_text(content_text))
+    ]
+    if not chunked:
+        return 0
+
+    vectors: list[list[float]] = []
+    for start in range(0, len(chunked), max(1, batch_size)):
+        texts = [chunk for _version_id, _idx, chunk, _meta in chunked[start : start + max(1, batch_size)]]
+        batch = await embeddings.embed(texts=texts)
+        if len(batch) != len(texts):
+            raise RuntimeError("embeddings_count_mismatch")
+        vectors.extend(batch)
+
+    for (version_id, idx, chunk, meta), vector in zip(chunked, vectors, strict=True):
+        session.add(
+            MemoryChunk(
+                brief_snapshot_id=brief_snapshot_id,
+                artifact_version_id=version_id,
+                chunk_index=idx,
+                content_text=chunk,
+                embedding=vector,
+                meta=meta or {},
+            )
+        )
+
+    if commit:
+        await session.commit()
+    else:
+        await session.flush()
+    return len(chunked)
+
+
+async def memory_fingerprint(*, session: AsyncSession, brief_snapshot_id: uuid.UUID) -> tuple[int, str]:
+    # Chunks are only ever added or removed, so count + newest row identifies a snapshot's memory.
+    row = (
+        await session.execute(
+            select(func.count(MemoryChunk.id), func.max(MemoryChunk.created_at)).where(
+                MemoryChunk.brief_snapshot_id == brief_snapshot_id
+            )
+        )
+    ).one()
+    return int(row[0] or 0), str(row[1] or "")
+
+
 async def retrieve_evidence(
     *,
     session: AsyncSession,
@@ -111,9 +173,11 @@ async def retrieve_evidence(
     brief_snapshot_id: uuid.UUID,
     query: str,
     limit: int = 8,
+    query_vec: list[float] | None = None,
 ) -> list[MemoryChunk]:
     limit = max(1, min(limit, 20))
-    query_vec = (await embeddings.embed(texts=[query]))[0]
+    if query_vec is None:
+        query_vec = (await embeddings.embed(texts=[query]))[0]
 
     bind = session.get_bind()
     dialect_name = getattr(getattr(bind, "dialect", None), "name", None)
@@ -132,5 +196,5 @@ async def retrieve_evidence(
         select(MemoryChunk).where(MemoryChunk.brief_snapshot_id == brief_snapshot_id)
     )
     rows = list(result.scalars().all())
-    rows.sort(key=lambda row: _cosine_distance(row.embedding, query_vec))
+    rows.sort(key=lambda row: cosine_distance(row.embedding, query_vec))
     return rows[:limit]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+# Resend the whole numbered draft and regenerate the flagged paragraphs in one call.
+FIX_MODE_WHOLE = "whole"
+# Rewrite each flagged paragraph in its own concurrent call, with its neighbours as context.
+FIX_MODE_PARAGRAPH = "paragraph"
+FIX_MODES = (FIX_MODE_WHOLE, FIX_MODE_PARAGRAPH)
+
+_CONTEXT_PARAGRAPHS = 1
+
+
+def normalize_fix_mode(raw: object) -> str:
+    mode = str(raw or "").strip()
+    return mode if mode in FIX_MODES else FIX_MODE_WHOLE
+
+
+def resolve_fix_mode(*, runtime_prefs: dict[str, Any], state: dict[str, Any]) -> str:
+    override = state.get("fix_mode")
+    if isinstance(override, str) and override in FIX_MODES:
+        return override
+    return normalize_fix_mode(runtime_prefs.get("fix_mode"))
+
+
+def paragraph_fix_targets(*, paragraphs: list[str], indices: list[int]) -> list[int]:
+    # An empty result means the fix needs the whole draft: either nothing specific was flagged, or
+    # every paragraph was (e.g. the NTS format/length checks), which is a whole-unit problem.
+    targets = sorted({int(index) for index in indices if 1 <= int(index) <= len(paragraphs)})
+    if not targets or len(targets) == len(paragraphs):
+        return []
+    return targets
+
+
+def paragraph_context(paragraphs: list[str], index: int, *, radius: int = _CONTEXT_PARAGRAPHS) -> tuple[str, str]:
+    before = paragraphs[max(0, index - 1 - radius) : index - 1]
+    after = paragraphs[index : index + radius]
+    return "\n\n".join(before), "\n\n".join(after)
+
+
+async def rewrite_paragraphs(
+    *,
+    targets: list[int],
+    concurrency: int,
+    rewrite: Callable[[int], Awaitable[str]],
+) -> dict[int, str]:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    replacements: dict[int, str] = {}
+
+    async def rewrite_one(index: int) -> None:
+        async with semaphore:
+            replacements[index] = await rewrite(index)
+
+    # A failed paragraph fails the step (and cancels its siblings) like a failed whole-draft call.
+    try:
+        async with asyncio.TaskGroup() as group:
+            for index in targets:
+                group.create_task(rewrite_one(index))
+    except BaseExceptionGroup as exc:
+        raise exc.exceptions[0] from None
+    return replacements
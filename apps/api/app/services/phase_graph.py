@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from app.db.models import WorkflowKind
+
+
+@dataclass(frozen=True, slots=True)
+class PhaseNode:
+    name: str
+    # Phases with a unit run once per chapter/episode; the cursor carries the unit index.
+    unit: str | None = None
+    next: tuple[str, ...] = ()
+    # Inputs that must be identical for a speculative result to be reused as-is.
+    depends_on: tuple[str, ...] = ()
+    # Rolling inputs handed from one unit to the next. A speculative result built on an older
+    # value is still used, but it is flagged so the critic pass reconciles it.
+    carries: tuple[str, ...] = ()
+    speculative: bool = False
+
+
+PHASE_GRAPHS: dict[WorkflowKind, tuple[PhaseNode, ...]] = {
+    WorkflowKind.novel: (
+        PhaseNode("novel_outline", next=("novel_beats",)),
+        PhaseNode("novel_beats", depends_on=("outline",), next=("novel_chapter_draft",)),
+        PhaseNode(
+            "novel_chapter_draft",
+            unit="chapter",
+            depends_on=("beats",),
+            carries=("current_state",),
+            speculative=True,
+            next=("novel_chapter_critic",),
+        ),
+        PhaseNode(
+            "novel_chapter_critic",
+            unit="chapter",
+            next=("novel_chapter_fix", "novel_chapter_commit"),
+        ),
+        PhaseNode("novel_chapter_fix", unit="chapter", next=("novel_chapter_critic",)),
+        PhaseNode("novel_chapter_commit", unit="chapter", next=("novel_chapter_draft", "done")),
+    ),
+    WorkflowKind.script: (
+        PhaseNode("script_scene_list", next=("script_scene_draft",)),
+        PhaseNode("script_scene_draft", unit="scene", depends_on=("scene_list",), next=("script_scene_critic",)),
+        PhaseNode("script_scene_critic", unit="scene", next=("script_scene_fix", "script_scene_commit")),
+        PhaseNode("script_scene_fix", unit="scene", next=("script_scene_critic",)),
+        PhaseNode("script_scene_commit", unit="scene", next=("script_scene_draft", "done")),
+    ),
+    WorkflowKind.novel_to_script: (
+        PhaseNode("nts_chapter_plan", unit="chapter", depends_on=("novel_source",), next=("nts_episode_draft",)),
+        PhaseNode(
+            "nts_episode_breakdown",
+            unit="chapter",
+            depends_on=("novel_source",),
+            carries=("current_state", "script_episode_digests"),
+            speculative=True,
+            next=("nts_episode_draft",),
+        ),
+        PhaseNode("nts_episode_draft", unit="chapter", next=("nts_episode_critic",)),
+        PhaseNode("nts_episode_critic", unit="chapter", next=("nts_episode_fix", "nts_episode_commit")),
+        PhaseNode("nts_episode_fix", unit="chapter", next=("nts_episode_critic",)),
+        PhaseNode(
+            "nts_episode_commit",
+            unit="chapter",
+            next=("nts_episode_breakdown", "nts_episode_draft", "nts_chapter_plan", "done"),
+        ),
+        PhaseNode("nts_scene_list", depends_on=("novel_source",), next=("nts_scene_draft",)),
+        PhaseNode("nts_scene_draft", unit="scene", depends_on=("scene_list",), next=("nts_scene_critic",)),
+        PhaseNode("nts_scene_critic", unit="scene", next=("nts_scene_fix", "nts_scene_commit")),
+        PhaseNode("nts_scene_fix", unit="scene", next=("nts_scene_critic",)),
+        PhaseNode("nts_scene_commit", unit="scene", next=("nts_scene_draft", "done")),
+    ),
+}
+
+
+def phase_node(kind: WorkflowKind, phase: str) -> PhaseNode | None:
+    for node in PHASE_GRAPHS.get(kind, ()):
+        if node.name == phase:
+            return node
+    return None
+
+
+def speculative_node(kind: WorkflowKind, phase: str) -> PhaseNode | None:
+    # The phase that can be fanned out ahead of the unit currently being worked on.
+    current = phase_node(kind, phase)
+    if current is None or current.unit is None:
+        return None
+    for node in PHASE_GRAPHS.get(kind, ()):
+        if node.speculative and node.unit == current.unit:
+            return node
+    return None
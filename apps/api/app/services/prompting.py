@@ -91,6 +91,15 @@ def _repair_truncated_json_object(raw: str) -> str:
 
 
 def extract_json_object(text: str) -> dict[str, Any]:
+    return parse_json_object(text)[0]
+
+
+def parse_json_object(text: str) -> tuple[dict[str, Any], bool]:
+    """Like ``extract_json_object``, and also tells whether the object had to be repaired.
+
+    Code fences, whitespace or text around a valid object do not count as a repair; completing a
+    truncated object does.
+    """
     raw = (text or "").strip()
 
     if raw.startswith("```"):
@@ -99,7 +108,7 @@ def extract_json_object(text: str) -> dict[str, Any]:
             raw = raw[: -len("```")].strip()
 
     try:
-        return _loads_best_effort(raw)
+        return _loads_best_effort(raw), False
     except json.JSONDecodeError:
         start = raw.find("{")
         end = raw.rfind("}")
@@ -114,17 +123,70 @@ def extract_json_object(text: str) -> dict[str, Any]:
         last_error: Exception | None = None
         for candidate in candidates:
             try:
-                return _loads_best_effort(candidate)
+                return _loads_best_effort(candidate), False
             except Exception as exc:  # noqa: BLE001 - best-effort parsing
                 last_error = exc
 
             repaired = _repair_truncated_json_object(candidate)
             if repaired and repaired != candidate:
                 try:
-                    return _loads_best_effort(repaired)
+                    return _loads_best_effort(repaired), True
                 except Exception as exc:  # noqa: BLE001 - best-effort parsing
                     last_error = exc
 
         if last_error is not None:
             raise last_error
         raise
+
+
+def _strip_code_fence(text: str) -> str:
+    raw = (text or "").strip()
+    if raw.startswith("```"):
+        raw = re.sub(r"^```(?:json)?", "", raw).strip()
+    if raw.endswith("```"):
+        raw = raw[: -len("```")].rstrip()
+    return raw
+
+
+def _is_complete_json_object(text: str) -> bool:
+    try:
+        _loads_best_effort(_strip_code_fence(text))
+    except (json.JSONDecodeError, ValueError):
+        return False
+    return True
+
+
+def stitch_stream_continuation(
+    partial_output: str,
+    continuation: str,
+    *,
+    max_overlap_chars: int = 200,
+) -> str | None:
+    """Join an interrupted stream with the model's continuation of it.
+
+    Returns ``None`` when the pieces can't be joined into a complete JSON object (for JSON output).
+    """
+    partial = partial_output or ""
+    tail = continuation or ""
+    if not partial.strip():
+        return tail
+
+    expects_json = partial.lstrip().startswith(("{", "```"))
+    if not expects_json:
+        return partial + tail
+
+    # The model sometimes ignores the instruction and restarts the whole object.
+    if tail.lstrip().startswith(("{", "```")) and _is_complete_json_object(tail):
+        return tail
+
+    candidates: list[str] = [partial + tail]
+    head = tail.lstrip()
+    # Continuations often repeat the last few characters of the partial output.
+    for size in range(min(max_overlap_chars, len(partial), len(head)), 0, -1):
+        if partial.endswith(head[:size]):
+            candidates.append(partial + head[size:])
+
+    for candidate in candidates:
+        if _is_complete_json_object(candidate):
+            return candidate
+    return None
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+from app.llm.client import LLMClient
+from app.llm.routing import llm_for_phase
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True, slots=True)
+class BreakerPolicy:
+    window_s: float = 60.0
+    min_calls: int = 5
+    error_rate: float = 0.5
+    slow_call_s: float = 120.0
+    slow_call_rate: float = 0.8
+    open_s: float = 15.0
+    max_open_s: float = 120.0
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    if isinstance(exc, (APIConnectionError, APITimeoutError, TimeoutError)):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in {408, 429} or exc.status_code >= 500
+    return False
+
+
+def provider_breaker_key(meta: dict[str, Any]) -> str:
+    effective = meta.get("effective") if isinstance(meta, dict) else None
+    if not isinstance(effective, dict) or effective.get("source") == "override":
+        return "override"
+    return f"{effective.get('base_url') or 'default'}#{effective.get('model')}"
+
+
+def _routed_breaker_key(llm: LLMClient, default_key: str) -> str:
+    # Phase routes may send some phases to another model (or endpoint); those get breakers of their
+    # own so one failing model does not trip the breaker for healthy ones.
+    model = getattr(llm, "model", None)
+    if default_key == "override" or not model:
+        return default_key
+    base_url = getattr(llm, "base_url", None) or default_key.split("#", 1)[0]
+    return f"{base_url}#{model}"
+
+
+class ProviderCircuitBreaker:
+    def __init__(self, *, key: str, policy: BreakerPolicy | None = None) -> None:
+        self.key = key
+        self.policy = policy or BreakerPolicy()
+        self.state = BREAKER_CLOSED
+        self._calls: deque[tuple[float, bool, bool]] = deque()
+        self._open_until = 0.0
+        self._trips = 0
+        self._probe_in_flight = False
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        changed = self._changed
+        self._changed = asyncio.Event()
+        changed.set()
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.policy.window_s:
+            self._calls.popleft()
+
+    def _open(self, now: float) -> None:
+        self._trips += 1
+        open_s = min(self.policy.max_open_s, self.policy.open_s * (2 ** (self._trips - 1)))
+        self.state = BREAKER_OPEN
+        self._open_until = now + open_s
+        self._probe_in_flight = False
+        self._calls.clear()
+        self._notify()
+
+    def _close(self) -> None:
+        self.state = BREAKER_CLOSED
+        self._trips = 0
+        self._probe_in_flight = False
+        self._calls.clear()
+        self._notify()
+
+    def retry_in_s(self) -> float:
+        if self.state == BREAKER_OPEN:
+            return max(0.0, self._open_until - time.monotonic())
+        return 0.0
+
+    def _try_acquire(self) -> float:
+        if self.state == BREAKER_CLOSED:
+            return 0.0
+        now = time.monotonic()
+        if self.state == BREAKER_OPEN:
+            if now < self._open_until:
+                return self._open_until - now
+            self.state = BREAKER_HALF_OPEN
+            self._probe_in_flight = False
+            self._notify()
+        if self._probe_in_flight:
+            return self.policy.open_s
+        self._probe_in_flight = True
+        return 0.0
+
+    async def acquire(self) -> None:
+        while True:
+            delay = self._try_acquire()
+            if delay <= 0:
+                return
+            changed = self._changed
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=delay)
+            except TimeoutError:
+                pass
+
+    def release(self) -> None:
+        if self.state == BREAKER_HALF_OPEN and self._probe_in_flight:
+            self._probe_in_flight = False
+            self._notify()
+
+    def record(self, *, failed: bool, latency_s: float) -> None:
+        now = time.monotonic()
+        slow = latency_s >= self.policy.slow_call_s
+        if self.state == BREAKER_HALF_OPEN:
+            if failed or slow:
+                self._open(now)
+            else:
+                self._close()
+            return
+        if self.state == BREAKER_OPEN:
+            return
+
+        self._calls.append((now, failed, slow))
+        self._prune(now)
+        total = len(self._calls)
+        if total < self.policy.min_calls:
+            return
+        failures = sum(1 for _ts, call_failed, _slow in self._calls if call_failed)
+        slow_calls = sum(1 for _ts, _failed, call_slow in self._calls if call_slow)
+        if failures / total >= self.policy.error_rate or slow_calls / total >= self.policy.slow_call_rate:
+            self._open(now)
+
+    def snapshot(self) -> dict[str, Any]:
+        self._prune(time.monotonic())
+        total = len(self._calls)
+        failures = sum(1 for _ts, failed, _slow in self._calls if failed)
+        return {
+            "key": self.key,
+            "state": self.state,
+            "retry_in_s": round(self.retry_in_s(), 1),
+            "window_calls": total,
+            "window_error_rate": round(failures / total, 3) if total else 0.0,
+            "trips": self._trips,
+        }
+
+
+class ProviderBreakerRegistry:
+    def __init__(self, *, policy: BreakerPolicy | None = None) -> None:
+        self._policy = policy
+        self._breakers: dict[str, ProviderCircuitBreaker] = {}
+
+    def get(self, key: str) -> ProviderCircuitBreaker:
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = ProviderCircuitBreaker(key=key, policy=self._policy)
+            self._breakers[key] = breaker
+        return breaker
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [self._breakers[key].snapshot() for key in sorted(self._breakers)]
+
+
+class BreakerGuardedLLM:
+    def __init__(
+        self,
+        llm: LLMClient,
+        breaker: ProviderCircuitBreaker,
+        registry: ProviderBreakerRegistry | None = None,
+    ) -> None:
+        self._llm = llm
+        self._breaker = breaker
+        self._registry = registry
+
+    @property
+    def model(self) -> str | None:
+        return getattr(self._llm, "model", None)
+
+    @property
+    def supports_json_schema(self) -> bool:
+        return bool(getattr(self._llm, "supports_json_schema", False))
+
+    def for_phase(self, phase: str | None) -> LLMClient:
+        routed = llm_for_phase(self._llm, phase)
+        breaker = self._breaker
+        if self._registry is not None:
+            breaker = self._registry.get(_routed_breaker_key(routed, self._breaker.key))
+        return guard_llm(routed, breaker, registry=self._registry)
+
+    async def complete(self, *, system_prompt: str, user_prompt: str, **kwargs: Any) -> str:
+        await self._breaker.acquire()
+        started = time.monotonic()
+        try:
+            result = await self._llm.complete(system_prompt=system_prompt, user_prompt=user_prompt, **kwargs)
+        except BaseException as exc:
+            if is_provider_failure(exc):
+                self._breaker.record(failed=True, latency_s=time.monotonic() - started)
+            else:
+                self._breaker.release()
+            raise
+        self._breaker.record(failed=False, latency_s=time.monotonic() - started)
+        return result
+
+
+class _BreakerGuardedStreamingLLM(BreakerGuardedLLM):
+    async def stream_complete(self, *, system_prompt: str, user_prompt: str, **kwargs: Any) -> AsyncIterator[str]:
+        # One sample per call, taken when the stream ends: a stream that dies mid-way is a failure,
+        # and a half-open probe only closes the breaker once the whole stream came through. The
+        # latency is the time to the first token, so a long generation does not count as slow.
+        await self._breaker.acquire()
+        started = time.monotonic()
+        first_token_s: float | None = None
+        try:
+            async for delta in self._llm.stream_complete(  # type: ignore[attr-defined]
+                system_prompt=system_prompt, user_prompt=user_prompt, **kwargs
+            ):
+                if first_token_s is None:
+                    first_token_s = time.monotonic() - started
+                yield delta
+        except BaseException as exc:
+            if is_provider_failure(exc):
+                self._breaker.record(failed=True, latency_s=time.monotonic() - started)
+            else:
+                self._breaker.release()
+            raise
+        latency_s = first_token_s if first_token_s is not None else time.monotonic() - started
+        self._breaker.record(failed=False, latency_s=latency_s)
+
+
+def guard_llm(
+    llm: LLMClient,
+    breaker: ProviderCircuitBreaker,
+    *,
+    registry: ProviderBreakerRegistry | None = None,
+) -> LLMClient:
+    if isinstance(llm, BreakerGuardedLLM):
+        return llm
+    if hasattr(llm, "stream_complete"):
+        return _BreakerGuardedStreamingLLM(llm, breaker, registry)
+    return BreakerGuardedLLM(llm, breaker, registry)
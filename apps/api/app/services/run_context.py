@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import json
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import BriefSnapshot
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.services.llm_provider import resolve_llm_and_embeddings
+from app.services.settings_store import get_prompt_presets, resolve_runtime_execution_preferences
+
+
+class RunContextGenerations:
+    def __init__(self) -> None:
+        self._global = 0
+        self._runs: dict[uuid.UUID, int] = {}
+
+    def current(self, run_id: uuid.UUID) -> tuple[int, int]:
+        return self._global, self._runs.get(run_id, 0)
+
+    def invalidate(self, run_id: uuid.UUID | None = None) -> None:
+        if run_id is None:
+            self._global += 1
+        else:
+            self._runs[run_id] = self._runs.get(run_id, 0) + 1
+
+    def forget(self, run_id: uuid.UUID) -> None:
+        self._runs.pop(run_id, None)
+
+
+@dataclass(slots=True)
+class RunContext:
+    run_id: uuid.UUID
+    snapshot: BriefSnapshot
+    brief_json: Any
+    brief_json_text: str
+    runtime_prefs: dict[str, Any]
+    prompt_presets: dict[str, Any]
+    llm: LLMClient | None
+    embeddings: EmbeddingsClient | None
+    provider_meta: dict[str, Any]
+    max_step_retries: int
+    backoff_s: float
+    generation: tuple[int, int] = (0, 0)
+    loads: int = 1
+
+
+def _generations(app: FastAPI | None) -> RunContextGenerations | None:
+    generations = getattr(app.state, "run_context_generations", None) if app is not None else None
+    return generations if isinstance(generations, RunContextGenerations) else None
+
+
+def invalidate_run_contexts(app: FastAPI | None, *, run_id: uuid.UUID | None = None) -> None:
+    generations = _generations(app)
+    if generations is not None:
+        generations.invalidate(run_id)
+
+
+def run_context_is_stale(app: FastAPI | None, context: RunContext) -> bool:
+    generations = _generations(app)
+    if generations is None:
+        return False
+    return generations.current(context.run_id) != context.generation
+
+
+def _coerce_retry_policy(runtime_prefs: dict[str, Any]) -> tuple[int, float]:
+    try:
+        retries = max(0, int(runtime_prefs.get("auto_step_retries")))
+    except (TypeError, ValueError):
+        retries = 3
+    try:
+        backoff_s = max(0.0, float(runtime_prefs.get("auto_step_backoff_s")))
+    except (TypeError, ValueError):
+        backoff_s = 1.0
+    return retries, backoff_s
+
+
+async def load_run_context(
+    *,
+    session: AsyncSession,
+    app: FastAPI | None,
+    run_id: uuid.UUID,
+    brief_snapshot_id: uuid.UUID,
+    previous: RunContext | None = None,
+) -> RunContext:
+    generations = _generations(app)
+    # Read the generation first so an invalidation that races with the load is not lost.
+    generation = generations.current(run_id) if generations is not None else (0, 0)
+
+    snapshot = await session.get(BriefSnapshot, brief_snapshot_id)
+    if not snapshot:
+        raise RuntimeError("brief_snapshot_not_found")
+    # The snapshot outlives this session; keep later rollbacks from expiring it.
+    session.expunge(snapshot)
+    runtime_prefs = await resolve_runtime_execution_preferences(session=session, brief_id=snapshot.brief_id)
+    prompt_presets = await get_prompt_presets(session=session)
+    llm: LLMClient | None = None
+    embeddings: EmbeddingsClient | None = None
+    meta: dict[str, Any] = {}
+    if app is not None:
+        llm, embeddings, meta = await resolve_llm_and_embeddings(session=session, app=app)
+    max_step_retries, backoff_s = _coerce_retry_policy(runtime_prefs)
+
+    brief_json = snapshot.content
+    return RunContext(
+        run_id=run_id,
+        snapshot=snapshot,
+        brief_json=brief_json,
+        brief_json_text=json.dumps(brief_json, ensure_ascii=False, indent=2),
+        runtime_prefs=runtime_prefs,
+        prompt_presets=prompt_presets,
+        llm=llm,
+        embeddings=embeddings,
+        provider_meta=meta,
+        max_step_retries=max_step_retries,
+        backoff_s=backoff_s,
+        generation=generation,
+        loads=(previous.loads + 1) if previous is not None else 1,
+    )
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import WorkflowRun, WorkflowRunStateBlob, WorkflowRunStateItem
+
+# Large, rarely-changing values are stored once per distinct content and referenced by digest.
+STATE_BLOB_KEYS = ("outline", "beats", "scene_list", "chapter_plan", "episode_breakdown", "novel_source")
+# Append-only collections are stored one row per item, so appending costs a single insert.
+STATE_ITEM_KEYS = ("chapter_episode_map", "script_episode_digests")
+
+_BLOB_REF = "$blob"
+_ITEMS_REF = "$items"
+
+
+def _canonical_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def state_blob_digest(value: Any) -> str:
+    return hashlib.sha256(_canonical_json(value).encode("utf-8")).hexdigest()
+
+
+def _blob_ref_digest(value: Any) -> str | None:
+    if isinstance(value, dict) and len(value) == 1 and isinstance(value.get(_BLOB_REF), str):
+        return value[_BLOB_REF]
+    return None
+
+
+def _is_items_ref(value: Any, key: str) -> bool:
+    return isinstance(value, dict) and value.get(_ITEMS_REF) == key
+
+
+class RunStateStore:
+    def __init__(self, *, session: AsyncSession, run_id: Any) -> None:
+        self.session = session
+        self.run_id = run_id
+        self._digests: set[str] = set()
+        self._digests_loaded = False
+        self._items: dict[str, list[WorkflowRunStateItem]] = {}
+        self._items_loaded = False
+        self._item_keys: set[str] = set()
+
+    def note_refs(self, state: dict[str, Any] | None) -> None:
+        for key in STATE_ITEM_KEYS:
+            if _is_items_ref((state or {}).get(key), key):
+                self._item_keys.add(key)
+
+    async def _load_digests(self) -> None:
+        rows = await self.session.scalars(
+            select(WorkflowRunStateBlob.digest).where(WorkflowRunStateBlob.workflow_run_id == self.run_id)
+        )
+        self._digests.update(rows.all())
+        self._digests_loaded = True
+
+    async def _load_items(self) -> None:
+        if self._items_loaded:
+            return
+        rows = await self.session.scalars(
+            select(WorkflowRunStateItem)
+            .where(WorkflowRunStateItem.workflow_run_id == self.run_id)
+            .order_by(WorkflowRunStateItem.collection, WorkflowRunStateItem.position)
+        )
+        items: dict[str, list[WorkflowRunStateItem]] = {}
+        for row in rows.all():
+            items.setdefault(row.collection, []).append(row)
+        self._items = items
+        self._items_loaded = True
+
+    async def expand(self, state: dict[str, Any] | None) -> dict[str, Any]:
+        self.note_refs(state)
+        expanded: dict[str, Any] = copy.deepcopy(state or {})
+
+        digests = {
+            key: digest
+            for key in STATE_BLOB_KEYS
+            if (digest := _blob_ref_digest(expanded.get(key))) is not None
+        }
+        if digests:
+            rows = await self.session.execute(
+                select(WorkflowRunStateBlob.digest, WorkflowRunStateBlob.content).where(
+                    WorkflowRunStateBlob.workflow_run_id == self.run_id,
+                    WorkflowRunStateBlob.digest.in_(set(digests.values())),
+                )
+            )
+            contents = {digest: content for digest, content in rows.all()}
+            for key, digest in digests.items():
+                if digest in contents:
+                    expanded[key] = copy.deepcopy(contents[digest])
+                else:
+                    expanded.pop(key, None)
+
+        if any(_is_items_ref(expanded.get(key), key) for key in STATE_ITEM_KEYS):
+            await self._load_items()
+            for key in STATE_ITEM_KEYS:
+                if _is_items_ref(expanded.get(key), key):
+                    expanded[key] = [copy.deepcopy(row.value) for row in self._items.get(key, [])]
+        return expanded
+
+    async def compact(self, state: dict[str, Any]) -> dict[str, Any]:
+        compacted: dict[str, Any] = {}
+        for key, value in state.items():
+            if key in STATE_BLOB_KEYS and value is not None:
+                compacted[key] = await self._put_blob(value)
+            elif key in STATE_ITEM_KEYS and (isinstance(value, list) or _is_items_ref(value, key)):
+                compacted[key] = await self._put_items(key, value)
+            else:
+                compacted[key] = copy.deepcopy(value)
+
+        for key in STATE_ITEM_KEYS:
+            if key in self._item_keys and not isinstance(compacted.get(key), dict):
+                await self._drop_items(key)
+        return compacted
+
+    async def _put_blob(self, value: Any) -> dict[str, str]:
+        digest = _blob_ref_digest(value)
+        if digest is not None:
+            return {_BLOB_REF: digest}
+        digest = state_blob_digest(value)
+        if digest not in self._digests:
+            if not self._digests_loaded:
+                await self._load_digests()
+            if digest not in self._digests:
+                self.session.add(
+                    WorkflowRunStateBlob(
+                        workflow_run_id=self.run_id,
+                        digest=digest,
+                        content=json.loads(_canonical_json(value)),
+                    )
+                )
+                self._digests.add(digest)
+        return {_BLOB_REF: digest}
+
+    async def _put_items(self, key: str, value: Any) -> dict[str, Any]:
+        await self._load_items()
+        self._item_keys.add(key)
+        rows = self._items.setdefault(key, [])
+        if _is_items_ref(value, key):
+            return {_ITEMS_REF: key, "count": len(rows)}
+
+        for position, item in enumerate(value):
+            if position < len(rows):
+                if rows[position].value != item:
+                    rows[position].value = copy.deepcopy(item)
+                continue
+            row = WorkflowRunStateItem(
+                workflow_run_id=self.run_id,
+                collection=key,
+                position=position,
+                value=copy.deepcopy(item),
+            )
+            self.session.add(row)
+            rows.append(row)
+        if len(rows) > len(value):
+            for row in rows[len(value):]:
+                await self.session.delete(row)
+            del rows[len(value):]
+            # Deletes flush after inserts; flush now so the positions can be reused.
+            await self.session.flush()
+        return {_ITEMS_REF: key, "count": len(rows)}
+
+    async def _drop_items(self, key: str) -> None:
+        await self._load_items()
+        self._item_keys.discard(key)
+        rows = self._items.pop(key, [])
+        for row in rows:
+            await self.session.delete(row)
+        if rows:
+            await self.session.flush()
+
+
+async def load_run_state(*, session: AsyncSession, run: WorkflowRun) -> tuple[RunStateStore, dict[str, Any]]:
+    store = RunStateStore(session=session, run_id=run.id)
+    return store, await store.expand(run.state)
+
+
+async def expand_run_state(*, session: AsyncSession, run: WorkflowRun) -> dict[str, Any]:
+    return await RunStateStore(session=session, run_id=run.id).expand(run.state)
+
+
+async def store_run_state(*, session: AsyncSession, run: WorkflowRun, state: dict[str, Any]) -> None:
+    if run.id is None:
+        await session.flush()
+    store = RunStateStore(session=session, run_id=run.id)
+    store.note_refs(run.state)
+    run.state = await store.compact(state)
+
@@ -8,13 +8,29 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import Settings
 from app.db.models import AppSetting
+from app.llm.endpoints import same_base_url
 from app.schemas.briefs import ScriptFormat
+from app.services.critic_policy import DEFAULT_CRITIC_POLICY, normalize_critic_policy
 from app.services.json_utils import deep_merge
+from app.services.paragraph_fix import FIX_MODE_WHOLE, normalize_fix_mode
 
 OUTPUT_SPEC_DEFAULTS_KEY = "output_spec_defaults"
 LLM_PROVIDER_SETTINGS_KEY = "llm_provider_settings"
 NOVEL_TO_SCRIPT_PROMPT_DEFAULTS_KEY = "novel_to_script_prompt_defaults"
 PROMPT_PRESETS_KEY = "prompt_presets"
+LLM_PHASE_ROUTING_KEY = "llm_phase_routing"
+
+# Phases that only judge, extract or repair; routed to the fast model when one is configured.
+LIGHTWEIGHT_LLM_PHASES: tuple[str, ...] = (
+    "novel_chapter_critic",
+    "script_scene_critic",
+    "nts_episode_critic",
+    "nts_scene_critic",
+    "json_repair",
+    "kg_extraction",
+    "propagation_extraction",
+    "story_lint",
+)
 
 SERVER_OUTPUT_SPEC_DEFAULTS: dict[str, Any] = {
     "language": "zh-CN",
@@ -23,6 +39,18 @@ SERVER_OUTPUT_SPEC_DEFAULTS: dict[str, Any] = {
     "max_fix_attempts": 2,
     "auto_step_retries": 3,
     "auto_step_backoff_s": 1.0,
+    "step_deadline_s": 900.0,
+    "step_idle_timeout_s": 180.0,
+    "phase_deadlines": {},
+    "speculative_draft_window": 0,
+    "speculative_draft_concurrency": 2,
+    "critic_policy": dict(DEFAULT_CRITIC_POLICY),
+    "draft_self_review": False,
+    "fix_mode": FIX_MODE_WHOLE,
+    "paragraph_fix_concurrency": 4,
+    "propagation_repair_concurrency": 4,
+    # Downstream artifacts scoring below this are not flagged by propagation; 0 flags all of them.
+    "propagation_impact_min_relevance": 0.3,
 }
 
 SERVER_PROMPT_PRESETS_DEFAULTS: dict[str, Any] = {
@@ -158,6 +186,25 @@ async def patch_prompt_presets(
     return normalized
 
 
+def _normalize_phase_deadlines(raw: object) -> dict[str, dict[str, float]]:
+    if not isinstance(raw, dict):
+        return {}
+    out: dict[str, dict[str, float]] = {}
+    for phase, item in raw.items():
+        if not isinstance(item, dict):
+            continue
+        limits: dict[str, float] = {}
+        for key in ("deadline_s", "idle_timeout_s"):
+            try:
+                seconds = float(item.get(key))
+            except (TypeError, ValueError):
+                continue
+            limits[key] = max(0.0, seconds)
+        if limits:
+            out[str(phase)] = limits
+    return out
+
+
 async def get_output_spec_defaults(*, session: AsyncSession) -> dict[str, Any]:
     setting = await session.get(AppSetting, OUTPUT_SPEC_DEFAULTS_KEY)
     stored = dict(setting.value or {}) if setting else {}
@@ -195,6 +242,35 @@ async def get_output_spec_defaults(*, session: AsyncSession) -> dict[str, Any]:
         auto_step_backoff_s = 0.0
     resolved["auto_step_backoff_s"] = auto_step_backoff_s
 
+    for key in ("step_deadline_s", "step_idle_timeout_s"):
+        try:
+            seconds = float(resolved.get(key))
+        except (TypeError, ValueError):
+            seconds = float(SERVER_OUTPUT_SPEC_DEFAULTS[key])
+        resolved[key] = max(0.0, seconds)
+    resolved["phase_deadlines"] = _normalize_phase_deadlines(resolved.get("phase_deadlines"))
+
+    try:
+        min_relevance = float(resolved.get("propagation_impact_min_relevance"))
+    except (TypeError, ValueError):
+        min_relevance = float(SERVER_OUTPUT_SPEC_DEFAULTS["propagation_impact_min_relevance"])
+    resolved["propagation_impact_min_relevance"] = min(1.0, max(0.0, min_relevance))
+
+    for key in (
+        "speculative_draft_window",
+        "speculative_draft_concurrency",
+        "paragraph_fix_concurrency",
+        "propagation_repair_concurrency",
+    ):
+        try:
+            count = int(resolved.get(key))
+        except (TypeError, ValueError):
+            count = int(SERVER_OUTPUT_SPEC_DEFAULTS[key])
+        resolved[key] = max(0, count)
+    resolved["critic_policy"] = normalize_critic_policy(resolved.get("critic_policy"))
+    resolved["draft_self_review"] = bool(resolved.get("draft_self_review"))
+    resolved["fix_mode"] = normalize_fix_mode(resolved.get("fix_mode"))
+
     return resolved
 
 
@@ -254,9 +330,34 @@ async def resolve_runtime_execution_preferences(
         "auto_step_backoff_s": _as_float(
             "auto_step_backoff_s", fallback=float(defaults.get("auto_step_backoff_s") or 0.0)
         ),
+        "step_deadline_s": _as_float("step_deadline_s", fallback=0.0),
+        "step_idle_timeout_s": _as_float("step_idle_timeout_s", fallback=0.0),
+        "phase_deadlines": _normalize_phase_deadlines(merged.get("phase_deadlines")),
+        "speculative_draft_window": _as_int("speculative_draft_window", fallback=0),
+        "speculative_draft_concurrency": _as_int(
+            "speculative_draft_concurrency",
+            fallback=int(SERVER_OUTPUT_SPEC_DEFAULTS["speculative_draft_concurrency"]),
+        ),
+        "critic_policy": normalize_critic_policy(merged.get("critic_policy")),
+        "draft_self_review": bool(merged.get("draft_self_review")),
+        "fix_mode": normalize_fix_mode(merged.get("fix_mode")),
+        "paragraph_fix_concurrency": _as_int("paragraph_fix_concurrency", fallback=1),
+        "propagation_repair_concurrency": _as_int("propagation_repair_concurrency", fallback=1),
+        "propagation_impact_min_relevance": _as_float("propagation_impact_min_relevance", fallback=0.0),
     }
 
 
+def resolve_phase_deadlines(*, runtime_prefs: dict[str, Any], phase: str) -> tuple[float, float]:
+    deadline_s = float(runtime_prefs.get("step_deadline_s") or 0.0)
+    idle_timeout_s = float(runtime_prefs.get("step_idle_timeout_s") or 0.0)
+    overrides = runtime_prefs.get("phase_deadlines")
+    override = overrides.get(phase) if isinstance(overrides, dict) else None
+    if isinstance(override, dict):
+        deadline_s = float(override.get("deadline_s", deadline_s))
+        idle_timeout_s = float(override.get("idle_timeout_s", idle_timeout_s))
+    return deadline_s, idle_timeout_s
+
+
 async def get_novel_to_script_prompt_defaults(*, session: AsyncSession) -> dict[str, Any]:
     setting = await session.get(AppSetting, NOVEL_TO_SCRIPT_PROMPT_DEFAULTS_KEY)
     stored = dict(setting.value or {}) if setting else {}
@@ -289,6 +390,39 @@ async def patch_novel_to_script_prompt_defaults(
     return await get_novel_to_script_prompt_defaults(session=session)
 
 
+def _normalize_failover_endpoints(raw: object) -> list[dict[str, Any]]:
+    if not isinstance(raw, list):
+        return []
+    endpoints: list[dict[str, Any]] = []
+    for item in raw:
+        if not isinstance(item, dict):
+            continue
+        model = _normalize_optional_str(item.get("model"))
+        base_url = _normalize_optional_str(item.get("base_url"))
+        if model is None and base_url is None:
+            continue
+        endpoint: dict[str, Any] = {"base_url": base_url, "model": model}
+        api_key = _normalize_optional_str(item.get("api_key"))
+        if api_key is not None:
+            endpoint["api_key"] = api_key
+        endpoints.append(endpoint)
+    return endpoints
+
+
+def _normalize_hedge_percentile(raw: object) -> float | None:
+    if raw is None or isinstance(raw, bool):
+        return None
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None
+    if value > 1:
+        value = value / 100
+    if value <= 0 or value >= 1:
+        return None
+    return value
+
+
 async def get_llm_provider_settings_raw(*, session: AsyncSession) -> dict[str, Any]:
     setting = await session.get(AppSetting, LLM_PROVIDER_SETTINGS_KEY)
     return dict(setting.value or {}) if setting else {}
@@ -325,6 +459,30 @@ def resolve_llm_provider_effective_config(
         _normalize_optional_str(env_settings.openai_api_key) if env_settings.openai_api_key else None
     )
 
+    structured_output_raw = stored.get("structured_output")
+    if isinstance(structured_output_raw, bool):
+        structured_output = structured_output_raw
+    else:
+        structured_output = bool(env_settings.openai_structured_output)
+
+    hedge_initial_delay_raw = stored.get("hedge_initial_delay_s")
+    try:
+        hedge_initial_delay_s = (
+            max(0.0, float(hedge_initial_delay_raw)) if hedge_initial_delay_raw is not None else None
+        )
+    except (TypeError, ValueError):
+        hedge_initial_delay_s = None
+
+    # An endpoint without a base_url or model takes the primary's.
+    failover_endpoints = [
+        {
+            **endpoint,
+            "base_url": endpoint.get("base_url") or base_url,
+            "model": endpoint.get("model") or model,
+        }
+        for endpoint in _normalize_failover_endpoints(stored.get("failover_endpoints"))
+    ]
+
     return {
         "base_url": base_url,
         "api_key": api_key,
@@ -332,6 +490,10 @@ def resolve_llm_provider_effective_config(
         "embeddings_model": embeddings_model,
         "timeout_s": timeout_s,
         "max_retries": max_retries,
+        "structured_output": structured_output,
+        "failover_endpoints": failover_endpoints,
+        "hedge_percentile": _normalize_hedge_percentile(stored.get("hedge_percentile")),
+        "hedge_initial_delay_s": hedge_initial_delay_s,
     }
 
 
@@ -350,6 +512,17 @@ async def get_llm_provider_settings(
         "embeddings_model": effective.get("embeddings_model"),
         "timeout_s": effective.get("timeout_s"),
         "max_retries": effective.get("max_retries"),
+        "structured_output": effective.get("structured_output"),
+        "failover_endpoints": [
+            {
+                "base_url": endpoint.get("base_url"),
+                "model": endpoint.get("model"),
+                "api_key_configured": bool(endpoint.get("api_key")),
+            }
+            for endpoint in effective.get("failover_endpoints") or []
+        ],
+        "hedge_percentile": effective.get("hedge_percentile"),
+        "hedge_initial_delay_s": effective.get("hedge_initial_delay_s"),
         "api_key_configured": api_key_configured,
     }
 
@@ -358,6 +531,7 @@ async def patch_llm_provider_settings(
     *,
     session: AsyncSession,
     patch: dict[str, Any],
+    env_settings: Settings,
 ) -> None:
     setting = await session.get(AppSetting, LLM_PROVIDER_SETTINGS_KEY)
     stored: dict[str, Any] = dict(setting.value or {}) if setting else {}
@@ -388,9 +562,36 @@ async def patch_llm_provider_settings(
             stored[key] = float(value)
         elif key == "max_retries":
             stored[key] = int(value)
+        elif key == "structured_output":
+            stored[key] = bool(value)
+        elif key == "failover_endpoints":
+            previous_keys = {
+                (endpoint.get("base_url"), endpoint.get("model")): endpoint.get("api_key")
+                for endpoint in _normalize_failover_endpoints(stored.get(key))
+            }
+            endpoints = _normalize_failover_endpoints(value)
+            for endpoint in endpoints:
+                # API keys are write-only; keep the stored one when the client doesn't resend it.
+                previous_key = previous_keys.get((endpoint.get("base_url"), endpoint.get("model")))
+                if "api_key" not in endpoint and previous_key:
+                    endpoint["api_key"] = previous_key
+            stored[key] = endpoints
+        elif key == "hedge_percentile":
+            stored[key] = _normalize_hedge_percentile(value)
+        elif key == "hedge_initial_delay_s":
+            stored[key] = max(0.0, float(value))
         else:
             stored[key] = value
 
+    if patch.get("failover_endpoints"):
+        effective = resolve_llm_provider_effective_config(stored=stored, env_settings=env_settings)
+        for endpoint in effective["failover_endpoints"]:
+            # An endpoint on another host needs a key of its own; the primary one is not sent there.
+            if not endpoint.get("api_key") and not same_base_url(
+                endpoint.get("base_url"), effective["base_url"]
+            ):
+                raise ValueError("llm_failover_api_key_required")
+
     if setting is None:
         setting = AppSetting(key=LLM_PROVIDER_SETTINGS_KEY, value=stored)
         session.add(setting)
@@ -398,3 +599,136 @@ async def patch_llm_provider_settings(
         setting.value = stored
 
     await session.commit()
+
+
+def _normalize_llm_phase_route(raw: object) -> dict[str, Any]:
+    if not isinstance(raw, dict):
+        return {}
+    route: dict[str, Any] = {}
+    for key in ("model", "base_url", "api_key"):
+        cleaned = _normalize_optional_str(raw.get(key))
+        if cleaned is not None:
+            route[key] = cleaned
+    return route
+
+
+async def get_llm_phase_routing_raw(*, session: AsyncSession) -> dict[str, Any]:
+    setting = await session.get(AppSetting, LLM_PHASE_ROUTING_KEY)
+    stored = dict(setting.value or {}) if setting else {}
+    routes_raw = stored.get("routes")
+    routes: dict[str, dict[str, Any]] = {}
+    if isinstance(routes_raw, dict):
+        for phase, raw_route in routes_raw.items():
+            phase_key = _normalize_optional_str(phase)
+            route = _normalize_llm_phase_route(raw_route)
+            if phase_key and route:
+                routes[phase_key] = route
+    return {"fast_model": _normalize_optional_str(stored.get("fast_model")), "routes": routes}
+
+
+def resolve_llm_phase_route(
+    *,
+    routing: dict[str, Any],
+    phase: str | None,
+    env_settings: Settings,
+) -> dict[str, Any]:
+    if not phase:
+        return {}
+    routes = routing.get("routes") if isinstance(routing.get("routes"), dict) else {}
+    route = dict(routes.get(phase) or {})
+    if "model" not in route and phase in LIGHTWEIGHT_LLM_PHASES:
+        fast_model = _normalize_optional_str(routing.get("fast_model")) or _normalize_optional_str(
+            env_settings.openai_fast_model
+        )
+        if fast_model:
+            route["model"] = fast_model
+    return route
+
+
+async def get_llm_phase_routing(
+    *,
+    session: AsyncSession,
+    env_settings: Settings,
+) -> dict[str, Any]:
+    routing = await get_llm_phase_routing_raw(session=session)
+    provider = resolve_llm_provider_effective_config(
+        stored=await get_llm_provider_settings_raw(session=session),
+        env_settings=env_settings,
+    )
+
+    effective_models: dict[str, str] = {}
+    for phase in [*LIGHTWEIGHT_LLM_PHASES, *routing["routes"].keys()]:
+        route = resolve_llm_phase_route(routing=routing, phase=phase, env_settings=env_settings)
+        effective_models[phase] = str(route.get("model") or provider.get("model"))
+
+    return {
+        "fast_model": routing.get("fast_model") or _normalize_optional_str(env_settings.openai_fast_model),
+        "lightweight_phases": list(LIGHTWEIGHT_LLM_PHASES),
+        "routes": {
+            phase: {
+                "model": route.get("model"),
+                "base_url": route.get("base_url"),
+                "api_key_configured": bool(route.get("api_key")),
+            }
+            for phase, route in routing["routes"].items()
+        },
+        "effective_models": effective_models,
+    }
+
+
+async def patch_llm_phase_routing(
+    *,
+    session: AsyncSession,
+    patch: dict[str, Any],
+    env_settings: Settings,
+) -> None:
+    setting = await session.get(AppSetting, LLM_PHASE_ROUTING_KEY)
+    stored = await get_llm_phase_routing_raw(session=session)
+
+    if "fast_model" in patch:
+        cleaned = _normalize_optional_str(patch.get("fast_model"))
+        if cleaned is None:
+            stored.pop("fast_model", None)
+        else:
+            stored["fast_model"] = cleaned
+
+    routes_patch = patch.get("routes")
+    if isinstance(routes_patch, dict):
+        routes: dict[str, dict[str, Any]] = dict(stored.get("routes") or {})
+        for phase, route_patch in routes_patch.items():
+            phase_key = _normalize_optional_str(phase)
+            if not phase_key:
+                continue
+            if route_patch is None:
+                routes.pop(phase_key, None)
+                continue
+            route = dict(routes.get(phase_key) or {})
+            for key, value in dict(route_patch).items():
+                cleaned = _normalize_optional_str(value)
+                if cleaned is None:
+                    route.pop(key, None)
+                else:
+                    route[key] = cleaned
+            route = _normalize_llm_phase_route(route)
+            if route:
+                routes[phase_key] = route
+            else:
+                routes.pop(phase_key, None)
+        primary = resolve_llm_provider_effective_config(
+            stored=await get_llm_provider_settings_raw(session=session), env_settings=env_settings
+        )
+        for route in routes.values():
+            # A route to another host needs a key of its own; the primary one is not sent there.
+            if not route.get("api_key") and not same_base_url(
+                route.get("base_url") or primary.get("base_url"), primary.get("base_url")
+            ):
+                raise ValueError("llm_route_api_key_required")
+        stored["routes"] = routes
+
+    if setting is None:
+        setting = AppSetting(key=LLM_PHASE_ROUTING_KEY, value=stored)
+        session.add(setting)
+    else:
+        setting.value = stored
+
+    await session.commit()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.llm_metrics import llm_metrics
+from app.services.step_cancellation import (
+    CANCEL_REASON_STOPPED,
+    StepCancellation,
+    await_detached,
+    bind_step_cancellation,
+    spawn_detached,
+)
+
+SpeculativeFactory = Callable[[AsyncSession], Awaitable[Any]]
+
+
+@dataclass(slots=True)
+class SpeculativeResult:
+    value: Any
+    # True when the rolling inputs (carries) moved on after the draft was started.
+    stale: bool = False
+
+
+@dataclass(slots=True)
+class _Speculation:
+    task: asyncio.Task[Any]
+    hard_basis: str
+    soft_basis: str
+
+
+class SpeculativeDrafts:
+    def __init__(
+        self,
+        *,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        window: int = 0,
+        concurrency: int = 1,
+    ) -> None:
+        self._sessionmaker = sessionmaker
+        self._entries: dict[tuple[str, int], _Speculation] = {}
+        self.window = 0
+        self.concurrency = 1
+        self._semaphore = asyncio.Semaphore(1)
+        self.cancel = StepCancellation()
+        self.configure(window=window, concurrency=concurrency)
+
+    def configure(self, *, window: int, concurrency: int) -> None:
+        self.window = max(0, int(window))
+        concurrency = max(1, int(concurrency))
+        if concurrency != self.concurrency:
+            self.concurrency = concurrency
+            self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0 and not self.cancel.canceled
+
+    def pending_units(self, phase: str) -> list[int]:
+        return sorted(unit for (entry_phase, unit) in self._entries if entry_phase == phase)
+
+    def wanted_units(self, *, phase: str, after_unit: int, units: list[int]) -> list[int]:
+        # Drafts for units the cursor has already passed can never be taken.
+        for key in [key for key in self._entries if key[0] == phase and key[1] < after_unit]:
+            self._entries.pop(key).task.cancel()
+        if not self.enabled:
+            return []
+        ahead = [unit for unit in units if unit > after_unit][: self.window]
+        return [unit for unit in ahead if (phase, unit) not in self._entries]
+
+    def spawn(
+        self,
+        *,
+        phase: str,
+        unit: int,
+        hard_basis: str,
+        soft_basis: str,
+        factory: SpeculativeFactory,
+    ) -> None:
+        if not self.enabled or (phase, unit) in self._entries:
+            return
+        task = spawn_detached(self._run(factory))
+        self._entries[(phase, unit)] = _Speculation(task=task, hard_basis=hard_basis, soft_basis=soft_basis)
+        llm_metrics.incr(phase=phase, name="speculative_spawned")
+
+    async def _run(self, factory: SpeculativeFactory) -> Any:
+        async with self._semaphore:
+            with bind_step_cancellation(self.cancel):
+                async with self._sessionmaker() as session:
+                    return await factory(session)
+
+    async def take(
+        self,
+        *,
+        phase: str,
+        unit: int,
+        hard_basis: str,
+        soft_basis: str,
+    ) -> SpeculativeResult | None:
+        entry = self._entries.pop((phase, unit), None)
+        if entry is None:
+            return None
+        if entry.hard_basis != hard_basis:
+            entry.task.cancel()
+            llm_metrics.incr(phase=phase, name="speculative_discarded")
+            return None
+
+        ok, value = await await_detached(entry.task)
+        if not ok:
+            llm_metrics.incr(phase=phase, name="speculative_failed")
+            return None
+
+        stale = entry.soft_basis != soft_basis
+        llm_metrics.incr(phase=phase, name="speculative_stale" if stale else "speculative_hit")
+        return SpeculativeResult(value=value, stale=stale)
+
+    def discard(self, *, phase: str | None = None) -> None:
+        for key in list(self._entries):
+            if phase is None or key[0] == phase:
+                self._entries.pop(key).task.cancel()
+
+    async def close(self) -> None:
+        self.cancel.cancel(CANCEL_REASON_STOPPED)
+        tasks = [entry.task for entry in self._entries.values()]
+        self._entries.clear()
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=5.0)
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Coroutine, Iterator
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+from typing import Any, TypeVar
+
+from fastapi import FastAPI
+
+from app.services.llm_metrics import llm_metrics
+
+T = TypeVar("T")
+
+CANCEL_REASON_STOPPED = "stopped"
+CANCEL_REASON_PAUSED = "paused"
+CANCEL_REASON_DELETED = "deleted"
+CANCEL_REASON_SHUTDOWN = "shutdown"
+CANCEL_REASON_DEADLINE = "deadline_exceeded"
+CANCEL_REASON_IDLE = "idle_timeout"
+
+_TIMEOUT_REASONS = {CANCEL_REASON_DEADLINE, CANCEL_REASON_IDLE}
+
+
+class StepCanceled(Exception):
+    def __init__(self, reason: str) -> None:
+        super().__init__(f"step_canceled:{reason}")
+        self.reason = reason
+
+
+class StepTimedOut(StepCanceled):
+    # Raised when the watchdog cancels a step; unlike a user cancel this is a (retryable) failure.
+    pass
+
+
+class StepCancellation:
+    def __init__(
+        self,
+        *,
+        phase: str | None = None,
+        deadline_s: float = 0.0,
+        idle_timeout_s: float = 0.0,
+        close_timeout_s: float = 5.0,
+    ) -> None:
+        self.phase = phase
+        self.deadline_s = deadline_s
+        self.idle_timeout_s = idle_timeout_s
+        self.close_timeout_s = close_timeout_s
+        self.reason: str | None = None
+        self.started_at = time.monotonic()
+        self.last_activity_at = self.started_at
+        self._in_flight = 0
+        self._event = asyncio.Event()
+
+    @property
+    def canceled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str) -> None:
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._event.set()
+
+    def raise_if_canceled(self) -> None:
+        if not self._event.is_set():
+            return
+        reason = self.reason or "canceled"
+        if reason in _TIMEOUT_REASONS:
+            raise StepTimedOut(reason)
+        raise StepCanceled(reason)
+
+    def touch(self) -> None:
+        self.last_activity_at = time.monotonic()
+
+    def overdue_reason(self, now: float | None = None) -> str | None:
+        now = time.monotonic() if now is None else now
+        if self.deadline_s > 0 and now - self.started_at >= self.deadline_s:
+            return CANCEL_REASON_DEADLINE
+        # Idle time only counts while a provider call is outstanding; DB and embedding work
+        # between calls is covered by the wall-clock deadline.
+        if self.idle_timeout_s > 0 and self._in_flight and now - self.last_activity_at >= self.idle_timeout_s:
+            return CANCEL_REASON_IDLE
+        return None
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        if self._event.is_set():
+            close = getattr(awaitable, "close", None)
+            if close is not None:
+                close()
+            self.raise_if_canceled()
+        task = asyncio.ensure_future(awaitable)
+        waiter = asyncio.ensure_future(self._event.wait())
+        self._in_flight += 1
+        self.touch()
+        try:
+            done, _pending = await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            waiter.cancel()
+            raise
+        finally:
+            self._in_flight -= 1
+        if task in done:
+            waiter.cancel()
+            self.touch()
+            return task.result()
+
+        # Cancelling the task throws CancelledError into the provider call, whose cleanup closes
+        # the underlying HTTP stream. Give it a bounded amount of time to do so.
+        task.cancel()
+        await asyncio.wait({task}, timeout=self.close_timeout_s)
+        self.raise_if_canceled()
+        raise StepCanceled("canceled")
+
+    async def iterate(self, stream: AsyncIterator[T]) -> AsyncIterator[T]:
+        iterator = stream.__aiter__()
+        # Count the whole stream as one outstanding call so the idle clock keeps running while
+        # the consumer publishes deltas between chunks.
+        self._in_flight += 1
+        try:
+            while True:
+                try:
+                    item = await self.run(iterator.__anext__())
+                except StopAsyncIteration:
+                    return
+                yield item
+        finally:
+            self._in_flight -= 1
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                with suppress(Exception):
+                    await asyncio.wait_for(aclose(), timeout=self.close_timeout_s)
+
+
+_current_step_cancellation: ContextVar[StepCancellation | None] = ContextVar(
+    "current_step_cancellation", default=None
+)
+
+
+@contextmanager
+def bind_step_cancellation(cancel: StepCancellation | None) -> Iterator[StepCancellation | None]:
+    token = _current_step_cancellation.set(cancel)
+    try:
+        yield cancel
+    finally:
+        _current_step_cancellation.reset(token)
+
+
+def current_step_cancellation() -> StepCancellation | None:
+    return _current_step_cancellation.get()
+
+
+def _consume_task_result(task: asyncio.Task[Any]) -> None:
+    # Detached work may fail or be dropped unused; await_detached reports the failure as a miss.
+    if not task.cancelled():
+        task.exception()
+
+
+def spawn_detached[R](coro: Coroutine[Any, Any, R]) -> asyncio.Task[R]:
+    # Work done ahead of time on behalf of a later step (speculative drafts, prefetched inputs).
+    # It runs outside the current step's context, so that step's cancellation and metrics do not
+    # apply to it.
+    task = asyncio.create_task(coro, context=contextvars.Context())
+    task.add_done_callback(_consume_task_result)
+    return task
+
+
+async def await_detached[R](task: asyncio.Task[R]) -> tuple[bool, R | None]:
+    # Awaits a spawn_detached task from the step that needs its result; a task that is still in
+    # flight is awaited rather than started again. Returns (False, None) when the task failed or
+    # was canceled. Canceling the waiting step cancels the task too.
+    cancel = current_step_cancellation()
+    try:
+        if cancel is not None:
+            return True, await cancel.run(asyncio.shield(task))
+        return True, await asyncio.shield(task)
+    except StepCanceled:
+        task.cancel()
+        raise
+    except asyncio.CancelledError:
+        current = asyncio.current_task()
+        if current is not None and current.cancelling():
+            task.cancel()
+            raise
+        return False, None
+    except Exception:
+        return False, None
+
+
+def cancel_running_step(*, app: FastAPI | None, run_id: uuid.UUID, reason: str) -> bool:
+    if app is None:
+        return False
+    cancels: Any = getattr(app.state, "workflow_step_cancels", None)
+    if not isinstance(cancels, dict):
+        return False
+    cancel = cancels.get(run_id)
+    if not isinstance(cancel, StepCancellation) or cancel.canceled:
+        return False
+    cancel.cancel(reason)
+    return True
+
+
+@contextmanager
+def track_step_cancellation(
+    *,
+    app: FastAPI | None,
+    run_id: uuid.UUID,
+    phase: str | None = None,
+    deadline_s: float = 0.0,
+    idle_timeout_s: float = 0.0,
+) -> Iterator[StepCancellation]:
+    cancel = StepCancellation(phase=phase, deadline_s=deadline_s, idle_timeout_s=idle_timeout_s)
+    cancels: Any = getattr(app.state, "workflow_step_cancels", None) if app is not None else None
+    if isinstance(cancels, dict):
+        cancels[run_id] = cancel
+    try:
+        yield cancel
+    finally:
+        if isinstance(cancels, dict) and cancels.get(run_id) is cancel:
+            cancels.pop(run_id, None)
+
+
+async def shutdown_autoruns(app: FastAPI, *, timeout_s: float = 10.0) -> None:
+    flags: Any = getattr(app.state, "workflow_autorun_stop_flags", None)
+    if isinstance(flags, dict):
+        for stop_event in list(flags.values()):
+            if isinstance(stop_event, asyncio.Event):
+                stop_event.set()
+    cancels: Any = getattr(app.state, "workflow_step_cancels", None)
+    if isinstance(cancels, dict):
+        for cancel in list(cancels.values()):
+            if isinstance(cancel, StepCancellation):
+                cancel.cancel(CANCEL_REASON_SHUTDOWN)
+
+    tasks: Any = getattr(app.state, "workflow_autorun_tasks", None)
+    if not isinstance(tasks, dict):
+        return
+    pending = [task for task in tasks.values() if isinstance(task, asyncio.Task) and not task.done()]
+    if not pending:
+        return
+    # Let the loops record their canceled steps while the database is still available.
+    _done, still_running = await asyncio.wait(pending, timeout=timeout_s)
+    for task in still_running:
+        task.cancel()
+    if still_running:
+        await asyncio.wait(still_running, timeout=1.0)
+
+
+def sweep_overdue_steps(app: FastAPI) -> list[tuple[uuid.UUID, StepCancellation]]:
+    cancels: Any = getattr(app.state, "workflow_step_cancels", None)
+    if not isinstance(cancels, dict):
+        return []
+    now = time.monotonic()
+    swept: list[tuple[uuid.UUID, StepCancellation]] = []
+    for run_id, cancel in list(cancels.items()):
+        if not isinstance(cancel, StepCancellation) or cancel.canceled:
+            continue
+        reason = cancel.overdue_reason(now)
+        if reason is None:
+            continue
+        cancel.cancel(reason)
+        llm_metrics.incr(phase=cancel.phase or "unknown", name=f"step_{reason}")
+        swept.append((run_id, cancel))
+    return swept
+
+
+async def run_step_watchdog(app: FastAPI, *, interval_s: float = 1.0) -> None:
+    while True:
+        await asyncio.sleep(interval_s)
+        hub = getattr(app.state, "workflow_event_hub", None)
+        for run_id, cancel in sweep_overdue_steps(app):
+            if hub is None:
+                continue
+            await hub.publish(
+                run_id=run_id,
+                name="log",
+                payload={"message": f"step_watchdog_canceled step={cancel.phase} reason={cancel.reason}"},
+            )
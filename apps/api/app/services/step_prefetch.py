@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.step_cancellation import await_detached, spawn_detached
+
+PrefetchFactory = Callable[[AsyncSession], Awaitable[Any]]
+
+_MAX_PENDING = 8
+_MAX_MEMO = 32
+
+
+class StepPrefetch:
+    # Deterministic inputs for the next step, computed while the current step waits on the model.
+    # Keys cover everything a value was computed from; callers still validate the value against the
+    # database when the step starts, since a commit in between may have changed it.
+
+    def __init__(self, *, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        self._sessionmaker = sessionmaker
+        self._tasks: dict[Hashable, asyncio.Task[Any]] = {}
+        self._memo: dict[Hashable, Any] = {}
+        self._closed = False
+
+    def spawn(self, key: Hashable, factory: PrefetchFactory) -> None:
+        if self._closed or key in self._tasks:
+            return
+        while len(self._tasks) >= _MAX_PENDING:
+            self._tasks.pop(next(iter(self._tasks))).cancel()
+        self._tasks[key] = spawn_detached(self._run(factory))
+
+    async def _run(self, factory: PrefetchFactory) -> Any:
+        async with self._sessionmaker() as session:
+            return await factory(session)
+
+    async def take(self, key: Hashable) -> Any | None:
+        task = self._tasks.pop(key, None)
+        if task is None:
+            return None
+        # A failed prefetch is just a miss; the step computes the value itself.
+        _ok, value = await await_detached(task)
+        return value
+
+    def memo(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        if key in self._memo:
+            return self._memo[key]
+        if len(self._memo) >= _MAX_MEMO:
+            self._memo.pop(next(iter(self._memo)))
+        value = self._memo[key] = compute()
+        return value
+
+    def discard(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        self._tasks.clear()
+        self._memo.clear()
+
+    async def close(self) -> None:
+        self._closed = True
+        tasks = list(self._tasks.values())
+        self.discard()
+        if tasks:
+            await asyncio.wait(tasks, timeout=5.0)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import time
+import uuid
+from typing import Any
+
+from app.services.workflow_events import WorkflowEventHub
+
+# Stream the LLM text as it is generated (llm_start / llm_delta / llm_end).
+STREAM_DETAIL_FULL = "full"
+# Only llm_progress events with the number of characters generated so far, e.g. for batch autoruns
+# nobody is reading along with.
+STREAM_DETAIL_PROGRESS = "progress"
+# No LLM stream events at all; run and step events are unaffected.
+STREAM_DETAIL_OFF = "off"
+STREAM_DETAILS = (STREAM_DETAIL_FULL, STREAM_DETAIL_PROGRESS, STREAM_DETAIL_OFF)
+
+# Flush thresholds for an idle subscriber and for a saturated one (a queue close to full, or a
+# large fan-out); the pressure reported by the hub interpolates between them.
+_MIN_FLUSH_INTERVAL_S = 0.05
+_MAX_FLUSH_INTERVAL_S = 2.0
+_MIN_FLUSH_CHARS = 200
+_MAX_FLUSH_CHARS = 4000
+_PROGRESS_INTERVAL_S = 1.0
+
+
+def resolve_stream_detail(state: dict[str, Any]) -> str:
+    detail = state.get("stream_detail")
+    return detail if isinstance(detail, str) and detail in STREAM_DETAILS else STREAM_DETAIL_FULL
+
+
+def flush_thresholds(pressure: float) -> tuple[float, int]:
+    pressure = min(1.0, max(0.0, pressure))
+    interval = _MIN_FLUSH_INTERVAL_S + (_MAX_FLUSH_INTERVAL_S - _MIN_FLUSH_INTERVAL_S) * pressure
+    chars = _MIN_FLUSH_CHARS + int((_MAX_FLUSH_CHARS - _MIN_FLUSH_CHARS) * pressure)
+    return interval, chars
+
+
+class DeltaCoalescer:
+    # Turns the growing output of a streamed LLM call into llm_* events. Nothing is buffered here:
+    # the caller already keeps the full output, and only the offset of what was published is
+    # tracked. llm_start goes out as soon as someone is watching; while nobody is subscribed to the
+    # run nothing is published at all, and a subscriber that shows up mid-call gets llm_start and
+    # everything generated so far in its first delta.
+
+    def __init__(self, *, hub: WorkflowEventHub, run_id: uuid.UUID, step_id: uuid.UUID, step_name: str) -> None:
+        self._hub = hub
+        self._run_id = run_id
+        self._step_id = str(step_id)
+        self._step_name = step_name
+        self._started = False
+        self._published = 0
+        self._reported = 0
+        self._last_flush = time.monotonic()
+
+    async def start(self) -> None:
+        if self._hub.stream_detail(self._run_id) == STREAM_DETAIL_OFF:
+            return
+        if self._hub.stream_pressure(self._run_id) is not None:
+            await self._start()
+
+    async def update(self, output: str, *, final: bool = False) -> None:
+        detail = self._hub.stream_detail(self._run_id)
+        if detail == STREAM_DETAIL_OFF:
+            return
+        pressure = self._hub.stream_pressure(self._run_id)
+        if pressure is None:
+            return
+        await self._start()
+        now = time.monotonic()
+        if detail == STREAM_DETAIL_PROGRESS:
+            pending = len(output) - self._reported
+            due = now - self._last_flush >= _PROGRESS_INTERVAL_S
+        else:
+            pending = len(output) - self._published
+            interval, chars = flush_thresholds(pressure)
+            due = pending >= chars or now - self._last_flush >= interval
+        if pending <= 0 or not (due or final):
+            return
+        if detail == STREAM_DETAIL_PROGRESS:
+            await self._publish("llm_progress", {"step_id": self._step_id, "chars": len(output)})
+            self._reported = len(output)
+        else:
+            await self._publish("llm_delta", {"step_id": self._step_id, "append": output[self._published :]})
+            self._published = len(output)
+        self._last_flush = now
+
+    async def restart(self, output: str) -> None:
+        # The final output does not continue what was published (a continuation that started over,
+        # or a full recompute): a fresh llm_start makes clients drop the text they hold, and the
+        # final output follows from scratch.
+        if self._started:
+            self._published = 0
+            self._reported = 0
+            await self._publish("llm_start", {"step_id": self._step_id, "step_name": self._step_name})
+        await self.update(output, final=True)
+
+    async def end(self) -> None:
+        if self._started:
+            await self._publish("llm_end", {"step_id": self._step_id})
+
+    async def _start(self) -> None:
+        if not self._started:
+            self._started = True
+            await self._publish("llm_start", {"step_id": self._step_id, "step_name": self._step_name})
+
+    async def _publish(self, name: str, payload: dict[str, Any]) -> None:
+        await self._hub.publish(run_id=self._run_id, name=name, payload=payload)
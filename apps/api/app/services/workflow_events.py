@@ -3,59 +3,318 @@ from __future__ import annotations
 import asyncio
 import json
 import uuid
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from typing import Any
 
+from app.services.event_bus import EventBus, InMemoryEventBus
+
+_QUEUE_SIZE = 200
+# A multiplexed subscriber gets several runs' events through one queue.
+_MULTIPLEXED_QUEUE_SIZE = 1000
+# Events kept per run for Last-Event-ID replay.
+_LOG_SIZE = 1000
+# Runs whose logs are kept once nobody is subscribed to them any more.
+_MAX_IDLE_LOGS = 64
+# Steps (and their streamed LLM text) carried in a resync snapshot.
+_SNAPSHOT_STEPS = 8
+# Subscribers to one run at which fan-out alone counts as full stream pressure.
+_FANOUT_SATURATION = 50
+
 
 @dataclass(frozen=True, slots=True)
 class WorkflowEvent:
     name: str
     payload: dict[str, Any]
+    id: int | None = None
+    # The SSE frame, encoded once when the event is published and shared by every subscriber.
+    data: bytes = b""
+    run_id: uuid.UUID | None = None
+    # The same event for multiplexed streams: no id, and the payload tagged with its run_id.
+    multiplexed_data: bytes = b""
+
+
+def format_sse_event(*, name: str, payload: dict[str, Any], event_id: int | str | None = None) -> str:
+    data = json.dumps(payload, ensure_ascii=False)
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {name}\ndata: {data}\n\n"
 
 
-def format_sse_event(*, name: str, payload: dict[str, Any]) -> str:
+def format_multiplexed_sse_event(*, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> str:
+    return format_sse_event(name=name, payload={"run_id": str(run_id), **payload})
+
+
+def _encoded_event(
+    *,
+    run_id: uuid.UUID,
+    name: str,
+    payload: dict[str, Any],
+    event_id: int,
+    epoch: str,
+) -> WorkflowEvent:
+    # SSE ids are "<epoch>-<n>": ids only mean something to the process that assigned them, so a
+    # client that reconnects to another worker (or after a restart) is resynced, not mis-replayed.
     data = json.dumps(payload, ensure_ascii=False)
-    return f"event: {name}\ndata: {data}\n\n"
+    return WorkflowEvent(
+        name=name,
+        payload=payload,
+        id=event_id,
+        data=f"id: {epoch}-{event_id}\nevent: {name}\ndata: {data}\n\n".encode(),
+        run_id=run_id,
+        multiplexed_data=format_multiplexed_sse_event(run_id=run_id, name=name, payload=payload).encode(),
+    )
+
+
+def _state_diff(previous: dict[str, Any], current: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "set": {key: value for key, value in current.items() if key not in previous or previous[key] != value},
+        "unset": [key for key in previous if key not in current],
+    }
+
+
+class _RunLog:
+    # Ring buffer of a run's recent events, plus a compacted snapshot of what they add up to: the
+    # latest run and step payloads and the LLM text streamed for recent steps. A subscriber that
+    # cannot be replayed exactly gets the snapshot instead.
+
+    def __init__(self, *, run_id: uuid.UUID, epoch: str) -> None:
+        self.run_id = run_id
+        self.epoch = epoch
+        self.last_id = 0
+        self.events: deque[WorkflowEvent] = deque(maxlen=_LOG_SIZE)
+        self.subscribers: set[asyncio.Queue[WorkflowEvent]] = set()
+        self.run: dict[str, Any] | None = None
+        self.steps: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self.llm_text: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        # How much of the LLM output the run's publisher streams (see stream_coalescing).
+        self.stream_detail: str | None = None
+
+    def append(self, *, name: str, payload: dict[str, Any]) -> WorkflowEvent:
+        self.last_id += 1
+        if name == "run":
+            payload = self._run_payload(payload)
+        event = _encoded_event(
+            run_id=self.run_id, name=name, payload=payload, event_id=self.last_id, epoch=self.epoch
+        )
+        self.events.append(event)
+        self._fold(event)
+        return event
+
+    def _run_payload(self, payload: dict[str, Any]) -> dict[str, Any]:
+        # Run dumps carry the whole state blob. Once this log has sent one for the run, later run
+        # events carry only the top-level state keys that changed; subscribers start from a full
+        # dump (the initial run event, or a resync snapshot).
+        run = payload.get("run")
+        if not isinstance(run, dict):
+            return payload
+        previous, self.run = self.run, run
+        state = run.get("state")
+        previous_state = previous.get("state") if previous is not None else None
+        if not isinstance(state, dict) or not isinstance(previous_state, dict):
+            return payload
+        fields = {key: value for key, value in run.items() if key != "state"}
+        return {**payload, "run": fields, "state_diff": _state_diff(previous_state, state)}
+
+    def _fold(self, event: WorkflowEvent) -> None:
+        payload = event.payload
+        if event.name == "run":
+            return
+        if event.name == "step" and isinstance(payload.get("step"), dict):
+            step_id = str(payload["step"].get("id") or "")
+            if step_id:
+                self.steps[step_id] = payload["step"]
+                self.steps.move_to_end(step_id)
+                while len(self.steps) > _SNAPSHOT_STEPS:
+                    self.steps.popitem(last=False)
+            return
+        step_id = str(payload.get("step_id") or "")
+        if not step_id:
+            return
+        if event.name == "llm_start":
+            self.llm_text[step_id] = {"step_name": payload.get("step_name"), "text": "", "done": False}
+            self.llm_text.move_to_end(step_id)
+            while len(self.llm_text) > _SNAPSHOT_STEPS:
+                self.llm_text.popitem(last=False)
+        elif event.name == "llm_delta" and step_id in self.llm_text:
+            entry = self.llm_text[step_id]
+            entry["text"] = str(entry["text"]) + str(payload.get("append") or "")
+        elif event.name == "llm_end" and step_id in self.llm_text:
+            self.llm_text[step_id]["done"] = True
+
+    def since(self, last_event_id: int) -> list[WorkflowEvent] | None:
+        # None when the gap cannot be replayed: it fell out of the buffer, or the id comes from
+        # before a restart of this process.
+        if last_event_id > self.last_id:
+            return None
+        oldest = self.events[0].id if self.events else self.last_id + 1
+        if last_event_id + 1 < int(oldest or 0):
+            return None
+        return [event for event in self.events if int(event.id or 0) > last_event_id]
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "run": self.run,
+            "steps": list(self.steps.values()),
+            "llm": {step_id: dict(entry) for step_id, entry in self.llm_text.items()},
+        }
+
+    def resync(self, *, reason: str) -> WorkflowEvent:
+        # Carries the id of the latest event, so a client that reconnects after it resumes there.
+        return _encoded_event(
+            run_id=self.run_id,
+            name="resync",
+            payload={"reason": reason, "snapshot": self.snapshot()},
+            event_id=self.last_id,
+            epoch=self.epoch,
+        )
+
+
+def _multiplexed_resync(logs: list[_RunLog], *, reason: str) -> WorkflowEvent:
+    # One event for every run a multiplexed queue follows, so it fits the queue however many
+    # runs that is. It has no run_id of its own; the snapshots are keyed by run.
+    payload = {"reason": reason, "runs": {str(log.run_id): log.snapshot() for log in logs}}
+    return WorkflowEvent(
+        name="resync",
+        payload=payload,
+        multiplexed_data=format_sse_event(name="resync", payload=payload).encode(),
+    )
 
 
 class WorkflowEventHub:
-    def __init__(self) -> None:
-        self._lock = asyncio.Lock()
-        self._subscribers: dict[uuid.UUID, set[asyncio.Queue[WorkflowEvent]]] = {}
-
-    async def subscribe(self, *, run_id: uuid.UUID) -> asyncio.Queue[WorkflowEvent]:
-        queue: asyncio.Queue[WorkflowEvent] = asyncio.Queue(maxsize=200)
-        async with self._lock:
-            self._subscribers.setdefault(run_id, set()).add(queue)
+    # Events are published through the bus, which hands every event (from this process or, with a
+    # cross-process backend, any other) back to _deliver. Nothing on the delivery side awaits, so
+    # each call runs to completion on the event loop without a lock, and runs never contend with
+    # each other: delivering touches only that run's log and subscribers.
+
+    def __init__(self, *, bus: EventBus | None = None) -> None:
+        self.epoch = uuid.uuid4().hex[:8]
+        self._logs: OrderedDict[uuid.UUID, _RunLog] = OrderedDict()
+        # Multiplexed queues and the runs each one is subscribed to.
+        self._multiplexed: dict[asyncio.Queue[WorkflowEvent], set[uuid.UUID]] = {}
+        self._bus = bus or InMemoryEventBus()
+        self._bus.attach(self._deliver)
+        # Events the bus failed to carry. They are dropped; the next run and step events carry the
+        # full state again.
+        self.dropped_events = 0
+
+    async def start(self) -> None:
+        await self._bus.start()
+
+    async def close(self) -> None:
+        await self._bus.close()
+
+    def resume_point(self, last_event_id: str | None) -> int | None:
+        # Parses a Last-Event-ID header. An id this process did not assign maps to -1, which can
+        # never be replayed, so the subscriber starts with a resync.
+        raw = (last_event_id or "").strip()
+        if not raw:
+            return None
+        epoch, _, number = raw.rpartition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return -1
+        return int(number)
+
+    def _log(self, run_id: uuid.UUID) -> _RunLog:
+        log = self._logs.get(run_id)
+        if log is None:
+            log = self._logs[run_id] = _RunLog(run_id=run_id, epoch=self.epoch)
+            idle = [key for key, value in self._logs.items() if not value.subscribers and key != run_id]
+            for key in idle[: max(0, len(idle) - _MAX_IDLE_LOGS)]:
+                self._logs.pop(key, None)
+        return log
+
+    async def subscribe(
+        self,
+        *,
+        run_id: uuid.UUID,
+        last_event_id: int | None = None,
+    ) -> asyncio.Queue[WorkflowEvent]:
+        # With last_event_id the queue starts with everything published after it, or with a
+        # resync event when that is no longer possible. No event can be published in between, so
+        # nothing is missed or repeated between the replay and the live stream.
+        queue: asyncio.Queue[WorkflowEvent] = asyncio.Queue(maxsize=_QUEUE_SIZE)
+        log = self._log(run_id)
+        if last_event_id is not None:
+            missed = log.since(last_event_id)
+            if missed is None or len(missed) > _QUEUE_SIZE:
+                queue.put_nowait(log.resync(reason="gap"))
+            else:
+                for event in missed:
+                    queue.put_nowait(event)
+        log.subscribers.add(queue)
         return queue
 
     async def unsubscribe(self, *, run_id: uuid.UUID, queue: asyncio.Queue[WorkflowEvent]) -> None:
-        async with self._lock:
-            subscribers = self._subscribers.get(run_id)
-            if not subscribers:
-                return
-            subscribers.discard(queue)
-            if not subscribers:
-                self._subscribers.pop(run_id, None)
+        log = self._logs.get(run_id)
+        if log is not None:
+            log.subscribers.discard(queue)
 
-    async def publish(self, *, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None:
-        async with self._lock:
-            queues = list(self._subscribers.get(run_id, set()))
+    async def subscribe_many(self, *, run_ids: list[uuid.UUID]) -> asyncio.Queue[WorkflowEvent]:
+        # One queue for several runs; events carry their run_id. Runs can be added later.
+        queue: asyncio.Queue[WorkflowEvent] = asyncio.Queue(maxsize=_MULTIPLEXED_QUEUE_SIZE)
+        self._multiplexed[queue] = set()
+        self.add_runs(queue=queue, run_ids=run_ids)
+        return queue
 
-        if not queues:
+    def add_runs(self, *, queue: asyncio.Queue[WorkflowEvent], run_ids: list[uuid.UUID]) -> None:
+        runs = self._multiplexed.get(queue)
+        if runs is None:
             return
+        for run_id in run_ids:
+            if run_id not in runs:
+                runs.add(run_id)
+                self._log(run_id).subscribers.add(queue)
+
+    async def unsubscribe_many(self, *, queue: asyncio.Queue[WorkflowEvent]) -> None:
+        for run_id in self._multiplexed.pop(queue, set()):
+            log = self._logs.get(run_id)
+            if log is not None:
+                log.subscribers.discard(queue)
+
+    def set_stream_detail(self, run_id: uuid.UUID, detail: str | None) -> None:
+        self._log(run_id).stream_detail = detail
+
+    def stream_detail(self, run_id: uuid.UUID) -> str | None:
+        log = self._logs.get(run_id)
+        return log.stream_detail if log is not None else None
 
-        event = WorkflowEvent(name=name, payload=payload)
-        for queue in queues:
+    def stream_pressure(self, run_id: uuid.UUID) -> float | None:
+        # How far behind the run's subscribers are, from 0.0 to 1.0: the fullest queue, or the
+        # fan-out once many clients follow the run. None when nobody is subscribed. Subscribers of
+        # other processes are invisible here, so with a cross-process bus that is never assumed;
+        # the run is reported as saturated instead, which keeps its bus traffic to the relaxed
+        # thresholds.
+        log = self._logs.get(run_id)
+        if log is None or not log.subscribers:
+            return 1.0 if self._bus.cross_process else None
+        depth = max(queue.qsize() / (queue.maxsize or _QUEUE_SIZE) for queue in log.subscribers)
+        return max(depth, min(1.0, len(log.subscribers) / _FANOUT_SATURATION))
+
+    async def publish(self, *, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None:
+        # Awaited from inside workflow steps: a transport error (a dropped LISTEN connection, a dead
+        # socket broker, a failed payload insert) costs the event, never the step.
+        try:
+            await self._bus.publish(run_id=run_id, name=name, payload=payload)
+        except Exception:
+            self.dropped_events += 1
+
+    def _deliver(self, run_id: uuid.UUID, name: str, payload: dict[str, Any]) -> None:
+        log = self._log(run_id)
+        event = log.append(name=name, payload=payload)
+        for queue in log.subscribers:
             try:
                 queue.put_nowait(event)
             except asyncio.QueueFull:
-                try:
-                    queue.get_nowait()
-                except asyncio.QueueEmpty:
-                    pass
-                try:
-                    queue.put_nowait(event)
-                except asyncio.QueueFull:
-                    continue
+                self._overflow(queue, log=log)
 
+    def _overflow(self, queue: asyncio.Queue[WorkflowEvent], *, log: _RunLog) -> None:
+        # A subscriber that fell behind gets the compacted state instead of a stream with holes in
+        # it (a dropped llm_delta would corrupt the streamed text).
+        while not queue.empty():
+            queue.get_nowait()
+        run_ids = self._multiplexed.get(queue)
+        if run_ids is None:
+            queue.put_nowait(log.resync(reason="overflow"))
+            return
+        logs = [self._logs[run_id] for run_id in sorted(run_ids) if run_id in self._logs]
+        queue.put_nowait(_multiplexed_resync(logs, reason="overflow"))
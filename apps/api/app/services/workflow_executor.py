@@ -1,16 +1,15 @@
 from __future__ import annotations
 
-import copy
+import asyncio
 import difflib
 import json
 import re
-import time
 import unicodedata
 import uuid
 from datetime import datetime
 from typing import Any
 
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -20,6 +19,7 @@ from app.db.models import (
     ArtifactVersion,
     ArtifactVersionSource,
     BriefSnapshot,
+    MemoryChunk,
     RunStatus,
     WorkflowKind,
     WorkflowRun,
@@ -27,21 +27,62 @@ from app.db.models import (
 )
 from app.llm.client import LLMClient
 from app.llm.embeddings_client import EmbeddingsClient
+from app.llm.routing import llm_for_phase
 from app.schemas.generation import (
     CriticResult,
     DraftResult,
     EpisodeBreakdown,
     NtsChapterPlan,
     NovelBeats,
+    NovelBeatsChapter,
     NovelOutline,
+    ParagraphRewriteResult,
     RewriteResult,
     ScriptSceneList,
+    SelfReviewedDraft,
+)
+from app.services.critic_policy import (
+    CRITIC_DECISION_DEFER,
+    CRITIC_DECISION_DEFERRED_REVIEW,
+    CRITIC_DECISION_LLM,
+    CriticPolicy,
+    critic_decision,
+    critic_rejected,
+    record_critic_outcome,
+    resolve_critic_policy,
+    resolve_draft_self_review,
+    stand_in_critic_result,
 )
 from app.services.error_utils import format_exception_chain
 from app.services.json_utils import deep_merge
-from app.services.memory_store import index_artifact_version, retrieve_evidence
-from app.services.prompting import extract_json_object, load_prompt, render_prompt
+from app.services.llm_metrics import collect_step_metrics, llm_metrics, record_llm_call
+from app.services.memory_store import index_artifact_version, memory_fingerprint, retrieve_evidence
+from app.services.paragraph_fix import (
+    FIX_MODE_PARAGRAPH,
+    paragraph_context,
+    paragraph_fix_targets,
+    resolve_fix_mode,
+    rewrite_paragraphs,
+)
+from app.services.phase_graph import phase_node, speculative_node
+from app.services.prompting import (
+    load_prompt,
+    parse_json_object,
+    render_prompt,
+    stitch_stream_continuation,
+)
+from app.services.run_context import RunContext
+from app.services.run_state_store import load_run_state, state_blob_digest
 from app.services.settings_store import get_prompt_presets, resolve_runtime_execution_preferences
+from app.services.speculative_drafts import SpeculativeDrafts, SpeculativeResult
+from app.services.step_cancellation import (
+    StepCanceled,
+    StepCancellation,
+    bind_step_cancellation,
+    current_step_cancellation,
+)
+from app.services.step_prefetch import StepPrefetch
+from app.services.stream_coalescing import DeltaCoalescer, resolve_stream_detail
 from app.services.text_utils import apply_replacements, join_paragraphs, numbered_paragraphs, split_paragraphs
 from app.services.workflow_events import WorkflowEventHub
 
@@ -125,6 +166,7 @@ async def _resolve_prompt_preset_text(
     session: AsyncSession,
     kind: WorkflowKind,
     state: dict[str, Any],
+    catalogs: dict[str, Any] | None = None,
 ) -> str | None:
     if kind == WorkflowKind.script:
         catalog_key = "script"
@@ -133,7 +175,8 @@ async def _resolve_prompt_preset_text(
     else:
         return None
 
-    catalogs = await get_prompt_presets(session=session)
+    if catalogs is None:
+        catalogs = await get_prompt_presets(session=session)
     catalog = catalogs.get(catalog_key) if isinstance(catalogs, dict) else None
     if not isinstance(catalog, dict):
         return None
@@ -578,6 +621,46 @@ def _extract_episode_title(*, text: str, episode_index: int) -> str | None:
     return None
 
 
+async def _continue_interrupted_stream(
+    *,
+    llm: LLMClient,
+    system_prompt: str,
+    user_prompt: str,
+    partial_output: str,
+    step_name: str,
+    cancel: StepCancellation | None = None,
+) -> str | None:
+    llm_metrics.incr(phase=step_name, name="stream_continuation_attempts")
+    continue_prompt = render_prompt(
+        load_prompt("llm_stream_continue_user.md"),
+        {"ORIGINAL_USER_PROMPT": user_prompt, "PARTIAL_OUTPUT": partial_output},
+    )
+    call = llm.complete(system_prompt=system_prompt, user_prompt=continue_prompt)
+    try:
+        continuation = await (cancel.run(call) if cancel is not None else call)
+    except StepCanceled:
+        raise
+    except Exception:
+        llm_metrics.incr(phase=step_name, name="stream_continuation_failed")
+        return None
+
+    stitched = stitch_stream_continuation(partial_output, continuation)
+    if stitched is None:
+        llm_metrics.incr(phase=step_name, name="stream_continuation_failed")
+        return None
+
+    if stitched == continuation:
+        llm_metrics.incr(phase=step_name, name="stream_continuation_restarted")
+    else:
+        llm_metrics.incr(phase=step_name, name="stream_continuation_succeeded")
+        llm_metrics.incr(
+            phase=step_name,
+            name="stream_continuation_salvaged_chars",
+            amount=len(partial_output),
+        )
+    return stitched
+
+
 async def _llm_complete_with_optional_stream(
     *,
     llm: LLMClient,
@@ -587,65 +670,146 @@ async def _llm_complete_with_optional_stream(
     run_id: uuid.UUID,
     step_id: uuid.UUID | None,
     step_name: str,
-    flush_chars: int = 800,
-    flush_interval_s: float = 0.25,
+    response_model: type[BaseModel] | None = None,
+    cancel: StepCancellation | None = None,
 ) -> str:
-    if hub is None or step_id is None or not hasattr(llm, "stream_complete"):
-        return await llm.complete(system_prompt=system_prompt, user_prompt=user_prompt)
+    llm = llm_for_phase(llm, step_name)
+    cancel = cancel or current_step_cancellation()
+    if cancel is not None:
+        cancel.raise_if_canceled()
+    record_llm_call(phase=step_name, model=getattr(llm, "model", None))
 
-    await hub.publish(
-        run_id=run_id,
-        name="llm_start",
-        payload={"step_id": str(step_id), "step_name": step_name},
-    )
+    llm_kwargs: dict[str, Any] = {}
+    if response_model is not None and getattr(llm, "supports_json_schema", False):
+        llm_kwargs["response_model"] = response_model
+        llm_metrics.incr(phase=step_name, name="structured_output_requests")
+
+    async def complete(prompt: str, **kwargs: Any) -> str:
+        call = llm.complete(system_prompt=system_prompt, user_prompt=prompt, **kwargs)
+        return await (cancel.run(call) if cancel is not None else call)
+
+    if hub is None or step_id is None or not hasattr(llm, "stream_complete"):
+        return await complete(user_prompt, **llm_kwargs)
 
+    coalescer = DeltaCoalescer(hub=hub, run_id=run_id, step_id=step_id, step_name=step_name)
+    await coalescer.start()
     raw_output = ""
-    buffer = ""
-    last_flush = time.monotonic()
+    stream = llm.stream_complete(system_prompt=system_prompt, user_prompt=user_prompt, **llm_kwargs)
+    if cancel is not None:
+        stream = cancel.iterate(stream)
     try:
-        async for delta in llm.stream_complete(system_prompt=system_prompt, user_prompt=user_prompt):
+        async for delta in stream:
             raw_output += delta
-            buffer += delta
-            now = time.monotonic()
-            if len(buffer) >= flush_chars or (now - last_flush) >= flush_interval_s:
-                await hub.publish(
-                    run_id=run_id,
-                    name="llm_delta",
-                    payload={"step_id": str(step_id), "append": buffer},
-                )
-                buffer = ""
-                last_flush = now
-
-        if buffer:
-            await hub.publish(
-                run_id=run_id,
-                name="llm_delta",
-                payload={"step_id": str(step_id), "append": buffer},
-            )
+            await coalescer.update(raw_output)
+
+        await coalescer.update(raw_output, final=True)
         return raw_output
+    except StepCanceled:
+        llm_metrics.incr(phase=step_name, name="stream_canceled")
+        raise
     except Exception:
         # Providers that are "OpenAI-compatible" sometimes have flaky stream implementations.
-        # Falling back to a non-streaming request makes autorun far more robust.
-        try:
-            return await llm.complete(system_prompt=system_prompt, user_prompt=user_prompt)
-        finally:
-            buffer = ""
+        # Ask the model to continue from the partial output first; recomputing the whole
+        # response is only the last resort.
+        llm_metrics.incr(phase=step_name, name="stream_interrupted")
+        if raw_output.strip():
+            stitched = await _continue_interrupted_stream(
+                llm=llm,
+                system_prompt=system_prompt,
+                user_prompt=user_prompt,
+                partial_output=raw_output,
+                step_name=step_name,
+                cancel=cancel,
+            )
+            if stitched is not None:
+                if stitched.startswith(raw_output):
+                    await coalescer.update(stitched, final=True)
+                else:
+                    await coalescer.restart(stitched)
+                return stitched
+
+        llm_metrics.incr(phase=step_name, name="stream_full_recompute")
+        output = await complete(user_prompt, **llm_kwargs)
+        await coalescer.restart(output)
+        return output
     finally:
-        await hub.publish(run_id=run_id, name="llm_end", payload={"step_id": str(step_id)})
+        await coalescer.end()
 
 
-async def _select_latest_novel_chapter_versions(
+def _parse_llm_output[ModelT: BaseModel](
     *,
-    session: AsyncSession,
-    brief_snapshot_id: uuid.UUID,
-) -> list[tuple[int, Artifact, ArtifactVersion]]:
-    result = await session.execute(
-        select(Artifact, ArtifactVersion)
+    raw: str,
+    model: type[ModelT],
+    llm: LLMClient,
+    step_name: str,
+) -> ModelT:
+    phase_llm = llm_for_phase(llm, step_name)
+    mode = "structured" if getattr(phase_llm, "supports_json_schema", False) else "text"
+    llm_metrics.incr(phase=step_name, name=f"json_outputs_{mode}")
+    try:
+        payload, repaired = parse_json_object(raw)
+        result = model.model_validate(payload)
+    except Exception:
+        llm_metrics.incr(phase=step_name, name=f"json_invalid_{mode}")
+        raise
+    if repaired:
+        llm_metrics.incr(phase=step_name, name=f"json_repaired_{mode}")
+    return result
+
+
+def _novel_chapter_versions_query(columns: tuple[Any, ...], brief_snapshot_id: uuid.UUID) -> Any:
+    return (
+        select(*columns)
         .join(ArtifactVersion, ArtifactVersion.artifact_id == Artifact.id)
         .where(Artifact.kind == ArtifactKind.novel_chapter)
         .where(ArtifactVersion.brief_snapshot_id == brief_snapshot_id)
         .order_by(Artifact.ordinal.asc().nullslast(), ArtifactVersion.created_at.desc())
     )
+
+
+async def _latest_novel_chapter_version_ids(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+) -> list[uuid.UUID]:
+    # Same selection as below without loading chapter texts; used to validate prefetched sources.
+    result = await session.execute(
+        _novel_chapter_versions_query((Artifact.ordinal, ArtifactVersion.id), brief_snapshot_id)
+    )
+    chosen: dict[int, uuid.UUID] = {}
+    for ordinal, version_id in result.all():
+        if ordinal is None or int(ordinal) in chosen:
+            continue
+        chosen[int(ordinal)] = version_id
+    return [chosen[idx] for idx in sorted(chosen.keys())]
+
+
+async def _select_latest_novel_chapter_versions(
+    *,
+    session: AsyncSession,
+    brief_snapshot_id: uuid.UUID,
+    prefetch: StepPrefetch | None = None,
+    step_name: str | None = None,
+) -> list[tuple[int, Artifact, ArtifactVersion]]:
+    if prefetch is not None:
+        key = ("novel_sources", brief_snapshot_id)
+        sources = await _take_prefetched_novel_sources(
+            session=session, prefetch=prefetch, key=key, brief_snapshot_id=brief_snapshot_id, step_name=step_name
+        )
+        if sources is None:
+            sources = await _select_latest_novel_chapter_versions(session=session, brief_snapshot_id=brief_snapshot_id)
+
+        # Every nts_episode_* step reads the same sources; load them for the next step while this
+        # one waits on the model.
+        async def factory(prefetch_session: AsyncSession) -> list[tuple[int, Artifact, ArtifactVersion]]:
+            return await _select_latest_novel_chapter_versions(
+                session=prefetch_session, brief_snapshot_id=brief_snapshot_id
+            )
+
+        prefetch.spawn(key, factory)
+        return sources
+
+    result = await session.execute(_novel_chapter_versions_query((Artifact, ArtifactVersion), brief_snapshot_id))
     rows = result.all()
 
     chosen: dict[int, tuple[int, Artifact, ArtifactVersion]] = {}
@@ -660,6 +824,29 @@ async def _select_latest_novel_chapter_versions(
     return [chosen[idx] for idx in sorted(chosen.keys())]
 
 
+async def _take_prefetched_novel_sources(
+    *,
+    session: AsyncSession,
+    prefetch: StepPrefetch,
+    key: tuple[str, uuid.UUID],
+    brief_snapshot_id: uuid.UUID,
+    step_name: str | None,
+) -> list[tuple[int, Artifact, ArtifactVersion]] | None:
+    prefetched = await prefetch.take(key)
+    if prefetched is None:
+        return None
+    latest_ids = await _latest_novel_chapter_version_ids(session=session, brief_snapshot_id=brief_snapshot_id)
+    if latest_ids != [version.id for _, _, version in prefetched]:
+        llm_metrics.incr(phase=step_name or "", name="prefetch_stale")
+        return None
+    llm_metrics.incr(phase=step_name or "", name="prefetch_hit")
+    # The rows were loaded by the prefetch session; attach them to this one without reloading.
+    return [
+        (ordinal, await session.merge(artifact, load=False), await session.merge(version, load=False))
+        for ordinal, artifact, version in prefetched
+    ]
+
+
 def _novel_digest_lines(digests: list[dict[str, Any]]) -> str:
     lines: list[str] = []
     for item in digests:
@@ -698,17 +885,573 @@ async def _get_or_create_artifact(
     if artifact:
         if title and artifact.title != title:
             artifact.title = title
-            await session.commit()
-            await session.refresh(artifact)
+            await session.flush()
         return artifact
 
     artifact = Artifact(kind=kind, ordinal=ordinal, title=title)
     session.add(artifact)
-    await session.commit()
-    await session.refresh(artifact)
+    await session.flush()
     return artifact
 
 
+def _draft_system_prompt(name: str, *, self_review: bool) -> str:
+    prompt = load_prompt(name)
+    if self_review:
+        prompt = f"{prompt.rstrip()}\n\n{load_prompt('draft_self_review_system.md')}"
+    return prompt
+
+
+def _draft_response_model(*, self_review: bool) -> type[DraftResult]:
+    return SelfReviewedDraft if self_review else DraftResult
+
+
+def _self_assessment_fields(draft: DraftResult) -> dict[str, Any]:
+    # Kept on the draft state so the critic phase can decide whether the separate critic must run.
+    if not isinstance(draft, SelfReviewedDraft):
+        return {}
+    assessment = draft.self_assessment
+    return {"self_assessment": assessment.model_dump(mode="json") if assessment is not None else None}
+
+
+async def _rewrite_flagged_paragraphs(
+    *,
+    llm: LLMClient,
+    run_id: uuid.UUID,
+    step_name: str,
+    paragraphs: list[str],
+    targets: list[int],
+    concurrency: int,
+    brief_text: str,
+    current_state: dict[str, Any],
+    rewrite_instructions: str,
+    unit_context: str = "",
+) -> dict[int, str]:
+    # Each flagged paragraph is rewritten on its own, with its neighbours as context, so the fix
+    # takes as long as the slowest paragraph rather than the whole draft. The calls run side by
+    # side, so they are not streamed to the run's event stream.
+    async def rewrite(index: int) -> str:
+        before, after = paragraph_context(paragraphs, index)
+        raw = await _llm_complete_with_optional_stream(
+            llm=llm,
+            system_prompt=load_prompt("paragraph_rewrite_system.md"),
+            user_prompt=render_prompt(
+                load_prompt("paragraph_rewrite_user.md"),
+                {
+                    "BRIEF_JSON": brief_text,
+                    "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                    "UNIT_CONTEXT": unit_context or "(none)",
+                    "REWRITE_INSTRUCTIONS": rewrite_instructions,
+                    "CONTEXT_BEFORE": before or "(none)",
+                    "PARAGRAPH_INDEX": str(index),
+                    "PARAGRAPH": paragraphs[index - 1],
+                    "CONTEXT_AFTER": after or "(none)",
+                },
+            ),
+            hub=None,
+            run_id=run_id,
+            step_id=None,
+            step_name=step_name,
+            response_model=ParagraphRewriteResult,
+        )
+        result = _parse_llm_output(raw=raw, model=ParagraphRewriteResult, llm=llm, step_name=step_name)
+        return result.text.strip() or paragraphs[index - 1]
+
+    llm_metrics.incr(phase=step_name, name="paragraph_fix_paragraphs", amount=len(targets))
+    return await rewrite_paragraphs(targets=targets, concurrency=concurrency, rewrite=rewrite)
+
+
+def _evidence_query(phase: str, unit: Any) -> tuple[str, int] | None:
+    if phase == "novel_chapter_draft":
+        return f"第{unit.index}章 {unit.title} {','.join(unit.beats[:3])}", 6
+    if phase == "novel_chapter_critic":
+        return f"Critic 第{unit.index}章 {unit.title}", 6
+    if phase == "script_scene_draft":
+        return f"Scene {unit.slug} {unit.title} {unit.location} {unit.time}", 6
+    if phase == "script_scene_critic":
+        return f"Critic Scene {unit.slug} {unit.title}", 6
+    if phase == "nts_scene_draft":
+        return (
+            f"NTS Scene {unit.slug} {unit.title} {unit.location} {unit.time} "
+            f"{' '.join(unit.characters)} {unit.purpose}",
+            8,
+        )
+    if phase == "nts_scene_critic":
+        return f"NTS Critic {unit.slug} {unit.title}", 8
+    if phase == "nts_scene_fix":
+        return f"NTS Fix {unit.slug} {unit.title}", 8
+    return None
+
+
+async def _retrieve_step_evidence(
+    *,
+    session: AsyncSession,
+    embeddings: EmbeddingsClient,
+    prefetch: StepPrefetch | None,
+    state: dict[str, Any],
+    brief_snapshot_id: uuid.UUID,
+    step_name: str,
+    unit: Any,
+) -> list[MemoryChunk]:
+    query, limit = _evidence_query(step_name, unit) or ("", 0)
+    if not query or _rag_is_disabled(state):
+        return []
+    prefetched = None
+    if prefetch is not None:
+        prefetched = await prefetch.take(("evidence", brief_snapshot_id, query, limit))
+    try:
+        if prefetched is not None:
+            query_vec, fingerprint, chunks = prefetched
+            # Chunks indexed since the prefetch (e.g. by a commit) change the ranking; the query
+            # embedding is still valid, so only the search is repeated.
+            if fingerprint == await memory_fingerprint(session=session, brief_snapshot_id=brief_snapshot_id):
+                llm_metrics.incr(phase=step_name, name="prefetch_hit")
+                return chunks
+            llm_metrics.incr(phase=step_name, name="prefetch_stale")
+            return await retrieve_evidence(
+                session=session,
+                embeddings=embeddings,
+                brief_snapshot_id=brief_snapshot_id,
+                query=query,
+                limit=limit,
+                query_vec=query_vec,
+            )
+        return await retrieve_evidence(
+            session=session,
+            embeddings=embeddings,
+            brief_snapshot_id=brief_snapshot_id,
+            query=query,
+            limit=limit,
+        )
+    except Exception as exc:
+        _record_embeddings_error(state=state, where=f"{step_name}:retrieve_evidence", exc=exc)
+        return []
+
+
+def _prefetch_next_evidence(
+    *,
+    prefetch: StepPrefetch | None,
+    embeddings: EmbeddingsClient,
+    run: WorkflowRun,
+    phase: str,
+    state: dict[str, Any],
+    brief_snapshot_id: uuid.UUID,
+    units: list[Any],
+    position: int,
+) -> None:
+    node = phase_node(run.kind, phase)
+    if prefetch is None or node is None or _rag_is_disabled(state):
+        return
+    for next_phase in node.next:
+        # A commit hands over to the next unit; every other transition stays on the same one.
+        next_position = position + 1 if phase.endswith("_commit") else position
+        if not (0 <= next_position < len(units)):
+            continue
+        spec = _evidence_query(next_phase, units[next_position])
+        if spec is None:
+            continue
+        query, limit = spec
+
+        async def factory(
+            prefetch_session: AsyncSession, query: str = query, limit: int = limit
+        ) -> tuple[list[float], tuple[int, str], list[MemoryChunk]]:
+            query_vec = (await embeddings.embed(texts=[query]))[0]
+            fingerprint = await memory_fingerprint(session=prefetch_session, brief_snapshot_id=brief_snapshot_id)
+            chunks = await retrieve_evidence(
+                session=prefetch_session,
+                embeddings=embeddings,
+                brief_snapshot_id=brief_snapshot_id,
+                query=query,
+                limit=limit,
+                query_vec=query_vec,
+            )
+            return query_vec, fingerprint, chunks
+
+        prefetch.spawn(("evidence", brief_snapshot_id, query, limit), factory)
+
+
+async def _critique_novel_chapter(
+    *,
+    llm: LLMClient,
+    brief_text: str,
+    current_state: dict[str, Any],
+    numbered: str,
+    evidence_text: str,
+    hub: WorkflowEventHub | None,
+    run_id: uuid.UUID,
+    step_id: uuid.UUID | None,
+) -> CriticResult:
+    raw = await _llm_complete_with_optional_stream(
+        llm=llm,
+        system_prompt=load_prompt("critic_system.md"),
+        user_prompt=render_prompt(
+            load_prompt("critic_user.md"),
+            {
+                "BRIEF_JSON": brief_text,
+                "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                "NUMBERED_PARAGRAPHS": numbered or "(empty)",
+                "EVIDENCE_TEXT": evidence_text or "(none)",
+            },
+        ),
+        hub=hub,
+        run_id=run_id,
+        step_id=step_id,
+        step_name="novel_chapter_critic",
+        response_model=CriticResult,
+    )
+    return _parse_llm_output(raw=raw, model=CriticResult, llm=llm, step_name="novel_chapter_critic")
+
+
+async def _start_deferred_novel_critic(
+    *,
+    session: AsyncSession,
+    llm: LLMClient,
+    embeddings: EmbeddingsClient,
+    prefetch: StepPrefetch | None,
+    state: dict[str, Any],
+    snapshot: BriefSnapshot,
+    brief_text: str,
+    current_state: dict[str, Any],
+    chapters: list[NovelBeatsChapter],
+    run_id: uuid.UUID,
+) -> tuple[dict[str, Any], ArtifactVersion, asyncio.Task[CriticResult]] | None:
+    # A chapter committed under the deferred critic policy is reviewed during the next step.
+    pending = state.get("deferred_critic")
+    if not isinstance(pending, dict):
+        return None
+    chapter_index = int(pending.get("chapter_index") or 0)
+    try:
+        version = await session.get(ArtifactVersion, uuid.UUID(str(pending.get("artifact_version_id"))))
+    except (TypeError, ValueError):
+        version = None
+    if version is None or not (1 <= chapter_index <= len(chapters)):
+        state.pop("deferred_critic", None)
+        return None
+
+    _paragraphs, numbered = numbered_paragraphs(version.content_text or "")
+    evidence_chunks = await _retrieve_step_evidence(
+        session=session,
+        embeddings=embeddings,
+        prefetch=prefetch,
+        state=state,
+        brief_snapshot_id=snapshot.id,
+        step_name="novel_chapter_critic",
+        unit=chapters[chapter_index - 1],
+    )
+    # The chapter has been indexed by now; don't hand the critic its own text as evidence.
+    evidence_text = "\n\n---\n\n".join(
+        [c.content_text for c in evidence_chunks if c.artifact_version_id != version.id]
+    )
+    # Only the model call runs alongside the step; it does not touch the session. It isn't streamed,
+    # so its output doesn't interleave with the step's own deltas.
+    task = asyncio.create_task(
+        _critique_novel_chapter(
+            llm=llm,
+            brief_text=brief_text,
+            current_state=current_state,
+            numbered=numbered,
+            evidence_text=evidence_text,
+            hub=None,
+            run_id=run_id,
+            step_id=None,
+        )
+    )
+    return pending, version, task
+
+
+def _settle_deferred_novel_critic(
+    *,
+    state: dict[str, Any],
+    cursor: dict[str, Any],
+    policy: CriticPolicy,
+    pending: dict[str, Any],
+    version: ArtifactVersion,
+    critic: CriticResult,
+) -> bool:
+    state.pop("deferred_critic", None)
+    record_critic_outcome(
+        state=state,
+        phase="novel_chapter_critic",
+        policy=policy,
+        decision=CRITIC_DECISION_DEFERRED_REVIEW,
+        critic=critic,
+    )
+    chapter_index = int(pending.get("chapter_index") or 0)
+    text = version.content_text or ""
+    if not critic_rejected(critic):
+        state["current_state"] = deep_merge(dict(state.get("current_state") or {}), critic.state_patch)
+        version.meta = {
+            **dict(version.meta or {}),
+            "fact_digest": critic.fact_digest,
+            "tone_digest": critic.tone_digest,
+            "soft_scores": critic.soft_scores,
+        }
+        return False
+
+    # Reopen the chapter: fix it, have it critiqued again and commit a new version; the chapters
+    # after it are then drafted again from there.
+    paragraphs, _numbered = numbered_paragraphs(text)
+    if not critic.rewrite_paragraph_indices and paragraphs:
+        critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
+    state["draft"] = {"kind": "chapter", "index": chapter_index, "title": pending.get("title"), "text": text}
+    state["critic"] = critic.model_dump(mode="json")
+    state["fix_attempt"] = 0
+    cursor["chapter_index"] = chapter_index
+    cursor["phase"] = "novel_chapter_fix"
+    return True
+
+
+def _novel_chapter_draft_basis(*, snapshot: BriefSnapshot, chapter: NovelBeatsChapter) -> str:
+    return state_blob_digest({"snapshot_id": str(snapshot.id), "chapter": chapter.model_dump(mode="json")})
+
+
+async def _draft_novel_chapter(
+    *,
+    session: AsyncSession,
+    llm: LLMClient,
+    embeddings: EmbeddingsClient,
+    snapshot: BriefSnapshot,
+    brief_text: str,
+    current_state: dict[str, Any],
+    chapter: NovelBeatsChapter,
+    state: dict[str, Any],
+    hub: WorkflowEventHub | None,
+    run_id: uuid.UUID,
+    step_id: uuid.UUID | None,
+    prefetch: StepPrefetch | None = None,
+    self_review: bool = False,
+) -> DraftResult:
+    evidence_chunks = await _retrieve_step_evidence(
+        session=session,
+        embeddings=embeddings,
+        prefetch=prefetch,
+        state=state,
+        brief_snapshot_id=snapshot.id,
+        step_name="novel_chapter_draft",
+        unit=chapter,
+    )
+    evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
+    raw = await _llm_complete_with_optional_stream(
+        llm=llm,
+        system_prompt=_draft_system_prompt("novel_draft_system.md", self_review=self_review),
+        user_prompt=render_prompt(
+            load_prompt("novel_draft_user.md"),
+            {
+                "BRIEF_JSON": brief_text,
+                "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                "CHAPTER_INDEX": str(chapter.index),
+                "CHAPTER_TITLE": chapter.title,
+                "CHAPTER_BEATS_JSON": json.dumps(chapter.beats, ensure_ascii=False),
+                "EVIDENCE_TEXT": evidence_text or "(none)",
+            },
+        ),
+        hub=hub,
+        run_id=run_id,
+        step_id=step_id,
+        step_name="novel_chapter_draft",
+        response_model=_draft_response_model(self_review=self_review),
+    )
+    return _parse_llm_output(
+        raw=raw, model=_draft_response_model(self_review=self_review), llm=llm, step_name="novel_chapter_draft"
+    )
+
+
+async def _novel_chapter_draft_or_speculation(
+    *,
+    session: AsyncSession,
+    llm: LLMClient,
+    embeddings: EmbeddingsClient,
+    drafts: SpeculativeDrafts | None,
+    prefetch: StepPrefetch | None,
+    snapshot: BriefSnapshot,
+    brief_text: str,
+    current_state: dict[str, Any],
+    chapter: NovelBeatsChapter,
+    state: dict[str, Any],
+    hub: WorkflowEventHub | None,
+    run_id: uuid.UUID,
+    step_id: uuid.UUID | None,
+    self_review: bool = False,
+) -> tuple[DraftResult, SpeculativeResult | None]:
+    speculation = None
+    if drafts is not None:
+        speculation = await drafts.take(
+            phase="novel_chapter_draft",
+            unit=chapter.index,
+            hard_basis=_novel_chapter_draft_basis(snapshot=snapshot, chapter=chapter),
+            soft_basis=state_blob_digest(current_state),
+        )
+    if speculation is not None:
+        return speculation.value, speculation
+    draft = await _draft_novel_chapter(
+        session=session,
+        llm=llm,
+        embeddings=embeddings,
+        snapshot=snapshot,
+        brief_text=brief_text,
+        current_state=current_state,
+        chapter=chapter,
+        state=state,
+        hub=hub,
+        run_id=run_id,
+        step_id=step_id,
+        prefetch=prefetch,
+        self_review=self_review,
+    )
+    return draft, None
+
+
+def _schedule_novel_chapter_drafts(
+    *,
+    drafts: SpeculativeDrafts,
+    llm: LLMClient,
+    embeddings: EmbeddingsClient,
+    run: WorkflowRun,
+    phase: str,
+    snapshot: BriefSnapshot,
+    brief_text: str,
+    current_state: dict[str, Any],
+    state: dict[str, Any],
+    chapters: list[NovelBeatsChapter],
+    after_index: int,
+    self_review: bool = False,
+) -> None:
+    node = speculative_node(run.kind, phase)
+    if node is None:
+        return
+    by_index = {chapter.index: chapter for chapter in chapters}
+    # Drafts started now see the current_state as of this step; the chapters in between may still
+    # change it, which take() reports as stale.
+    soft_basis = state_blob_digest(current_state)
+    frozen_state = json.dumps(current_state, ensure_ascii=False)
+    rag = dict(_rag_state(state))
+    for index in drafts.wanted_units(phase=node.name, after_unit=after_index, units=sorted(by_index)):
+        chapter = by_index[index]
+
+        async def factory(spec_session: AsyncSession, chapter: NovelBeatsChapter = chapter) -> DraftResult:
+            return await _draft_novel_chapter(
+                session=spec_session,
+                llm=llm,
+                embeddings=embeddings,
+                snapshot=snapshot,
+                brief_text=brief_text,
+                current_state=json.loads(frozen_state),
+                chapter=chapter,
+                state={"rag": dict(rag)},
+                hub=None,
+                run_id=run.id,
+                step_id=None,
+                self_review=self_review,
+            )
+
+        drafts.spawn(
+            phase=node.name,
+            unit=index,
+            hard_basis=_novel_chapter_draft_basis(snapshot=snapshot, chapter=chapter),
+            soft_basis=soft_basis,
+            factory=factory,
+        )
+
+
+def _nts_source_chapter(*, artifact: Artifact, version: ArtifactVersion, ordinal: int) -> tuple[str, str]:
+    meta = dict(version.meta or {})
+    title = str(meta.get("chapter_title") or meta.get("title") or artifact.title or f"第{ordinal}章")
+    text = (version.content_text or "").strip()
+    if len(text) > 20000:
+        text = text[:20000].rstrip() + "\n\n（后续内容已截断）"
+    return title, text
+
+
+def _nts_episode_breakdown_basis(*, version: ArtifactVersion, brief_json_for_conversion: dict[str, Any]) -> str:
+    return state_blob_digest({"version_id": str(version.id), "brief": brief_json_for_conversion})
+
+
+async def _breakdown_nts_chapter(
+    *,
+    llm: LLMClient,
+    brief_json_for_conversion: dict[str, Any],
+    current_state: dict[str, Any],
+    episode_json: dict[str, Any],
+    prev_episode_digests_text: str,
+    chapter_text: str,
+    hub: WorkflowEventHub | None,
+    run_id: uuid.UUID,
+    step_id: uuid.UUID | None,
+) -> EpisodeBreakdown:
+    raw = await _llm_complete_with_optional_stream(
+        llm=llm,
+        system_prompt=load_prompt("nts_episode_breakdown_system.md"),
+        user_prompt=render_prompt(
+            load_prompt("nts_episode_breakdown_user.md"),
+            {
+                "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
+                "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                "EPISODE_JSON": json.dumps(episode_json, ensure_ascii=False, indent=2),
+                "PREV_EPISODE_DIGESTS_TEXT": prev_episode_digests_text,
+                "CHAPTER_TEXT": chapter_text or "(empty)",
+            },
+        ),
+        hub=hub,
+        run_id=run_id,
+        step_id=step_id,
+        step_name="nts_episode_breakdown",
+        response_model=EpisodeBreakdown,
+    )
+    return _parse_llm_output(raw=raw, model=EpisodeBreakdown, llm=llm, step_name="nts_episode_breakdown")
+
+
+def _schedule_nts_episode_breakdowns(
+    *,
+    drafts: SpeculativeDrafts,
+    llm: LLMClient,
+    run: WorkflowRun,
+    phase: str,
+    brief_json_for_conversion: dict[str, Any],
+    output_spec: dict[str, Any],
+    current_state: dict[str, Any],
+    prev_episode_digests_text: str,
+    sources_by_ordinal: dict[int, tuple[Artifact, ArtifactVersion]],
+    after_index: int,
+) -> None:
+    node = speculative_node(run.kind, phase)
+    if node is None:
+        return
+    # Breakdowns only read their own source chapter; the rolling digests they also see are
+    # refreshed by the episode draft and critic that follow.
+    soft_basis = state_blob_digest([current_state, prev_episode_digests_text])
+    frozen_state = json.dumps(current_state, ensure_ascii=False)
+    for ordinal in drafts.wanted_units(phase=node.name, after_unit=after_index, units=sorted(sources_by_ordinal)):
+        artifact, version = sources_by_ordinal[ordinal]
+        title, text = _nts_source_chapter(artifact=artifact, version=version, ordinal=ordinal)
+        episode_json = {"episode_index": ordinal, "chapter_title": title, "output_spec": output_spec}
+
+        async def factory(
+            _spec_session: AsyncSession,
+            episode_json: dict[str, Any] = episode_json,
+            text: str = text,
+        ) -> EpisodeBreakdown:
+            return await _breakdown_nts_chapter(
+                llm=llm,
+                brief_json_for_conversion=brief_json_for_conversion,
+                current_state=json.loads(frozen_state),
+                episode_json=episode_json,
+                prev_episode_digests_text=prev_episode_digests_text,
+                chapter_text=text,
+                hub=None,
+                run_id=run.id,
+                step_id=None,
+            )
+
+        drafts.spawn(
+            phase=node.name,
+            unit=ordinal,
+            hard_basis=_nts_episode_breakdown_basis(
+                version=version, brief_json_for_conversion=brief_json_for_conversion
+            ),
+            soft_basis=soft_basis,
+            factory=factory,
+        )
+
+
 async def execute_next_step(
     *,
     session: AsyncSession,
@@ -717,17 +1460,65 @@ async def execute_next_step(
     run: WorkflowRun,
     hub: WorkflowEventHub | None = None,
     step_id: uuid.UUID | None = None,
+    cancel: StepCancellation | None = None,
+    context: RunContext | None = None,
+    drafts: SpeculativeDrafts | None = None,
+    prefetch: StepPrefetch | None = None,
+) -> dict[str, Any]:
+    with collect_step_metrics() as metrics, bind_step_cancellation(cancel):
+        outputs = await _execute_phase(
+            session=session,
+            llm=llm,
+            embeddings=embeddings,
+            run=run,
+            hub=hub,
+            step_id=step_id,
+            context=context,
+            drafts=drafts,
+            prefetch=prefetch,
+        )
+    if (metrics.llm_calls or metrics.critic_decision) and isinstance(outputs, dict):
+        outputs = {**outputs, "metrics": metrics.as_dict()}
+    return outputs
+
+
+async def _execute_phase(
+    *,
+    session: AsyncSession,
+    llm: LLMClient,
+    embeddings: EmbeddingsClient,
+    run: WorkflowRun,
+    hub: WorkflowEventHub | None = None,
+    step_id: uuid.UUID | None = None,
+    context: RunContext | None = None,
+    drafts: SpeculativeDrafts | None = None,
+    prefetch: StepPrefetch | None = None,
 ) -> dict[str, Any]:
-    # NOTE: run.state is a JSON column. Using a shallow copy can keep references to nested dicts
-    # (e.g., cursor) and cause SQLAlchemy to miss changes when only nested fields are updated.
-    state: dict[str, Any] = copy.deepcopy(run.state or {})
+    # NOTE: run.state only holds small, frequently-changing keys; large values live in their own
+    # tables (see run_state_store). The expanded state is a fresh copy, so nested edits never alias
+    # the loaded JSON, and compacting it back writes only what changed.
+    run_state, state = await load_run_state(session=session, run=run)
     cursor = _cursor(state)
 
-    snapshot = await _get_snapshot(session, run.brief_snapshot_id)
-    brief_json = snapshot.content
+    prompt_presets: dict[str, Any] | None = None
+    if context is not None:
+        snapshot = context.snapshot
+        brief_json = context.brief_json
+        brief_text = context.brief_json_text
+        runtime_prefs = context.runtime_prefs
+        prompt_presets = context.prompt_presets
+    else:
+        snapshot = await _get_snapshot(session, run.brief_snapshot_id)
+        brief_json = snapshot.content
+        brief_text = json.dumps(brief_json, ensure_ascii=False, indent=2)
+        runtime_prefs = await resolve_runtime_execution_preferences(session=session, brief_id=snapshot.brief_id)
     current_state: dict[str, Any] = dict(state.get("current_state") or {})
-    runtime_prefs = await resolve_runtime_execution_preferences(session=session, brief_id=snapshot.brief_id)
     max_fix_attempts = int(runtime_prefs.get("max_fix_attempts") or 0)
+    self_review = resolve_draft_self_review(runtime_prefs=runtime_prefs, state=state)
+    fix_mode = resolve_fix_mode(runtime_prefs=runtime_prefs, state=state)
+    paragraph_fix_concurrency = int(runtime_prefs.get("paragraph_fix_concurrency") or 1)
+    if hub is not None:
+        hub.set_stream_detail(run.id, resolve_stream_detail(state))
 
     if run.kind == WorkflowKind.novel:
         phase = cursor.get("phase") or "novel_outline"
@@ -739,18 +1530,18 @@ async def execute_next_step(
                 system_prompt=load_prompt("novel_outline_system.md"),
                 user_prompt=render_prompt(
                     load_prompt("novel_outline_user.md"),
-                    {"BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2)},
+                    {"BRIEF_JSON": brief_text},
                 ),
                 hub=hub,
                 run_id=run.id,
                 step_id=step_id,
                 step_name="novel_outline",
+                response_model=NovelOutline,
             )
-            payload = extract_json_object(raw)
-            outline = NovelOutline.model_validate(payload)
+            outline = _parse_llm_output(raw=raw, model=NovelOutline, llm=llm, step_name="novel_outline")
             state["outline"] = outline.model_dump(mode="json")
             cursor["phase"] = "novel_beats"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": phase, "outline": state["outline"]}
 
@@ -762,7 +1553,7 @@ async def execute_next_step(
                 user_prompt=render_prompt(
                     load_prompt("novel_beats_user.md"),
                     {
-                        "BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2),
+                        "BRIEF_JSON": brief_text,
                         "OUTLINE_JSON": json.dumps(outline_json, ensure_ascii=False, indent=2),
                     },
                 ),
@@ -770,124 +1561,211 @@ async def execute_next_step(
                 run_id=run.id,
                 step_id=step_id,
                 step_name="novel_beats",
+                response_model=NovelBeats,
             )
-            payload = extract_json_object(raw)
-            beats = NovelBeats.model_validate(payload)
+            beats = _parse_llm_output(raw=raw, model=NovelBeats, llm=llm, step_name="novel_beats")
             state["beats"] = beats.model_dump(mode="json")
             cursor["phase"] = "novel_chapter_draft"
             cursor["chapter_index"] = 1
             state["fix_attempt"] = 0
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": phase, "beats": state["beats"]}
 
         beats_json = state.get("beats") or {}
         beats = NovelBeats.model_validate(beats_json)
         if chapter_index > len(beats.chapters):
+            deferred = await _start_deferred_novel_critic(
+                session=session,
+                llm=llm,
+                embeddings=embeddings,
+                prefetch=prefetch,
+                state=state,
+                snapshot=snapshot,
+                brief_text=brief_text,
+                current_state=current_state,
+                chapters=beats.chapters,
+                run_id=run.id,
+            )
+            if deferred is not None:
+                pending, version, task = deferred
+                if _settle_deferred_novel_critic(
+                    state=state,
+                    cursor=cursor,
+                    policy=resolve_critic_policy(runtime_prefs=runtime_prefs, state=state),
+                    pending=pending,
+                    version=version,
+                    critic=await task,
+                ):
+                    run.state = await run_state.compact(state)
+                    await session.commit()
+                    return {"phase": phase, "reopened_chapter_index": int(pending.get("chapter_index") or 0)}
             run.status = RunStatus.succeeded
             cursor["phase"] = "done"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": "done"}
 
         chapter = beats.chapters[chapter_index - 1]
+        _prefetch_next_evidence(
+            prefetch=prefetch,
+            embeddings=embeddings,
+            run=run,
+            phase=phase,
+            state=state,
+            brief_snapshot_id=snapshot.id,
+            units=beats.chapters,
+            position=chapter_index - 1,
+        )
+
+        if drafts is not None and drafts.enabled:
+            _schedule_novel_chapter_drafts(
+                drafts=drafts,
+                llm=llm,
+                embeddings=embeddings,
+                run=run,
+                phase=phase,
+                snapshot=snapshot,
+                brief_text=brief_text,
+                current_state=current_state,
+                state=state,
+                chapters=beats.chapters,
+                after_index=chapter.index,
+                self_review=self_review,
+            )
 
         if phase == "novel_chapter_draft":
-            query = f"第{chapter.index}章 {chapter.title} {','.join(chapter.beats[:3])}"
-            evidence_chunks = []
-            if not _rag_is_disabled(state):
-                try:
-                    evidence_chunks = await retrieve_evidence(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=snapshot.id,
-                        query=query,
-                        limit=6,
-                    )
-                except Exception as exc:
-                    _record_embeddings_error(state=state, where="novel_chapter_draft:retrieve_evidence", exc=exc)
-            evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
-            raw = await _llm_complete_with_optional_stream(
+            deferred = await _start_deferred_novel_critic(
+                session=session,
                 llm=llm,
-                system_prompt=load_prompt("novel_draft_system.md"),
-                user_prompt=render_prompt(
-                    load_prompt("novel_draft_user.md"),
-                    {
-                        "BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2),
-                        "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                        "CHAPTER_INDEX": str(chapter.index),
-                        "CHAPTER_TITLE": chapter.title,
-                        "CHAPTER_BEATS_JSON": json.dumps(chapter.beats, ensure_ascii=False),
-                        "EVIDENCE_TEXT": evidence_text or "(none)",
-                    },
-                ),
-                hub=hub,
+                embeddings=embeddings,
+                prefetch=prefetch,
+                state=state,
+                snapshot=snapshot,
+                brief_text=brief_text,
+                current_state=current_state,
+                chapters=beats.chapters,
                 run_id=run.id,
-                step_id=step_id,
-                step_name="novel_chapter_draft",
             )
-            payload = extract_json_object(raw)
-            draft = DraftResult.model_validate(payload)
-            state["draft"] = {"kind": "chapter", "index": chapter.index, "title": draft.title, "text": draft.text}
+            try:
+                draft, speculation = await _novel_chapter_draft_or_speculation(
+                    session=session,
+                    llm=llm,
+                    embeddings=embeddings,
+                    drafts=drafts,
+                    prefetch=prefetch,
+                    snapshot=snapshot,
+                    brief_text=brief_text,
+                    current_state=current_state,
+                    chapter=chapter,
+                    state=state,
+                    hub=hub,
+                    run_id=run.id,
+                    step_id=step_id,
+                    self_review=self_review,
+                )
+            except BaseException:
+                if deferred is not None:
+                    deferred[2].cancel()
+                raise
+            if deferred is not None:
+                pending, version, task = deferred
+                if _settle_deferred_novel_critic(
+                    state=state,
+                    cursor=cursor,
+                    policy=resolve_critic_policy(runtime_prefs=runtime_prefs, state=state),
+                    pending=pending,
+                    version=version,
+                    critic=await task,
+                ):
+                    # The previous chapter failed its review; this draft was written on top of it.
+                    run.state = await run_state.compact(state)
+                    await session.commit()
+                    return {
+                        "phase": phase,
+                        "chapter_index": chapter.index,
+                        "reopened_chapter_index": int(pending.get("chapter_index") or 0),
+                    }
+
+            state["draft"] = {
+                "kind": "chapter",
+                "index": chapter.index,
+                "title": draft.title,
+                "text": draft.text,
+                **_self_assessment_fields(draft),
+            }
+            draft_outputs: dict[str, Any] = {
+                "phase": phase,
+                "chapter_index": chapter.index,
+                "draft_preview": draft.text[:500],
+            }
+            if speculation is not None:
+                # A stale draft was written against an older current_state; critic_decision always
+                # sends it to the LLM critic, which checks it against the latest one.
+                state["draft"]["speculative"] = "stale" if speculation.stale else "fresh"
+                draft_outputs["speculative"] = state["draft"]["speculative"]
             cursor["phase"] = "novel_chapter_critic"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
-            return {"phase": phase, "chapter_index": chapter.index, "draft_preview": draft.text[:500]}
+            return draft_outputs
 
         if phase == "novel_chapter_critic":
             draft_state = state.get("draft") or {}
             draft_text = str(draft_state.get("text") or "")
             paragraphs, numbered = numbered_paragraphs(draft_text)
-            query = f"Critic 第{chapter.index}章 {chapter.title}"
-            evidence_chunks = []
-            if not _rag_is_disabled(state):
-                try:
-                    evidence_chunks = await retrieve_evidence(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=snapshot.id,
-                        query=query,
-                        limit=6,
-                    )
-                except Exception as exc:
-                    _record_embeddings_error(state=state, where="novel_chapter_critic:retrieve_evidence", exc=exc)
-            evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
-            raw = await _llm_complete_with_optional_stream(
-                llm=llm,
-                system_prompt=load_prompt("critic_system.md"),
-                user_prompt=render_prompt(
-                    load_prompt("critic_user.md"),
-                    {
-                        "BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2),
-                        "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                        "NUMBERED_PARAGRAPHS": numbered or "(empty)",
-                        "EVIDENCE_TEXT": evidence_text or "(none)",
-                    },
-                ),
-                hub=hub,
-                run_id=run.id,
-                step_id=step_id,
-                step_name="novel_chapter_critic",
+            policy = resolve_critic_policy(runtime_prefs=runtime_prefs, state=state)
+            decision = critic_decision(
+                policy, state=state, unit_index=chapter.index, deferrable=True, draft=draft_state
+            )
+            if decision == CRITIC_DECISION_LLM:
+                evidence_chunks = await _retrieve_step_evidence(
+                    session=session,
+                    embeddings=embeddings,
+                    prefetch=prefetch,
+                    state=state,
+                    brief_snapshot_id=snapshot.id,
+                    step_name="novel_chapter_critic",
+                    unit=chapter,
+                )
+                evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
+                critic = await _critique_novel_chapter(
+                    llm=llm,
+                    brief_text=brief_text,
+                    current_state=current_state,
+                    numbered=numbered,
+                    evidence_text=evidence_text,
+                    hub=hub,
+                    run_id=run.id,
+                    step_id=step_id,
+                )
+                if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
+                    critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
+            else:
+                critic = stand_in_critic_result(decision=decision, draft_state=draft_state, draft_text=draft_text)
+            record_critic_outcome(
+                state=state,
+                phase=phase,
+                policy=policy,
+                decision=decision,
+                critic=critic if decision == CRITIC_DECISION_LLM else None,
             )
-            payload = extract_json_object(raw)
-            critic = CriticResult.model_validate(payload)
-            if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
-                critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
             state["critic"] = critic.model_dump(mode="json")
+            if decision == CRITIC_DECISION_DEFER:
+                state["critic_deferred"] = True
 
             fix_attempt = int(state.get("fix_attempt") or 0)
             if not critic.hard_pass or critic.rewrite_paragraph_indices:
                 if fix_attempt >= max_fix_attempts:
                     run.status = RunStatus.failed
                     run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
                 cursor["phase"] = "novel_chapter_fix"
             else:
                 cursor["phase"] = "novel_chapter_commit"
 
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {
                 "phase": phase,
@@ -903,30 +1781,48 @@ async def execute_next_step(
             draft_state = state.get("draft") or {}
             draft_text = str(draft_state.get("text") or "")
             paragraphs, numbered = numbered_paragraphs(draft_text)
-
-            raw = await _llm_complete_with_optional_stream(
-                llm=llm,
-                system_prompt=load_prompt("rewrite_system.md"),
-                user_prompt=render_prompt(
-                    load_prompt("rewrite_user.md"),
-                    {
-                        "BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2),
-                        "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                        "REWRITE_INSTRUCTIONS": critic.rewrite_instructions or "提升一致性与质量",
-                        "NUMBERED_PARAGRAPHS": numbered or "(empty)",
-                        "REWRITE_PARAGRAPH_INDICES_JSON": json.dumps(
-                            critic.rewrite_paragraph_indices, ensure_ascii=False
-                        ),
-                    },
-                ),
-                hub=hub,
-                run_id=run.id,
-                step_id=step_id,
-                step_name="novel_chapter_fix",
+            targets = (
+                paragraph_fix_targets(paragraphs=paragraphs, indices=critic.rewrite_paragraph_indices)
+                if fix_mode == FIX_MODE_PARAGRAPH
+                else []
             )
-            payload = extract_json_object(raw)
-            rewrite = RewriteResult.model_validate(payload)
-            replacements = {int(k): v for k, v in rewrite.replacements.items()}
+
+            if targets:
+                replacements = await _rewrite_flagged_paragraphs(
+                    llm=llm,
+                    run_id=run.id,
+                    step_name="novel_chapter_fix",
+                    paragraphs=paragraphs,
+                    targets=targets,
+                    concurrency=paragraph_fix_concurrency,
+                    brief_text=brief_text,
+                    current_state=current_state,
+                    rewrite_instructions=critic.rewrite_instructions or "提升一致性与质量",
+                )
+            else:
+                raw = await _llm_complete_with_optional_stream(
+                    llm=llm,
+                    system_prompt=load_prompt("rewrite_system.md"),
+                    user_prompt=render_prompt(
+                        load_prompt("rewrite_user.md"),
+                        {
+                            "BRIEF_JSON": brief_text,
+                            "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                            "REWRITE_INSTRUCTIONS": critic.rewrite_instructions or "提升一致性与质量",
+                            "NUMBERED_PARAGRAPHS": numbered or "(empty)",
+                            "REWRITE_PARAGRAPH_INDICES_JSON": json.dumps(
+                                critic.rewrite_paragraph_indices, ensure_ascii=False
+                            ),
+                        },
+                    ),
+                    hub=hub,
+                    run_id=run.id,
+                    step_id=step_id,
+                    step_name="novel_chapter_fix",
+                    response_model=RewriteResult,
+                )
+                rewrite = _parse_llm_output(raw=raw, model=RewriteResult, llm=llm, step_name="novel_chapter_fix")
+                replacements = {int(k): v for k, v in rewrite.replacements.items()}
             updated_paragraphs = apply_replacements(paragraphs, replacements)
             new_text = join_paragraphs(updated_paragraphs)
             state["draft"] = {
@@ -937,9 +1833,9 @@ async def execute_next_step(
             }
             state["fix_attempt"] = int(state.get("fix_attempt") or 0) + 1
             cursor["phase"] = "novel_chapter_critic"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
-            return {"phase": phase, "updated_preview": new_text[:500]}
+            return {"phase": phase, "updated_preview": new_text[:500], "paragraph_fix": targets}
 
         if phase == "novel_chapter_commit":
             critic_json = state.get("critic") or {}
@@ -947,7 +1843,7 @@ async def execute_next_step(
             if not critic.hard_pass:
                 run.status = RunStatus.failed
                 run.error = {"detail": "hard_check_failed", "hard_errors": critic.hard_errors}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
 
@@ -976,23 +1872,30 @@ async def execute_next_step(
                 brief_snapshot_id=snapshot.id,
             )
             session.add(version)
-            await session.commit()
-            await session.refresh(version)
+            await session.flush()
 
             if not _rag_is_disabled(state):
                 try:
-                    await index_artifact_version(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=snapshot.id,
-                        artifact_version_id=version.id,
-                        content_text=draft_text,
-                        meta={"kind": "novel_chapter", "ordinal": chapter.index},
-                    )
+                    async with session.begin_nested():
+                        await index_artifact_version(
+                            session=session,
+                            embeddings=embeddings,
+                            brief_snapshot_id=snapshot.id,
+                            artifact_version_id=version.id,
+                            content_text=draft_text,
+                            meta={"kind": "novel_chapter", "ordinal": chapter.index},
+                            commit=False,
+                        )
                 except Exception as exc:
-                    await session.rollback()
                     _record_embeddings_error(state=state, where="novel_chapter_commit:index_artifact_version", exc=exc)
 
+            if state.pop("critic_deferred", False):
+                state["deferred_critic"] = {
+                    "chapter_index": chapter.index,
+                    "title": str(draft_title),
+                    "artifact_version_id": str(version.id),
+                }
+
             current_state = deep_merge(current_state, critic.state_patch)
             state["current_state"] = current_state
             state.pop("draft", None)
@@ -1001,11 +1904,12 @@ async def execute_next_step(
 
             cursor["chapter_index"] = chapter.index + 1
             cursor["phase"] = "novel_chapter_draft"
-            if cursor["chapter_index"] > len(beats.chapters):
+            # With a review still pending, the last chapter is settled by one more step.
+            if cursor["chapter_index"] > len(beats.chapters) and "deferred_critic" not in state:
                 run.status = RunStatus.succeeded
                 cursor["phase"] = "done"
 
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {
                 "phase": phase,
@@ -1027,20 +1931,20 @@ async def execute_next_step(
                 system_prompt=load_prompt("script_scene_list_system.md"),
                 user_prompt=render_prompt(
                     load_prompt("script_scene_list_user.md"),
-                    {"BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2)},
+                    {"BRIEF_JSON": brief_text},
                 ),
                 hub=hub,
                 run_id=run.id,
                 step_id=step_id,
                 step_name="script_scene_list",
+                response_model=ScriptSceneList,
             )
-            payload = extract_json_object(raw)
-            scene_list = ScriptSceneList.model_validate(payload)
+            scene_list = _parse_llm_output(raw=raw, model=ScriptSceneList, llm=llm, step_name="script_scene_list")
             state["scene_list"] = scene_list.model_dump(mode="json")
             cursor["phase"] = "script_scene_draft"
             cursor["scene_index"] = 1
             state["fix_attempt"] = 0
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": phase, "scene_list": state["scene_list"]}
 
@@ -1049,40 +1953,48 @@ async def execute_next_step(
         if scene_index > len(scene_list.scenes):
             run.status = RunStatus.succeeded
             cursor["phase"] = "done"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": "done"}
 
         scene = scene_list.scenes[scene_index - 1]
+        _prefetch_next_evidence(
+            prefetch=prefetch,
+            embeddings=embeddings,
+            run=run,
+            phase=phase,
+            state=state,
+            brief_snapshot_id=snapshot.id,
+            units=scene_list.scenes,
+            position=scene_index - 1,
+        )
 
         if phase == "script_scene_draft":
             output_spec = dict((brief_json.get("output_spec") or {}) if isinstance(brief_json, dict) else {})
-            preset_notes = await _resolve_prompt_preset_text(session=session, kind=run.kind, state=state)
+            preset_notes = await _resolve_prompt_preset_text(
+                session=session, kind=run.kind, state=state, catalogs=prompt_presets
+            )
             if preset_notes is None:
-                output_spec.pop("script_format_notes", None)
-            else:
-                output_spec["script_format_notes"] = preset_notes
-            query = f"Scene {scene.slug} {scene.title} {scene.location} {scene.time}"
-            evidence_chunks = []
-            if not _rag_is_disabled(state):
-                try:
-                    evidence_chunks = await retrieve_evidence(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=snapshot.id,
-                        query=query,
-                        limit=6,
-                    )
-                except Exception as exc:
-                    _record_embeddings_error(state=state, where="script_scene_draft:retrieve_evidence", exc=exc)
+                output_spec.pop("script_format_notes", None)
+            else:
+                output_spec["script_format_notes"] = preset_notes
+            evidence_chunks = await _retrieve_step_evidence(
+                session=session,
+                embeddings=embeddings,
+                prefetch=prefetch,
+                state=state,
+                brief_snapshot_id=snapshot.id,
+                step_name="script_scene_draft",
+                unit=scene,
+            )
             evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
             raw = await _llm_complete_with_optional_stream(
                 llm=llm,
-                system_prompt=load_prompt("script_scene_draft_system.md"),
+                system_prompt=_draft_system_prompt("script_scene_draft_system.md", self_review=self_review),
                 user_prompt=render_prompt(
                     load_prompt("script_scene_draft_user.md"),
                     {
-                        "BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2),
+                        "BRIEF_JSON": brief_text,
                         "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
                         "SCENE_JSON": json.dumps(
                             deep_merge(scene.model_dump(mode="json"), {"output_spec": output_spec}),
@@ -1096,12 +2008,20 @@ async def execute_next_step(
                 run_id=run.id,
                 step_id=step_id,
                 step_name="script_scene_draft",
+                response_model=_draft_response_model(self_review=self_review),
             )
-            payload = extract_json_object(raw)
-            draft = DraftResult.model_validate(payload)
-            state["draft"] = {"kind": "scene", "index": scene.index, "slug": scene.slug, "text": draft.text}
+            draft = _parse_llm_output(
+                raw=raw, model=_draft_response_model(self_review=self_review), llm=llm, step_name="script_scene_draft"
+            )
+            state["draft"] = {
+                "kind": "scene",
+                "index": scene.index,
+                "slug": scene.slug,
+                "text": draft.text,
+                **_self_assessment_fields(draft),
+            }
             cursor["phase"] = "script_scene_critic"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": phase, "scene_index": scene.index, "draft_preview": draft.text[:500]}
 
@@ -1109,41 +2029,50 @@ async def execute_next_step(
             draft_state = state.get("draft") or {}
             draft_text = str(draft_state.get("text") or "")
             paragraphs, numbered = numbered_paragraphs(draft_text)
-            query = f"Critic Scene {scene.slug} {scene.title}"
-            evidence_chunks = []
-            if not _rag_is_disabled(state):
-                try:
-                    evidence_chunks = await retrieve_evidence(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=snapshot.id,
-                        query=query,
-                        limit=6,
-                    )
-                except Exception as exc:
-                    _record_embeddings_error(state=state, where="script_scene_critic:retrieve_evidence", exc=exc)
-            evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
-            raw = await _llm_complete_with_optional_stream(
-                llm=llm,
-                system_prompt=load_prompt("critic_system.md"),
-                user_prompt=render_prompt(
-                    load_prompt("critic_user.md"),
-                    {
-                        "BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2),
-                        "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                        "NUMBERED_PARAGRAPHS": numbered or "(empty)",
-                        "EVIDENCE_TEXT": evidence_text or "(none)",
-                    },
-                ),
-                hub=hub,
-                run_id=run.id,
-                step_id=step_id,
-                step_name="script_scene_critic",
+            # Critic policies cover chapters and episodes; scenes only honour the draft's self-review.
+            policy = CriticPolicy()
+            decision = critic_decision(policy, state=state, unit_index=scene.index, draft=draft_state)
+            if decision == CRITIC_DECISION_LLM:
+                evidence_chunks = await _retrieve_step_evidence(
+                    session=session,
+                    embeddings=embeddings,
+                    prefetch=prefetch,
+                    state=state,
+                    brief_snapshot_id=snapshot.id,
+                    step_name="script_scene_critic",
+                    unit=scene,
+                )
+                evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
+                raw = await _llm_complete_with_optional_stream(
+                    llm=llm,
+                    system_prompt=load_prompt("critic_system.md"),
+                    user_prompt=render_prompt(
+                        load_prompt("critic_user.md"),
+                        {
+                            "BRIEF_JSON": brief_text,
+                            "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                            "NUMBERED_PARAGRAPHS": numbered or "(empty)",
+                            "EVIDENCE_TEXT": evidence_text or "(none)",
+                        },
+                    ),
+                    hub=hub,
+                    run_id=run.id,
+                    step_id=step_id,
+                    step_name="script_scene_critic",
+                    response_model=CriticResult,
+                )
+                critic = _parse_llm_output(raw=raw, model=CriticResult, llm=llm, step_name="script_scene_critic")
+                if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
+                    critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
+            else:
+                critic = stand_in_critic_result(decision=decision, draft_state=draft_state, draft_text=draft_text)
+            record_critic_outcome(
+                state=state,
+                phase=phase,
+                policy=policy,
+                decision=decision,
+                critic=critic if decision == CRITIC_DECISION_LLM else None,
             )
-            payload = extract_json_object(raw)
-            critic = CriticResult.model_validate(payload)
-            if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
-                critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
             state["critic"] = critic.model_dump(mode="json")
 
             fix_attempt = int(state.get("fix_attempt") or 0)
@@ -1151,14 +2080,14 @@ async def execute_next_step(
                 if fix_attempt >= max_fix_attempts:
                     run.status = RunStatus.failed
                     run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
                 cursor["phase"] = "script_scene_fix"
             else:
                 cursor["phase"] = "script_scene_commit"
 
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {
                 "phase": phase,
@@ -1174,38 +2103,56 @@ async def execute_next_step(
             draft_state = state.get("draft") or {}
             draft_text = str(draft_state.get("text") or "")
             paragraphs, numbered = numbered_paragraphs(draft_text)
-
-            raw = await _llm_complete_with_optional_stream(
-                llm=llm,
-                system_prompt=load_prompt("rewrite_system.md"),
-                user_prompt=render_prompt(
-                    load_prompt("rewrite_user.md"),
-                    {
-                        "BRIEF_JSON": json.dumps(brief_json, ensure_ascii=False, indent=2),
-                        "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                        "REWRITE_INSTRUCTIONS": critic.rewrite_instructions or "提升一致性与质量",
-                        "NUMBERED_PARAGRAPHS": numbered or "(empty)",
-                        "REWRITE_PARAGRAPH_INDICES_JSON": json.dumps(
-                            critic.rewrite_paragraph_indices, ensure_ascii=False
-                        ),
-                    },
-                ),
-                hub=hub,
-                run_id=run.id,
-                step_id=step_id,
-                step_name="script_scene_fix",
+            targets = (
+                paragraph_fix_targets(paragraphs=paragraphs, indices=critic.rewrite_paragraph_indices)
+                if fix_mode == FIX_MODE_PARAGRAPH
+                else []
             )
-            payload = extract_json_object(raw)
-            rewrite = RewriteResult.model_validate(payload)
-            replacements = {int(k): v for k, v in rewrite.replacements.items()}
+
+            if targets:
+                replacements = await _rewrite_flagged_paragraphs(
+                    llm=llm,
+                    run_id=run.id,
+                    step_name="script_scene_fix",
+                    paragraphs=paragraphs,
+                    targets=targets,
+                    concurrency=paragraph_fix_concurrency,
+                    brief_text=brief_text,
+                    current_state=current_state,
+                    rewrite_instructions=critic.rewrite_instructions or "提升一致性与质量",
+                )
+            else:
+                raw = await _llm_complete_with_optional_stream(
+                    llm=llm,
+                    system_prompt=load_prompt("rewrite_system.md"),
+                    user_prompt=render_prompt(
+                        load_prompt("rewrite_user.md"),
+                        {
+                            "BRIEF_JSON": brief_text,
+                            "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                            "REWRITE_INSTRUCTIONS": critic.rewrite_instructions or "提升一致性与质量",
+                            "NUMBERED_PARAGRAPHS": numbered or "(empty)",
+                            "REWRITE_PARAGRAPH_INDICES_JSON": json.dumps(
+                                critic.rewrite_paragraph_indices, ensure_ascii=False
+                            ),
+                        },
+                    ),
+                    hub=hub,
+                    run_id=run.id,
+                    step_id=step_id,
+                    step_name="script_scene_fix",
+                    response_model=RewriteResult,
+                )
+                rewrite = _parse_llm_output(raw=raw, model=RewriteResult, llm=llm, step_name="script_scene_fix")
+                replacements = {int(k): v for k, v in rewrite.replacements.items()}
             updated_paragraphs = apply_replacements(paragraphs, replacements)
             new_text = join_paragraphs(updated_paragraphs)
             state["draft"] = {"kind": "scene", "index": scene.index, "slug": scene.slug, "text": new_text}
             state["fix_attempt"] = int(state.get("fix_attempt") or 0) + 1
             cursor["phase"] = "script_scene_critic"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
-            return {"phase": phase, "updated_preview": new_text[:500]}
+            return {"phase": phase, "updated_preview": new_text[:500], "paragraph_fix": targets}
 
         if phase == "script_scene_commit":
             critic_json = state.get("critic") or {}
@@ -1213,7 +2160,7 @@ async def execute_next_step(
             if not critic.hard_pass:
                 run.status = RunStatus.failed
                 run.error = {"detail": "hard_check_failed", "hard_errors": critic.hard_errors}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
 
@@ -1242,21 +2189,21 @@ async def execute_next_step(
                 brief_snapshot_id=snapshot.id,
             )
             session.add(version)
-            await session.commit()
-            await session.refresh(version)
+            await session.flush()
 
             if not _rag_is_disabled(state):
                 try:
-                    await index_artifact_version(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=snapshot.id,
-                        artifact_version_id=version.id,
-                        content_text=draft_text,
-                        meta={"kind": "script_scene", "ordinal": scene.index},
-                    )
+                    async with session.begin_nested():
+                        await index_artifact_version(
+                            session=session,
+                            embeddings=embeddings,
+                            brief_snapshot_id=snapshot.id,
+                            artifact_version_id=version.id,
+                            content_text=draft_text,
+                            meta={"kind": "script_scene", "ordinal": scene.index},
+                            commit=False,
+                        )
                 except Exception as exc:
-                    await session.rollback()
                     _record_embeddings_error(state=state, where="script_scene_commit:index_artifact_version", exc=exc)
 
             current_state = deep_merge(current_state, critic.state_patch)
@@ -1271,7 +2218,7 @@ async def execute_next_step(
                 run.status = RunStatus.succeeded
                 cursor["phase"] = "done"
 
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {
                 "phase": phase,
@@ -1308,7 +2255,7 @@ async def execute_next_step(
             except (TypeError, ValueError):
                 run.status = RunStatus.failed
                 run.error = {"detail": "invalid_source_snapshot_id"}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "invalid_source_snapshot_id"}
 
@@ -1318,13 +2265,13 @@ async def execute_next_step(
             if not source_snapshot:
                 run.status = RunStatus.failed
                 run.error = {"detail": "source_snapshot_not_found"}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "source_snapshot_not_found"}
             if source_snapshot.brief_id != snapshot.brief_id:
                 run.status = RunStatus.failed
                 run.error = {"detail": "source_snapshot_not_in_same_brief"}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "source_snapshot_not_in_same_brief"}
 
@@ -1335,7 +2282,9 @@ async def execute_next_step(
             cleaned.pop("script_format_notes", None)
             output_spec = deep_merge(output_spec, cleaned)
 
-        preset_notes = await _resolve_prompt_preset_text(session=session, kind=run.kind, state=state)
+        preset_notes = await _resolve_prompt_preset_text(
+            session=session, kind=run.kind, state=state, catalogs=prompt_presets
+        )
         if preset_notes is None:
             output_spec.pop("script_format_notes", None)
         else:
@@ -1351,11 +2300,13 @@ async def execute_next_step(
             sources = await _select_latest_novel_chapter_versions(
                 session=session,
                 brief_snapshot_id=source_snapshot.id,
+                prefetch=prefetch,
+                step_name=phase,
             )
             if not sources:
                 run.status = RunStatus.failed
                 run.error = {"detail": "novel_source_missing"}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "novel_source_missing"}
 
@@ -1395,7 +2346,7 @@ async def execute_next_step(
             if chapter_index not in sources_by_ordinal:
                 run.status = RunStatus.failed
                 run.error = {"detail": "chapter_not_found", "chapter_index": chapter_index}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "chapter_not_found"}
 
@@ -1468,9 +2419,9 @@ async def execute_next_step(
                     run_id=run.id,
                     step_id=step_id,
                     step_name="nts_chapter_plan",
+                    response_model=NtsChapterPlan,
                 )
-                payload = extract_json_object(raw)
-                plan = NtsChapterPlan.model_validate(payload)
+                plan = _parse_llm_output(raw=raw, model=NtsChapterPlan, llm=llm, step_name="nts_chapter_plan")
                 dumped = plan.model_dump(mode="json")
                 dumped["chapter_index"] = int(chapter_index)
                 if not dumped.get("chapter_title"):
@@ -1482,7 +2433,7 @@ async def execute_next_step(
                 cursor["chapter_episode_sub_index"] = 1
                 cursor["episode_index"] = int(script_episode_index_next)
                 state["fix_attempt"] = 0
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {
                     "phase": phase,
@@ -1496,13 +2447,13 @@ async def execute_next_step(
                 plan = NtsChapterPlan.model_validate(plan_json)
             except ValidationError:
                 cursor["phase"] = "nts_chapter_plan"
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "chapter_plan_missing"}
 
             if int(plan.chapter_index) != int(chapter_index):
                 cursor["phase"] = "nts_chapter_plan"
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "chapter_plan_mismatch"}
 
@@ -1513,7 +2464,14 @@ async def execute_next_step(
                 episode_index = int(script_episode_index_next)
                 cursor["episode_index"] = episode_index
 
-            chapter_segments = _nts_split_chapter_text_into_segments(chapter_text, len(plan.episodes))
+            if prefetch is not None:
+                # Every episode of this chapter splits the same text the same way.
+                chapter_segments = prefetch.memo(
+                    ("chapter_segments", chapter_version.id, len(plan.episodes)),
+                    lambda: _nts_split_chapter_text_into_segments(chapter_text, len(plan.episodes)),
+                )
+            else:
+                chapter_segments = _nts_split_chapter_text_into_segments(chapter_text, len(plan.episodes))
             seg_pos = max(0, min(len(chapter_segments) - 1, int(chapter_episode_sub_index) - 1))
             chapter_text_segment = (chapter_segments[seg_pos] or "").strip()
             if not chapter_text_segment:
@@ -1529,7 +2487,7 @@ async def execute_next_step(
                     "chapter_index": int(chapter_index),
                     "chapter_episode_sub_index": int(chapter_episode_sub_index),
                 }
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "chapter_episode_out_of_range"}
 
@@ -1569,7 +2527,7 @@ async def execute_next_step(
             if phase == "nts_episode_draft":
                 raw = await _llm_complete_with_optional_stream(
                     llm=llm,
-                    system_prompt=load_prompt("nts_episode_draft_system.md"),
+                    system_prompt=_draft_system_prompt("nts_episode_draft_system.md", self_review=self_review),
                     user_prompt=render_prompt(
                         load_prompt("nts_episode_draft_user.md"),
                         {
@@ -1587,9 +2545,11 @@ async def execute_next_step(
                     run_id=run.id,
                     step_id=step_id,
                     step_name="nts_episode_draft",
+                    response_model=_draft_response_model(self_review=self_review),
+                )
+                draft = _parse_llm_output(
+                    raw=raw, model=_draft_response_model(self_review=self_review), llm=llm, step_name="nts_episode_draft"
                 )
-                payload = extract_json_object(raw)
-                draft = DraftResult.model_validate(payload)
                 state["draft"] = {
                     "kind": "episode",
                     "index": int(episode_index),
@@ -1597,9 +2557,10 @@ async def execute_next_step(
                     "chapter_episode_sub_index": int(chapter_episode_sub_index),
                     "title": draft.title,
                     "text": draft.text,
+                    **_self_assessment_fields(draft),
                 }
                 cursor["phase"] = "nts_episode_critic"
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {
                     "phase": phase,
@@ -1730,7 +2691,7 @@ async def execute_next_step(
                     if fix_attempt >= max_fix_attempts:
                         run.status = RunStatus.failed
                         run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                        run.state = state
+                        run.state = await run_state.compact(state)
                         await session.commit()
                         return {
                             "phase": phase,
@@ -1745,7 +2706,7 @@ async def execute_next_step(
                         }
 
                     cursor["phase"] = "nts_episode_fix"
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {
                         "phase": phase,
@@ -1759,29 +2720,43 @@ async def execute_next_step(
                         "target_chars_soft_max": target_soft_max,
                     }
 
-                raw = await _llm_complete_with_optional_stream(
-                    llm=llm,
-                    system_prompt=load_prompt("nts_critic_system.md"),
-                    user_prompt=render_prompt(
-                        load_prompt("nts_critic_user.md"),
-                        {
-                            "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
-                            "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                            "NUMBERED_PARAGRAPHS": numbered or "(empty)",
-                            "EVIDENCE_TEXT": evidence_text or "(none)",
-                        },
-                    ),
-                    hub=hub,
-                    run_id=run.id,
-                    step_id=step_id,
-                    step_name="nts_episode_critic",
-                )
-                payload = extract_json_object(raw)
-                critic = CriticResult.model_validate(payload)
-                if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
-                    critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
+                policy = resolve_critic_policy(runtime_prefs=runtime_prefs, state=state)
+                decision = critic_decision(policy, state=state, unit_index=int(episode_index), draft=draft_state)
+                if decision == CRITIC_DECISION_LLM:
+                    raw = await _llm_complete_with_optional_stream(
+                        llm=llm,
+                        system_prompt=load_prompt("nts_critic_system.md"),
+                        user_prompt=render_prompt(
+                            load_prompt("nts_critic_user.md"),
+                            {
+                                "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
+                                "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                                "NUMBERED_PARAGRAPHS": numbered or "(empty)",
+                                "EVIDENCE_TEXT": evidence_text or "(none)",
+                            },
+                        ),
+                        hub=hub,
+                        run_id=run.id,
+                        step_id=step_id,
+                        step_name="nts_episode_critic",
+                        response_model=CriticResult,
+                    )
+                    critic = _parse_llm_output(raw=raw, model=CriticResult, llm=llm, step_name="nts_episode_critic")
+                    if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
+                        critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
+                else:
+                    critic = stand_in_critic_result(
+                        decision=decision, draft_state=draft_state, draft_text=draft_text
+                    )
                 critic.soft_scores = dict(critic.soft_scores or {})
                 critic.soft_scores["length"] = length_soft_score or 0
+                record_critic_outcome(
+                    state=state,
+                    phase=phase,
+                    policy=policy,
+                    decision=decision,
+                    critic=critic if decision == CRITIC_DECISION_LLM else None,
+                )
                 state["critic"] = critic.model_dump(mode="json")
 
                 fix_attempt = int(state.get("fix_attempt") or 0)
@@ -1789,14 +2764,14 @@ async def execute_next_step(
                     if fix_attempt >= max_fix_attempts:
                         run.status = RunStatus.failed
                         run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                        run.state = state
+                        run.state = await run_state.compact(state)
                         await session.commit()
                         return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
                     cursor["phase"] = "nts_episode_fix"
                 else:
                     cursor["phase"] = "nts_episode_commit"
 
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {
                     "phase": phase,
@@ -1816,32 +2791,55 @@ async def execute_next_step(
                 draft_state = state.get("draft") or {}
                 draft_text = str(draft_state.get("text") or "")
                 paragraphs, numbered = numbered_paragraphs(draft_text)
-
-                raw = await _llm_complete_with_optional_stream(
-                    llm=llm,
-                    system_prompt=load_prompt("rewrite_system.md"),
-                    user_prompt=render_prompt(
-                        load_prompt("nts_episode_rewrite_user.md"),
-                        {
-                            "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
-                            "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                            "EPISODE_JSON": json.dumps(episode_json, ensure_ascii=False, indent=2),
-                            "EVIDENCE_TEXT": evidence_text or "(none)",
-                            "REWRITE_INSTRUCTIONS": critic.rewrite_instructions or "",
-                            "NUMBERED_PARAGRAPHS": numbered or "(empty)",
-                            "REWRITE_PARAGRAPH_INDICES_JSON": json.dumps(
-                                critic.rewrite_paragraph_indices, ensure_ascii=False, indent=2
-                            ),
-                        },
-                    ),
-                    hub=hub,
-                    run_id=run.id,
-                    step_id=step_id,
-                    step_name="nts_episode_fix",
+                targets = (
+                    paragraph_fix_targets(paragraphs=paragraphs, indices=critic.rewrite_paragraph_indices)
+                    if fix_mode == FIX_MODE_PARAGRAPH
+                    else []
                 )
-                payload = extract_json_object(raw)
-                rewrite = RewriteResult.model_validate(payload)
-                replacements = {int(k): v for k, v in rewrite.replacements.items()}
+
+                if targets:
+                    unit_context = (
+                        f"Episode meta：\n{json.dumps(episode_json, ensure_ascii=False, indent=2)}\n\n"
+                        f"Evidence（本集对应小说片段 + 前情摘要，事实来源）：\n{evidence_text or '(none)'}"
+                    )
+                    replacements = await _rewrite_flagged_paragraphs(
+                        llm=llm,
+                        run_id=run.id,
+                        step_name="nts_episode_fix",
+                        paragraphs=paragraphs,
+                        targets=targets,
+                        concurrency=paragraph_fix_concurrency,
+                        brief_text=json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
+                        current_state=current_state,
+                        rewrite_instructions=critic.rewrite_instructions or "",
+                        unit_context=unit_context,
+                    )
+                else:
+                    raw = await _llm_complete_with_optional_stream(
+                        llm=llm,
+                        system_prompt=load_prompt("rewrite_system.md"),
+                        user_prompt=render_prompt(
+                            load_prompt("nts_episode_rewrite_user.md"),
+                            {
+                                "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
+                                "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                                "EPISODE_JSON": json.dumps(episode_json, ensure_ascii=False, indent=2),
+                                "EVIDENCE_TEXT": evidence_text or "(none)",
+                                "REWRITE_INSTRUCTIONS": critic.rewrite_instructions or "",
+                                "NUMBERED_PARAGRAPHS": numbered or "(empty)",
+                                "REWRITE_PARAGRAPH_INDICES_JSON": json.dumps(
+                                    critic.rewrite_paragraph_indices, ensure_ascii=False, indent=2
+                                ),
+                            },
+                        ),
+                        hub=hub,
+                        run_id=run.id,
+                        step_id=step_id,
+                        step_name="nts_episode_fix",
+                        response_model=RewriteResult,
+                    )
+                    rewrite = _parse_llm_output(raw=raw, model=RewriteResult, llm=llm, step_name="nts_episode_fix")
+                    replacements = {int(k): v for k, v in rewrite.replacements.items()}
                 updated_paragraphs = apply_replacements(paragraphs, replacements)
                 new_text = join_paragraphs(updated_paragraphs)
                 state["draft"] = {
@@ -1855,9 +2853,9 @@ async def execute_next_step(
                 state.pop("critic", None)
                 state["fix_attempt"] = int(state.get("fix_attempt") or 0) + 1
                 cursor["phase"] = "nts_episode_critic"
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
-                return {"phase": phase, "updated_preview": new_text[:500]}
+                return {"phase": phase, "updated_preview": new_text[:500], "paragraph_fix": targets}
 
             if phase == "nts_episode_commit":
                 critic_json = state.get("critic") or {}
@@ -1865,7 +2863,7 @@ async def execute_next_step(
                 if not critic.hard_pass:
                     run.status = RunStatus.failed
                     run.error = {"detail": "hard_check_failed", "hard_errors": critic.hard_errors}
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
 
@@ -1908,21 +2906,21 @@ async def execute_next_step(
                     brief_snapshot_id=snapshot.id,
                 )
                 session.add(version)
-                await session.commit()
-                await session.refresh(version)
+                await session.flush()
 
                 if not _rag_is_disabled(state):
                     try:
-                        await index_artifact_version(
-                            session=session,
-                            embeddings=embeddings,
-                            brief_snapshot_id=snapshot.id,
-                            artifact_version_id=version.id,
-                            content_text=draft_text,
-                            meta={"kind": "script_scene", "ordinal": int(episode_index)},
-                        )
+                        async with session.begin_nested():
+                            await index_artifact_version(
+                                session=session,
+                                embeddings=embeddings,
+                                brief_snapshot_id=snapshot.id,
+                                artifact_version_id=version.id,
+                                content_text=draft_text,
+                                meta={"kind": "script_scene", "ordinal": int(episode_index)},
+                                commit=False,
+                            )
                     except Exception as exc:
-                        await session.rollback()
                         _record_embeddings_error(state=state, where="nts_episode_commit:index_artifact_version", exc=exc)
 
                 current_state = deep_merge(current_state, critic.state_patch)
@@ -1983,7 +2981,7 @@ async def execute_next_step(
                         cursor["episode_index"] = int(state["script_episode_index_next"])
                         cursor["phase"] = "nts_chapter_plan"
 
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {
                     "phase": phase,
@@ -1999,11 +2997,13 @@ async def execute_next_step(
             sources = await _select_latest_novel_chapter_versions(
                 session=session,
                 brief_snapshot_id=source_snapshot.id,
+                prefetch=prefetch,
+                step_name=phase,
             )
             if not sources:
                 run.status = RunStatus.failed
                 run.error = {"detail": "novel_source_missing"}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "novel_source_missing"}
 
@@ -2043,21 +3043,14 @@ async def execute_next_step(
             if chapter_index not in sources_by_ordinal:
                 run.status = RunStatus.failed
                 run.error = {"detail": "chapter_not_found", "chapter_index": chapter_index}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "chapter_not_found"}
 
             chapter_artifact, chapter_version = sources_by_ordinal[int(chapter_index)]
-            chapter_meta = dict(chapter_version.meta or {})
-            chapter_title = str(
-                chapter_meta.get("chapter_title")
-                or chapter_meta.get("title")
-                or chapter_artifact.title
-                or f"第{chapter_index}章"
+            chapter_title, chapter_text = _nts_source_chapter(
+                artifact=chapter_artifact, version=chapter_version, ordinal=int(chapter_index)
             )
-            chapter_text = (chapter_version.content_text or "").strip()
-            if len(chapter_text) > 20000:
-                chapter_text = chapter_text[:20000].rstrip() + "\n\n（后续内容已截断）"
 
             prev_digests = (
                 list(state.get("script_episode_digests") or []) if isinstance(state.get("script_episode_digests"), list) else []
@@ -2083,40 +3076,62 @@ async def execute_next_step(
                 f"【前情摘要】\n{prev_episode_digests_text}\n\n---\n\n【本章标题】{chapter_title}\n\n【本章全文】\n{chapter_text}"
             ).strip()
 
-            if phase == "nts_episode_breakdown":
-                raw = await _llm_complete_with_optional_stream(
+            if drafts is not None and drafts.enabled:
+                _schedule_nts_episode_breakdowns(
+                    drafts=drafts,
                     llm=llm,
-                    system_prompt=load_prompt("nts_episode_breakdown_system.md"),
-                    user_prompt=render_prompt(
-                        load_prompt("nts_episode_breakdown_user.md"),
-                        {
-                            "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
-                            "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                            "EPISODE_JSON": json.dumps(episode_json, ensure_ascii=False, indent=2),
-                            "PREV_EPISODE_DIGESTS_TEXT": prev_episode_digests_text,
-                            "CHAPTER_TEXT": chapter_text or "(empty)",
-                        },
-                    ),
-                    hub=hub,
-                    run_id=run.id,
-                    step_id=step_id,
-                    step_name="nts_episode_breakdown",
+                    run=run,
+                    phase=phase,
+                    brief_json_for_conversion=brief_json_for_conversion,
+                    output_spec=output_spec,
+                    current_state=current_state,
+                    prev_episode_digests_text=prev_episode_digests_text,
+                    sources_by_ordinal=sources_by_ordinal,
+                    after_index=int(chapter_index),
                 )
-                payload = extract_json_object(raw)
-                breakdown = EpisodeBreakdown.model_validate(payload)
+
+            if phase == "nts_episode_breakdown":
+                speculation = None
+                if drafts is not None:
+                    speculation = await drafts.take(
+                        phase=phase,
+                        unit=int(chapter_index),
+                        hard_basis=_nts_episode_breakdown_basis(
+                            version=chapter_version, brief_json_for_conversion=brief_json_for_conversion
+                        ),
+                        soft_basis=state_blob_digest([current_state, prev_episode_digests_text]),
+                    )
+                if speculation is not None:
+                    breakdown = speculation.value
+                else:
+                    breakdown = await _breakdown_nts_chapter(
+                        llm=llm,
+                        brief_json_for_conversion=brief_json_for_conversion,
+                        current_state=current_state,
+                        episode_json=episode_json,
+                        prev_episode_digests_text=prev_episode_digests_text,
+                        chapter_text=chapter_text,
+                        hub=hub,
+                        run_id=run.id,
+                        step_id=step_id,
+                    )
                 state["episode_breakdown"] = breakdown.model_dump(mode="json")
                 cursor["phase"] = "nts_episode_draft"
                 cursor["chapter_index"] = int(chapter_index)
                 state["fix_attempt"] = 0
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
-                return {"phase": phase, "episode_breakdown": state["episode_breakdown"]}
+                breakdown_outputs: dict[str, Any] = {"phase": phase, "episode_breakdown": state["episode_breakdown"]}
+                if speculation is not None:
+                    # The episode draft and critic that follow run against the latest digests.
+                    breakdown_outputs["speculative"] = "stale" if speculation.stale else "fresh"
+                return breakdown_outputs
 
             if phase == "nts_episode_draft":
                 breakdown_json = state.get("episode_breakdown") or {}
                 raw = await _llm_complete_with_optional_stream(
                     llm=llm,
-                    system_prompt=load_prompt("nts_episode_draft_system.md"),
+                    system_prompt=_draft_system_prompt("nts_episode_draft_system.md", self_review=self_review),
                     user_prompt=render_prompt(
                         load_prompt("nts_episode_draft_user.md"),
                         {
@@ -2134,17 +3149,20 @@ async def execute_next_step(
                     run_id=run.id,
                     step_id=step_id,
                     step_name="nts_episode_draft",
+                    response_model=_draft_response_model(self_review=self_review),
+                )
+                draft = _parse_llm_output(
+                    raw=raw, model=_draft_response_model(self_review=self_review), llm=llm, step_name="nts_episode_draft"
                 )
-                payload = extract_json_object(raw)
-                draft = DraftResult.model_validate(payload)
                 state["draft"] = {
                     "kind": "episode",
                     "index": int(chapter_index),
                     "title": draft.title,
                     "text": draft.text,
+                    **_self_assessment_fields(draft),
                 }
                 cursor["phase"] = "nts_episode_critic"
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "chapter_index": int(chapter_index), "draft_preview": draft.text[:500]}
 
@@ -2180,7 +3198,7 @@ async def execute_next_step(
                     if fix_attempt >= max_fix_attempts:
                         run.status = RunStatus.failed
                         run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                        run.state = state
+                        run.state = await run_state.compact(state)
                         await session.commit()
                         return {
                             "phase": phase,
@@ -2191,7 +3209,7 @@ async def execute_next_step(
                         }
 
                     cursor["phase"] = "nts_episode_fix"
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {
                         "phase": phase,
@@ -2201,27 +3219,41 @@ async def execute_next_step(
                         "rewrite_paragraph_indices": critic.rewrite_paragraph_indices,
                     }
 
-                raw = await _llm_complete_with_optional_stream(
-                    llm=llm,
-                    system_prompt=load_prompt("nts_critic_system.md"),
-                    user_prompt=render_prompt(
-                        load_prompt("nts_critic_user.md"),
-                        {
-                            "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
-                            "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
-                            "NUMBERED_PARAGRAPHS": numbered or "(empty)",
-                            "EVIDENCE_TEXT": evidence_text or "(none)",
-                        },
-                    ),
-                    hub=hub,
-                    run_id=run.id,
-                    step_id=step_id,
-                    step_name="nts_episode_critic",
+                policy = resolve_critic_policy(runtime_prefs=runtime_prefs, state=state)
+                decision = critic_decision(policy, state=state, unit_index=int(chapter_index), draft=draft_state)
+                if decision == CRITIC_DECISION_LLM:
+                    raw = await _llm_complete_with_optional_stream(
+                        llm=llm,
+                        system_prompt=load_prompt("nts_critic_system.md"),
+                        user_prompt=render_prompt(
+                            load_prompt("nts_critic_user.md"),
+                            {
+                                "BRIEF_JSON": json.dumps(brief_json_for_conversion, ensure_ascii=False, indent=2),
+                                "CURRENT_STATE_JSON": json.dumps(current_state, ensure_ascii=False, indent=2),
+                                "NUMBERED_PARAGRAPHS": numbered or "(empty)",
+                                "EVIDENCE_TEXT": evidence_text or "(none)",
+                            },
+                        ),
+                        hub=hub,
+                        run_id=run.id,
+                        step_id=step_id,
+                        step_name="nts_episode_critic",
+                        response_model=CriticResult,
+                    )
+                    critic = _parse_llm_output(raw=raw, model=CriticResult, llm=llm, step_name="nts_episode_critic")
+                    if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
+                        critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
+                else:
+                    critic = stand_in_critic_result(
+                        decision=decision, draft_state=draft_state, draft_text=draft_text
+                    )
+                record_critic_outcome(
+                    state=state,
+                    phase=phase,
+                    policy=policy,
+                    decision=decision,
+                    critic=critic if decision == CRITIC_DECISION_LLM else None,
                 )
-                payload = extract_json_object(raw)
-                critic = CriticResult.model_validate(payload)
-                if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
-                    critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
                 state["critic"] = critic.model_dump(mode="json")
 
                 fix_attempt = int(state.get("fix_attempt") or 0)
@@ -2229,14 +3261,14 @@ async def execute_next_step(
                     if fix_attempt >= max_fix_attempts:
                         run.status = RunStatus.failed
                         run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                        run.state = state
+                        run.state = await run_state.compact(state)
                         await session.commit()
                         return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
                     cursor["phase"] = "nts_episode_fix"
                 else:
                     cursor["phase"] = "nts_episode_commit"
 
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {
                     "phase": phase,
@@ -2274,9 +3306,9 @@ async def execute_next_step(
                     run_id=run.id,
                     step_id=step_id,
                     step_name="nts_episode_fix",
+                    response_model=RewriteResult,
                 )
-                payload = extract_json_object(raw)
-                rewrite = RewriteResult.model_validate(payload)
+                rewrite = _parse_llm_output(raw=raw, model=RewriteResult, llm=llm, step_name="nts_episode_fix")
                 replacements = {int(k): v for k, v in rewrite.replacements.items()}
                 updated_paragraphs = apply_replacements(paragraphs, replacements)
                 new_text = join_paragraphs(updated_paragraphs)
@@ -2289,7 +3321,7 @@ async def execute_next_step(
                 state.pop("critic", None)
                 state["fix_attempt"] = int(state.get("fix_attempt") or 0) + 1
                 cursor["phase"] = "nts_episode_critic"
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "updated_preview": new_text[:500]}
 
@@ -2299,7 +3331,7 @@ async def execute_next_step(
                 if not critic.hard_pass:
                     run.status = RunStatus.failed
                     run.error = {"detail": "hard_check_failed", "hard_errors": critic.hard_errors}
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
 
@@ -2339,21 +3371,21 @@ async def execute_next_step(
                     brief_snapshot_id=snapshot.id,
                 )
                 session.add(version)
-                await session.commit()
-                await session.refresh(version)
+                await session.flush()
 
                 if not _rag_is_disabled(state):
                     try:
-                        await index_artifact_version(
-                            session=session,
-                            embeddings=embeddings,
-                            brief_snapshot_id=snapshot.id,
-                            artifact_version_id=version.id,
-                            content_text=draft_text,
-                            meta={"kind": "script_scene", "ordinal": int(chapter_index)},
-                        )
+                        async with session.begin_nested():
+                            await index_artifact_version(
+                                session=session,
+                                embeddings=embeddings,
+                                brief_snapshot_id=snapshot.id,
+                                artifact_version_id=version.id,
+                                content_text=draft_text,
+                                meta={"kind": "script_scene", "ordinal": int(chapter_index)},
+                                commit=False,
+                            )
                     except Exception as exc:
-                        await session.rollback()
                         _record_embeddings_error(state=state, where="nts_episode_commit:index_artifact_version", exc=exc)
 
                 current_state = deep_merge(current_state, critic.state_patch)
@@ -2387,7 +3419,7 @@ async def execute_next_step(
                     cursor["chapter_index"] = ordinals[next_pos]
                     cursor["phase"] = "nts_episode_breakdown"
 
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {
                     "phase": phase,
@@ -2405,7 +3437,7 @@ async def execute_next_step(
             if not sources:
                 run.status = RunStatus.failed
                 run.error = {"detail": "novel_source_missing"}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "detail": "novel_source_missing"}
 
@@ -2455,14 +3487,14 @@ async def execute_next_step(
                 run_id=run.id,
                 step_id=step_id,
                 step_name="nts_scene_list",
+                response_model=ScriptSceneList,
             )
-            payload = extract_json_object(raw)
-            scene_list = ScriptSceneList.model_validate(payload)
+            scene_list = _parse_llm_output(raw=raw, model=ScriptSceneList, llm=llm, step_name="nts_scene_list")
             state["scene_list"] = scene_list.model_dump(mode="json")
             cursor["phase"] = "nts_scene_draft"
             cursor["scene_index"] = 1
             state["fix_attempt"] = 0
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": phase, "scene_list": state["scene_list"]}
 
@@ -2471,11 +3503,21 @@ async def execute_next_step(
         if scene_index > len(scene_list.scenes):
             run.status = RunStatus.succeeded
             cursor["phase"] = "done"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": "done"}
 
         scene = scene_list.scenes[scene_index - 1]
+        _prefetch_next_evidence(
+            prefetch=prefetch,
+            embeddings=embeddings,
+            run=run,
+            phase=phase,
+            state=state,
+            brief_snapshot_id=source_snapshot.id,
+            units=scene_list.scenes,
+            position=scene_index - 1,
+        )
         source = state.get("novel_source") or {}
         chapter_digests = (
             list(source.get("chapter_digests") or []) if isinstance(source, dict) else []
@@ -2483,19 +3525,15 @@ async def execute_next_step(
         digest_lines = _novel_digest_lines(chapter_digests)
 
         if phase == "nts_scene_draft":
-            query = f"NTS Scene {scene.slug} {scene.title} {scene.location} {scene.time} {' '.join(scene.characters)} {scene.purpose}"
-            evidence_chunks = []
-            if not _rag_is_disabled(state):
-                try:
-                    evidence_chunks = await retrieve_evidence(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=source_snapshot.id,
-                        query=query,
-                        limit=8,
-                    )
-                except Exception as exc:
-                    _record_embeddings_error(state=state, where="nts_scene_draft:retrieve_evidence", exc=exc)
+            evidence_chunks = await _retrieve_step_evidence(
+                session=session,
+                embeddings=embeddings,
+                prefetch=prefetch,
+                state=state,
+                brief_snapshot_id=source_snapshot.id,
+                step_name="nts_scene_draft",
+                unit=scene,
+            )
             evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
             if digest_lines:
                 evidence_text = (digest_lines + ("\n\n---\n\n" + evidence_text if evidence_text else "")).strip()
@@ -2530,12 +3568,12 @@ async def execute_next_step(
                 run_id=run.id,
                 step_id=step_id,
                 step_name="nts_scene_draft",
+                response_model=DraftResult,
             )
-            payload = extract_json_object(raw)
-            draft = DraftResult.model_validate(payload)
+            draft = _parse_llm_output(raw=raw, model=DraftResult, llm=llm, step_name="nts_scene_draft")
             state["draft"] = {"kind": "scene", "index": scene.index, "slug": scene.slug, "text": draft.text}
             cursor["phase"] = "nts_scene_critic"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": phase, "scene_index": scene.index, "draft_preview": draft.text[:500]}
 
@@ -2568,7 +3606,7 @@ async def execute_next_step(
                 if fix_attempt >= max_fix_attempts:
                     run.status = RunStatus.failed
                     run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {
                         "phase": phase,
@@ -2579,7 +3617,7 @@ async def execute_next_step(
                     }
 
                 cursor["phase"] = "nts_scene_fix"
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {
                     "phase": phase,
@@ -2589,19 +3627,15 @@ async def execute_next_step(
                     "rewrite_paragraph_indices": critic.rewrite_paragraph_indices,
                 }
 
-            query = f"NTS Critic {scene.slug} {scene.title}"
-            evidence_chunks = []
-            if not _rag_is_disabled(state):
-                try:
-                    evidence_chunks = await retrieve_evidence(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=source_snapshot.id,
-                        query=query,
-                        limit=8,
-                    )
-                except Exception as exc:
-                    _record_embeddings_error(state=state, where="nts_scene_critic:retrieve_evidence", exc=exc)
+            evidence_chunks = await _retrieve_step_evidence(
+                session=session,
+                embeddings=embeddings,
+                prefetch=prefetch,
+                state=state,
+                brief_snapshot_id=source_snapshot.id,
+                step_name="nts_scene_critic",
+                unit=scene,
+            )
             evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
             if digest_lines:
                 evidence_text = (digest_lines + ("\n\n---\n\n" + evidence_text if evidence_text else "")).strip()
@@ -2622,9 +3656,9 @@ async def execute_next_step(
                 run_id=run.id,
                 step_id=step_id,
                 step_name="nts_scene_critic",
+                response_model=CriticResult,
             )
-            payload = extract_json_object(raw)
-            critic = CriticResult.model_validate(payload)
+            critic = _parse_llm_output(raw=raw, model=CriticResult, llm=llm, step_name="nts_scene_critic")
             if (not critic.hard_pass) and (not critic.rewrite_paragraph_indices) and paragraphs:
                 critic.rewrite_paragraph_indices = list(range(1, len(paragraphs) + 1))
             state["critic"] = critic.model_dump(mode="json")
@@ -2634,14 +3668,14 @@ async def execute_next_step(
                 if fix_attempt >= max_fix_attempts:
                     run.status = RunStatus.failed
                     run.error = {"detail": "max_fix_attempts_exceeded", "hard_errors": critic.hard_errors}
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
                 cursor["phase"] = "nts_scene_fix"
             else:
                 cursor["phase"] = "nts_scene_commit"
 
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {
                 "phase": phase,
@@ -2670,7 +3704,7 @@ async def execute_next_step(
                     state.pop("critic", None)
                     state["fix_attempt"] = int(state.get("fix_attempt") or 0) + 1
                     cursor["phase"] = "nts_scene_critic"
-                    run.state = state
+                    run.state = await run_state.compact(state)
                     await session.commit()
                     return {
                         "phase": phase,
@@ -2678,19 +3712,15 @@ async def execute_next_step(
                         "updated_preview": extracted[:500],
                     }
 
-            query = f"NTS Fix {scene.slug} {scene.title}"
-            evidence_chunks = []
-            if not _rag_is_disabled(state):
-                try:
-                    evidence_chunks = await retrieve_evidence(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=source_snapshot.id,
-                        query=query,
-                        limit=8,
-                    )
-                except Exception as exc:
-                    _record_embeddings_error(state=state, where="nts_scene_fix:retrieve_evidence", exc=exc)
+            evidence_chunks = await _retrieve_step_evidence(
+                session=session,
+                embeddings=embeddings,
+                prefetch=prefetch,
+                state=state,
+                brief_snapshot_id=source_snapshot.id,
+                step_name="nts_scene_fix",
+                unit=scene,
+            )
             evidence_text = "\n\n---\n\n".join([c.content_text for c in evidence_chunks])
             if digest_lines:
                 evidence_text = (digest_lines + ("\n\n---\n\n" + evidence_text if evidence_text else "")).strip()
@@ -2720,9 +3750,9 @@ async def execute_next_step(
                 run_id=run.id,
                 step_id=step_id,
                 step_name="nts_scene_fix",
+                response_model=RewriteResult,
             )
-            payload = extract_json_object(raw)
-            rewrite = RewriteResult.model_validate(payload)
+            rewrite = _parse_llm_output(raw=raw, model=RewriteResult, llm=llm, step_name="nts_scene_fix")
             replacements = {int(k): v for k, v in rewrite.replacements.items()}
             updated_paragraphs = apply_replacements(paragraphs, replacements)
             new_text = join_paragraphs(updated_paragraphs)
@@ -2730,7 +3760,7 @@ async def execute_next_step(
             state.pop("critic", None)
             state["fix_attempt"] = int(state.get("fix_attempt") or 0) + 1
             cursor["phase"] = "nts_scene_critic"
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {"phase": phase, "updated_preview": new_text[:500]}
 
@@ -2740,7 +3770,7 @@ async def execute_next_step(
             if not critic.hard_pass:
                 run.status = RunStatus.failed
                 run.error = {"detail": "hard_check_failed", "hard_errors": critic.hard_errors}
-                run.state = state
+                run.state = await run_state.compact(state)
                 await session.commit()
                 return {"phase": phase, "hard_pass": False, "hard_errors": critic.hard_errors}
 
@@ -2770,21 +3800,21 @@ async def execute_next_step(
                 brief_snapshot_id=snapshot.id,
             )
             session.add(version)
-            await session.commit()
-            await session.refresh(version)
+            await session.flush()
 
             if not _rag_is_disabled(state):
                 try:
-                    await index_artifact_version(
-                        session=session,
-                        embeddings=embeddings,
-                        brief_snapshot_id=snapshot.id,
-                        artifact_version_id=version.id,
-                        content_text=draft_text,
-                        meta={"kind": "script_scene", "ordinal": scene.index},
-                    )
+                    async with session.begin_nested():
+                        await index_artifact_version(
+                            session=session,
+                            embeddings=embeddings,
+                            brief_snapshot_id=snapshot.id,
+                            artifact_version_id=version.id,
+                            content_text=draft_text,
+                            meta={"kind": "script_scene", "ordinal": scene.index},
+                            commit=False,
+                        )
                 except Exception as exc:
-                    await session.rollback()
                     _record_embeddings_error(state=state, where="nts_scene_commit:index_artifact_version", exc=exc)
 
             current_state = deep_merge(current_state, critic.state_patch)
@@ -2799,7 +3829,7 @@ async def execute_next_step(
                 run.status = RunStatus.succeeded
                 cursor["phase"] = "done"
 
-            run.state = state
+            run.state = await run_state.compact(state)
             await session.commit()
             return {
                 "phase": phase,
@@ -6,6 +6,7 @@ from typing import Any
 from pydantic import ValidationError
 
 from app.llm.client import LLMClient
+from app.llm.routing import llm_for_phase
 from app.schemas.workflow_interventions import WorkflowInterventionResult
 from app.services.prompting import extract_json_object, load_prompt, render_prompt
 
@@ -28,7 +29,9 @@ async def parse_workflow_intervention_output(
             load_prompt("json_repair_user.md"),
             {"INVALID_OUTPUT": raw_output or str(exc)},
         )
-        repaired = await llm.complete(system_prompt=repair_system, user_prompt=repair_user)
+        repaired = await llm_for_phase(llm, "json_repair").complete(
+            system_prompt=repair_system, user_prompt=repair_user
+        )
         try:
             payload = extract_json_object(repaired)
             return WorkflowInterventionResult.model_validate(payload)
@@ -8,10 +8,12 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import RunStatus, WorkflowKind, WorkflowRun, WorkflowStepRun
+from app.db.unit_of_work import commit_unit, rollback_unit
 from app.llm.client import LLMClient
 from app.llm.embeddings_client import EmbeddingsClient
 from app.schemas.workflows import WorkflowRunRead, WorkflowStepRunRead
 from app.services.error_utils import format_exception_chain
+from app.services.step_cancellation import StepCanceled, StepCancellation, StepTimedOut
 from app.services.workflow_events import WorkflowEventHub
 from app.services.workflow_executor import execute_next_step
 
@@ -65,17 +67,16 @@ async def execute_one_step(
     embeddings: EmbeddingsClient,
     run: WorkflowRun,
     hub: WorkflowEventHub | None = None,
+    cancel: StepCancellation | None = None,
 ) -> WorkflowStepRun:
     if run.status == RunStatus.paused:
         raise RuntimeError("workflow_run_paused")
     if run.status in {RunStatus.succeeded, RunStatus.failed, RunStatus.canceled}:
         raise RuntimeError("workflow_run_not_runnable")
 
-    if run.status == RunStatus.queued:
+    run_started = run.status == RunStatus.queued
+    if run_started:
         run.status = RunStatus.running
-        await session.commit()
-        await session.refresh(run)
-        await _publish_run(hub, run=run)
 
     step_name = determine_step_name(run)
 
@@ -93,13 +94,22 @@ async def execute_one_step(
         started_at=_now(),
     )
     session.add(step)
-    await session.commit()
-    await session.refresh(step)
+    # Claim the step up front so it shows as running; the phase's writes and the final step/run
+    # update then land in a single commit (a single transaction when the session is a UnitOfWork).
+    await commit_unit(session)
+    if run_started:
+        await _publish_run(hub, run=run)
     await _publish_step(hub, step=step)
 
     try:
         outputs: dict[str, Any] = await execute_next_step(
-            session=session, llm=llm, embeddings=embeddings, run=run, hub=hub, step_id=step.id
+            session=session,
+            llm=llm,
+            embeddings=embeddings,
+            run=run,
+            hub=hub,
+            step_id=step.id,
+            cancel=cancel,
         )
         if run.status == RunStatus.failed:
             step.status = RunStatus.failed
@@ -109,29 +119,55 @@ async def execute_one_step(
             step.status = RunStatus.succeeded
         step.outputs = outputs
         step.finished_at = _now()
-        await session.commit()
-        await session.refresh(step)
-        await session.refresh(run)
+        await commit_unit(session)
         await _publish_step(hub, step=step)
         await _publish_run(hub, run=run)
         return step
-    except Exception as exc:
-        error_chain = format_exception_chain(exc)
-        step.status = RunStatus.failed
-        step.error = error_chain
+    except StepCanceled as exc:
+        await _discard_step_writes(session=session, run=run, step=step)
+        if isinstance(exc, StepTimedOut):
+            return await _record_step_failure(session=session, run=run, step=step, hub=hub, exc=exc)
+        step.status = RunStatus.canceled
+        step.error = str(exc)
         step.finished_at = _now()
-        run.status = RunStatus.failed
-        run.error = {
-            "detail": "step_failed",
-            "step_name": step_name,
-            "step_index": step_index,
-            "error_type": exc.__class__.__name__,
-            "error": str(exc),
-            "error_chain": error_chain,
-        }
-        await session.commit()
-        await session.refresh(step)
-        await session.refresh(run)
+        await commit_unit(session)
         await _publish_step(hub, step=step)
-        await _publish_run(hub, run=run)
         return step
+    except Exception as exc:
+        await _discard_step_writes(session=session, run=run, step=step)
+        return await _record_step_failure(session=session, run=run, step=step, hub=hub, exc=exc)
+
+
+async def _discard_step_writes(
+    *, session: AsyncSession, run: WorkflowRun, step: WorkflowStepRun
+) -> None:
+    await rollback_unit(session)
+    await session.refresh(run)
+    await session.refresh(step)
+
+
+async def _record_step_failure(
+    *,
+    session: AsyncSession,
+    run: WorkflowRun,
+    step: WorkflowStepRun,
+    hub: WorkflowEventHub | None,
+    exc: Exception,
+) -> WorkflowStepRun:
+    error_chain = format_exception_chain(exc)
+    step.status = RunStatus.failed
+    step.error = error_chain
+    step.finished_at = _now()
+    run.status = RunStatus.failed
+    run.error = {
+        "detail": "step_failed",
+        "step_name": step.step_name,
+        "step_index": step.step_index,
+        "error_type": exc.__class__.__name__,
+        "error": str(exc),
+        "error_chain": error_chain,
+    }
+    await commit_unit(session)
+    await _publish_step(hub, step=step)
+    await _publish_run(hub, run=run)
+    return step
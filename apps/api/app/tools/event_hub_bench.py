@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from typing import Any
+
+from app.services.workflow_events import WorkflowEventHub
+
+# Every Nth event of a streaming run is a run update; the rest are llm_delta appends.
+_RUN_EVENT_EVERY = 20
+
+
+def _run_payload(run_id: uuid.UUID, *, state_keys: int, revision: int) -> dict[str, Any]:
+    state = {f"key_{index}": {"value": "状态" * 20, "index": index} for index in range(state_keys)}
+    state["cursor"] = {"phase": "novel_chapter_draft", "chapter_index": revision}
+    return {"run": {"id": str(run_id), "status": "running", "state": state}}
+
+
+async def run_benchmark(*, subscribers: int, runs: int, events: int, state_keys: int) -> dict[str, Any]:
+    hub = WorkflowEventHub()
+    run_ids = [uuid.uuid4() for _ in range(max(1, runs))]
+    delivered = {"events": 0, "bytes": 0, "resyncs": 0}
+
+    async def consume(queue: asyncio.Queue) -> None:
+        while True:
+            event = await queue.get()
+            delivered["events"] += 1
+            delivered["bytes"] += len(event.data)
+            if event.name == "resync":
+                delivered["resyncs"] += 1
+            if int(event.id or 0) >= events:
+                return
+
+    latencies: list[float] = []
+    run_event_bytes = 0
+
+    async def produce(run_id: uuid.UUID) -> None:
+        nonlocal run_event_bytes
+        step_id = str(uuid.uuid4())
+        for index in range(1, events + 1):
+            if index % _RUN_EVENT_EVERY == 1:
+                name = "run"
+                payload = _run_payload(run_id, state_keys=state_keys, revision=index // _RUN_EVENT_EVERY)
+            else:
+                name = "llm_delta"
+                payload = {"step_id": step_id, "append": "正文" * 40}
+            started = time.perf_counter()
+            await hub.publish(run_id=run_id, name=name, payload=payload)
+            latencies.append(time.perf_counter() - started)
+            if name == "run":
+                run_event_bytes += len(hub._logs[run_id].events[-1].data)
+            # Yield like a streaming LLM call would between deltas.
+            await asyncio.sleep(0)
+
+    queues = [await hub.subscribe(run_id=run_ids[index % len(run_ids)]) for index in range(subscribers)]
+    consumers = [asyncio.create_task(consume(queue)) for queue in queues]
+    started = time.perf_counter()
+    await asyncio.gather(*(produce(run_id) for run_id in run_ids))
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - started
+
+    published = events * len(run_ids)
+    latencies.sort()
+    return {
+        "subscribers": subscribers,
+        "runs": len(run_ids),
+        "published_events": published,
+        "delivered_events": delivered["events"],
+        "resyncs": delivered["resyncs"],
+        "elapsed_s": round(elapsed, 4),
+        "published_per_s": round(published / elapsed, 1) if elapsed else None,
+        "delivered_per_s": round(delivered["events"] / elapsed, 1) if elapsed else None,
+        "delivered_mb": round(delivered["bytes"] / 1_000_000, 3),
+        "publish_p50_us": round(statistics.median(latencies) * 1e6, 1),
+        "publish_p99_us": round(latencies[int(len(latencies) * 0.99) - 1] * 1e6, 1),
+        "avg_run_event_bytes": round(run_event_bytes / max(1, published // _RUN_EVENT_EVERY), 1),
+        "full_run_dump_bytes": len(json.dumps(_run_payload(run_ids[0], state_keys=state_keys, revision=0), ensure_ascii=False).encode()),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark WorkflowEventHub fan-out.")
+    parser.add_argument("--subscribers", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--events", type=int, default=2000, help="events published per run")
+    parser.add_argument("--state-keys", type=int, default=200, help="top-level keys in the run state")
+    args = parser.parse_args(argv)
+    result = asyncio.run(
+        run_benchmark(
+            subscribers=args.subscribers,
+            runs=args.runs,
+            events=args.events,
+            state_keys=args.state_keys,
+        )
+    )
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
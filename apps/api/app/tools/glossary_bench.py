@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Any
+
+from app.services.glossary import GlossaryMatcher
+
+# Common CJK ideographs, so terms and text share an alphabet the way real glossaries do.
+_ALPHABET = [chr(code) for code in range(0x4E00, 0x4E00 + 800)]
+
+
+def _legacy_apply(text: str, replacements: list[tuple[str, str]]) -> str:
+    # The previous export path: one str.replace per term, longest first, sorted for every chapter.
+    updated = text
+    for term, replacement in sorted(replacements, key=lambda item: len(item[0]), reverse=True):
+        updated = updated.replace(term, replacement)
+    return updated
+
+
+def run_benchmark(*, terms: int, chapters: int, chapter_chars: int, seed: int = 0) -> dict[str, Any]:
+    rng = random.Random(seed)
+    glossary = sorted(
+        {"".join(rng.choices(_ALPHABET, k=rng.randint(2, 4))): f"<{index}>" for index in range(terms)}.items()
+    )
+    texts = ["".join(rng.choices(_ALPHABET, k=chapter_chars)) for _ in range(chapters)]
+
+    started = time.perf_counter()
+    matcher = GlossaryMatcher(glossary)
+    compile_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for text in texts:
+        matcher.apply(text)
+    matcher_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for text in texts:
+        _legacy_apply(text, glossary)
+    legacy_s = time.perf_counter() - started
+
+    return {
+        "terms": len(glossary),
+        "chapters": chapters,
+        "chapter_chars": chapter_chars,
+        "compile_s": round(compile_s, 4),
+        "aho_corasick_s": round(matcher_s, 4),
+        "str_replace_s": round(legacy_s, 4),
+        "speedup": round(legacy_s / matcher_s, 1) if matcher_s else None,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark glossary substitution.")
+    parser.add_argument("--terms", type=int, default=5000)
+    parser.add_argument("--chapters", type=int, default=50)
+    parser.add_argument("--chapter-chars", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    result = run_benchmark(
+        terms=args.terms,
+        chapters=args.chapters,
+        chapter_chars=args.chapter_chars,
+        seed=args.seed,
+    )
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
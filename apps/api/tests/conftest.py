@@ -169,7 +169,10 @@ async def _clean_database(_ensure_test_database: None, test_database_url: str) -
               kg_entities,
               memory_chunks,
               artifact_versions,
+              workflow_event_payloads,
               workflow_step_runs,
+              workflow_run_state_items,
+              workflow_run_state_blobs,
               workflow_runs,
               artifacts,
               brief_snapshots,
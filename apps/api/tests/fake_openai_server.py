@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeModelBehavior:
+    latency_s: float = 0.0
+    content: str = "ok"
+    status_code: int = 200
+    chunk_size: int = 8
+    chunk_delay_s: float = 0.0
+
+
+@dataclass
+class FakeOpenAIServer:
+    """A tiny OpenAI-compatible chat server with per-model latency/failure injection."""
+
+    behaviors: dict[str, FakeModelBehavior] = field(default_factory=dict)
+    requests: list[dict[str, Any]] = field(default_factory=list)
+    cancelled: list[str] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        self.app = FastAPI()
+        self.app.post("/v1/chat/completions")(self._chat_completions)
+
+    def set_model(self, model: str, **kwargs: Any) -> FakeModelBehavior:
+        behavior = FakeModelBehavior(**kwargs)
+        self.behaviors[model] = behavior
+        return behavior
+
+    def http_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app))
+
+    def models_requested(self) -> list[str]:
+        return [str(item.get("model")) for item in self.requests]
+
+    async def _chat_completions(self, request: Request):
+        body = await request.json()
+        model = str(body.get("model"))
+        behavior = self.behaviors.get(model, FakeModelBehavior())
+        self.requests.append(body)
+
+        try:
+            await asyncio.sleep(behavior.latency_s)
+        except asyncio.CancelledError:
+            self.cancelled.append(model)
+            raise
+
+        if behavior.status_code != 200:
+            return JSONResponse(
+                status_code=behavior.status_code,
+                content={"error": {"message": f"fake_error_{behavior.status_code}", "type": "fake"}},
+            )
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": behavior.content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            )
+
+        async def events():
+            text = behavior.content
+            for start in range(0, len(text), max(1, behavior.chunk_size)):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": text[start : start + behavior.chunk_size]},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                if behavior.chunk_delay_s:
+                    await asyncio.sleep(behavior.chunk_delay_s)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a fake OpenAI-compatible chat server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="fake-model")
+    parser.add_argument("--latency-s", type=float, default=0.0)
+    parser.add_argument("--content", default='{"ok": true}')
+    args = parser.parse_args()
+
+    import uvicorn
+
+    server = FakeOpenAIServer()
+    server.set_model(args.model, latency_s=args.latency_s, content=args.content)
+    uvicorn.run(server.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import httpx
 import pytest
 from openai import APIConnectionError, APIError
 
+from app.api.routers import workflows
 from app.core.config import Settings
 from app.llm.client import LLMClient
 from app.llm.embeddings_client import EmbeddingsClient
@@ -248,6 +249,36 @@ async def test_autorun_stops_after_retry_limit_exhausted(client_with_failing_llm
     assert len(steps) == 3
 
 
+async def test_autorun_backoff_does_not_hold_a_db_connection(
+    client_with_failing_llm_and_embeddings, monkeypatch
+):
+    client = client_with_failing_llm_and_embeddings
+    engine = client._transport.app.state.engine
+    wait_for_stop = workflows._wait_for_stop
+    checked_out: list[int] = []
+    backoff_started = asyncio.Event()
+
+    async def recording_wait(stop_event: asyncio.Event, *, timeout_s: float | None) -> None:
+        if timeout_s:
+            checked_out.append(engine.pool.checkedout())
+            backoff_started.set()
+        await wait_for_stop(stop_event, timeout_s=timeout_s)
+
+    monkeypatch.setattr(workflows, "_wait_for_stop", recording_wait)
+    await client.patch("/api/settings/output-spec", json={"auto_step_retries": 1, "auto_step_backoff_s": 0.05})
+    brief = await client.post("/api/briefs", json={"title": "测试作品"})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    started = await client.post(f"/api/workflow-runs/{run.json()['id']}/autorun/start")
+    assert started.status_code == 200
+
+    await asyncio.wait_for(backoff_started.wait(), timeout=5)
+    assert checked_out[0] == 0
+
+
 async def test_autorun_uses_latest_retry_settings_without_new_snapshot(client_with_failing_llm_and_embeddings):
     patched = await client_with_failing_llm_and_embeddings.patch(
         "/api/settings/output-spec",
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.core.config import Settings
+from app.db.models import Artifact, ArtifactKind, ArtifactVersion
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.main import create_app
+from app.schemas.generation import CriticResult
+from app.services.critic_policy import (
+    CRITIC_DECISION_LLM,
+    CRITIC_DECISION_SELF_REVIEW,
+    CRITIC_DECISION_SKIP,
+    CriticPolicy,
+    critic_decision,
+    record_critic_outcome,
+)
+from app.services.llm_metrics import collect_step_metrics, llm_metrics
+from app.services.prompting import load_prompt
+
+
+def _critic(*, hard_pass: bool, fact_digest: str) -> str:
+    return json.dumps(
+        {
+            "hard_pass": hard_pass,
+            "hard_errors": [] if hard_pass else ["设定冲突"],
+            "soft_scores": {"consistency": 90 if hard_pass else 40},
+            "rewrite_paragraph_indices": [] if hard_pass else [1],
+            "rewrite_instructions": "" if hard_pass else "修正设定。",
+            "fact_digest": fact_digest,
+            "tone_digest": "基调。",
+            "state_patch": {"reviewed": True},
+        },
+        ensure_ascii=False,
+    )
+
+
+class _NovelLLM(LLMClient):
+    def __init__(self, *, reject_first_critic: bool) -> None:
+        self.reject_first_critic = reject_first_critic
+        self.critic_calls = 0
+        # One entry per self-reviewed draft: whether its self-assessment passes.
+        self.self_reviews: list[bool] = []
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        if system_prompt == load_prompt("novel_outline_system.md"):
+            chapters = [{"index": i, "title": f"第{i}章", "summary": "摘要。", "hook": "悬念。"} for i in (1, 2)]
+            return json.dumps({"chapters": chapters}, ensure_ascii=False)
+        if system_prompt == load_prompt("novel_beats_system.md"):
+            chapters = [{"index": i, "title": f"第{i}章", "beats": ["冲突"]} for i in (1, 2)]
+            return json.dumps({"chapters": chapters}, ensure_ascii=False)
+        if system_prompt.startswith(load_prompt("novel_draft_system.md").rstrip()):
+            draft: dict = {"title": "章节", "text": "初稿正文。"}
+            if system_prompt.endswith(load_prompt("draft_self_review_system.md")):
+                passed = self.self_reviews.pop(0)
+                draft["self_assessment"] = json.loads(_critic(hard_pass=passed, fact_digest="自审"))
+            return json.dumps(draft, ensure_ascii=False)
+        if system_prompt == load_prompt("rewrite_system.md"):
+            return json.dumps({"replacements": {"1": "修订正文。"}}, ensure_ascii=False)
+        self.critic_calls += 1
+        rejected = self.reject_first_critic and self.critic_calls == 1
+        await asyncio.sleep(0.01)
+        return _critic(hard_pass=not rejected, fact_digest=f"审阅{self.critic_calls}")
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+@pytest.fixture()
+def novel_llm() -> _NovelLLM:
+    return _NovelLLM(reject_first_critic=False)
+
+
+@pytest.fixture()
+async def app_and_client(_ensure_test_database: None, test_database_url: str, novel_llm: _NovelLLM):
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(settings=settings, llm_client=novel_llm, embeddings_client=_StubEmbeddings())
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield app, http_client
+    await app.router.shutdown()
+
+
+async def _autorun_novel(client: httpx.AsyncClient, *, state: dict) -> tuple[dict, list[dict]]:
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": state},
+    )
+    run_id = run.json()["id"]
+    started = await client.post(f"/api/workflow-runs/{run_id}/autorun/start")
+    assert started.status_code == 200
+
+    body: dict = {}
+    for _ in range(500):
+        body = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+        if body["status"] in {"succeeded", "failed"}:
+            break
+        await asyncio.sleep(0.02)
+    steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+    return body, steps
+
+
+async def _chapter_versions(app) -> dict[int, list[ArtifactVersion]]:
+    async with app.state.sessionmaker() as session:
+        rows = (
+            await session.execute(
+                select(Artifact.ordinal, ArtifactVersion)
+                .join(ArtifactVersion, ArtifactVersion.artifact_id == Artifact.id)
+                .where(Artifact.kind == ArtifactKind.novel_chapter)
+                .order_by(ArtifactVersion.created_at.asc())
+            )
+        ).all()
+    versions: dict[int, list[ArtifactVersion]] = {}
+    for ordinal, version in rows:
+        versions.setdefault(int(ordinal), []).append(version)
+    return versions
+
+
+async def test_deferred_critic_reviews_chapters_after_commit(app_and_client, novel_llm):
+    app, client = app_and_client
+    body, steps = await _autorun_novel(client, state={"critic_policy": "deferred"})
+    assert body["status"] == "succeeded"
+
+    critic_steps = [step for step in steps if step["step_name"] == "novel_chapter_critic"]
+    assert [step["outputs"]["metrics"]["critic_decision"] for step in critic_steps] == ["defer", "defer"]
+    # Both chapters were still reviewed by the LLM critic, after their commits.
+    assert novel_llm.critic_calls == 2
+    assert body["state"]["current_state"] == {"reviewed": True}
+
+    versions = await _chapter_versions(app)
+    assert sorted(versions) == [1, 2]
+    assert all(len(items) == 1 for items in versions.values())
+    assert {items[0].meta["fact_digest"] for items in versions.values()} == {"审阅1", "审阅2"}
+
+
+async def test_deferred_critic_reopens_a_rejected_chapter(app_and_client, novel_llm):
+    app, client = app_and_client
+    novel_llm.reject_first_critic = True
+    body, steps = await _autorun_novel(client, state={"critic_policy": "deferred"})
+    assert body["status"] == "succeeded"
+
+    reopened = [step for step in steps if (step["outputs"] or {}).get("reopened_chapter_index")]
+    assert [step["outputs"]["reopened_chapter_index"] for step in reopened] == [1]
+    assert "novel_chapter_fix" in [step["step_name"] for step in steps]
+
+    versions = await _chapter_versions(app)
+    assert [version.content_text for version in versions[1]] == ["初稿正文。", "修订正文。"]
+    assert len(versions[2]) == 1
+
+
+async def test_self_reviewed_drafts_only_call_the_critic_when_flagged(app_and_client, novel_llm):
+    _app, client = app_and_client
+    novel_llm.self_reviews = [True, False]
+    body, steps = await _autorun_novel(client, state={"draft_self_review": True})
+    assert body["status"] == "succeeded"
+
+    critic_steps = [step for step in steps if step["step_name"] == "novel_chapter_critic"]
+    assert [step["outputs"]["metrics"]["critic_decision"] for step in critic_steps] == ["self_review", "llm"]
+    assert critic_steps[0]["outputs"]["metrics"]["llm_calls"] == 0
+    # Chapter 2 flagged itself, so the separate critic ran for it only.
+    assert novel_llm.critic_calls == 1
+
+
+def test_critic_decision_fast_path_and_sampling():
+    fast = CriticPolicy(mode="fast_path", min_soft_score=80, recent_units=2, sample_every=2)
+    state: dict = {"critic_recent_scores": [{"a": 90}]}
+    assert critic_decision(fast, state=state, unit_index=3) == CRITIC_DECISION_LLM
+    state["critic_recent_scores"].append({"a": 85, "b": 95})
+    assert critic_decision(fast, state=state, unit_index=3) == CRITIC_DECISION_SKIP
+    # Consecutive skips are bounded, and a unit that was sent back for fixing is always re-checked.
+    assert critic_decision(fast, state={**state, "critic_skip_streak": 2}, unit_index=3) == CRITIC_DECISION_LLM
+    assert critic_decision(fast, state={**state, "fix_attempt": 1}, unit_index=3) == CRITIC_DECISION_LLM
+    state["critic_recent_scores"].append({"a": 70})
+    assert critic_decision(fast, state=state, unit_index=3) == CRITIC_DECISION_LLM
+
+    sample = CriticPolicy(mode="sample", sample_every=3)
+    decisions = [critic_decision(sample, state={}, unit_index=index) for index in range(1, 7)]
+    assert decisions == ["llm", "skip", "skip", "llm", "skip", "skip"]
+    # Deferral only applies where the workflow can reopen a committed unit.
+    assert critic_decision(CriticPolicy(mode="deferred"), state={}, unit_index=1) == CRITIC_DECISION_LLM
+
+
+def test_skipped_critic_is_reported_as_not_updating_state():
+    policy = CriticPolicy(mode="sample", sample_every=2)
+    state: dict = {}
+    counter = "critic:sample:state_not_updated"
+    before = llm_metrics.snapshot()["totals"].get(counter, 0)
+    with collect_step_metrics() as metrics:
+        record_critic_outcome(state=state, phase="novel_chapter_critic", policy=policy, decision=CRITIC_DECISION_SKIP)
+    assert metrics.as_dict()["critic_state_updated"] is False
+    assert llm_metrics.snapshot()["totals"][counter] == before + 1
+
+    critic = CriticResult.model_validate(json.loads(_critic(hard_pass=True, fact_digest="摘要")))
+    with collect_step_metrics() as metrics:
+        record_critic_outcome(
+            state=state, phase="novel_chapter_critic", policy=policy, decision=CRITIC_DECISION_LLM, critic=critic
+        )
+    assert metrics.as_dict()["critic_state_updated"] is True
+
+
+def test_stale_speculative_drafts_always_go_to_the_critic():
+    fast = CriticPolicy(mode="fast_path", min_soft_score=80, recent_units=1, sample_every=2)
+    state: dict = {"critic_recent_scores": [{"a": 90}]}
+    self_reviewed = {"text": "正文。", "self_assessment": json.loads(_critic(hard_pass=True, fact_digest="自审"))}
+    assert critic_decision(fast, state=state, unit_index=2, draft={"speculative": "fresh"}) == CRITIC_DECISION_SKIP
+    assert critic_decision(fast, state=state, unit_index=2, draft={"speculative": "stale"}) == CRITIC_DECISION_LLM
+    assert critic_decision(fast, state=state, unit_index=2, draft=self_reviewed) == CRITIC_DECISION_SELF_REVIEW
+    assert (
+        critic_decision(fast, state=state, unit_index=2, draft={**self_reviewed, "speculative": "stale"})
+        == CRITIC_DECISION_LLM
+    )
+    deferred = CriticPolicy(mode="deferred")
+    assert (
+        critic_decision(deferred, state={}, unit_index=2, deferrable=True, draft={"speculative": "stale"})
+        == CRITIC_DECISION_LLM
+    )
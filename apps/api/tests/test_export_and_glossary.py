@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+import uuid
+
+from app.db.models import Artifact
+
 
 async def test_export_novel_orders_by_ordinal_and_applies_glossary(client):
     brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
@@ -45,6 +49,17 @@ async def test_export_novel_orders_by_ordinal_and_applies_glossary(client):
     assert "旧城" not in text
     assert "新城" in text
 
+    downloaded = await client.get(f"/api/brief-snapshots/{snap_id}/download/novel.md")
+    assert downloaded.status_code == 200
+    assert downloaded.headers["content-disposition"] == 'attachment; filename="novel.md"'
+    assert downloaded.headers["content-type"].startswith("text/markdown")
+    assert downloaded.text == text
+
+    raw = await client.get(f"/api/brief-snapshots/{snap_id}/download/novel.txt?apply_glossary=false")
+    assert raw.text == "第一章\n\n他回到旧城。\n\n第二章\n\n她还在旧城。\n"
+    missing = await client.get(f"/api/brief-snapshots/{snap_id}/download/novel.pdf")
+    assert missing.status_code == 404
+
 
 async def test_export_script_fountain_smoke(client):
     brief = await client.post("/api/briefs", json={"title": "测试剧本", "content": {}})
@@ -105,3 +120,67 @@ async def test_export_script_text_smoke(client):
     assert "==" not in text
     assert "第一场内容。" in text
     assert "第二场内容。" in text
+
+
+async def test_export_etag_answers_304_until_the_book_changes(app, client):
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+    chapter = await client.post("/api/artifacts", json={"kind": "novel_chapter", "ordinal": 1, "title": "第一章"})
+    await client.post(
+        f"/api/artifacts/{chapter.json()['id']}/versions",
+        json={"source": "agent", "content_text": "初稿。", "metadata": {}, "brief_snapshot_id": snap_id},
+    )
+
+    first = await client.get(f"/api/brief-snapshots/{snap_id}/download/novel.txt")
+    etag = first.headers["etag"]
+    cached = await client.get(f"/api/brief-snapshots/{snap_id}/download/novel.txt")
+    assert cached.headers["etag"] == etag
+    assert cached.text == first.text == "第一章\n\n初稿。\n"
+    exported = await client.get(f"/api/brief-snapshots/{snap_id}/export/novel.txt")
+    assert exported.json()["text"] == first.text
+
+    not_modified = await client.get(
+        f"/api/brief-snapshots/{snap_id}/download/novel.txt", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    second = await client.post("/api/artifacts", json={"kind": "novel_chapter", "ordinal": 2, "title": "第二章"})
+    await client.post(
+        f"/api/artifacts/{second.json()['id']}/versions",
+        json={"source": "agent", "content_text": "续写。", "metadata": {}, "brief_snapshot_id": snap_id},
+    )
+    changed = await client.get(
+        f"/api/brief-snapshots/{snap_id}/export/novel.txt", headers={"If-None-Match": etag}
+    )
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["text"] == "第一章\n\n初稿。\n\n第二章\n\n续写。\n"
+
+    # Runs rename artifacts in place, without a new version.
+    async with app.state.sessionmaker() as session:
+        artifact = await session.get(Artifact, uuid.UUID(chapter.json()["id"]))
+        artifact.title = "第一章：归来"
+        await session.commit()
+    renamed = await client.get(
+        f"/api/brief-snapshots/{snap_id}/download/novel.txt", headers={"If-None-Match": changed.headers["etag"]}
+    )
+    assert renamed.status_code == 200
+    assert renamed.text.startswith("第一章：归来\n\n初稿。")
+
+
+def test_export_cache_evicts_least_recently_used(tmp_path):
+    from app.services.export_cache import ExportCache
+
+    cache = ExportCache(directory=str(tmp_path), max_bytes=10)
+    cache.store_text("a", "1234")
+    cache.store_text("b", "5678")
+    assert cache.read_text("a") == "1234"
+    cache.store_text("c", "90ab")
+    assert cache.read_text("b") is None
+    assert cache.read_text("a") == "1234"
+    assert b"".join(cache.open_stream("c") or []) == b"90ab"
+    cache.store_text("huge", "x" * 11)
+    assert cache.read_text("huge") is None
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a", "c"]
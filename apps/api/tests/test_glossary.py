@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from app.services.glossary import GlossaryMatcher
+from app.tools.glossary_bench import run_benchmark
+
+
+def test_glossary_replaces_leftmost_longest_matches_without_cascading():
+    matcher = GlossaryMatcher([("旧城", "新城"), ("新城", "故都"), ("旧城门", "北门"), ("城门楼", "箭楼")])
+    # 旧城门 beats the shorter 旧城 and the later-starting 城门楼; replaced text is not rescanned.
+    assert matcher.apply("他在旧城门楼下望向新城。") == "他在北门楼下望向故都。"
+    assert matcher.apply("旧城") == "新城"
+    assert GlossaryMatcher([]).apply("旧城") == "旧城"
+
+
+def test_glossary_benchmark_runs():
+    result = run_benchmark(terms=200, chapters=2, chapter_chars=500)
+    assert result["terms"] > 0
+    assert result["aho_corasick_s"] >= 0
+
+
+async def test_glossary_edits_invalidate_the_compiled_glossary(client):
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+    chapter = await client.post("/api/artifacts", json={"kind": "novel_chapter", "ordinal": 1, "title": "第一章"})
+    await client.post(
+        f"/api/artifacts/{chapter.json()['id']}/versions",
+        json={"source": "agent", "content_text": "他回到旧城。", "metadata": {}, "brief_snapshot_id": snap_id},
+    )
+    entry = await client.post(
+        f"/api/brief-snapshots/{snap_id}/glossary",
+        json={"term": "旧城", "replacement": "新城", "metadata": {}},
+    )
+    exported = await client.get(f"/api/brief-snapshots/{snap_id}/export/novel.txt")
+    assert "他回到新城。" in exported.json()["text"]
+
+    await client.patch(
+        f"/api/brief-snapshots/{snap_id}/glossary/{entry.json()['id']}",
+        json={"replacement": "故都"},
+    )
+    exported = await client.get(f"/api/brief-snapshots/{snap_id}/export/novel.txt")
+    assert "他回到故都。" in exported.json()["text"]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import uuid
+
+from app.db.models import KgEntity
+from app.services.impact_analysis import analyze_impacts, change_terms
+from app.services.settings_store import SERVER_OUTPUT_SPEC_DEFAULTS
+
+
+def test_change_terms_keep_only_what_the_edit_removed_or_added():
+    terms = change_terms(base_text="阿澄来到旧城。天色已晚。", edited_text="阿澄来到新城。天色已晚。")
+    assert {"旧城", "新城"} <= terms
+    # Shared by both versions, or in sentences the edit did not touch.
+    assert "阿澄" not in terms
+    assert "天色" not in terms
+    assert change_terms(base_text="阿澄来到旧城。", edited_text="阿澄来到旧城！") == set()
+
+
+async def _chapters(client, snap_id: str, texts: list[str]) -> list[tuple[str, str]]:
+    created = []
+    for ordinal, text in enumerate(texts, start=1):
+        chapter = await client.post(
+            "/api/artifacts",
+            json={"kind": "novel_chapter", "ordinal": ordinal, "title": f"第{ordinal}章"},
+        )
+        version = await client.post(
+            f"/api/artifacts/{chapter.json()['id']}/versions",
+            json={"source": "agent", "content_text": text, "metadata": {}, "brief_snapshot_id": snap_id},
+        )
+        created.append((chapter.json()["id"], version.json()["id"]))
+    return created
+
+
+async def _preview(client, snap_id: str, chapter_id: str, base_version_id: str, text: str) -> list[dict]:
+    edited = await client.post(
+        f"/api/artifacts/{chapter_id}/versions",
+        json={
+            "source": "user",
+            "content_text": text,
+            "metadata": {"edited_from_version_id": base_version_id},
+            "brief_snapshot_id": snap_id,
+        },
+    )
+    preview = await client.post(
+        f"/api/brief-snapshots/{snap_id}/propagation/preview",
+        json={"base_artifact_version_id": base_version_id, "edited_artifact_version_id": edited.json()["id"]},
+    )
+    assert preview.status_code == 200
+    return preview.json()["impacts"]
+
+
+async def test_impacts_are_narrowed_by_terms_and_kg_entities(app, client):
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+    (ch1, ch1_v1), (ch2, _), (ch3, _), (ch4, _) = await _chapters(
+        client,
+        snap_id,
+        ["阿澄来到旧城。", "阿澄在酒馆喝茶。", "旧城的钟声响起。", "远方下起了雨。"],
+    )
+    async with app.state.sessionmaker() as session:
+        session.add(KgEntity(brief_snapshot_id=uuid.UUID(snap_id), name="阿澄", entity_type="character", meta={}))
+        await session.commit()
+
+    # Chapters that only share the character involved in the change are flagged too, below the
+    # ones that mention what changed.
+    impacts = await _preview(client, snap_id, ch1, ch1_v1, "阿澄来到新城。")
+    by_id = {item["artifact_id"]: item for item in impacts}
+    assert set(by_id) == {ch2, ch3}
+    assert by_id[ch3]["evidence"][0]["match"] == "旧城"
+    assert by_id[ch2]["evidence"] == [{"signal": "entity", "match": "阿澄", "excerpt": "阿澄在酒馆喝茶。"}]
+    assert by_id[ch3]["relevance"] > by_id[ch2]["relevance"]
+
+    await client.patch("/api/settings/output-spec", json={"propagation_impact_min_relevance": 0.45})
+    impacts = await _preview(client, snap_id, ch1, ch1_v1, "阿澄来到新城。")
+    assert [item["artifact_id"] for item in impacts] == [ch3]
+
+    await client.patch("/api/settings/output-spec", json={"propagation_impact_min_relevance": 0})
+    impacts = await _preview(client, snap_id, ch1, ch1_v1, "阿澄来到新城。")
+    assert [item["artifact_id"] for item in impacts] == [ch2, ch3, ch4]
+    assert impacts[2]["relevance"] == 0
+
+
+async def test_fact_changes_about_a_character_reach_chapters_that_only_name_them(app, client):
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = uuid.UUID(snap.json()["id"])
+    homecoming, mourning, weather = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    async with app.state.sessionmaker() as session:
+        session.add(KgEntity(brief_snapshot_id=snap_id, name="张三", entity_type="character", meta={}))
+        await session.commit()
+
+        relevance = await analyze_impacts(
+            session=session,
+            embeddings=None,
+            brief_snapshot_id=snap_id,
+            base_text="张三活着逃出了城。",
+            edited_text="张三死在了城门下。",
+            fact_changes="张三在第一章死亡",
+            candidates=[(homecoming, "张三骑马赶回故乡。"), (mourning, "众人为他的死亡哀悼。"), (weather, "远方下起了雨。")],
+        )
+
+    assert relevance is not None
+    min_relevance = SERVER_OUTPUT_SPEC_DEFAULTS["propagation_impact_min_relevance"]
+    assert relevance[homecoming].score >= min_relevance
+    assert [item["match"] for item in relevance[homecoming].evidence] == ["张三"]
+    # The extracted fact changes count as changed text for the lexical signal.
+    assert relevance[mourning].score >= min_relevance
+    assert [item["match"] for item in relevance[mourning].evidence] == ["死亡"]
+    assert relevance[weather].score == 0
+
+
+async def test_impacts_fall_back_to_all_downstream_when_the_change_has_no_terms(client):
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+    (ch1, ch1_v1), (ch2, _), (ch3, _) = await _chapters(
+        client, snap_id, ["阿澄来到旧城。", "她在旧城寻找线索。", "她遇到一名陌生人。"]
+    )
+
+    impacts = await _preview(client, snap_id, ch1, ch1_v1, "阿澄来到旧城！")
+    assert [item["artifact_id"] for item in impacts] == [ch2, ch3]
+    assert all(item["relevance"] is None for item in impacts)
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from fake_openai_server import FakeOpenAIServer
+from openai import BadRequestError
+
+from app.llm.endpoints import ChatEndpoint, endpoint_health
+from app.llm.openai_client import OpenAIChatClient
+
+
+@pytest.fixture(autouse=True)
+def _reset_endpoint_health():
+    endpoint_health.reset()
+    yield
+    endpoint_health.reset()
+
+
+def _client(server: FakeOpenAIServer, **kwargs) -> OpenAIChatClient:
+    return OpenAIChatClient(
+        api_key="sk-test",
+        model="primary-model",
+        timeout_s=5,
+        max_retries=0,
+        base_url="http://fake/v1",
+        failover_endpoints=[ChatEndpoint(base_url="http://fake/v1", model="secondary-model")],
+        http_client=server.http_client(),
+        **kwargs,
+    )
+
+
+async def test_slow_primary_is_hedged_and_loser_cancelled() -> None:
+    server = FakeOpenAIServer()
+    server.set_model("primary-model", latency_s=2.0, content="primary")
+    server.set_model("secondary-model", latency_s=0.0, content="secondary")
+    client = _client(server, hedge_percentile=0.95, hedge_initial_delay_s=0.05, hedge_min_delay_s=0.01)
+
+    started = time.monotonic()
+    out = await client.complete(system_prompt="s", user_prompt="u")
+    assert out == "secondary"
+    assert time.monotonic() - started < 1.0
+    assert server.models_requested() == ["primary-model", "secondary-model"]
+    assert server.cancelled == ["primary-model"]
+    health = endpoint_health.snapshot()
+    assert health["http://fake/v1#secondary-model"]["hedge_wins"] == 1
+
+
+async def test_stream_hedging_uses_first_endpoint_to_produce_a_token() -> None:
+    server = FakeOpenAIServer()
+    server.set_model("primary-model", latency_s=2.0, content="primary")
+    server.set_model("secondary-model", latency_s=0.0, content="secondary-stream", chunk_size=4)
+    client = _client(server, hedge_percentile=0.95, hedge_initial_delay_s=0.05, hedge_min_delay_s=0.01)
+
+    deltas = [delta async for delta in client.stream_complete(system_prompt="s", user_prompt="u")]
+    assert "".join(deltas) == "secondary-stream"
+    assert server.cancelled == ["primary-model"]
+
+
+async def test_fast_primary_is_not_hedged() -> None:
+    server = FakeOpenAIServer()
+    server.set_model("primary-model", latency_s=0.0, content="primary")
+    client = _client(server, hedge_percentile=0.95, hedge_initial_delay_s=1.0)
+
+    assert await client.complete(system_prompt="s", user_prompt="u") == "primary"
+    assert server.models_requested() == ["primary-model"]
+
+
+async def test_failover_on_server_error_and_health_demotes_endpoint() -> None:
+    server = FakeOpenAIServer()
+    server.set_model("primary-model", status_code=503)
+    server.set_model("secondary-model", content="secondary")
+    client = _client(server)
+
+    for _ in range(2):
+        assert await client.complete(system_prompt="s", user_prompt="u") == "secondary"
+    assert server.models_requested() == [
+        "primary-model",
+        "secondary-model",
+        "primary-model",
+        "secondary-model",
+    ]
+    assert endpoint_health.is_healthy("http://fake/v1#primary-model") is False
+
+    assert await client.complete(system_prompt="s", user_prompt="u") == "secondary"
+    assert server.models_requested()[-1] == "secondary-model"
+    assert len(server.requests) == 5
+
+
+async def test_client_errors_do_not_fail_over() -> None:
+    server = FakeOpenAIServer()
+    server.set_model("primary-model", status_code=400)
+    server.set_model("secondary-model", content="secondary")
+    client = _client(server)
+
+    with pytest.raises(BadRequestError):
+        await client.complete(system_prompt="s", user_prompt="u")
+    assert server.models_requested() == ["primary-model"]
+
+
+def test_failover_endpoints_on_other_hosts_need_their_own_key() -> None:
+    client = OpenAIChatClient(
+        api_key="sk-primary",
+        model="primary-model",
+        timeout_s=5,
+        base_url="http://fake/v1",
+        failover_endpoints=[
+            ChatEndpoint(base_url="http://elsewhere/v1", model="borrowed-key"),
+            ChatEndpoint(base_url="http://elsewhere/v1", model="own-key", api_key="sk-elsewhere"),
+            ChatEndpoint(base_url="http://fake/v1/", model="same-host"),
+        ],
+    )
+    assert [endpoint.model for endpoint in client._endpoints] == ["primary-model", "own-key", "same-host"]
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.llm.endpoints import ChatEndpoint
+from app.llm.routing import PhaseRoutedLLMClient
+from app.main import create_app
+from app.services.llm_provider import (
+    EffectiveLlmProviderConfig,
+    _apply_phase_route,
+    resolve_llm_client,
+)
+
+
+async def test_llm_routing_settings_get_and_patch(client):
+    got = await client.get("/api/settings/llm-routing")
+    assert got.status_code == 200
+    body = got.json()
+    assert body["fast_model"] is None
+    assert "novel_chapter_critic" in body["lightweight_phases"]
+    assert body["routes"] == {}
+
+    patched = await client.patch(
+        "/api/settings/llm-routing",
+        json={
+            "fast_model": "fast-model",
+            "routes": {
+                "novel_chapter_draft": {
+                    "model": "writer-model",
+                    "base_url": "https://writer.example.com/v1",
+                    "api_key": "sk-writer",
+                }
+            },
+        },
+    )
+    assert patched.status_code == 200
+    patched_body = patched.json()
+    assert patched_body["fast_model"] == "fast-model"
+    route = patched_body["routes"]["novel_chapter_draft"]
+    assert route["model"] == "writer-model"
+    assert route["api_key_configured"] is True
+    assert "api_key" not in route
+    assert patched_body["effective_models"]["novel_chapter_critic"] == "fast-model"
+    assert patched_body["effective_models"]["novel_chapter_draft"] == "writer-model"
+
+    model_only = await client.patch(
+        "/api/settings/llm-routing",
+        json={"routes": {"novel_chapter_draft": {"model": "writer-model-2"}}},
+    )
+    assert model_only.json()["routes"]["novel_chapter_draft"]["api_key_configured"] is True
+
+    cleared = await client.patch(
+        "/api/settings/llm-routing",
+        json={"fast_model": None, "routes": {"novel_chapter_draft": None}},
+    )
+    assert cleared.json()["fast_model"] is None
+    assert cleared.json()["routes"] == {}
+
+
+async def test_resolved_llm_client_routes_phases_to_configured_models(app, client):
+    await client.patch(
+        "/api/settings/llm-provider",
+        json={"api_key": "sk-test", "model": "main-model", "base_url": "https://example.com/v1"},
+    )
+    await client.patch(
+        "/api/settings/llm-routing",
+        json={"fast_model": "fast-model", "routes": {"nts_episode_draft": {"model": "draft-model"}}},
+    )
+
+    async with app.state.sessionmaker() as session:
+        llm = await resolve_llm_client(session=session, app=app)
+        kg_llm = await resolve_llm_client(session=session, app=app, phase="kg_extraction")
+
+    assert isinstance(llm, PhaseRoutedLLMClient)
+    assert llm.model == "main-model"
+    assert llm.for_phase("novel_chapter_draft").model == "main-model"
+    assert llm.for_phase("novel_chapter_critic").model == "fast-model"
+    assert llm.for_phase("json_repair").model == "fast-model"
+    assert llm.for_phase("nts_episode_draft").model == "draft-model"
+    assert llm.for_phase("novel_chapter_critic") is llm.for_phase("nts_episode_critic")
+    assert kg_llm.model == "fast-model"
+
+    await client.patch("/api/settings/llm-provider", json={"api_key": None})
+    await client.patch(
+        "/api/settings/llm-routing",
+        json={"fast_model": None, "routes": {"nts_episode_draft": None}},
+    )
+
+
+async def test_routes_to_another_host_need_their_own_api_key(app, client):
+    await client.patch(
+        "/api/settings/llm-provider",
+        json={"api_key": "sk-primary", "model": "main-model", "base_url": "https://example.com/v1"},
+    )
+    rejected = await client.patch(
+        "/api/settings/llm-routing",
+        json={"routes": {"novel_chapter_draft": {"base_url": "https://other.example.net/v1"}}},
+    )
+    assert rejected.status_code == 400
+    assert rejected.json()["detail"] == "llm_route_api_key_required"
+
+    same_host = await client.patch(
+        "/api/settings/llm-routing",
+        json={"routes": {"novel_chapter_draft": {"model": "draft-model", "base_url": "https://example.com/v1/"}}},
+    )
+    assert same_host.status_code == 200
+
+    # The primary moved after the route was saved: the route is not sent the new primary's key.
+    await client.patch("/api/settings/llm-provider", json={"base_url": "https://moved.example.org/v1"})
+    async with app.state.sessionmaker() as session:
+        llm = await resolve_llm_client(session=session, app=app)
+    assert isinstance(llm, PhaseRoutedLLMClient)
+    assert llm.for_phase("novel_chapter_draft").model == "main-model"
+    assert llm.for_phase("novel_chapter_draft").base_url == "https://moved.example.org/v1"
+
+    await client.patch("/api/settings/llm-provider", json={"api_key": None, "base_url": None})
+    await client.patch("/api/settings/llm-routing", json={"routes": {"novel_chapter_draft": None}})
+
+
+def test_phase_routes_to_another_model_do_not_inherit_failover_endpoints():
+    cfg = EffectiveLlmProviderConfig(
+        api_key="sk-primary",
+        base_url="https://example.com/v1",
+        model="main-model",
+        embeddings_model="embed-model",
+        timeout_s=5,
+        max_retries=0,
+        failover_endpoints=(ChatEndpoint(base_url="https://example.com/v1", model="backup-model"),),
+    )
+    assert _apply_phase_route(cfg, {"api_key": "sk-other"}).failover_endpoints == cfg.failover_endpoints
+    assert _apply_phase_route(cfg, {"model": "fast-model"}).failover_endpoints == ()
+
+
+class _ModelStubLLM(LLMClient):
+    model = "stub-model"
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        return json.dumps(
+            {"chapters": [{"index": 1, "title": "第一章", "summary": "开端。", "hook": "悬念。"}]},
+            ensure_ascii=False,
+        )
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+@pytest.fixture()
+async def client_with_model_stub_llm(_ensure_test_database: None, test_database_url: str):
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(settings=settings, llm_client=_ModelStubLLM(), embeddings_client=_StubEmbeddings())
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield http_client
+    await app.router.shutdown()
+
+
+async def test_step_outputs_record_which_model_ran(client_with_model_stub_llm):
+    client = client_with_model_stub_llm
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+
+    resp = await client.post(f"/api/workflow-runs/{run.json()['id']}/next")
+    assert resp.status_code == 200
+    step = resp.json()["step"]
+    assert step["status"] == "succeeded"
+    assert step["outputs"]["metrics"] == {"llm_calls": 1, "models": ["stub-model"]}
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+from types import SimpleNamespace
+from typing import Any
+
+import httpx
+import pytest
+from openai import BadRequestError
+
+from app.core.config import Settings
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.llm.openai_client import OpenAIChatClient
+from app.main import create_app
+from app.schemas.generation import NovelOutline
+
+OUTLINE_JSON = json.dumps(
+    {"chapters": [{"index": 1, "title": "第一章", "summary": "开端。", "hook": "悬念。"}]},
+    ensure_ascii=False,
+)
+
+
+class _FakeCompletions:
+    def __init__(self, *, reject_response_format: bool) -> None:
+        self.reject_response_format = reject_response_format
+        self.calls: list[dict[str, Any]] = []
+
+    async def create(self, **kwargs: Any) -> Any:
+        self.calls.append(kwargs)
+        if "response_format" in kwargs and self.reject_response_format:
+            request = httpx.Request("POST", "http://fake/v1/chat/completions")
+            raise BadRequestError(
+                "response_format is not supported",
+                response=httpx.Response(400, request=request),
+                body=None,
+            )
+        message = SimpleNamespace(content=OUTLINE_JSON)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _client_with_fake(*, base_url: str, reject: bool) -> tuple[OpenAIChatClient, _FakeCompletions]:
+    client = OpenAIChatClient(
+        api_key="sk-test",
+        model="fake-model",
+        timeout_s=5,
+        base_url=base_url,
+        structured_output=True,
+    )
+    fake = _FakeCompletions(reject_response_format=reject)
+    client._client = SimpleNamespace(chat=SimpleNamespace(completions=fake))  # type: ignore[assignment]
+    return client, fake
+
+
+async def test_openai_client_sends_json_schema_response_format() -> None:
+    client, fake = _client_with_fake(base_url="http://supported.test/v1", reject=False)
+    assert client.supports_json_schema is True
+
+    out = await client.complete(system_prompt="s", user_prompt="u", response_model=NovelOutline)
+    assert json.loads(out)["chapters"][0]["title"] == "第一章"
+    response_format = fake.calls[0]["response_format"]
+    assert response_format["type"] == "json_schema"
+    assert response_format["json_schema"]["name"] == "NovelOutline"
+    assert "chapters" in response_format["json_schema"]["schema"]["properties"]
+
+
+async def test_openai_client_falls_back_when_provider_rejects_json_schema() -> None:
+    client, fake = _client_with_fake(base_url="http://unsupported.test/v1", reject=True)
+
+    out = await client.complete(system_prompt="s", user_prompt="u", response_model=NovelOutline)
+    assert json.loads(out)["chapters"]
+    assert len(fake.calls) == 2
+    assert "response_format" not in fake.calls[1]
+    assert client.supports_json_schema is False
+
+    await client.complete(system_prompt="s", user_prompt="u", response_model=NovelOutline)
+    assert len(fake.calls) == 3
+    assert "response_format" not in fake.calls[2]
+
+
+class _SchemaAwareLLM(LLMClient):
+    supports_json_schema = True
+
+    def __init__(self) -> None:
+        self.response_models: list[Any] = []
+
+    async def complete(
+        self, *, system_prompt: str, user_prompt: str, response_model: Any = None
+    ) -> str:
+        self.response_models.append(response_model)
+        return OUTLINE_JSON
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+@pytest.fixture()
+async def client_with_schema_llm(_ensure_test_database: None, test_database_url: str):
+    llm = _SchemaAwareLLM()
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(settings=settings, llm_client=llm, embeddings_client=_StubEmbeddings())
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield http_client, llm
+    await app.router.shutdown()
+
+
+async def test_executor_requests_phase_schema_and_reports_metrics(client_with_schema_llm):
+    client, llm = client_with_schema_llm
+    before = (await client.get("/api/metrics/llm")).json()["by_phase"].get("novel_outline", {})
+
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+
+    resp = await client.post(f"/api/workflow-runs/{run.json()['id']}/next")
+    assert resp.status_code == 200
+    assert resp.json()["step"]["status"] == "succeeded"
+    assert llm.response_models == [NovelOutline]
+
+    after = (await client.get("/api/metrics/llm")).json()["by_phase"]["novel_outline"]
+    for name in ("structured_output_requests", "json_outputs_structured"):
+        assert after[name] == before.get(name, 0) + 1
+    assert after.get("json_repaired_structured", 0) == before.get("json_repaired_structured", 0)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.main import create_app
+from app.services.paragraph_fix import paragraph_context, paragraph_fix_targets
+from app.services.prompting import load_prompt
+
+
+def _critic(*, rewrite_indices: list[int]) -> str:
+    return json.dumps(
+        {
+            "hard_pass": True,
+            "hard_errors": [],
+            "soft_scores": {"consistency": 80},
+            "rewrite_paragraph_indices": rewrite_indices,
+            "rewrite_instructions": "修正设定。" if rewrite_indices else "",
+            "fact_digest": "事实。",
+            "tone_digest": "基调。",
+            "state_patch": {},
+        },
+        ensure_ascii=False,
+    )
+
+
+class _FixRoutedLLM(LLMClient):
+    def __init__(self) -> None:
+        self.critic_calls = 0
+        self.whole_rewrites = 0
+        self.paragraph_prompts: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        if system_prompt == load_prompt("novel_outline_system.md"):
+            chapters = [{"index": 1, "title": "第1章", "summary": "摘要。", "hook": "悬念。"}]
+            return json.dumps({"chapters": chapters}, ensure_ascii=False)
+        if system_prompt == load_prompt("novel_beats_system.md"):
+            return json.dumps({"chapters": [{"index": 1, "title": "第1章", "beats": ["冲突"]}]}, ensure_ascii=False)
+        if system_prompt == load_prompt("novel_draft_system.md"):
+            text = "\n\n".join(f"第{i}段。" for i in range(1, 5))
+            return json.dumps({"title": "第1章", "text": text}, ensure_ascii=False)
+        if system_prompt == load_prompt("rewrite_system.md"):
+            self.whole_rewrites += 1
+            return json.dumps({"replacements": {}}, ensure_ascii=False)
+        if system_prompt == load_prompt("paragraph_rewrite_system.md"):
+            self.paragraph_prompts.append(user_prompt)
+            index = re.search(r"第 (\d+) 段", user_prompt).group(1)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(0.05)
+            finally:
+                self.in_flight -= 1
+            return json.dumps({"text": f"修订第{index}段。"}, ensure_ascii=False)
+        self.critic_calls += 1
+        return _critic(rewrite_indices=[1, 3] if self.critic_calls == 1 else [])
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+@pytest.fixture()
+async def app_with_fix_llm(_ensure_test_database: None, test_database_url: str):
+    llm = _FixRoutedLLM()
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(settings=settings, llm_client=llm, embeddings_client=_StubEmbeddings())
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield http_client, llm
+    await app.router.shutdown()
+
+
+async def test_paragraph_fix_rewrites_flagged_paragraphs_concurrently(app_with_fix_llm):
+    client, llm = app_with_fix_llm
+    patched = await client.patch("/api/settings/output-spec", json={"fix_mode": "paragraph"})
+    assert patched.json()["fix_mode"] == "paragraph"
+
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    run_id = run.json()["id"]
+    started = await client.post(f"/api/workflow-runs/{run_id}/autorun/start")
+    assert started.status_code == 200
+
+    body: dict = {}
+    for _ in range(500):
+        body = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+        if body["status"] in {"succeeded", "failed"}:
+            break
+        await asyncio.sleep(0.02)
+    assert body["status"] == "succeeded"
+
+    steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+    fixes = [step for step in steps if step["step_name"] == "novel_chapter_fix"]
+    assert [step["outputs"]["paragraph_fix"] for step in fixes] == [[1, 3]]
+    assert llm.whole_rewrites == 0
+    assert llm.max_in_flight == 2
+    # Each request carries only its paragraph and the neighbours around it.
+    third = next(prompt for prompt in llm.paragraph_prompts if "第 3 段" in prompt)
+    assert "第2段。" in third and "第4段。" in third and "第1段。" not in third
+
+    artifacts = (await client.get("/api/artifacts")).json()
+    versions = (await client.get(f"/api/artifacts/{artifacts[0]['id']}/versions")).json()
+    assert versions[0]["content_text"] == "修订第1段。\n\n第2段。\n\n修订第3段。\n\n第4段。"
+
+
+def test_paragraph_fix_targets_fall_back_to_whole_draft():
+    paragraphs = ["a", "b", "c"]
+    assert paragraph_fix_targets(paragraphs=paragraphs, indices=[3, 1, 9]) == [1, 3]
+    # Nothing flagged, or every paragraph flagged (e.g. the NTS format checks): rewrite the whole draft.
+    assert paragraph_fix_targets(paragraphs=paragraphs, indices=[]) == []
+    assert paragraph_fix_targets(paragraphs=paragraphs, indices=[1, 2, 3]) == []
+    assert paragraph_context(paragraphs, 1) == ("", "b")
+    assert paragraph_context(paragraphs, 3) == ("b", "")
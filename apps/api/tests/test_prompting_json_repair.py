@@ -2,7 +2,11 @@ from __future__ import annotations
 
 import pytest
 
-from app.services.prompting import extract_json_object
+from app.services.prompting import (
+    extract_json_object,
+    parse_json_object,
+    stitch_stream_continuation,
+)
 
 
 def test_extract_json_object_allows_unescaped_newlines_in_strings() -> None:
@@ -30,3 +34,24 @@ def test_extract_json_object_raises_when_no_object_present() -> None:
     with pytest.raises(Exception):
         extract_json_object("not json at all")
 
+
+def test_parse_json_object_reports_only_real_repairs() -> None:
+    assert parse_json_object('```json\n{"title": "t"}\n```') == ({"title": "t"}, False)
+    assert parse_json_object('  Here you go: {"title": "t"} thanks\n') == ({"title": "t"}, False)
+    assert parse_json_object('{"title": "a\nb"}') == ({"title": "a\nb"}, False)
+    assert parse_json_object('{"title": "t", "text": "a') == ({"title": "t", "text": "a"}, True)
+
+
+
+def test_stitch_stream_continuation_trims_repeated_overlap() -> None:
+    stitched = stitch_stream_continuation('{"title":"t","te', '"te' + 'xt":"a"}')
+    assert stitched == '{"title":"t","text":"a"}'
+
+
+def test_stitch_stream_continuation_accepts_restarted_object() -> None:
+    stitched = stitch_stream_continuation('{"title":"t', '```json\n{"title":"t","text":"a"}\n```')
+    assert extract_json_object(stitched or "") == {"title": "t", "text": "a"}
+
+
+def test_stitch_stream_continuation_rejects_unparseable_result() -> None:
+    assert stitch_stream_continuation('{"title":"t","text":"a', "b, c") is None
@@ -70,10 +70,12 @@ async def test_propagation_preview_apply_and_repair_flow(client_with_llm, llm_st
     assert preview.status_code == 200
     preview_data = preview.json()
     assert "文本已修改" in preview_data["fact_changes"]
-    assert len(preview_data["impacts"]) == 2
-    impacted_ids = {item["artifact_id"] for item in preview_data["impacts"]}
-    assert ch2_id in impacted_ids
-    assert ch3_id in impacted_ids
+    # Only ch2 mentions the place the edit changed; ch3 is left alone.
+    assert [item["artifact_id"] for item in preview_data["impacts"]] == [ch2_id]
+    assert preview_data["impacts"][0]["relevance"] >= 0.3
+    assert {"signal": "term", "match": "旧城", "excerpt": "第二章：她在旧城寻找线索。"} in preview_data["impacts"][0][
+        "evidence"
+    ]
 
     applied = await client_with_llm.post(
         f"/api/brief-snapshots/{snap_id}/propagation/apply",
@@ -84,14 +86,14 @@ async def test_propagation_preview_apply_and_repair_flow(client_with_llm, llm_st
     )
     assert applied.status_code == 200
     event_id = applied.json()["event"]["id"]
-    assert len(applied.json()["impacts"]) == 2
+    assert len(applied.json()["impacts"]) == 1
+    assert applied.json()["impacts"][0]["relevance"] == preview_data["impacts"][0]["relevance"]
 
     impacts = await client_with_llm.get(f"/api/brief-snapshots/{snap_id}/impacts")
     assert impacts.status_code == 200
-    assert len(impacts.json()) == 2
+    assert len(impacts.json()) == 1
 
     llm_stub.outputs.append("第二章（修复后）：她在新城寻找线索。")
-    llm_stub.outputs.append("第三章（修复后）：她在新城遇到一名陌生人。")
 
     repaired = await client_with_llm.post(
         f"/api/brief-snapshots/{snap_id}/propagation/events/{event_id}/repair",
@@ -99,7 +101,7 @@ async def test_propagation_preview_apply_and_repair_flow(client_with_llm, llm_st
     )
     assert repaired.status_code == 200
     repaired_data = repaired.json()
-    assert len(repaired_data["repaired"]) == 2
+    assert len(repaired_data["repaired"]) == 1
     assert all(item["repaired_artifact_version_id"] for item in repaired_data["impacts"])
 
     impacts_after = await client_with_llm.get(f"/api/brief-snapshots/{snap_id}/impacts")
@@ -110,3 +112,131 @@ async def test_propagation_preview_apply_and_repair_flow(client_with_llm, llm_st
     assert versions2.status_code == 200
     assert any(v["content_text"].startswith("第二章（修复后）") for v in versions2.json())
 
+
+
+async def test_propagation_repair_stream_runs_repairs_concurrently(client_with_llm, llm_stub):
+    import asyncio
+    import json
+
+    brief = await client_with_llm.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client_with_llm.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+
+    version_ids = []
+    for ordinal in range(1, 6):
+        chapter = await client_with_llm.post(
+            "/api/artifacts",
+            json={"kind": "novel_chapter", "ordinal": ordinal, "title": f"第{ordinal}章"},
+        )
+        version = await client_with_llm.post(
+            f"/api/artifacts/{chapter.json()['id']}/versions",
+            json={"source": "agent", "content_text": f"第{ordinal}章：旧城。", "metadata": {}, "brief_snapshot_id": snap_id},
+        )
+        version_ids.append((chapter.json()["id"], version.json()["id"]))
+
+    edited = await client_with_llm.post(
+        f"/api/artifacts/{version_ids[0][0]}/versions",
+        json={
+            "source": "user",
+            "content_text": "第1章：新城。",
+            "metadata": {"edited_from_version_id": version_ids[0][1]},
+            "brief_snapshot_id": snap_id,
+        },
+    )
+    applied = await client_with_llm.post(
+        f"/api/brief-snapshots/{snap_id}/propagation/apply",
+        json={"base_artifact_version_id": version_ids[0][1], "edited_artifact_version_id": edited.json()["id"]},
+    )
+    event_id = applied.json()["event"]["id"]
+    assert len(applied.json()["impacts"]) == 4
+
+    in_flight = 0
+    peak = 0
+
+    async def complete(*, system_prompt: str, user_prompt: str) -> str:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return "修复后：新城。"
+
+    llm_stub.complete = complete
+
+    too_many = await client_with_llm.post(
+        f"/api/brief-snapshots/{snap_id}/propagation/events/{event_id}/repair/stream",
+        json={"concurrency": 10_000},
+    )
+    assert too_many.status_code == 422
+
+    resp = await client_with_llm.post(
+        f"/api/brief-snapshots/{snap_id}/propagation/events/{event_id}/repair/stream",
+        json={"concurrency": 2},
+    )
+    assert resp.status_code == 200
+    lines = resp.text.splitlines()
+    events = [line.removeprefix("event: ") for line in lines if line.startswith("event: ")]
+    assert events == ["status", "progress", "progress", "progress", "progress", "final"]
+    final = json.loads(lines[lines.index("event: final") + 1].removeprefix("data: "))
+    assert len(final["repaired"]) == 4
+    assert peak == 2
+
+    impacts_after = await client_with_llm.get(f"/api/brief-snapshots/{snap_id}/impacts")
+    assert impacts_after.json() == []
+
+
+async def test_propagation_repair_reports_a_failed_index(client_with_llm, llm_stub, monkeypatch):
+    from app.api.routers import propagation
+
+    brief = await client_with_llm.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client_with_llm.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+
+    version_ids = []
+    for ordinal in range(1, 3):
+        chapter = await client_with_llm.post(
+            "/api/artifacts",
+            json={"kind": "novel_chapter", "ordinal": ordinal, "title": f"第{ordinal}章"},
+        )
+        version = await client_with_llm.post(
+            f"/api/artifacts/{chapter.json()['id']}/versions",
+            json={"source": "agent", "content_text": f"第{ordinal}章：旧城。", "metadata": {}, "brief_snapshot_id": snap_id},
+        )
+        version_ids.append((chapter.json()["id"], version.json()["id"]))
+
+    edited = await client_with_llm.post(
+        f"/api/artifacts/{version_ids[0][0]}/versions",
+        json={
+            "source": "user",
+            "content_text": "第1章：新城。",
+            "metadata": {"edited_from_version_id": version_ids[0][1]},
+            "brief_snapshot_id": snap_id,
+        },
+    )
+    applied = await client_with_llm.post(
+        f"/api/brief-snapshots/{snap_id}/propagation/apply",
+        json={"base_artifact_version_id": version_ids[0][1], "edited_artifact_version_id": edited.json()["id"]},
+    )
+    event_id = applied.json()["event"]["id"]
+
+    async def complete(*, system_prompt: str, user_prompt: str) -> str:
+        return "修复后：新城。"
+
+    async def embeddings_client(**_kwargs):
+        return object()
+
+    async def failing_index(**_kwargs):
+        raise RuntimeError("embeddings_unavailable")
+
+    llm_stub.complete = complete
+    monkeypatch.setattr(propagation, "resolve_embeddings_client", embeddings_client)
+    monkeypatch.setattr(propagation, "index_artifact_versions", failing_index)
+
+    resp = await client_with_llm.post(
+        f"/api/brief-snapshots/{snap_id}/propagation/events/{event_id}/repair", json={}
+    )
+    assert resp.status_code == 200
+    # The repair itself is kept; only the retrieval index is missing it.
+    assert len(resp.json()["repaired"]) == 1
+    assert resp.json()["index_error"] == "embeddings_unavailable"
+    assert (await client_with_llm.get(f"/api/brief-snapshots/{snap_id}/impacts")).json() == []
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from app.core.config import Settings
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.llm.routing import PhaseRoutedLLMClient, llm_for_phase
+from app.main import create_app
+from app.services.provider_breaker import (
+    BREAKER_CLOSED,
+    BREAKER_HALF_OPEN,
+    BREAKER_OPEN,
+    BreakerPolicy,
+    ProviderBreakerRegistry,
+    ProviderCircuitBreaker,
+    guard_llm,
+)
+
+
+def _connection_error() -> APIConnectionError:
+    return APIConnectionError(
+        message="Connection error.", request=httpx.Request("POST", "http://test/v1/chat/completions")
+    )
+
+
+async def test_breaker_trips_on_error_rate_and_recovers_through_probe() -> None:
+    breaker = ProviderCircuitBreaker(key="k", policy=BreakerPolicy(min_calls=4, error_rate=0.5, open_s=0.05))
+    breaker.record(failed=False, latency_s=0.1)
+    breaker.record(failed=True, latency_s=0.1)
+    breaker.record(failed=False, latency_s=0.1)
+    assert breaker.state == BREAKER_CLOSED
+    breaker.record(failed=True, latency_s=0.1)
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.retry_in_s() > 0
+
+    await breaker.acquire()
+    assert breaker.state == BREAKER_HALF_OPEN
+
+    waiter = asyncio.create_task(breaker.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiter.done()
+
+    breaker.record(failed=False, latency_s=0.1)
+    assert breaker.state == BREAKER_CLOSED
+    await asyncio.wait_for(waiter, timeout=1)
+
+
+async def test_breaker_trips_on_slow_calls_and_reopens_when_probe_fails() -> None:
+    breaker = ProviderCircuitBreaker(
+        key="k", policy=BreakerPolicy(min_calls=2, slow_call_s=1.0, slow_call_rate=1.0, open_s=0.02)
+    )
+    breaker.record(failed=False, latency_s=5.0)
+    breaker.record(failed=False, latency_s=5.0)
+    assert breaker.state == BREAKER_OPEN
+    first_window = breaker.retry_in_s()
+
+    await breaker.acquire()
+    breaker.record(failed=True, latency_s=0.1)
+    assert breaker.state == BREAKER_OPEN
+    assert breaker.retry_in_s() > first_window
+    assert breaker.snapshot()["trips"] == 2
+
+
+class _FailingLLM(LLMClient):
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        raise _connection_error()
+
+
+async def test_guarded_llm_feeds_provider_failures_into_breaker() -> None:
+    breaker = ProviderCircuitBreaker(key="k", policy=BreakerPolicy(min_calls=2, open_s=10))
+    llm = guard_llm(_FailingLLM(), breaker)
+    for _ in range(2):
+        with pytest.raises(APIConnectionError):
+            await llm.complete(system_prompt="s", user_prompt="u")
+    assert breaker.state == BREAKER_OPEN
+    assert not hasattr(llm, "stream_complete")
+
+
+class _DyingStreamLLM(LLMClient):
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        raise NotImplementedError
+
+    async def stream_complete(self, *, system_prompt: str, user_prompt: str):
+        yield "第一段"
+        raise _connection_error()
+
+
+async def test_streams_are_recorded_once_when_they_end() -> None:
+    breaker = ProviderCircuitBreaker(key="k", policy=BreakerPolicy(min_calls=10, open_s=0.01))
+    llm = guard_llm(_DyingStreamLLM(), breaker)
+    with pytest.raises(APIConnectionError):
+        async for _delta in llm.stream_complete(system_prompt="s", user_prompt="u"):
+            pass
+    snapshot = breaker.snapshot()
+    assert (snapshot["window_calls"], snapshot["window_error_rate"]) == (1, 1.0)
+
+    # A half-open probe is not closed by the first token of a stream that then dies.
+    breaker._open(time.monotonic())
+    await asyncio.sleep(0.02)
+    stream = llm.stream_complete(system_prompt="s", user_prompt="u")
+    assert await anext(stream) == "第一段"
+    assert breaker.state == BREAKER_HALF_OPEN
+    with pytest.raises(APIConnectionError):
+        await anext(stream)
+    assert breaker.state == BREAKER_OPEN
+
+
+class _ModelLLM(LLMClient):
+    def __init__(self, *, model: str, failing: bool) -> None:
+        self.model = model
+        self.failing = failing
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        if self.failing:
+            raise _connection_error()
+        return "ok"
+
+
+async def test_phase_routed_models_trip_their_own_breakers() -> None:
+    registry = ProviderBreakerRegistry(policy=BreakerPolicy(min_calls=2, open_s=10))
+    routed = PhaseRoutedLLMClient(
+        default=_ModelLLM(model="big", failing=False),
+        routes={"novel_chapter_critic": _ModelLLM(model="small", failing=True)},
+    )
+    default_breaker = registry.get("https://api.test/v1#big")
+    llm = guard_llm(routed, default_breaker, registry=registry)
+
+    critic = llm_for_phase(llm, "novel_chapter_critic")
+    for _ in range(2):
+        with pytest.raises(APIConnectionError):
+            await critic.complete(system_prompt="s", user_prompt="u")
+    assert registry.get("https://api.test/v1#small").state == BREAKER_OPEN
+    assert default_breaker.state == BREAKER_CLOSED
+    assert await llm_for_phase(llm, "novel_chapter_draft").complete(system_prompt="s", user_prompt="u") == "ok"
+
+
+class _FailTwiceLLM(LLMClient):
+    def __init__(self, *, outputs: list[str]) -> None:
+        self.queue: list[object] = [_connection_error(), _connection_error(), *outputs]
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        if not self.queue:
+            raise RuntimeError("stub_llm_no_output")
+        item = self.queue.pop(0)
+        if isinstance(item, BaseException):
+            raise item
+        return str(item)
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+@pytest.fixture()
+async def app_with_failing_provider(_ensure_test_database: None, test_database_url: str):
+    outline = json.dumps(
+        {"chapters": [{"index": 1, "title": "第一章", "summary": "开端。", "hook": "悬念。"}]},
+        ensure_ascii=False,
+    )
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(
+        settings=settings, llm_client=_FailTwiceLLM(outputs=[outline]), embeddings_client=_StubEmbeddings()
+    )
+    app.state.provider_breakers = ProviderBreakerRegistry(
+        policy=BreakerPolicy(min_calls=2, error_rate=0.5, open_s=0.2)
+    )
+    await app.router.startup()
+    yield app
+    await app.router.shutdown()
+
+
+async def test_autorun_waits_on_open_breaker_and_publishes_state(app_with_failing_provider):
+    app = app_with_failing_provider
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        await client.patch(
+            "/api/settings/output-spec",
+            json={"auto_step_retries": 3, "auto_step_backoff_s": 0.0},
+        )
+        brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+        snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+        run = await client.post(
+            "/api/workflow-runs",
+            json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+        )
+        run_id = run.json()["id"]
+
+        hub = app.state.workflow_event_hub
+        queue = await hub.subscribe(run_id=uuid.UUID(run_id))
+
+        started = await client.post(f"/api/workflow-runs/{run_id}/autorun/start")
+        assert started.status_code == 200
+
+        steps: list[dict] = []
+        for _ in range(150):
+            steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+            if any(s["step_name"] == "novel_outline" and s["status"] == "succeeded" for s in steps):
+                break
+            await asyncio.sleep(0.02)
+        await client.post(f"/api/workflow-runs/{run_id}/autorun/stop")
+
+        outline_steps = [s for s in steps if s["step_name"] == "novel_outline"]
+        assert [s["status"] for s in outline_steps] == ["failed", "failed", "succeeded"]
+
+        messages: list[str] = []
+        while not queue.empty():
+            event = queue.get_nowait()
+            if event.name == "log":
+                messages.append(str(event.payload.get("message")))
+        assert any(m.startswith("provider_breaker state=open") for m in messages)
+        assert any(m.startswith("provider_breaker state=closed") for m in messages)
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+
+import httpx
+import pytest
+
+import app.api.routers.workflows as workflows_router
+import app.services.workflow_executor as workflow_executor
+from app.core.config import Settings
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.main import create_app
+from app.services.run_context import invalidate_run_contexts, load_run_context, run_context_is_stale
+
+
+class _ScriptedLLM(LLMClient):
+    def __init__(self, *, outputs: list[str]) -> None:
+        self.outputs = list(outputs)
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        if not self.outputs:
+            raise RuntimeError("stub_llm_no_output")
+        return self.outputs.pop(0)
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+def _novel_outputs() -> list[str]:
+    return [
+        json.dumps(
+            {"chapters": [{"index": 1, "title": "第一章", "summary": "开端。", "hook": "悬念。"}]},
+            ensure_ascii=False,
+        ),
+        json.dumps(
+            {"chapters": [{"index": 1, "title": "第一章", "beats": ["冲突出现", "角色选择", "留下钩子"]}]},
+            ensure_ascii=False,
+        ),
+        json.dumps({"title": "第一章", "text": "这是一段正文。"}, ensure_ascii=False),
+        json.dumps(
+            {
+                "hard_pass": True,
+                "hard_errors": [],
+                "soft_scores": {"pacing": 7},
+                "rewrite_paragraph_indices": [],
+                "rewrite_instructions": "",
+                "fact_digest": "角色做出了关键选择。",
+                "tone_digest": "紧张但克制。",
+                "state_patch": {},
+            },
+            ensure_ascii=False,
+        ),
+    ]
+
+
+@pytest.fixture()
+async def app_and_client(_ensure_test_database: None, test_database_url: str):
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(
+        settings=settings,
+        llm_client=_ScriptedLLM(outputs=_novel_outputs()),
+        embeddings_client=_StubEmbeddings(),
+    )
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield app, http_client
+    await app.router.shutdown()
+
+
+async def _create_novel_run(client: httpx.AsyncClient) -> str:
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    return run.json()["id"]
+
+
+async def test_autorun_loads_run_context_once(app_and_client, monkeypatch):
+    _app, client = app_and_client
+    loads: list[uuid.UUID] = []
+    prefs_calls: list[uuid.UUID] = []
+
+    async def counting_load_run_context(**kwargs):
+        loads.append(kwargs["run_id"])
+        return await load_run_context(**kwargs)
+
+    async def counting_prefs(*, session, brief_id):
+        prefs_calls.append(brief_id)
+        raise AssertionError("runtime preferences should come from the run context")
+
+    monkeypatch.setattr(workflows_router, "load_run_context", counting_load_run_context)
+    monkeypatch.setattr(workflow_executor, "resolve_runtime_execution_preferences", counting_prefs)
+
+    run_id = await _create_novel_run(client)
+    started = await client.post(f"/api/workflow-runs/{run_id}/autorun/start")
+    assert started.status_code == 200
+
+    steps: list[dict] = []
+    for _ in range(200):
+        steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+        if len(steps) >= 4 and all(step["status"] == "succeeded" for step in steps[:4]):
+            break
+        await asyncio.sleep(0.02)
+    await client.post(f"/api/workflow-runs/{run_id}/autorun/stop")
+
+    assert [step["status"] for step in steps[:4]] == ["succeeded"] * 4
+    assert [step["step_name"] for step in steps[:2]] == ["novel_outline", "novel_beats"]
+    assert loads == [uuid.UUID(run_id)]
+    assert prefs_calls == []
+
+
+async def test_run_context_invalidated_by_settings_patch_and_intervention(app_and_client):
+    app, client = app_and_client
+    run_id = uuid.UUID(await _create_novel_run(client))
+    run = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+
+    async with app.state.sessionmaker() as session:
+        context = await load_run_context(
+            session=session,
+            app=app,
+            run_id=run_id,
+            brief_snapshot_id=uuid.UUID(run["brief_snapshot_id"]),
+        )
+    assert context.runtime_prefs["auto_step_retries"] == 3
+    assert context.brief_json_text == json.dumps(context.brief_json, ensure_ascii=False, indent=2)
+    assert not run_context_is_stale(app, context)
+
+    patched = await client.patch("/api/settings/output-spec", json={"auto_step_retries": 1})
+    assert patched.status_code == 200
+    assert run_context_is_stale(app, context)
+
+    async with app.state.sessionmaker() as session:
+        context = await load_run_context(
+            session=session,
+            app=app,
+            run_id=run_id,
+            brief_snapshot_id=context.snapshot.id,
+            previous=context,
+        )
+    assert context.max_step_retries == 1
+    assert context.loads == 2
+    assert not run_context_is_stale(app, context)
+
+    invalidate_run_contexts(app, run_id=uuid.uuid4())
+    assert not run_context_is_stale(app, context)
+    invalidate_run_contexts(app, run_id=run_id)
+    assert run_context_is_stale(app, context)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import uuid
+
+from sqlalchemy import func, select
+
+from app.db.models import WorkflowRun, WorkflowRunStateBlob, WorkflowRunStateItem
+from app.services.run_state_store import load_run_state, state_blob_digest
+
+
+async def _create_run(client) -> str:
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel_to_script", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    return run.json()["id"]
+
+
+async def _count(session, model, run_id: uuid.UUID) -> int:
+    return int(
+        await session.scalar(select(func.count()).select_from(model).where(model.workflow_run_id == run_id)) or 0
+    )
+
+
+async def test_run_state_keeps_large_values_out_of_the_state_row(app, client):
+    run_id = uuid.UUID(await _create_run(client))
+    outline = {"chapters": [{"index": i, "title": f"第{i}章", "summary": "摘要" * 50} for i in range(1, 30)]}
+
+    compact_sizes: list[int] = []
+    for episode in range(1, 6):
+        async with app.state.sessionmaker() as session:
+            run = await session.get(WorkflowRun, run_id)
+            store, state = await load_run_state(session=session, run=run)
+            if episode > 1:
+                assert state["outline"] == outline
+                assert [item["episode_index"] for item in state["script_episode_digests"]] == list(range(1, episode))
+            state["outline"] = outline
+            state.setdefault("script_episode_digests", []).append(
+                {"episode_index": episode, "fact_digest": "事实" * 40}
+            )
+            state["cursor"] = {"phase": "nts_episode_draft", "episode_index": episode + 1}
+            run.state = await store.compact(state)
+            await session.commit()
+            compact_sizes.append(len(json.dumps(run.state, ensure_ascii=False)))
+
+            assert run.state["outline"] == {"$blob": state_blob_digest(outline)}
+            assert run.state["script_episode_digests"] == {"$items": "script_episode_digests", "count": episode}
+            assert await _count(session, WorkflowRunStateBlob, run_id) == 1
+            assert await _count(session, WorkflowRunStateItem, run_id) == episode
+
+    # The stored row does not grow with the number of episodes.
+    assert len(set(compact_sizes)) == 1
+
+    fetched = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+    assert fetched["state"]["outline"] == outline
+    assert len(fetched["state"]["script_episode_digests"]) == 5
+
+    patched = await client.patch(
+        f"/api/workflow-runs/{run_id}",
+        json={"state": {**fetched["state"], "script_episode_digests": fetched["state"]["script_episode_digests"][:2]}},
+    )
+    assert patched.status_code == 200
+    assert len(patched.json()["state"]["script_episode_digests"]) == 2
+
+    forked = await client.post(f"/api/workflow-runs/{run_id}/fork", json={})
+    assert forked.status_code == 200
+    assert forked.json()["state"]["outline"] == outline
+    assert len(forked.json()["state"]["script_episode_digests"]) == 2
+
+    deleted = await client.delete(f"/api/workflow-runs/{run_id}")
+    assert deleted.status_code in {200, 204}
+    async with app.state.sessionmaker() as session:
+        assert await _count(session, WorkflowRunStateItem, run_id) == 0
+        assert await _count(session, WorkflowRunStateBlob, run_id) == 0
@@ -100,6 +100,7 @@ async def test_llm_provider_settings_get_and_patch_and_clear(client):
     assert body["embeddings_model"]
     assert isinstance(body["timeout_s"], (int, float))
     assert isinstance(body["max_retries"], int)
+    assert body["structured_output"] is False
 
     patched = await client.patch(
         "/api/settings/llm-provider",
@@ -109,6 +110,7 @@ async def test_llm_provider_settings_get_and_patch_and_clear(client):
             "embeddings_model": "text-embedding-test",
             "timeout_s": 12,
             "max_retries": 5,
+            "structured_output": True,
             "api_key": "sk-test",
         },
     )
@@ -121,6 +123,7 @@ async def test_llm_provider_settings_get_and_patch_and_clear(client):
     assert patched_body["embeddings_model"] == "text-embedding-test"
     assert patched_body["timeout_s"] == 12
     assert patched_body["max_retries"] == 5
+    assert patched_body["structured_output"] is True
 
     cleared = await client.patch("/api/settings/llm-provider", json={"api_key": None})
     assert cleared.status_code == 200
@@ -129,6 +132,58 @@ async def test_llm_provider_settings_get_and_patch_and_clear(client):
     assert cleared_body["api_key_configured"] is False
 
 
+async def test_llm_provider_failover_and_hedging_settings(client):
+    patched = await client.patch(
+        "/api/settings/llm-provider",
+        json={
+            "failover_endpoints": [
+                {"base_url": "https://backup.example.com/v1", "model": "backup-model", "api_key": "sk-b"},
+                {"model": "cheap-model"},
+            ],
+            "hedge_percentile": 95,
+            "hedge_initial_delay_s": 8,
+        },
+    )
+    assert patched.status_code == 200
+    body = patched.json()
+    assert body["hedge_percentile"] == 0.95
+    assert body["hedge_initial_delay_s"] == 8
+    endpoints = body["failover_endpoints"]
+    assert endpoints[0] == {
+        "base_url": "https://backup.example.com/v1",
+        "model": "backup-model",
+        "api_key_configured": True,
+    }
+    # Same provider, another model: the primary's base_url and key apply.
+    assert endpoints[1] == {"base_url": body["base_url"], "model": "cheap-model", "api_key_configured": False}
+
+    resent = await client.patch(
+        "/api/settings/llm-provider",
+        json={"failover_endpoints": [{"base_url": "https://backup.example.com/v1", "model": "backup-model"}]},
+    )
+    assert resent.json()["failover_endpoints"][0]["api_key_configured"] is True
+
+    # Another host needs its own key.
+    rejected = await client.patch(
+        "/api/settings/llm-provider",
+        json={"failover_endpoints": [{"base_url": "https://other.example.com/v1"}]},
+    )
+    assert rejected.status_code == 400
+    assert rejected.json()["detail"] == "llm_failover_api_key_required"
+    with_key = await client.patch(
+        "/api/settings/llm-provider",
+        json={"failover_endpoints": [{"base_url": "https://other.example.com/v1", "api_key": "sk-o"}]},
+    )
+    assert with_key.json()["failover_endpoints"][0]["model"] == body["model"]
+
+    cleared = await client.patch(
+        "/api/settings/llm-provider",
+        json={"failover_endpoints": None, "hedge_percentile": None, "hedge_initial_delay_s": None},
+    )
+    assert cleared.json()["failover_endpoints"] == []
+    assert cleared.json()["hedge_percentile"] is None
+
+
 async def test_novel_to_script_prompt_defaults_get_and_patch_and_clear(client):
     got = await client.get("/api/settings/novel-to-script-prompt")
     assert got.status_code == 200
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.db.models import WorkflowKind
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.main import create_app
+from app.services.phase_graph import speculative_node
+from app.services.prompting import load_prompt
+
+_CHAPTERS = 4
+
+
+class _PhaseRoutedLLM(LLMClient):
+    def __init__(self) -> None:
+        self.in_flight_drafts = 0
+        self.max_in_flight_drafts = 0
+        self.drafted: list[int] = []
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        if system_prompt == load_prompt("novel_outline_system.md"):
+            chapters = [{"index": i, "title": f"第{i}章", "summary": "摘要。", "hook": "悬念。"} for i in range(1, _CHAPTERS + 1)]
+            return json.dumps({"chapters": chapters}, ensure_ascii=False)
+        if system_prompt == load_prompt("novel_beats_system.md"):
+            chapters = [{"index": i, "title": f"第{i}章", "beats": ["冲突", "钩子"]} for i in range(1, _CHAPTERS + 1)]
+            return json.dumps({"chapters": chapters}, ensure_ascii=False)
+        if system_prompt == load_prompt("novel_draft_system.md"):
+            match = re.search(r"chapter_index: (\d+)", user_prompt)
+            index = int(match.group(1)) if match else 0
+            self.in_flight_drafts += 1
+            self.max_in_flight_drafts = max(self.max_in_flight_drafts, self.in_flight_drafts)
+            try:
+                await asyncio.sleep(0.05)
+            finally:
+                self.in_flight_drafts -= 1
+            self.drafted.append(index)
+            return json.dumps({"title": f"第{index}章", "text": f"第{index}章正文。"}, ensure_ascii=False)
+        return json.dumps(
+            {
+                "hard_pass": True,
+                "hard_errors": [],
+                "soft_scores": {},
+                "rewrite_paragraph_indices": [],
+                "rewrite_instructions": "",
+                "fact_digest": "事实。",
+                "tone_digest": "基调。",
+                "state_patch": {"last_chapter": 1},
+            },
+            ensure_ascii=False,
+        )
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+@pytest.fixture()
+async def app_with_routed_llm(_ensure_test_database: None, test_database_url: str):
+    llm = _PhaseRoutedLLM()
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(settings=settings, llm_client=llm, embeddings_client=_StubEmbeddings())
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield app, http_client, llm
+    await app.router.shutdown()
+
+
+async def test_autorun_drafts_upcoming_chapters_speculatively(app_with_routed_llm):
+    _app, client, llm = app_with_routed_llm
+    patched = await client.patch(
+        "/api/settings/output-spec",
+        json={"speculative_draft_window": 2, "speculative_draft_concurrency": 2},
+    )
+    assert patched.json()["speculative_draft_window"] == 2
+
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    run_id = run.json()["id"]
+    started = await client.post(f"/api/workflow-runs/{run_id}/autorun/start")
+    assert started.status_code == 200
+
+    body: dict = {}
+    for _ in range(500):
+        body = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+        if body["status"] in {"succeeded", "failed"}:
+            break
+        await asyncio.sleep(0.02)
+    assert body["status"] == "succeeded"
+
+    steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+    drafts = [step for step in steps if step["step_name"] == "novel_chapter_draft"]
+    assert [step["outputs"]["chapter_index"] for step in drafts] == list(range(1, _CHAPTERS + 1))
+    # Chapter 1 is drafted in the step itself; later chapters come from the speculative pool,
+    # drafted against an older current_state and reconciled by the critic.
+    assert "speculative" not in drafts[0]["outputs"]
+    assert {step["outputs"].get("speculative") for step in drafts[1:]} <= {"fresh", "stale"}
+    assert any(step["outputs"].get("speculative") for step in drafts[1:])
+    assert sorted(llm.drafted) == list(range(1, _CHAPTERS + 1))
+    assert llm.max_in_flight_drafts >= 2
+
+    artifacts = (await client.get("/api/artifacts")).json()
+    assert len(artifacts) == _CHAPTERS
+
+
+def test_phase_graph_marks_per_unit_draft_phases_speculative():
+    assert speculative_node(WorkflowKind.novel, "novel_chapter_commit").name == "novel_chapter_draft"
+    assert speculative_node(WorkflowKind.novel, "novel_outline") is None
+    assert speculative_node(WorkflowKind.novel_to_script, "nts_episode_draft").name == "nts_episode_breakdown"
+    assert speculative_node(WorkflowKind.script, "script_scene_draft") is None
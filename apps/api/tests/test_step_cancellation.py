@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.config import Settings
+from app.llm.client import LLMClient
+from app.llm.embeddings_client import EmbeddingsClient
+from app.main import create_app
+from app.services.step_cancellation import (
+    CANCEL_REASON_DEADLINE,
+    CANCEL_REASON_IDLE,
+    StepCanceled,
+    StepCancellation,
+    StepTimedOut,
+)
+
+
+class _HangingStreamLLM(LLMClient):
+    def __init__(self) -> None:
+        self.stream_started = asyncio.Event()
+        self.stream_closed = asyncio.Event()
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        await asyncio.sleep(3600)
+        return "{}"
+
+    async def stream_complete(self, *, system_prompt: str, user_prompt: str):
+        try:
+            yield '{"chapters": ['
+            self.stream_started.set()
+            await asyncio.sleep(3600)
+            yield "]}"
+        finally:
+            self.stream_closed.set()
+
+
+class _StubEmbeddings(EmbeddingsClient):
+    async def embed(self, *, texts: list[str]) -> list[list[float]]:
+        return [[1.0] + ([0.0] * 1535) for _ in texts]
+
+
+@pytest.fixture()
+async def app_with_hanging_llm(_ensure_test_database: None, test_database_url: str):
+    llm = _HangingStreamLLM()
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+        step_watchdog_interval_s=0.05,
+    )
+    app = create_app(settings=settings, llm_client=llm, embeddings_client=_StubEmbeddings())
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield app, http_client, llm
+    await app.router.shutdown()
+
+
+async def _start_autorun(client: httpx.AsyncClient, llm: _HangingStreamLLM) -> str:
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    run_id = run.json()["id"]
+    started = await client.post(f"/api/workflow-runs/{run_id}/autorun/start")
+    assert started.status_code == 200
+    await asyncio.wait_for(llm.stream_started.wait(), timeout=5)
+    return run_id
+
+
+async def _wait_for_step_status(client: httpx.AsyncClient, run_id: str, status: str) -> list[dict]:
+    steps: list[dict] = []
+    for _ in range(100):
+        steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+        if steps and steps[-1]["status"] == status:
+            break
+        await asyncio.sleep(0.02)
+    return steps
+
+
+async def test_autorun_stop_cancels_in_flight_stream(app_with_hanging_llm):
+    app, client, llm = app_with_hanging_llm
+    run_id = await _start_autorun(client, llm)
+
+    started_at = time.monotonic()
+    stopped = await client.post(f"/api/workflow-runs/{run_id}/autorun/stop")
+    assert stopped.status_code == 200
+    await asyncio.wait_for(llm.stream_closed.wait(), timeout=2)
+    assert time.monotonic() - started_at < 2
+
+    steps = await _wait_for_step_status(client, run_id, "canceled")
+    assert len(steps) == 1
+    assert steps[0]["status"] == "canceled"
+    assert steps[0]["error"] == "step_canceled:stopped"
+    assert steps[0]["finished_at"] is not None
+
+    run = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+    assert run["status"] == "running"
+    assert run["error"] is None
+    assert (run["state"].get("cursor") or {}).get("phase") in {None, "novel_outline"}
+    assert app.state.workflow_step_cancels == {}
+
+
+async def test_pause_cancels_in_flight_step(app_with_hanging_llm):
+    _app, client, llm = app_with_hanging_llm
+    run_id = await _start_autorun(client, llm)
+
+    paused = await client.post(f"/api/workflow-runs/{run_id}/pause")
+    assert paused.status_code == 200
+    await asyncio.wait_for(llm.stream_closed.wait(), timeout=2)
+
+    steps = await _wait_for_step_status(client, run_id, "canceled")
+    assert steps[-1]["error"] == "step_canceled:paused"
+    run = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+    assert run["status"] == "paused"
+
+
+async def test_shutdown_cancels_in_flight_step(app_with_hanging_llm):
+    app, client, llm = app_with_hanging_llm
+    await _start_autorun(client, llm)
+    tasks = list(app.state.workflow_autorun_tasks.values())
+    assert tasks
+
+    started_at = time.monotonic()
+    await app.router.shutdown()
+    assert llm.stream_closed.is_set()
+    assert all(task.done() for task in tasks)
+    assert time.monotonic() - started_at < 5
+
+
+async def test_step_cancellation_closes_stream_iterator():
+    closed = asyncio.Event()
+
+    async def stream():
+        try:
+            yield "a"
+            await asyncio.sleep(3600)
+            yield "b"
+        finally:
+            closed.set()
+
+    cancel = StepCancellation(close_timeout_s=1.0)
+    received: list[str] = []
+
+    async def consume() -> None:
+        async for item in cancel.iterate(stream()):
+            received.append(item)
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(0.05)
+    cancel.cancel("stopped")
+    with pytest.raises(StepCanceled) as excinfo:
+        await asyncio.wait_for(task, timeout=2)
+    assert excinfo.value.reason == "stopped"
+    assert received == ["a"]
+    assert closed.is_set()
+
+    with pytest.raises(StepCanceled):
+        await cancel.run(asyncio.sleep(0))
+
+
+async def test_watchdog_times_out_idle_stream_and_retries(app_with_hanging_llm):
+    _app, client, llm = app_with_hanging_llm
+    patched = await client.patch(
+        "/api/settings/output-spec",
+        json={
+            "auto_step_retries": 1,
+            "auto_step_backoff_s": 0,
+            "phase_deadlines": {"novel_outline": {"idle_timeout_s": 0.2}},
+        },
+    )
+    assert patched.status_code == 200
+    assert patched.json()["phase_deadlines"] == {"novel_outline": {"idle_timeout_s": 0.2}}
+    assert patched.json()["step_deadline_s"] == 900.0
+
+    run_id = await _start_autorun(client, llm)
+
+    run: dict = {}
+    for _ in range(150):
+        run = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+        if run["status"] == "failed":
+            break
+        await asyncio.sleep(0.02)
+    assert run["status"] == "failed"
+    assert run["error"]["error_type"] == "StepTimedOut"
+    assert run["error"]["error"] == "step_canceled:idle_timeout"
+    assert run["error"]["autorun_retry_exhausted"] is True
+
+    steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+    assert [step["status"] for step in steps] == ["failed", "failed"]
+    assert llm.stream_closed.is_set()
+
+
+async def test_step_cancellation_overdue_reasons():
+    cancel = StepCancellation(deadline_s=10.0, idle_timeout_s=1.0)
+    now = cancel.started_at
+    # Not idle while no provider call is outstanding.
+    assert cancel.overdue_reason(now + 5) is None
+    assert cancel.overdue_reason(now + 10) == CANCEL_REASON_DEADLINE
+
+    call = asyncio.create_task(cancel.run(asyncio.sleep(3600)))
+    await asyncio.sleep(0)
+    assert cancel.overdue_reason(time.monotonic() + 1.5) == CANCEL_REASON_IDLE
+    cancel.cancel(CANCEL_REASON_IDLE)
+    with pytest.raises(StepTimedOut):
+        await asyncio.wait_for(call, timeout=2)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+from app.services.llm_metrics import llm_metrics
+
+
+def _critic_output() -> str:
+    return json.dumps(
+        {
+            "hard_pass": True,
+            "hard_errors": [],
+            "soft_scores": {},
+            "rewrite_paragraph_indices": [],
+            "rewrite_instructions": "",
+            "fact_digest": "事实。",
+            "tone_digest": "基调。",
+            "state_patch": {},
+        },
+        ensure_ascii=False,
+    )
+
+
+def _prefetch_hits(phase: str) -> int:
+    return int(llm_metrics.snapshot()["by_phase"].get(phase, {}).get("prefetch_hit", 0))
+
+
+async def test_autorun_prefetches_next_step_evidence(
+    client_with_llm_and_embeddings, llm_stub, embeddings_stub, monkeypatch
+):
+    client = client_with_llm_and_embeddings
+    embedded: list[str] = []
+    original_embed = embeddings_stub.embed
+
+    async def recording_embed(*, texts: list[str]) -> list[list[float]]:
+        embedded.extend(texts)
+        return await original_embed(texts=texts)
+
+    monkeypatch.setattr(embeddings_stub, "embed", recording_embed)
+
+    chapters = [{"index": i, "title": f"第{i}章", "summary": "摘要。", "hook": "悬念。"} for i in (1, 2)]
+    beats = [{"index": i, "title": f"第{i}章", "beats": ["冲突"]} for i in (1, 2)]
+    llm_stub.outputs = [
+        json.dumps({"chapters": chapters}, ensure_ascii=False),
+        json.dumps({"chapters": beats}, ensure_ascii=False),
+        json.dumps({"title": "第1章", "text": "第一章正文。"}, ensure_ascii=False),
+        _critic_output(),
+        json.dumps({"title": "第2章", "text": "第二章正文。"}, ensure_ascii=False),
+        _critic_output(),
+    ]
+    hits_before = _prefetch_hits("novel_chapter_critic")
+
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    run_id = run.json()["id"]
+    started = await client.post(f"/api/workflow-runs/{run_id}/autorun/start")
+    assert started.status_code == 200
+
+    body: dict = {}
+    for _ in range(500):
+        body = (await client.get(f"/api/workflow-runs/{run_id}")).json()
+        if body["status"] in {"succeeded", "failed"}:
+            break
+        await asyncio.sleep(0.02)
+    assert body["status"] == "succeeded"
+
+    # The critic's evidence is fetched while the draft step runs, and the critic reuses it.
+    assert _prefetch_hits("novel_chapter_critic") - hits_before == 2
+    for index in (1, 2):
+        assert embedded.count(f"Critic 第{index}章 第{index}章") == 1
+    # Chapter 2's draft query is embedded once, ahead of time, even though chapter 1's commit
+    # indexed new memory in between and forced the search itself to be repeated.
+    assert embedded.count("第2章 第2章 冲突") == 1
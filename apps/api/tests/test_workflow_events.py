@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import tempfile
+import uuid
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.services import workflow_events
+from app.services.event_bus import UnixSocketEventBus
+from app.services.event_multiplex import MultiplexFilter, coalesce_events
+from app.services.stream_coalescing import DeltaCoalescer, flush_thresholds
+from app.services.workflow_events import WorkflowEventHub, format_sse_event
+from app.tools.event_hub_bench import run_benchmark
+
+
+def _drain(queue) -> list:
+    events = []
+    while not queue.empty():
+        events.append(queue.get_nowait())
+    return events
+
+
+async def test_subscribe_replays_events_after_last_event_id():
+    hub = WorkflowEventHub()
+    run_id = uuid.uuid4()
+    for index in range(5):
+        await hub.publish(run_id=run_id, name="log", payload={"message": str(index)})
+
+    queue = await hub.subscribe(run_id=run_id, last_event_id=2)
+    await hub.publish(run_id=run_id, name="log", payload={"message": "live"})
+    events = _drain(queue)
+    assert [event.id for event in events] == [3, 4, 5, 6]
+    assert [event.payload["message"] for event in events] == ["2", "3", "4", "live"]
+    assert format_sse_event(name="log", payload={}, event_id=6).startswith("id: 6\nevent: log\n")
+
+
+async def test_unreplayable_gap_and_overflow_send_a_resync_snapshot():
+    hub = WorkflowEventHub()
+    run_id = uuid.uuid4()
+    await hub.publish(run_id=run_id, name="run", payload={"run": {"id": str(run_id), "status": "running"}})
+    await hub.publish(run_id=run_id, name="llm_start", payload={"step_id": "s1", "step_name": "novel_chapter_draft"})
+
+    # An id from before a restart cannot be replayed.
+    stale = await hub.subscribe(run_id=run_id, last_event_id=999)
+    [resync] = _drain(stale)
+    assert resync.name == "resync" and resync.payload["reason"] == "gap" and resync.id == 2
+
+    slow = await hub.subscribe(run_id=run_id)
+    for _ in range(250):
+        await hub.publish(run_id=run_id, name="llm_delta", payload={"step_id": "s1", "append": "字"})
+    events = _drain(slow)
+    # The subscriber fell behind, so it gets the compacted state instead of a stream with holes.
+    resyncs = [event for event in events if event.name == "resync"]
+    assert [event.payload["reason"] for event in resyncs] == ["overflow"]
+    snapshot = resyncs[0].payload["snapshot"]
+    assert snapshot["run"]["status"] == "running"
+    appended_after = sum(1 for event in events[events.index(resyncs[0]) + 1 :] if event.name == "llm_delta")
+    assert len(snapshot["llm"]["s1"]["text"]) + appended_after == 250
+    assert events[-1].id == 252
+
+
+async def test_run_events_after_the_first_carry_state_diffs():
+    hub = WorkflowEventHub()
+    run_id = uuid.uuid4()
+    queue = await hub.subscribe(run_id=run_id)
+    state = {"cursor": {"phase": "novel_outline"}, "outline": {"chapters": [1, 2, 3]}, "draft": {"text": "x"}}
+    await hub.publish(run_id=run_id, name="run", payload={"run": {"id": str(run_id), "state": state}})
+    changed = {"cursor": {"phase": "novel_beats"}, "outline": state["outline"]}
+    await hub.publish(run_id=run_id, name="run", payload={"run": {"id": str(run_id), "state": changed}})
+
+    first, second = _drain(queue)
+    assert first.payload["run"]["state"] == state
+    assert "state" not in second.payload["run"]
+    assert second.payload["state_diff"] == {"set": {"cursor": {"phase": "novel_beats"}}, "unset": ["draft"]}
+    # Each event is encoded once and the same bytes go to every subscriber.
+    assert second.data == format_sse_event(name="run", payload=second.payload, event_id=f"{hub.epoch}-2").encode()
+
+
+async def test_event_hub_benchmark_delivers_every_event():
+    result = await run_benchmark(subscribers=6, runs=3, events=50, state_keys=10)
+    assert result["delivered_events"] == 6 * 50
+    assert result["resyncs"] == 0
+
+
+async def test_last_event_id_from_another_process_resyncs():
+    hub = WorkflowEventHub()
+    assert hub.resume_point(None) is None
+    assert hub.resume_point(f"{hub.epoch}-7") == 7
+    assert hub.resume_point("0badf00d-7") == -1
+
+    run_id = uuid.uuid4()
+    await hub.publish(run_id=run_id, name="log", payload={"message": "x"})
+    queue = await hub.subscribe(run_id=run_id, last_event_id=hub.resume_point("0badf00d-1"))
+    assert [event.name for event in _drain(queue)] == ["resync"]
+
+
+async def _wait_for(queue, count: int) -> list:
+    events = []
+    for _ in range(count):
+        events.append(await asyncio.wait_for(queue.get(), timeout=5.0))
+    return events
+
+
+async def test_unix_socket_bus_fans_out_across_hubs(_ensure_test_database: None, test_database_url: str):
+    engine = create_async_engine(test_database_url)
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    path = str(Path(tempfile.mkdtemp()) / "events.sock")
+    broker = WorkflowEventHub(bus=UnixSocketEventBus(path=path, sessionmaker=sessionmaker, inline_max_bytes=500))
+    worker = WorkflowEventHub(bus=UnixSocketEventBus(path=path, sessionmaker=sessionmaker, inline_max_bytes=500))
+    await broker.start()
+    await worker.start()
+    try:
+        run_id = uuid.uuid4()
+        on_broker = await broker.subscribe(run_id=run_id)
+        on_worker = await worker.subscribe(run_id=run_id)
+
+        # Published by the worker process, seen by SSE clients of both; the large payload travels
+        # by reference through workflow_event_payloads.
+        await worker.publish(run_id=run_id, name="log", payload={"message": "small"})
+        await worker.publish(run_id=run_id, name="log", payload={"message": "大" * 1000})
+        for queue in (on_broker, on_worker):
+            events = await _wait_for(queue, 2)
+            assert [len(event.payload["message"]) for event in events] == [5, 1000]
+            assert [event.id for event in events] == [1, 2]
+
+        await broker.publish(run_id=run_id, name="log", payload={"message": "from broker"})
+        for queue in (on_broker, on_worker):
+            [event] = await _wait_for(queue, 1)
+            assert event.payload["message"] == "from broker"
+    finally:
+        await worker.close()
+        await broker.close()
+        await engine.dispose()
+
+
+async def test_multiplexed_subscriber_coalesces_and_filters_runs():
+    hub = WorkflowEventHub()
+    watched, background = uuid.uuid4(), uuid.uuid4()
+    queue = await hub.subscribe_many(run_ids=[watched, background])
+    await hub.publish(run_id=watched, name="run", payload={"run": {"id": str(watched), "state": {"a": 1, "b": 1}}})
+    for run_id in (watched, background):
+        for chunk in ("一", "二", "三"):
+            await hub.publish(run_id=run_id, name="llm_delta", payload={"step_id": "s", "append": chunk})
+    await hub.publish(run_id=watched, name="run", payload={"run": {"id": str(watched), "state": {"a": 2, "b": 1}}})
+    await hub.publish(run_id=watched, name="run", payload={"run": {"id": str(watched), "state": {"a": 2}}})
+
+    events = _drain(queue)
+    allowed = [event for event in events if MultiplexFilter(stream_run_ids=frozenset({watched})).allows(event)]
+    coalesced = coalesce_events(allowed)
+    assert [(event.run_id, event.name) for event in coalesced] == [
+        (watched, "run"),
+        (watched, "llm_delta"),
+        (watched, "run"),
+    ]
+    assert coalesced[1].payload["append"] == "一二三"
+    assert coalesced[2].payload["state_diff"] == {"set": {"a": 2}, "unset": ["b"]}
+    assert coalesced[1].multiplexed_data.startswith(f'event: llm_delta\ndata: {{"run_id": "{watched}"'.encode())
+
+    await hub.unsubscribe_many(queue=queue)
+    await hub.publish(run_id=watched, name="log", payload={"message": "after"})
+    assert queue.empty()
+
+
+async def test_multiplexed_overflow_sends_one_resync_for_all_runs(monkeypatch):
+    monkeypatch.setattr(workflow_events, "_MULTIPLEXED_QUEUE_SIZE", 3)
+    hub = WorkflowEventHub()
+    run_ids = [uuid.uuid4() for _ in range(5)]
+    queue = await hub.subscribe_many(run_ids=run_ids)
+    # More runs than the queue holds: a resync per run would not fit.
+    for run_id in run_ids:
+        await hub.publish(run_id=run_id, name="run", payload={"run": {"id": str(run_id), "status": "running"}})
+
+    [resync, *rest] = _drain(queue)
+    assert resync.name == "resync" and resync.run_id is None
+    assert resync.payload["reason"] == "overflow"
+    assert set(resync.payload["runs"]) == {str(run_id) for run_id in run_ids}
+    assert resync.payload["runs"][str(run_ids[3])]["run"]["status"] == "running"
+    assert resync.multiplexed_data.startswith(b'event: resync\ndata: {"reason": "overflow"')
+    assert [event.run_id for event in rest] == [run_ids[4]]
+
+
+async def test_llm_stream_is_published_only_while_someone_is_subscribed():
+    hub = WorkflowEventHub()
+    run_id = uuid.uuid4()
+    coalescer = DeltaCoalescer(hub=hub, run_id=run_id, step_id=uuid.uuid4(), step_name="novel_chapter_draft")
+    await coalescer.update("第一段", final=True)
+    assert hub.stream_pressure(run_id) is None
+    assert run_id not in hub._logs or not hub._logs[run_id].events
+
+    queue = await hub.subscribe(run_id=run_id)
+    assert hub.stream_pressure(run_id) == 1 / 50
+    # A subscriber that shows up mid-call gets llm_start right away, without waiting for a flush,
+    # and everything generated so far in its first delta.
+    await coalescer.update("第一段第二段")
+    events = _drain(queue)
+    assert events[0].name == "llm_start"
+    await coalescer.update("第一段第二段", final=True)
+    await coalescer.end()
+    events += _drain(queue)
+    assert [event.name for event in events] == ["llm_start", "llm_delta", "llm_end"]
+    assert events[1].payload["append"] == "第一段第二段"
+
+    hub.set_stream_detail(run_id, "progress")
+    progress = DeltaCoalescer(hub=hub, run_id=run_id, step_id=uuid.uuid4(), step_name="novel_chapter_draft")
+    await progress.start()
+    await progress.update("正文" * 10, final=True)
+    await progress.end()
+    events = _drain(queue)
+    assert [event.name for event in events] == ["llm_start", "llm_progress", "llm_end"]
+    assert events[1].payload["chars"] == 20
+
+    assert flush_thresholds(0.0) < flush_thresholds(0.5) < flush_thresholds(1.0)
+    hub._bus.cross_process = True
+    await hub.unsubscribe(run_id=run_id, queue=queue)
+    # Nobody here may still be watching from another process; stream at the relaxed thresholds.
+    assert hub.stream_pressure(run_id) == 1.0
+
+
+async def test_restarted_llm_output_replaces_the_streamed_text():
+    hub = WorkflowEventHub()
+    run_id = uuid.uuid4()
+    queue = await hub.subscribe(run_id=run_id)
+    coalescer = DeltaCoalescer(hub=hub, run_id=run_id, step_id=uuid.uuid4(), step_name="novel_chapter_draft")
+    await coalescer.start()
+    await coalescer.update('{"title": "第一', final=True)
+    # The stream broke and the model started the object over.
+    await coalescer.restart('{"title": "第一章", "text": "正文"}')
+    await coalescer.end()
+
+    events = _drain(queue)
+    assert [event.name for event in events] == ["llm_start", "llm_delta", "llm_start", "llm_delta", "llm_end"]
+    assert events[3].payload["append"] == '{"title": "第一章", "text": "正文"}'
+    [step_text] = hub._logs[run_id].snapshot()["llm"].values()
+    assert step_text["text"] == '{"title": "第一章", "text": "正文"}'
+
+
+async def test_event_delivery_failures_do_not_fail_the_step(
+    app_with_llm_and_embeddings, client_with_llm_and_embeddings, llm_stub, monkeypatch
+):
+    client = client_with_llm_and_embeddings
+    hub = app_with_llm_and_embeddings.state.workflow_event_hub
+
+    async def broken_transport(**_kwargs):
+        raise ConnectionResetError("event_bus_down")
+
+    monkeypatch.setattr(hub._bus, "publish", broken_transport)
+
+    brief = await client.post(
+        "/api/briefs", json={"title": "测试作品", "content": {"output_spec": {"chapter_count": 1}}}
+    )
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    llm_stub.outputs.append(
+        json.dumps(
+            {"chapters": [{"index": 1, "title": "第一章", "summary": "主角发现异常。", "hook": "陌生来电。"}]},
+            ensure_ascii=False,
+        )
+    )
+
+    step = await client.post(f"/api/workflow-runs/{run.json()['id']}/next")
+    assert step.status_code == 200
+    assert step.json()["step"]["status"] == "succeeded"
+    assert hub.dropped_events > 0
@@ -1604,3 +1604,59 @@ async def test_next_returns_error_chain_when_step_fails(client_with_llm_and_embe
 
     assert body["step"]["status"] == "failed"
     assert "RuntimeError" in (body["step"]["error"] or "")
+
+
+async def test_failed_step_rolls_back_its_writes(client_with_llm_and_embeddings, llm_stub, monkeypatch):
+    import app.services.workflow_executor as workflow_executor
+
+    client = client_with_llm_and_embeddings
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap.json()["id"], "status": "queued", "state": {}},
+    )
+    run_id = run.json()["id"]
+
+    llm_stub.outputs.extend(
+        [
+            json.dumps(
+                {"chapters": [{"index": 1, "title": "第一章", "summary": "开端。", "hook": "悬念。"}]},
+                ensure_ascii=False,
+            ),
+            json.dumps({"chapters": [{"index": 1, "title": "第一章", "beats": ["引子", "钩子"]}]}, ensure_ascii=False),
+            json.dumps({"title": "第一章", "text": "第一段。\n\n第二段。"}, ensure_ascii=False),
+            json.dumps(
+                {
+                    "hard_pass": True,
+                    "hard_errors": [],
+                    "soft_scores": {},
+                    "rewrite_paragraph_indices": [],
+                    "rewrite_instructions": "",
+                    "fact_digest": "主角发现异常。",
+                    "tone_digest": "紧张。",
+                    "state_patch": {},
+                },
+                ensure_ascii=False,
+            ),
+        ]
+    )
+    for _ in range(4):
+        step = await client.post(f"/api/workflow-runs/{run_id}/next")
+        assert step.json()["step"]["status"] == "succeeded"
+
+    def broken_deep_merge(*_args, **_kwargs):
+        raise RuntimeError("boom_after_version_insert")
+
+    # novel_chapter_commit inserts the chapter version before merging the critic state patch.
+    monkeypatch.setattr(workflow_executor, "deep_merge", broken_deep_merge)
+    failed = await client.post(f"/api/workflow-runs/{run_id}/next")
+    assert failed.status_code == 200
+    assert failed.json()["step"]["status"] == "failed"
+    assert failed.json()["run"]["status"] == "failed"
+    assert failed.json()["run"]["state"]["cursor"]["phase"] == "novel_chapter_commit"
+
+    artifacts = (await client.get("/api/artifacts")).json()
+    assert artifacts == []
+    steps = (await client.get(f"/api/workflow-runs/{run_id}/steps")).json()
+    assert [s["status"] for s in steps] == ["succeeded"] * 4 + ["failed"]
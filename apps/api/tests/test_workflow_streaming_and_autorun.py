@@ -2,10 +2,13 @@ from __future__ import annotations
 
 import asyncio
 import json
+import uuid
+from types import SimpleNamespace
 
 import httpx
 import pytest
 
+from app.api.routers import workflows
 from app.core.config import Settings
 from app.llm.client import LLMClient
 from app.llm.embeddings_client import EmbeddingsClient
@@ -34,6 +37,60 @@ async def test_workflow_events_stream_sends_initial_run_event(client):
     assert payload["run"]["id"] == run_id
 
 
+async def test_multiplexed_events_stream_covers_every_run_of_a_snapshot(client):
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+    run_ids = set()
+    for kind in ("novel", "script"):
+        run = await client.post(
+            "/api/workflow-runs",
+            json={"kind": kind, "brief_snapshot_id": snap_id, "status": "queued", "state": {}},
+        )
+        run_ids.add(run.json()["id"])
+
+    resp = await client.get(f"/api/workflow-runs/events?brief_snapshot_id={snap_id}&once=1")
+    assert resp.status_code == 200
+    data_lines = [line for line in resp.text.splitlines() if line.startswith("data: ")]
+    payloads = [json.loads(line.replace("data: ", "", 1)) for line in data_lines]
+    assert {payload["run_id"] for payload in payloads} == run_ids
+    assert all(payload["run"]["id"] == payload["run_id"] for payload in payloads)
+
+    missing = await client.get("/api/workflow-runs/events?once=1")
+    assert missing.status_code == 400
+
+
+async def test_multiplexed_events_stream_announces_new_runs_while_busy(app, client, monkeypatch):
+    monkeypatch.setattr(workflows, "_NEW_RUNS_CHECK_INTERVAL_S", 0.0)
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    snap = await client.post(f"/api/briefs/{brief.json()['id']}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+    body = {"kind": "novel", "brief_snapshot_id": snap_id, "status": "queued", "state": {}}
+    busy_id = (await client.post("/api/workflow-runs", json=body)).json()["id"]
+
+    resp = await workflows.workflow_runs_events(
+        request=SimpleNamespace(app=app),
+        run_id=[],
+        brief_snapshot_id=uuid.UUID(snap_id),
+        events=None,
+        stream_run_id=[],
+        once=False,
+    )
+    frames = resp.body_iterator
+    try:
+        assert busy_id in await anext(frames)
+        new_id = (await client.post("/api/workflow-runs", json=body)).json()["id"]
+        # The followed run keeps streaming, so the stream never sits idle long enough to time out.
+        await app.state.workflow_event_hub.publish(
+            run_id=uuid.UUID(busy_id), name="log", payload={"message": "still working"}
+        )
+        announced = await asyncio.wait_for(anext(frames), timeout=5)
+        assert json.loads(announced.split("data: ", 1)[1])["run"]["id"] == new_id
+        assert b"still working" in await asyncio.wait_for(anext(frames), timeout=5)
+    finally:
+        await frames.aclose()
+
+
 class _SlowStubLLM(LLMClient):
     def __init__(self, *, outputs: list[str], delay_s: float = 0.2) -> None:
         self.outputs = list(outputs)
@@ -62,6 +119,24 @@ class _StreamingFailsOnceLLM(LLMClient):
         raise RuntimeError("stream_interrupted")
 
 
+class _StreamingInterruptedMidwayLLM(LLMClient):
+    def __init__(self, *, output: str, cut: int) -> None:
+        self.output = output
+        self.cut = cut
+        self.stream_calls = 0
+        self.complete_prompts: list[str] = []
+
+    async def complete(self, *, system_prompt: str, user_prompt: str) -> str:
+        self.complete_prompts.append(user_prompt)
+        # Repeat a few characters of the partial output, like real models tend to do.
+        return self.output[self.cut - 3 :]
+
+    async def stream_complete(self, *, system_prompt: str, user_prompt: str):
+        self.stream_calls += 1
+        yield self.output[: self.cut]
+        raise RuntimeError("stream_interrupted")
+
+
 class _StubEmbeddings(EmbeddingsClient):
     async def embed(self, *, texts: list[str]) -> list[list[float]]:
         return [[1.0] + ([0.0] * 1535) for _ in texts]
@@ -128,6 +203,36 @@ async def client_with_streaming_error_llm_and_embeddings(_ensure_test_database:
     await app.router.shutdown()
 
 
+@pytest.fixture()
+async def client_with_streaming_interrupted_llm_and_embeddings(
+    _ensure_test_database: None, test_database_url: str
+):
+    output = json.dumps(
+        {
+            "chapters": [
+                {
+                    "index": 1,
+                    "title": "第一章",
+                    "summary": "开端。",
+                    "hook": "悬念。",
+                }
+            ]
+        },
+        ensure_ascii=False,
+    )
+    llm = _StreamingInterruptedMidwayLLM(output=output, cut=len(output) // 2)
+    settings = Settings(
+        database_url=test_database_url,
+        cors_allow_origins="http://localhost:5173,http://127.0.0.1:5173",
+    )
+    app = create_app(settings=settings, llm_client=llm, embeddings_client=_StubEmbeddings())
+    await app.router.startup()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http_client:
+        yield http_client, llm
+    await app.router.shutdown()
+
+
 async def test_autorun_stop_prevents_additional_steps(client_with_slow_llm_and_embeddings):
     brief = await client_with_slow_llm_and_embeddings.post(
         "/api/briefs", json={"title": "测试作品", "content": {}}
@@ -194,3 +299,37 @@ async def test_llm_streaming_error_falls_back_to_non_streaming(
     assert body["step"]["step_name"] == "novel_outline"
     assert llm.stream_calls == 1
     assert llm.complete_calls == 1
+
+
+async def test_llm_stream_interruption_resumes_with_continuation(
+    client_with_streaming_interrupted_llm_and_embeddings,
+):
+    client, llm = client_with_streaming_interrupted_llm_and_embeddings
+    before = (await client.get("/api/metrics/llm")).json()["by_phase"].get("novel_outline", {})
+
+    brief = await client.post("/api/briefs", json={"title": "测试作品", "content": {}})
+    brief_id = brief.json()["id"]
+    snap = await client.post(f"/api/briefs/{brief_id}/snapshots", json={"label": "v1"})
+    snap_id = snap.json()["id"]
+
+    run = await client.post(
+        "/api/workflow-runs",
+        json={"kind": "novel", "brief_snapshot_id": snap_id, "status": "queued", "state": {}},
+    )
+    run_id = run.json()["id"]
+
+    resp = await client.post(f"/api/workflow-runs/{run_id}/next")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["step"]["status"] == "succeeded"
+    assert llm.stream_calls == 1
+    assert len(llm.complete_prompts) == 1
+    assert llm.output[: llm.cut] in llm.complete_prompts[0]
+
+    run_resp = await client.get(f"/api/workflow-runs/{run_id}")
+    assert run_resp.json()["state"]["outline"]["chapters"][0]["title"] == "第一章"
+
+    after = (await client.get("/api/metrics/llm")).json()["by_phase"]["novel_outline"]
+    assert after.get("stream_continuation_succeeded", 0) == before.get("stream_continuation_succeeded", 0) + 1
+    assert after.get("stream_full_recompute", 0) == before.get("stream_full_recompute", 0)
+    assert after["stream_continuation_salvaged_chars"] >= llm.cut
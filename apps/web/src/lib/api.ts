@@ -211,6 +211,15 @@ export type ImpactReportItem = {
 	ordinal: number | null;
 	title: string | null;
 	reason: string;
+	relevance: number | null;
+	evidence: ImpactEvidence[];
+};
+
+export type ImpactEvidence = {
+	signal: 'term' | 'entity' | 'memory';
+	match?: string;
+	similarity?: number;
+	excerpt: string;
 };
 
 export type PropagationPreviewResponse = {
@@ -236,6 +245,8 @@ export type ArtifactImpactRead = {
 	artifact_id: string;
 	artifact_version_id: string;
 	reason: string;
+	relevance: number | null;
+	evidence: ImpactEvidence[] | null;
 	repaired_artifact_version_id: string | null;
 	repaired_at: string | null;
 	created_at: string;
@@ -249,6 +260,7 @@ export type PropagationApplyResponse = {
 export type PropagationRepairResponse = {
 	repaired: { artifact_id: string; artifact_version_id: string }[];
 	impacts: ArtifactImpactRead[];
+	index_error: string | null;
 };
 
 export async function listBriefs(): Promise<BriefRead[]> {
@@ -921,6 +933,20 @@ export type ExportResponse = {
 	text: string;
 };
 
+export type ExportFilename = 'novel.md' | 'novel.txt' | 'script.fountain' | 'script.txt';
+
+// Streamed file download of an export; open it with a link instead of fetching it as JSON.
+export function exportDownloadUrl(
+	snapshotId: string,
+	filename: ExportFilename,
+	payload?: { apply_glossary?: boolean },
+): string {
+	const apply_glossary = payload?.apply_glossary ?? true;
+	return `${API_BASE}/api/brief-snapshots/${snapshotId}/download/${filename}?apply_glossary=${encodeURIComponent(
+		String(apply_glossary),
+	)}`;
+}
+
 export async function exportNovelMarkdown(
 	snapshotId: string,
 	payload?: { apply_glossary?: boolean },